@@ -14,16 +14,30 @@
 
 __all__ = ['PsiObject']
 
+import warnings
 from numpy import *
 
 
 class PsiObject():
 
-    """Special class to handle internal array and functions of Psi adaptive psychophysical method (Kontsevich & Tyler, 1999)."""
+    """Special class to handle internal array and functions of Psi adaptive psychophysical method (Kontsevich & Tyler, 1999).
+
+    The likelihood of each response for every grid point and intensity is computed once, as tables of log-likelihoods (for
+    updating the posterior) and of response probabilities and entropies (for choosing the next intensity). The posterior is
+    kept as log-probabilities and updated in place by adding a row of the log-likelihood table, and the expected entropy of
+    every intensity is found with a single matrix product of the posterior and the tables, so no temporary arrays the size
+    of the whole grid are made between trials.
+
+    dtype sets the precision of the tables ('float32' halves their size and speeds up choosing the next intensity), the
+    posterior is always kept in double precision. If posteriorCutoff is given, grid points with a posterior probability
+    below posteriorCutoff times that of the most probable point are left out when choosing the next intensity (they are
+    still updated), which speeds up choosing it as the posterior narrows down over a run.
+    """
     
-    def __init__(self, x, alpha, beta, xPrecision, aPrecision, bPrecision, delta=0, stepType='lin', TwoAFC=False, prior=None):
-        global stats
-        from scipy import stats  # takes a while to load so do it lazy
+    def __init__(self, x, alpha, beta, xPrecision, aPrecision, bPrecision, delta=0, stepType='lin', TwoAFC=False, prior=None,
+                 dtype='float64', posteriorCutoff=None):
+        global stats, special
+        from scipy import stats, special  # takes a while to load so do it lazy
 
         self._TwoAFC = TwoAFC
         #Save dimensions
@@ -37,6 +51,8 @@ class PsiObject():
         self.beta = linspace(beta[0], beta[1], int(round((beta[1]-beta[0])/bPrecision)+1), True)
         self.r = array(list(range(2)))
         self.delta = delta
+        self.dtype = dtype
+        self.posteriorCutoff = posteriorCutoff
         
         # Change x,a,b,r arrays to matrix computation compatible orthogonal 4D arrays
         # ALWAYS use the order for P(r|lambda,x); i.e. [r,a,b,x]
@@ -56,31 +72,57 @@ class PsiObject():
                 self._probLambda = prior
             else:
                 self._probLambda = prior.reshape(1, len(self.alpha), len(self.beta), 1)
+        with errstate(divide='ignore'):
+            self._logProbLambda = log(self._probLambda.ravel() / sum(self._probLambda))
             
-        #Create P(r | lambda, x)
+        #Create P(r = 1 | lambda, x), as [a,b,x]
         if TwoAFC:
-            self._probResponseGivenLambdaX = (1-self._r) + (2*self._r-1) * ((.5 + .5 * stats.norm.cdf(self._x, self._alpha, self._beta)) * (1 - self.delta) + self.delta / 2)
+            probCorrect = (.5 + .5 * stats.norm.cdf(self._x[0], self._alpha[0], self._beta[0])) * (1 - self.delta) + self.delta / 2
         else: # Yes/No
-            self._probResponseGivenLambdaX = (1-self._r) + (2*self._r-1) * (stats.norm.cdf(self._x, self._alpha, self._beta)*(1-self.delta)+self.delta/2)
+            probCorrect = stats.norm.cdf(self._x[0], self._alpha[0], self._beta[0])*(1-self.delta)+self.delta/2
+        probCorrect = probCorrect.reshape((len(self.alpha)*len(self.beta), len(self.x)))
+
+        #Create log P(r | lambda, x), as [r,x,lambda] so the row for a response and intensity is contiguous
+        with errstate(divide='ignore'):
+            self._logProbResponseGivenLambdaX = log(array([1 - probCorrect.T, probCorrect.T], dtype=dtype))
+
+        #Create [P(r = 1 | lambda, x), H(r | lambda, x)], as [lambda,x], to get P(r = 1 | x) and E[H(r | lambda, x)] in one
+        #matrix product with P(lambda)
+        self._selectionTable = concatenate(
+            (probCorrect, special.entr(probCorrect) + special.entr(1 - probCorrect)), axis=1).astype(dtype)
         
     def update(self, response=None):
         if response is not None:    #response should only be None when Psi is first initialized
-            self._probLambda = self._probLambdaGivenXResponse[response,:,:,self.nextIntensityIndex].reshape((1,len(self.alpha),len(self.beta),1))
-            
-        #Create P(r | x)
-        self._probResponseGivenX = sum(self._probResponseGivenLambdaX * self._probLambda, axis=(1,2)).reshape((len(self.r),1,1,len(self.x)))
-        
-        #Create P(lambda | x, r)
-        self._probLambdaGivenXResponse = self._probLambda*self._probResponseGivenLambdaX/self._probResponseGivenX
-        
-        #Create H(x, r)
-        self._entropyXResponse = -1* sum(self._probLambdaGivenXResponse * log10(self._probLambdaGivenXResponse), axis=(1,2)).reshape((len(self.r),1,1,len(self.x)))
-        
-        #Create E[H(x)]
-        self._expectedEntropyX = sum(self._entropyXResponse * self._probResponseGivenX, axis=0).reshape((1,1,1,len(self.x)))
+            # P(lambda | x, r) is proportional to P(r | lambda, x) * P(lambda)
+            self._logProbLambda += self._logProbResponseGivenLambdaX[response, self.nextIntensityIndex]
+            logMax = amax(self._logProbLambda)
+            self._logProbLambda -= logMax + log(sum(exp(self._logProbLambda - logMax)))
+        probLambda = exp(self._logProbLambda)
+        self._probLambda = probLambda.reshape((1,len(self.alpha),len(self.beta),1))
+
+        # Only use the most probable grid points to choose the next intensity, if that leaves out enough of them to be quicker
+        logProbLambda = self._logProbLambda
+        selectionTable = self._selectionTable
+        if self.posteriorCutoff is not None:
+            active = logProbLambda >= amax(logProbLambda) + log(self.posteriorCutoff)
+            if count_nonzero(active) < active.size / 2:
+                probLambda = probLambda[active]
+                logProbLambda = logProbLambda[active]
+                selectionTable = selectionTable[active]
+
+        #Create P(r = 1 | x) and E[H(r | lambda, x)]
+        nX = len(self.x)
+        expectation = dot(probLambda.astype(self.dtype, copy=False), selectionTable)
+        self._probResponseGivenX = clip(expectation[:nX], 0, 1)
+
+        #Create E[H(x)], the expected entropy of P(lambda | x, r) over responses, which is
+        #H(lambda) + E[H(r | lambda, x)] - H(r | x); in log10 units as in Kontsevich & Tyler (1999)
+        entropyLambda = -dot(probLambda, nan_to_num(logProbLambda, neginf=0.0))
+        entropyResponseX = special.entr(self._probResponseGivenX) + special.entr(1 - self._probResponseGivenX)
+        self._expectedEntropyX = (entropyLambda + expectation[nX:] - entropyResponseX) / log(10)
         
         #Generate next intensity
-        self.nextIntensityIndex = argmin(self._expectedEntropyX, axis=3)[0][0][0]
+        self.nextIntensityIndex = int(argmin(self._expectedEntropyX))
         self.nextIntensity = self.x[self.nextIntensityIndex]
         
     def estimateLambda(self):
@@ -331,18 +331,17 @@ class QuestObject():
             raise RuntimeError('prior pdf is not finite')
 
         # recompute the pdf from the historical record of trials
-        for intensity, response in zip(self.intensity, self.response):
+        for k, (intensity, response) in enumerate(
+                zip(self.intensity, self.response), start=1):
             inten = max(-1e10,min(1e10, intensity)) # make intensity finite
-            ii = len(self.pdf) + self.i-round((inten-self.tGuess)/self.grain)-1
-            if ii[0]<0:
-                ii = ii-ii[0]
-            if ii[-1]>=self.s2.shape[1]:
-                ii = ii+self.s2.shape[1]-ii[-1]-1
-            iii = ii.astype(num.int_)
-            if not num.allclose(ii,iii):
+            # the pdf is multiplied by a contiguous run of s2 starting at i0
+            i0 = len(self.pdf) + self.i[0]-round((inten-self.tGuess)/self.grain)-1
+            i0 = min(max(i0, 0), self.s2.shape[1]-len(self.pdf))
+            if i0 != int(i0):
                 raise ValueError('truncation error')
-            self.pdf = self.pdf*self.s2[response,iii]
-            if self.normalizePdf and ii % 100 == 0:
+            i0 = int(i0)
+            self.pdf *= self.s2[response,i0:i0+len(self.pdf)]
+            if self.normalizePdf and k % 100 == 0:
                 self.pdf = self.pdf/num.sum(self.pdf) # avoid underflow; keep the pdf normalized
         if self.normalizePdf:
             self.pdf = self.pdf/num.sum(self.pdf) # avoid underflow; keep the pdf normalized
@@ -364,21 +363,24 @@ class QuestObject():
             raise RuntimeError('response %g out of range 0 to %d'%(response,self.s2.shape[0]))
         if self.updatePdf:
             inten = max(-1e10,min(1e10,intensity)) # make intensity finite
-            ii = len(self.pdf) + self.i-round((inten-self.tGuess)/self.grain)-1
-            if ii[0]<0 or ii[-1] > self.s2.shape[1]:
+            # the pdf is multiplied in place by a contiguous run of s2
+            # starting at i0, rather than indexing s2 with an array
+            nPdf = len(self.pdf)
+            i0 = nPdf + self.i[0]-round((inten-self.tGuess)/self.grain)-1
+            if i0<0 or i0+nPdf-1 >= self.s2.shape[1]:
                 if self.warnPdf:
                     low=(1-len(self.pdf)-self.i[0])*self.grain+self.tGuess
                     high=(self.s2.shape[1]-len(self.pdf)-self.i[-1])*self.grain+self.tGuess
                     warnings.warn( 'intensity %.2f out of range %.2f to %.2f. Pdf will be inexact.'%(intensity,low,high),
                                    RuntimeWarning,stacklevel=2)
-                if ii[0]<0:
-                    ii = ii-ii[0]
+                if i0<0:
+                    i0 = 0
                 else:
-                    ii = ii+self.s2.shape[1]-ii[-1]-1
-            iii = ii.astype(num.int_)
-            if not num.allclose(ii,iii):
+                    i0 = self.s2.shape[1]-nPdf
+            if i0 != int(i0):
                 raise ValueError('truncation error')
-            self.pdf = self.pdf*self.s2[response,iii]
+            i0 = int(i0)
+            self.pdf *= self.s2[response,i0:i0+nPdf]
             if self.normalizePdf:
                 self.pdf=self.pdf/num.sum(self.pdf)
         # keep a historical record of the trials
@@ -20,10 +20,12 @@ if sys.version_info.major == 3 and sys.version_info.minor >= 6:
 from .utils import (checkValidFilePath, isValidVariableName, importTrialTypes,
                     sliceFromString, indicesFromString, importConditions,
                     createFactorialTrialList, bootStraps, functionFromStaircase,
-                    getDateStr)
+                    getDateStr, clearConditionsCache)
 
 from .fit import (FitFunction, FitCumNormal, FitLogistic, FitNakaRushton,
                   FitWeibull)
+from .simulation import (SimulatedObserver, simulateStaircase,
+                         simulateStaircases)
 
 try:
     # import openpyxl
@@ -18,8 +18,8 @@ from psychopy import logging
 from psychopy.tools.filetools import (openOutputFile, genDelimiter,
                                       genFilenameFromDelimiter, pathToString)
 from psychopy.tools.fileerrortools import handleFileCollision
-from psychopy.tools.arraytools import extendArr
 from .utils import _getExcelCellName
+from .streaming import TrialDataStream
 
 try:
     import openpyxl
@@ -100,6 +100,8 @@ class _BaseTrialHandler(_ComparisonMixin):
     def _terminate(self):
         """Remove references to ourself in experiments and terminate the loop
         """
+        # write the last trials of any data stream and close it
+        self.closeStream()
         # remove ourself from the list of unfinished loops in the experiment
         exp = self.getExp()
         if exp != None:
@@ -107,6 +109,100 @@ class _BaseTrialHandler(_ComparisonMixin):
         # and halt the loop
         raise StopIteration
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # an open data stream only belongs to this session
+        state.pop('_stream', None)
+        return state
+
+    def startStream(self, fileName, delim=None, encoding='utf-8-sig',
+                    fileCollisionMethod='rename', excelFileName=None):
+        """Start writing each trial to a wide text file as soon as it is
+        completed, so data are on disk during the session and saving doesn't
+        need to rewrite the whole file.
+
+        Trials already completed are written straight away. The file is
+        completed (and the Excel file, if requested, written) when the loop
+        finishes or :meth:`closeStream` is called. See
+        :class:`~psychopy.data.streaming.TrialDataStream`.
+
+        :Parameters:
+
+            fileName:
+                the name of the file, '.csv' or '.tsv' is added according to
+                `delim` if it has no extension.
+
+            delim:
+                the delimiter, by default ',' for .csv files and tab
+                otherwise.
+
+            encoding:
+                The encoding to use when saving the file.
+                Defaults to `utf-8-sig`.
+
+            fileCollisionMethod:
+                Collision method passed to
+                :func:`~psychopy.tools.fileerrortools.handleFileCollision`
+
+            excelFileName:
+                if given, the trials are also saved to this Excel (.xlsx)
+                file when the stream is closed.
+
+        :Returns:
+
+            the name of the file being written.
+        """
+        self.closeStream()
+        self._stream = TrialDataStream(
+            fileName, delim=delim, encoding=encoding,
+            fileCollisionMethod=fileCollisionMethod,
+            excelFileName=excelFileName)
+        self._updateStream()
+        return self._stream.fileName
+
+    def closeStream(self):
+        """Write any remaining trials to the data stream started by
+        :meth:`startStream` and close it.
+        """
+        if getattr(self, '_stream', None) is None:
+            return
+        self._updateStream()
+        stream = self.__dict__.pop('_stream')
+        stream.close(columns=self._getStreamColumns())
+
+    def _updateStream(self):
+        """Write trials completed since the last update to the data stream.
+        """
+        stream = getattr(self, '_stream', None)
+        if stream is None:
+            return
+        nCompleted = self._nCompletedTrials()
+        if nCompleted < stream.nRows:
+            # trials have been rewound
+            stream.truncate(nCompleted)
+        for trialN in range(len(stream.store), nCompleted):
+            stream.store.appendRow(self._getTrialRow(trialN))
+        stream.writeRows()
+
+    def _nCompletedTrials(self):
+        """Number of trials whose data are complete (for streaming).
+        """
+        raise NotImplementedError(
+            "%s doesn't support streaming data" % type(self).__name__)
+
+    def _getTrialRow(self, trialN):
+        """Get the data of completed trial `trialN` as a dict (for
+        streaming).
+        """
+        raise NotImplementedError(
+            "%s doesn't support streaming data" % type(self).__name__)
+
+    def _getStreamColumns(self):
+        """Columns of the streamed file, in order, or None to keep the order
+        in which they appeared.
+        """
+        return None
+
     def saveAsPickle(self, fileName, fileCollisionMethod='rename'):
         """Basically just saves a copy of the handler (with data) to a
         pickle file.
@@ -447,11 +543,17 @@ class DataHandler(_ComparisonMixin, dict):
     """For handling data (used by TrialHandler, principally, rather than
     by users directly)
 
-    Numeric data are stored as numpy masked arrays where the mask is set
-    True for missing entries. When any non-numeric data (string, list or
-    array) get inserted using DataHandler.add(val) the array is converted
-    to a standard (not masked) numpy array with dtype='O' and where missing
-    entries have value = "--".
+    Numeric data (Python or numpy numbers) are stored as numpy masked arrays
+    where the mask is set True for missing entries. The arrays are float32,
+    or float64 once a numpy number needs it to keep its value. When any
+    non-numeric data (string, list or array) get inserted using
+    DataHandler.add(val) the array is converted to a standard (not masked)
+    numpy array with dtype='O' and where missing entries have value = "--".
+    Numbers added before or after that stay numbers (see also
+    :meth:`getNumeric`) and strings are interned, so repeated values share
+    memory. Which entries have been added is kept for both kinds of array
+    (see :meth:`getValid`). Arrays are allocated for all the expected trials
+    up front and grown if more are added.
 
     Attributes:
         - ['key']=data arrays containing values for that key
@@ -479,23 +581,27 @@ class DataHandler(_ComparisonMixin, dict):
     def __eq__(self, other):
         # We ignore an attached TrialHandler object, otherwise we will end up
         # in an infinite loop, as this DataHandler is attached to the
-        # TrialHandler!
+        # TrialHandler! The validity and numbers of object arrays are ignored
+        # too, as they follow from the data.
 
         from psychopy.data import TrialHandler
 
+        ignored = ['_valid', '_numeric']
         if isinstance(self.trials, TrialHandler):
-            self_copy = copy.deepcopy(self)
-            other_copy = copy.deepcopy(other)
-            del self_copy.trials, other_copy.trials
-            result = super(DataHandler, self_copy).__eq__(other_copy)
-
+            ignored.append('trials')
             msg = ('TrialHandler object detected in .trials. Excluding it from '
                    'comparison.')
             logging.warning(msg)
-        else:
-            result = super(DataHandler, self).__eq__(other)
+        if not any(name in obj.__dict__ for name in ignored
+                   for obj in (self, other) if hasattr(obj, '__dict__')):
+            return super(DataHandler, self).__eq__(other)
 
-        return result
+        self_copy = copy.copy(self)
+        other_copy = copy.copy(other)
+        for obj in (self_copy, other_copy):
+            for name in ignored:
+                obj.__dict__.pop(name, None)
+        return super(DataHandler, self_copy).__eq__(other_copy)
 
     def addDataType(self, names, shape=None):
         """Add a new key to the data dictionary of particular shape if
@@ -538,29 +644,149 @@ class DataHandler(_ComparisonMixin, dict):
             position.append(repN)
 
         # check whether data falls within bounds
-        posArr = np.asarray(position)
-        shapeArr = np.asarray(self.dataShape)
-        if not np.alltrue(posArr < shapeArr):
+        if np.any(np.asarray(position) >= self[thisType].shape):
             # array isn't big enough
-            logging.warning('need a bigger array for: ' + thisType)
-            # not implemented yet!
-            self[thisType] = extendArr(self[thisType], posArr)
-        # check for ndarrays with more than one value and for non-numeric data
-        if (self.isNumeric[thisType] and
-                ((type(value) == np.ndarray and len(value) > 1) or
-                     (type(value) not in [float, int]))):
-            self._convertToObjectArray(thisType)
-        # insert the value
-        self[thisType][position[0], int(position[1])] = value
+            self._extendDataType(thisType, position)
+        # numbers (including numpy scalars) stay in the numeric array as long
+        # as they fit its dtype, any other value needs an object array
+        if self.isNumeric[thisType]:
+            if not _isNumber(value):
+                self._convertToObjectArray(thisType)
+            elif not _fitsDtype(value, self[thisType].dtype):
+                if _fitsDtype(value, np.float64):
+                    self[thisType] = self[thisType].astype(np.float64)
+                else:
+                    self._convertToObjectArray(thisType)
+        index = (position[0], int(position[1]))
+        if self.isNumeric[thisType]:
+            self[thisType][index] = value
+            return
+        # object arrays hold the values themselves (numbers stay numbers)
+        if type(value) is str:
+            # repeated values (e.g. 'left'/'right') share memory
+            value = sys.intern(value)
+        elif isinstance(value, np.generic):
+            value = value.item()
+        self[thisType][index] = value
+        self._getValid(thisType)[index] = True
+        numeric = self._getNumeric(thisType)
+        if _isNumber(value):
+            numeric[index] = value
+        else:
+            numeric[index] = np.ma.masked
+
+    def getValid(self, thisType):
+        """Get a boolean array that is True where a value has been added
+        for `thisType` (so the missing entries of object arrays can be told
+        apart from values of "--").
+        """
+        return self._getValid(thisType).copy()
+
+    def getNumeric(self, thisType):
+        """Get the numeric values of `thisType` as a masked array, masked
+        where no value was added or the value isn't a number. For data types
+        that also hold text (or other objects) this is kept up to date as
+        values are added, so the numbers can be analysed without going
+        through the object array.
+        """
+        if self.isNumeric[thisType]:
+            return self[thisType].copy()
+        return self._getNumeric(thisType).copy()
+
+    def _getValid(self, thisType):
+        dat = self[thisType]
+        if self.isNumeric[thisType]:
+            return ~np.ma.getmaskarray(dat)
+        validity = self.__dict__.setdefault('_valid', {})
+        if thisType not in validity:
+            # handlers saved by older versions only marked missing by "--"
+            isMissing = np.frompyfunc(
+                lambda val: isinstance(val, str) and val == '--', 1, 1)
+            validity[thisType] = ~isMissing(dat).astype(bool)
+        return validity[thisType]
+
+    def _getNumeric(self, thisType):
+        numerics = self.__dict__.setdefault('_numeric', {})
+        if thisType not in numerics:
+            # handlers saved by older versions only had the object array
+            dat = self[thisType]
+            isNumber = np.frompyfunc(_isNumber, 1, 1)(dat).astype(bool)
+            isNumber &= self._getValid(thisType)
+            numeric = np.ma.zeros(dat.shape, np.float64)
+            numeric.mask = True
+            numeric[isNumber] = dat[isNumber].astype(np.float64)
+            numerics[thisType] = numeric
+        return numerics[thisType]
+
+    def _extendDataType(self, thisType, position):
+        """Grow the arrays of `thisType` so `position` fits, by at least
+        doubling the dimensions that are too small so that adding trials
+        one at a time beyond the expected number isn't slow.
+        """
+        dat = self[thisType]
+        oldShape = dat.shape
+        newShape = [max(size * 2, int(pos) + 1) if pos >= size else size
+                    for size, pos in zip(oldShape, position)]
+        logging.debug('need a bigger array for: %s %s' % (thisType, newShape))
+        oldSlice = tuple(slice(0, size) for size in oldShape)
+        if self.isNumeric[thisType]:
+            newDat = np.ma.zeros(newShape, dat.dtype)
+            newDat.mask = True
+            newDat[oldSlice] = dat
+        else:
+            valid = self._getValid(thisType)
+            numeric = self._getNumeric(thisType)
+            newDat = np.full(newShape, '--', dtype='O')
+            newDat[oldSlice] = dat
+            newValid = np.zeros(newShape, dtype=bool)
+            newValid[oldSlice] = valid
+            self._valid[thisType] = newValid
+            newNumeric = np.ma.zeros(newShape, np.float64)
+            newNumeric.mask = True
+            newNumeric[oldSlice] = numeric
+            self._numeric[thisType] = newNumeric
+        self[thisType] = newDat
+        # so any new data types match
+        self.dataShape = list(np.maximum(self.dataShape, newShape))
 
     def _convertToObjectArray(self, thisType):
         """Convert this datatype from masked numeric array to unmasked
         object array
         """
         dat = self[thisType]
-        # create an array of Object type
-        self[thisType] = np.array(dat.data, dtype='O')
-        # masked vals should be "--", others keep data
-        # we have to repeat forcing to 'O' or text gets truncated to 4chars
-        self[thisType] = np.where(dat.mask, '--', dat).astype('O')
+        valid = ~np.ma.getmaskarray(dat)
+        # masked vals should be "--", others keep their value as a number
+        if dat.dtype == np.float32:
+            # go via the shortest repr so 0.1 stays 0.1, not
+            # 0.10000000149011612, when written out as a float
+            dat = np.ma.masked_array(
+                dat.data.astype(str).astype(np.float64), mask=~valid)
+        objDat = np.full(dat.shape, '--', dtype='O')
+        objDat[valid] = dat.data[valid].tolist()
+        self[thisType] = objDat
+        self.__dict__.setdefault('_valid', {})[thisType] = valid
+        self.__dict__.setdefault('_numeric', {})[thisType] = \
+            dat.astype(np.float64)
         self.isNumeric[thisType] = False
+
+
+def _isNumber(value):
+    """Whether a value can be stored in the numeric (masked) array of a
+    :class:`DataHandler` data type.
+    """
+    return (type(value) in (int, float) or
+            isinstance(value, (np.integer, np.floating)))
+
+
+def _fitsDtype(value, dtype):
+    """Whether a number can be stored in an array of `dtype` without losing
+    precision. Python numbers are always stored in the (float32) numeric
+    arrays, as they have been in data files from previous versions, numpy
+    numbers only if they keep their value.
+    """
+    if type(value) in (int, float):
+        return True
+    with np.errstate(over='ignore'):
+        stored = np.dtype(dtype).type(value).item()
+    value = value.item()
+    return stored == value or (stored != stored and value != value)
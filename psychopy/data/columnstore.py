@@ -0,0 +1,472 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Append-only, column-oriented storage for trial data.
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+import sys
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    havePyArrow = True
+except ImportError:
+    havePyArrow = False
+
+# dtypes used for typed columns, values of any other type go in object columns
+_kindDtypes = {'b': bool, 'i': np.int64, 'f': np.float64, 'O': object}
+_int64Range = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+
+def _kindOf(value):
+    """Get the column kind a value can be stored in without changing the way
+    it is written out ('b', 'i', 'f' or 'O').
+    """
+    valType = type(value)
+    if valType is bool or valType is np.bool_:
+        return 'b'
+    if valType is int or isinstance(value, np.integer):
+        if _int64Range[0] <= value <= _int64Range[1]:
+            return 'i'
+        return 'O'
+    if valType is float or valType is np.float64:
+        return 'f'
+    return 'O'
+
+
+def formatCell(value):
+    """Format a value as a cell of a wide text data file, quoting it if it
+    contains a comma or newline.
+    """
+    txt = str(value)
+    if ',' in txt or '\n' in txt:
+        return u'"%s"' % txt
+    return txt
+
+
+class ColumnStoreRow(dict):
+    """A row of a :class:`ColumnStore`, as a dict of the values present.
+
+    Setting or deleting values of the row also sets or deletes them in the
+    store, so rows can be edited like the entries of a list of dicts. The
+    row holds the values as they were when it was fetched from the store.
+    Copies (and pickles) of a row are plain dicts.
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row, values):
+        dict.__init__(self, values)
+        self._store = store
+        self._row = row
+
+    def __setitem__(self, name, value):
+        self._store.setValue(self._row, name, value)
+        dict.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._store.deleteValue(self._row, name)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def setdefault(self, name, default=None):
+        if name not in self:
+            self[name] = default
+        return dict.__getitem__(self, name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            return dict.pop(self, name, *default)
+        value = dict.__getitem__(self, name)
+        del self[name]
+        return value
+
+    def popitem(self):
+        name, value = dict.popitem(self)
+        self._store.deleteValue(self._row, name)
+        return name, value
+
+    def clear(self):
+        for name in list(self):
+            del self[name]
+
+    def copy(self):
+        return dict(self)
+
+
+class ColumnStore:
+    """An append-only table of named columns, for data that arrives one row
+    at a time.
+
+    Each column is a growable NumPy array with a validity mask marking which
+    rows have a value. Columns holding only bools, integers or (double
+    precision) floats are stored with a numeric dtype; as soon as a value of
+    another type arrives the column is converted to an object column. Strings
+    are interned so repeated values (e.g. 'left'/'right') share memory. New
+    column names can be introduced by any row, earlier rows are then treated
+    as missing that value.
+
+    Rows can be read back as dicts (only containing the values that are
+    present), so the store can stand in for a list of dicts. Rows fetched by
+    indexing or iterating are :class:`ColumnStoreRow` objects, so changing
+    them changes the store too.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of rows to allocate space for initially. Storage is doubled
+        whenever it fills up, so this only needs to be a guess.
+
+    Examples
+    --------
+    Adding rows and getting columns back::
+
+        store = ColumnStore()
+        store.appendRow({'rt': 0.5, 'key': 'left'})
+        store.appendRow({'rt': 0.7, 'key': 'right', 'corr': 1})
+        values, valid = store.getColumn('corr')  # [0, 1], [False, True]
+
+    """
+
+    def __init__(self, capacity=64):
+        self._capacity = max(int(capacity), 1)
+        self._nRows = 0
+        self._columns = {}
+        self._valid = {}
+        self._observers = []
+        self.names = []  # column names in the order they were added
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_observers']  # these belong to this session
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._observers = []
+
+    def __len__(self):
+        return self._nRows
+
+    def __iter__(self):
+        for row in range(self._nRows):
+            yield ColumnStoreRow(self, row, self.getRow(row))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ColumnStoreRow(self, row, self.getRow(row))
+                    for row in range(*index.indices(self._nRows))]
+        if index < 0:
+            index += self._nRows
+        if not 0 <= index < self._nRows:
+            raise IndexError("ColumnStore row index out of range")
+        return ColumnStoreRow(self, index, self.getRow(index))
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnStore):
+            return NotImplemented
+        if self._nRows != other._nRows or self.names != other.names:
+            return False
+        n = self._nRows
+        for name in self.names:
+            if not np.array_equal(self._valid[name][:n],
+                                  other._valid[name][:n]):
+                return False
+            mask = self._valid[name][:n]
+            mine = self._columns[name][:n][mask]
+            theirs = other._columns[name][:n][mask]
+            if mine.dtype != theirs.dtype or list(mine) != list(theirs):
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<ColumnStore: %i rows, %i columns>" % (
+            self._nRows, len(self.names))
+
+    @property
+    def nRows(self):
+        """Number of rows in the store."""
+        return self._nRows
+
+    @property
+    def capacity(self):
+        """Number of rows space is currently allocated for."""
+        return self._capacity
+
+    def addObserver(self, callback):
+        """Call `callback(row)` whenever a value in `row` is set or deleted.
+        """
+        self._observers.append(callback)
+
+    def removeObserver(self, callback):
+        """Stop calling a callback added with :meth:`addObserver`.
+        """
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def dtypeOf(self, name):
+        """Get the dtype used to store column `name`."""
+        return self._columns[name].dtype
+
+    def reserve(self, nRows):
+        """Make sure there is space for at least `nRows` rows without any
+        further reallocation.
+        """
+        if nRows <= self._capacity:
+            return
+        for name in self.names:
+            self._columns[name] = self._resized(self._columns[name], nRows)
+            self._valid[name] = self._resized(self._valid[name], nRows)
+        self._capacity = nRows
+
+    @staticmethod
+    def _resized(arr, length):
+        newArr = np.zeros(length, dtype=arr.dtype)
+        newArr[:len(arr)] = arr
+        return newArr
+
+    def addColumn(self, name, kind='O'):
+        """Add an (empty) column, if not already present.
+        """
+        if name in self._columns:
+            return
+        self._columns[name] = np.zeros(self._capacity, dtype=_kindDtypes[kind])
+        self._valid[name] = np.zeros(self._capacity, dtype=bool)
+        self.names.append(name)
+
+    def _promote(self, name):
+        """Convert a typed column to an object column (keeping its values as
+        Python objects of the original type).
+        """
+        self._columns[name] = self._columns[name].astype(object)
+
+    def appendRow(self, row=None):
+        """Add a row to the end of the table.
+
+        Parameters
+        ----------
+        row : dict or None
+            Values for the new row, keyed by column name. Columns not in
+            `row` are marked as missing.
+
+        Returns
+        -------
+        int
+            Index of the new row.
+        """
+        if self._nRows >= self._capacity:
+            self.reserve(self._capacity * 2)
+        index = self._nRows
+        self._nRows += 1
+        if row:
+            for name, value in row.items():
+                self.setValue(index, name, value)
+        return index
+
+    # so the store can be used in place of a list of dicts
+    append = appendRow
+
+    def truncate(self, nRows):
+        """Remove all rows after the first `nRows`.
+        """
+        nRows = max(int(nRows), 0)
+        if nRows >= self._nRows:
+            return
+        for name in self.names:
+            self._valid[name][nRows:self._nRows] = False
+            if self._columns[name].dtype == object:
+                # don't keep references to the removed values
+                self._columns[name][nRows:self._nRows] = None
+        self._nRows = nRows
+
+    def setValue(self, row, name, value):
+        """Set the value of column `name` in an existing row.
+        """
+        if row < 0:
+            row += self._nRows
+        if not 0 <= row < self._nRows:
+            raise IndexError("ColumnStore row index out of range")
+        kind = _kindOf(value)
+        if name not in self._columns:
+            self.addColumn(name, kind)
+        col = self._columns[name]
+        if col.dtype.kind != kind and col.dtype != object:
+            self._promote(name)
+            col = self._columns[name]
+        if type(value) is str:
+            value = sys.intern(value)
+        col[row] = value
+        self._valid[name][row] = True
+        for callback in self._observers:
+            callback(row)
+
+    def deleteValue(self, row, name):
+        """Mark the value of column `name` in an existing row as missing.
+        """
+        if row < 0:
+            row += self._nRows
+        if not 0 <= row < self._nRows:
+            raise IndexError("ColumnStore row index out of range")
+        if name not in self._columns:
+            return
+        self._valid[name][row] = False
+        if self._columns[name].dtype == object:
+            self._columns[name][row] = None
+        for callback in self._observers:
+            callback(row)
+
+    def getValue(self, row, name, default=None):
+        """Get the value of column `name` in `row`, or `default` if it is
+        missing.
+        """
+        if name not in self._columns or not self._valid[name][row]:
+            return default
+        value = self._columns[name][row]
+        if isinstance(value, np.generic):
+            value = value.item()
+        return value
+
+    def getRow(self, row):
+        """Get a row as a (plain) dict containing only the values that are
+        present.
+        """
+        entry = {}
+        for name in self.names:
+            if self._valid[name][row]:
+                value = self._columns[name][row]
+                if isinstance(value, np.generic):
+                    value = value.item()
+                entry[name] = value
+        return entry
+
+    def getColumn(self, name, start=0, stop=None):
+        """Get values and validity for column `name` (as views, don't modify
+        them).
+
+        Returns
+        -------
+        tuple
+            Arrays `(values, valid)` for rows `start` to `stop`.
+        """
+        if stop is None:
+            stop = self._nRows
+        return self._columns[name][start:stop], self._valid[name][start:stop]
+
+    def formatRows(self, names, start=0, stop=None, delim=','):
+        """Format rows as lines of a wide text file, working column by column.
+
+        Parameters
+        ----------
+        names : list of str
+            Columns to write, in order. Names that aren't in the store are
+            written as empty cells.
+        start, stop : int
+            Range of rows to format.
+        delim : str
+            Delimiter written after each cell.
+
+        Returns
+        -------
+        list of str
+            One line (including the trailing newline) per row.
+        """
+        if stop is None:
+            stop = self._nRows
+        nRows = stop - start
+        if nRows <= 0:
+            return []
+        cells = []
+        for name in names:
+            if name not in self._columns:
+                cells.append([delim] * nRows)
+                continue
+            values, valid = self.getColumn(name, start, stop)
+            col = [delim] * nRows
+            for i in np.flatnonzero(valid).tolist():
+                value = values[i]
+                if isinstance(value, np.generic):
+                    value = value.item()
+                col[i] = formatCell(value) + delim
+            cells.append(col)
+        return [''.join(rowCells) + '\n' for rowCells in zip(*cells)]
+
+    def toDataFrame(self, columns=None):
+        """Convert the store to a :class:`pandas.DataFrame`. Missing values are
+        NaN for float columns and None otherwise.
+        """
+        if columns is None:
+            columns = self.names
+        data = {}
+        for name in columns:
+            if name not in self._columns:
+                data[name] = [None] * self._nRows
+                continue
+            values, valid = self.getColumn(name)
+            if values.dtype.kind == 'f':
+                data[name] = np.where(valid, values, np.nan)
+            elif valid.all():
+                data[name] = values.copy()
+            else:
+                col = values.astype(object)
+                col[~valid] = None
+                data[name] = col
+        return pd.DataFrame(data, columns=list(columns))
+
+    def copy(self):
+        """Get an independent copy of the store.
+        """
+        new = ColumnStore(capacity=self._capacity)
+        new._nRows = self._nRows
+        new.names = list(self.names)
+        new._columns = {name: col.copy() for name, col in self._columns.items()}
+        new._valid = {name: val.copy() for name, val in self._valid.items()}
+        return new
+
+    def saveAsBinary(self, fileName, columns=None, fileFormat='parquet'):
+        """Save the store in a binary columnar format (requires `pyarrow`).
+
+        Object columns are written as text (so lists etc. are stored as their
+        string representation), typed columns keep their type.
+
+        Parameters
+        ----------
+        fileName : str
+            Path of the file to write.
+        columns : list of str or None
+            Columns to write, defaults to all.
+        fileFormat : str
+            Either 'parquet' or 'feather'.
+        """
+        if not havePyArrow:
+            raise ImportError("Saving data as %s requires the pyarrow "
+                              "package" % fileFormat)
+        df = self.toDataFrame(columns)
+        for name in df.columns:
+            if df[name].dtype == object:
+                df[name] = [None if val is None else str(val)
+                            for val in df[name]]
+        if fileFormat == 'parquet':
+            df.to_parquet(fileName, index=False)
+        elif fileFormat == 'feather':
+            df.to_feather(fileName)
+        else:
+            raise ValueError("Unknown binary data format %r, should be "
+                             "'parquet' or 'feather'" % fileFormat)
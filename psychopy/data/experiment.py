@@ -12,9 +12,33 @@ from psychopy import logging
 from psychopy.data.trial import TrialHandler2
 from psychopy.tools.filetools import (openOutputFile, genDelimiter,
                                       genFilenameFromDelimiter)
+from psychopy.tools.fileerrortools import handleFileCollision
 from psychopy.localization import _translate
 from .utils import checkValidFilePath
 from .base import _ComparisonMixin
+from .columnstore import ColumnStore, havePyArrow
+from .streaming import TrialDataStream
+
+
+class _EntryTimestamp(dict):
+    """Target for :meth:`Window.timeOnFlip` which adds the flip time to the
+    entry that was current when the timestamp was requested, even if that
+    entry has been completed (and stored) by the time the flip happens.
+    """
+
+    def __init__(self, exp, row):
+        super(_EntryTimestamp, self).__init__()
+        self.exp = exp
+        self.row = row
+
+    def __setitem__(self, name, value):
+        exp = self.exp
+        if self.row < len(exp.entries):
+            # a stream of the entries is told by the store, and rewrites the
+            # file on closing if the entry is on disk already
+            exp.entries.setValue(self.row, name, value)
+        else:
+            exp.thisEntry[name] = value
 
 
 class ExperimentHandler(_ComparisonMixin):
@@ -40,7 +64,9 @@ class ExperimentHandler(_ComparisonMixin):
                  sortColumns=False,
                  dataFileName='',
                  autoLog=True,
-                 appendFiles=False):
+                 appendFiles=False,
+                 streamWideText=False,
+                 binaryFormat=None):
         """
         :parameters:
 
@@ -82,6 +108,18 @@ class ExperimentHandler(_ComparisonMixin):
 
 
             autoLog : True (default) or False
+
+            streamWideText : True or False (default)
+                If True (and a dataFileName is given), each entry is appended
+                to the wide text (.csv) data file as soon as it is completed,
+                so a crash loses at most the current entry and saving at the
+                end of the session only has to write what is left. Columns
+                that appear part way through go after the existing ones and
+                only the header line is rewritten when the file is closed.
+
+            binaryFormat : None (default), 'parquet' or 'feather'
+                Also save the data in this binary columnar format when the
+                experiment closes (requires the `pyarrow` package).
         """
         self.loops = []
         self.loopsUnfinished = []
@@ -98,7 +136,7 @@ class ExperimentHandler(_ComparisonMixin):
         self.dataFileName = dataFileName
         self.sortColumns = sortColumns
         self.thisEntry = {}
-        self.entries = []  # chronological list of entries
+        self.entries = ColumnStore()  # chronological store of entries
         self._paramNamesSoFar = []
         self.dataNames = ['thisRow.t', 'notes']  # names of all the data (eg. resp.keys)
         self.columnPriority = {
@@ -107,6 +145,10 @@ class ExperimentHandler(_ComparisonMixin):
         }
         self.autoLog = autoLog
         self.appendFiles = appendFiles
+        self.streamWideText = streamWideText
+        self.binaryFormat = binaryFormat
+        # the wide text file when streaming entries
+        self._stream = None
         self.status = constants.NOT_STARTED
 
         if dataFileName in ['', None]:
@@ -121,6 +163,26 @@ class ExperimentHandler(_ComparisonMixin):
     def __del__(self):
         self.close()
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # open file handles can't be pickled
+        state['_stream'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # data saved by older versions kept entries as a list of dicts
+        if isinstance(self.__dict__.get('entries', None), list):
+            entries = ColumnStore(capacity=len(self.entries) or 1)
+            for entry in self.entries:
+                entries.appendRow(entry)
+            self.entries = entries
+        for attr, default in (('streamWideText', False),
+                              ('binaryFormat', None),
+                              ('_stream', None)):
+            if attr not in self.__dict__:
+                self.__dict__[attr] = default
+
     @property
     def currentLoop(self):
         """
@@ -268,10 +330,10 @@ class ExperimentHandler(_ComparisonMixin):
             value = value.resolve()
 
         # get entry from row number
-        entry = self.thisEntry
         if row is not None:
-            entry = self.entries[row]
-        entry[name] = value
+            self.entries.setValue(row, name, value)
+        else:
+            self.thisEntry[name] = value
 
         # set priority if given
         if priority is not None:
@@ -386,8 +448,9 @@ class ExperimentHandler(_ComparisonMixin):
         # make sure the name is used when writing the datafile
         if name not in self.dataNames:
             self.dataNames.append(name)
-        # tell win to record timestamp on flip
-        win.timeOnFlip(self.thisEntry, name, format=format)
+        # tell win to record timestamp on flip (in the current entry)
+        win.timeOnFlip(_EntryTimestamp(self, len(self.entries)), name,
+                       format=format)
 
     @property
     def status(self):
@@ -575,9 +638,12 @@ class ExperimentHandler(_ComparisonMixin):
         # add the extraInfo dict to the data
         if type(self.extraInfo) == dict:
             this.update(self.extraInfo)
-        self.entries.append(this)
+        self.entries.appendRow(this)
         # add new entry with its
         self.thisEntry = {}
+        # write the completed entry straight to disk if requested
+        if self.streamWideText and self.dataFileName not in ['', None]:
+            self._streamEntries()
 
     def updateEntryFromLoop(self, thisLoop):
         """
@@ -605,11 +671,66 @@ class ExperimentHandler(_ComparisonMixin):
         :return: copy (not pointer) to entries
         """
         # check for orphan final data (not committed as a complete entry)
-        entries = copy.copy(self.entries)
+        entries = [self.entries.getRow(row) for row in range(len(self.entries))]
         if self.thisEntry:  # thisEntry is not empty
-            entries.append(self.thisEntry)
+            entries.append(copy.copy(self.thisEntry))
         return entries
 
+    def _getAllEntriesStore(self):
+        """As :meth:`getAllEntries` but returns a :class:`ColumnStore`,
+        avoiding the conversion of every entry to a dict.
+        """
+        if not self.thisEntry:
+            return self.entries
+        entries = self.entries.copy()
+        entries.appendRow(self.thisEntry)
+        return entries
+
+    def _getWideTextNames(self, sortColumns=None):
+        """Get the column names of the wide text data file, in order.
+        """
+        names = self._getAllParamNames()
+        for name in self.dataNames:
+            if name not in names:
+                names.append(name)
+        # names from the extraInfo dictionary
+        names.extend(self._getExtraInfo()[0])
+        if len(names) < 1:
+            logging.error("No data was found, so data file may not look as expected.")
+        # if sort columns not specified, use default from self
+        if sortColumns is None:
+            sortColumns = self.sortColumns
+        # sort names as requested
+        if sortColumns in ("alphabetical", "alpha", "a", True):
+            # sort alphabetically
+            names.sort()
+        elif sortColumns in ("priority", "pr" or "p"):
+            # map names to their priority
+            priorityMap = []
+            for name in names:
+                priority = self.columnPriority.get(name, self._guessPriority(name))
+                priorityMap.append((priority, name))
+            names = [name for priority, name in sorted(priorityMap, reverse=True)]
+
+        return names
+
+    def _streamEntries(self, final=False):
+        """Append completed entries to the wide text data file.
+
+        Columns that appear part way through are added to the end of later
+        rows (see :class:`~psychopy.data.streaming.TrialDataStream`) and stay
+        there, so only the header line is rewritten when `final`. Then the
+        current, incomplete entry is written too and the file is closed.
+        """
+        if self._stream is None:
+            self._stream = TrialDataStream(
+                self.dataFileName + '.csv', append=self.appendFiles,
+                fileCollisionMethod='rename', store=self.entries)
+        self._stream.writeRows(self._getWideTextNames(), header=final)
+        if final:
+            self._stream.close(lastRow=self.thisEntry)
+            self._stream = None
+
     def saveAsWideText(self,
                        fileName,
                        delim='auto',
@@ -685,47 +806,16 @@ class ExperimentHandler(_ComparisonMixin):
                            fileCollisionMethod=fileCollisionMethod,
                            encoding=encoding)
 
-        names = self._getAllParamNames()
-        for name in self.dataNames:
-            if name not in names:
-                names.append(name)
-        # names from the extraInfo dictionary
-        names.extend(self._getExtraInfo()[0])
-        if len(names) < 1:
-            logging.error("No data was found, so data file may not look as expected.")
-        # if sort columns not specified, use default from self
-        if sortColumns is None:
-            sortColumns = self.sortColumns
-        # sort names as requested
-        if sortColumns in ("alphabetical", "alpha", "a", True):
-            # sort alphabetically
-            names.sort()
-        elif sortColumns in ("priority", "pr" or "p"):
-            # map names to their priority
-            priorityMap = []
-            for name in names:
-                priority = self.columnPriority.get(name, self._guessPriority(name))
-                priorityMap.append((priority, name))
-            names = [name for priority, name in sorted(priorityMap, reverse=True)]
+        names = self._getWideTextNames(sortColumns)
         # write a header line
         if not matrixOnly:
             for heading in names:
                 f.write(u'%s%s' % (heading, delim))
             f.write('\n')
 
-        # write the data for each entry
-        for entry in self.getAllEntries():
-            for name in names:
-                if name in entry:
-                    ename = str(entry[name])
-                    if ',' in ename or '\n' in ename:
-                        fmt = u'"%s"%s'
-                    else:
-                        fmt = u'%s%s'
-                    f.write(fmt % (entry[name], delim))
-                else:
-                    f.write(delim)
-            f.write('\n')
+        # write the data for each entry, column by column
+        f.writelines(
+            self._getAllEntriesStore().formatRows(names, delim=delim))
         if f != sys.stdout:
             f.close()
         logging.info('saved data to %r' % f.name)
@@ -758,7 +848,7 @@ class ExperimentHandler(_ComparisonMixin):
         self.saveWideText = False
 
         origEntries = self.entries
-        self.entries = self.getAllEntries()
+        self.entries = self._getAllEntriesStore()
 
         # otherwise use default location
         if not fileName.endswith('.psydat'):
@@ -797,7 +887,7 @@ class ExperimentHandler(_ComparisonMixin):
         # get columns which meet threshold
         cols = [col for col in self.dataNames if self.getPriority(col) >= priorityThreshold]
         # convert just relevant entries to a DataFrame
-        trials = pd.DataFrame(self.entries, columns=cols).fillna(value="")
+        trials = self.entries.toDataFrame(cols).fillna(value="")
         # put in context
         context = {
             'type': "trials_data",
@@ -817,10 +907,39 @@ class ExperimentHandler(_ComparisonMixin):
             if self.savePickle:
                 self.saveAsPickle(self.dataFileName)
             if self.saveWideText:
-                self.saveAsWideText(self.dataFileName + '.csv')
+                if self.streamWideText:
+                    # only what hasn't been streamed yet needs writing
+                    self._streamEntries(final=True)
+                else:
+                    self.saveAsWideText(self.dataFileName + '.csv')
+            if self.binaryFormat:
+                self.saveAsBinary(self.dataFileName, self.binaryFormat)
         self.abort()
         self.autoLog = False
 
+    def saveAsBinary(self, fileName, fileFormat='parquet'):
+        """Save the data as a binary, columnar file which is much faster to
+        write and load than text for long sessions. Requires `pyarrow`.
+
+        Parameters
+        ----------
+        fileName : str
+            Path to save to, the extension ('.parquet' or '.feather') is added
+            if not given.
+        fileFormat : str
+            Either 'parquet' or 'feather'.
+        """
+        if not havePyArrow:
+            logging.error("Saving data as %s requires pyarrow, which isn't "
+                          "installed" % fileFormat)
+            return
+        if not fileName.endswith('.' + fileFormat):
+            fileName += '.' + fileFormat
+        fileName = handleFileCollision(fileName, 'rename')
+        self._getAllEntriesStore().saveAsBinary(
+            fileName, columns=self._getWideTextNames(), fileFormat=fileFormat)
+        logging.info('saved data to %r' % fileName)
+
     def abort(self):
         """Inform the ExperimentHandler that the run was aborted.
 
@@ -832,3 +951,8 @@ class ExperimentHandler(_ComparisonMixin):
         """
         self.savePickle = False
         self.saveWideText = False
+        self.binaryFormat = None
+        if self._stream is not None:
+            # keep whatever was already streamed to disk
+            self._stream.close()
+            self._stream = None
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Run simulated observers through staircase handlers to compare the bias,
+variability and length of adaptive procedures before running them on real
+participants.
+
+Example usage::
+
+    from psychopy import data
+
+    observer = data.SimulatedObserver(threshold=-1.0, slope=3.5,
+                                      function='logWeibull')
+    results = data.simulateStaircases(
+        {'quest': (data.QuestHandler,
+                   dict(startVal=-0.5, startValSd=0.5, nTrials=40)),
+         'simple': (data.StairHandler,
+                    dict(startVal=-0.5, stepType='lin', stepSizes=0.1,
+                         nReversals=10, nTrials=40))},
+        observer, nRuns=1000)
+    for name, stats in results.items():
+        print(name, stats['bias'], stats['sd'], stats['meanTrials'])
+
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .staircase import (StairHandler, QuestHandler, PsiHandler,
+                        QuestPlusHandler, MultiStairHandler)
+
+__all__ = ['SimulatedObserver', 'simulateStaircase', 'simulateStaircases']
+
+# reversals averaged by the default estimate of a simple staircase
+nEstimateReversals = 6
+
+
+class SimulatedObserver:
+    """A simulated observer responding according to a psychometric function.
+
+    Responses are drawn with a random number generator passed in by the
+    caller, so an observer holds no state and can be shared between runs
+    and worker processes.
+
+    Parameters
+    ----------
+    threshold : float
+        Location of the psychometric function, in the units of the
+        intensities given by the staircase.
+    slope : float
+        Steepness of the psychometric function. For `'cumNormal'` this is the
+        standard deviation of the underlying Gaussian (as in
+        :class:`~psychopy.data.PsiHandler`).
+    guessRate : float
+        Lower asymptote (0.5 for 2AFC, 0 for yes/no).
+    lapseRate : float
+        Proportion of trials answered at chance regardless of intensity.
+    function : str
+        `'weibull'` for intensities on a linear scale, `'logWeibull'` for
+        intensities in log10 units (the form assumed by
+        :class:`~psychopy.data.QuestHandler`) or `'cumNormal'`.
+
+    """
+
+    functions = ('weibull', 'logWeibull', 'cumNormal')
+
+    def __init__(self, threshold, slope=3.5, guessRate=0.5, lapseRate=0.01,
+                 function='weibull'):
+        if function not in self.functions:
+            raise ValueError(
+                "Unknown psychometric function '%s'; use one of %s"
+                % (function, ', '.join(self.functions)))
+        self.threshold = threshold
+        self.slope = slope
+        self.guessRate = guessRate
+        self.lapseRate = lapseRate
+        self.function = function
+
+    def __repr__(self):
+        return ('SimulatedObserver(threshold=%r, slope=%r, guessRate=%r, '
+                'lapseRate=%r, function=%r)'
+                % (self.threshold, self.slope, self.guessRate,
+                   self.lapseRate, self.function))
+
+    def probability(self, intensity):
+        """Probability of a correct (or 'yes') response at `intensity`.
+        """
+        x = np.asarray(intensity, dtype=float)
+        if self.function == 'weibull':
+            core = 1 - np.exp(-(np.maximum(x, 0) / self.threshold) **
+                              self.slope)
+        elif self.function == 'logWeibull':
+            core = 1 - np.exp(-10 ** (self.slope * (x - self.threshold)))
+        else:
+            from scipy import special
+            core = 0.5 + 0.5 * special.erf(
+                (x - self.threshold) / (self.slope * np.sqrt(2)))
+        return (self.guessRate +
+                (1 - self.guessRate - self.lapseRate) * core)
+
+    def respond(self, intensity, rng):
+        """Returns 1 (correct) or 0 (incorrect) for a trial at `intensity`.
+        """
+        return int(rng.random() < self.probability(intensity))
+
+
+def _estimate(handler):
+    """The default threshold estimate for a finished handler.
+    """
+    if isinstance(handler, MultiStairHandler):
+        return float(np.mean([_estimate(stair)
+                              for stair in handler.staircases]))
+    if isinstance(handler, QuestPlusHandler):
+        return float(handler.paramEstimate['threshold'])
+    if isinstance(handler, PsiHandler):
+        return float(handler.estimateLambda()[0])
+    if isinstance(handler, QuestHandler):
+        return float(handler.mean())
+    if handler.reversalIntensities:
+        return float(np.mean(
+            handler.reversalIntensities[-nEstimateReversals:]))
+    return float(handler.intensities[-1])
+
+
+def _response(handler, correct):
+    """Converts a simulated response into the form `handler` expects.
+    """
+    if isinstance(handler, MultiStairHandler):
+        handler = handler.currentStaircase
+    if isinstance(handler, QuestPlusHandler):
+        return handler.responseVals[0 if correct else 1]
+    return correct
+
+
+def _runObserver(handlerType, handlerKwargs, observer, estimator, seed):
+    """Runs one simulated observer and returns (estimate, nTrials).
+    """
+    rng = np.random.default_rng(seed)
+    kwargs = dict(handlerKwargs)
+    if handlerType is MultiStairHandler and kwargs.get('randomSeed') is None:
+        kwargs['randomSeed'] = int(rng.integers(2 ** 31))
+    handler = handlerType(**kwargs)
+    if isinstance(handler, MultiStairHandler):
+        for intensity, condition in handler:
+            correct = observer.respond(intensity, rng)
+            handler.addResponse(_response(handler, correct))
+        nTrials = handler.totalTrials
+    else:
+        for intensity in handler:
+            correct = observer.respond(intensity, rng)
+            handler.addResponse(_response(handler, correct))
+        nTrials = len(handler.data)
+    return (estimator or _estimate)(handler), nTrials
+
+
+def _runChunk(tasks):
+    """Runs a list of (configIndex, handlerType, handlerKwargs, observer,
+    estimator, seed) tasks in a worker and returns their results in order.
+    """
+    return [(task[0],) + _runObserver(*task[1:]) for task in tasks]
+
+
+def _summarize(estimates, nTrials, trueValue):
+    """Bias, variability and trial-count statistics of a set of runs.
+    """
+    estimates = np.asarray(estimates, dtype=float)
+    nTrials = np.asarray(nTrials, dtype=int)
+    errors = estimates - trueValue
+    return {
+        'nRuns': len(estimates),
+        'trueValue': trueValue,
+        'estimates': estimates,
+        'nTrials': nTrials,
+        'mean': estimates.mean(),
+        'bias': errors.mean(),
+        'sd': estimates.std(ddof=1) if len(estimates) > 1 else 0.0,
+        'variance': estimates.var(ddof=1) if len(estimates) > 1 else 0.0,
+        'rmse': np.sqrt(np.mean(errors ** 2)),
+        'meanTrials': nTrials.mean(),
+        'sdTrials': nTrials.std(ddof=1) if len(nTrials) > 1 else 0.0}
+
+
+def simulateStaircases(configurations, observer, nRuns=100, nWorkers=None,
+                       seed=None, chunkSize=None, trueValue=None):
+    """Runs simulated observers through several staircase configurations.
+
+    All runs of all configurations are shared out between a pool of worker
+    processes, so comparing procedures takes roughly
+    `1 / nWorkers` of the time of running them one after another.
+
+    Parameters
+    ----------
+    configurations : dict
+        Maps a name for each configuration to a tuple of
+        `(handlerType, handlerKwargs)` or
+        `(handlerType, handlerKwargs, estimator)`. `handlerType` is one of
+        :class:`~psychopy.data.StairHandler`,
+        :class:`~psychopy.data.QuestHandler`,
+        :class:`~psychopy.data.PsiHandler`,
+        :class:`~psychopy.data.QuestPlusHandler` or
+        :class:`~psychopy.data.MultiStairHandler` (or a subclass) and
+        `handlerKwargs` are the arguments it is created with for every run.
+        `estimator` is a function taking the finished handler and returning
+        its threshold estimate. By default this is the mean of the last 6
+        reversals for a :class:`~psychopy.data.StairHandler`, `mean()` for
+        QUEST, the location of `estimateLambda()` for Psi, the threshold of
+        `paramEstimate` for QUEST+ and the mean of those over the staircases
+        of a :class:`~psychopy.data.MultiStairHandler`.
+    observer : :class:`SimulatedObserver`
+        The observer responding on every run.
+    nRuns : int
+        Number of simulated observers to run for each configuration.
+    nWorkers : int or None
+        Number of worker processes. `None` uses one per CPU and `1` runs
+        everything in this process (useful for debugging). The handler types,
+        arguments and estimators must be picklable to use workers, so
+        estimators should be functions defined at module level.
+    seed : int or None
+        Seeds the responses of the simulated observers. Runs get the same
+        responses for a given seed whatever the number of workers.
+    chunkSize : int or None
+        Runs sent to a worker at a time. By default runs are split into
+        about 4 chunks per worker.
+    trueValue : float or None
+        The value that estimates are compared against to compute the bias.
+        Defaults to `observer.threshold`.
+
+    Returns
+    -------
+    dict
+        Maps each configuration name to a dict of statistics: `nRuns`,
+        `trueValue`, `estimates` and `nTrials` (arrays with one value per
+        run), `mean`, `bias`, `sd`, `variance` and `rmse` of the estimates,
+        `meanTrials` and `sdTrials` of the number of trials, and `duration`,
+        the wall time in seconds spent on all the configurations.
+
+    """
+    if trueValue is None:
+        trueValue = observer.threshold
+    names = list(configurations)
+    seeds = np.random.SeedSequence(seed).spawn(len(names) * nRuns)
+    tasks = []
+    for configIndex, name in enumerate(names):
+        config = tuple(configurations[name])
+        handlerType, handlerKwargs = config[:2]
+        estimator = config[2] if len(config) > 2 else None
+        for runN in range(nRuns):
+            tasks.append((configIndex, handlerType, handlerKwargs or {},
+                          observer, estimator,
+                          seeds[configIndex * nRuns + runN]))
+
+    if nWorkers is None:
+        nWorkers = os.cpu_count() or 1
+    nWorkers = max(1, min(nWorkers, len(tasks)))
+    if chunkSize is None:
+        chunkSize = max(1, len(tasks) // (nWorkers * 4))
+    chunks = [tasks[i:i + chunkSize] for i in range(0, len(tasks), chunkSize)]
+
+    t0 = time.time()
+    if nWorkers == 1:
+        chunkResults = map(_runChunk, chunks)
+        results = [result for chunk in chunkResults for result in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=nWorkers) as pool:
+            chunkResults = pool.map(_runChunk, chunks)
+            results = [result for chunk in chunkResults for result in chunk]
+    duration = time.time() - t0
+
+    summary = {}
+    for configIndex, name in enumerate(names):
+        runs = [result[1:] for result in results if result[0] == configIndex]
+        estimates, nTrials = zip(*runs) if runs else ((), ())
+        summary[name] = _summarize(estimates, nTrials, trueValue)
+        summary[name]['duration'] = duration
+    return summary
+
+
+def simulateStaircase(handlerType, handlerKwargs, observer, nRuns=100,
+                      estimator=None, **kwargs):
+    """Runs simulated observers through a single staircase configuration.
+
+    Takes the same keyword arguments as :func:`simulateStaircases` and
+    returns the dict of statistics for this configuration.
+    """
+    configurations = {'': (handlerType, handlerKwargs, estimator)}
+    return simulateStaircases(configurations, observer, nRuns=nRuns,
+                              **kwargs)['']
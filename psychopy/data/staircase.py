@@ -259,7 +259,7 @@ class StairHandler(_BaseTrialHandler):
         if not dataName in self.otherData:  # init the list
             if self.thisTrialN > 0:
                 # might have run trials already
-                self.otherData[dataName] = [None] * (self.thisTrialN - 1)
+                self.otherData[dataName] = [None] * self.thisTrialN
             else:
                 self.otherData[dataName] = []
         # then add current value
@@ -387,6 +387,8 @@ class StairHandler(_BaseTrialHandler):
             for key in self.otherData:
                 while len(self.otherData[key]) < self.thisTrialN:
                     self.otherData[key].append(None)
+            # the previous trial is complete
+            self._updateStream()
             # update pointer for next trial
             self.thisTrialN += 1
             self.intensities.append(self._nextIntensity)
@@ -424,6 +426,18 @@ class StairHandler(_BaseTrialHandler):
         if (self.minVal is not None) and (self._nextIntensity < self.minVal):
             self._nextIntensity = self.minVal
 
+    def _nCompletedTrials(self):
+        return len(self.data)
+
+    def _getTrialRow(self, trialN):
+        row = {'trialN': trialN,
+               'intensity': self.intensities[trialN],
+               'response': self.data[trialN]}
+        for name, values in self.otherData.items():
+            if trialN < len(values) and values[trialN] is not None:
+                row[name] = values[trialN]
+        return row
+
     def saveAsText(self, fileName,
                    delim=None,
                    matrixOnly=False,
@@ -1065,6 +1079,8 @@ class QuestHandler(StairHandler):
                 # do stuff here for the trial
         """
         if self.finished == False:
+            # the previous trial is complete
+            self._updateStream()
             # update pointer for next trial
             self.thisTrialN += 1
             self.intensities.append(self._nextIntensity)
@@ -1141,7 +1157,9 @@ class PsiHandler(StairHandler):
                  prior=None,
                  fromFile=False,
                  extraInfo=None,
-                 name=''):
+                 name='',
+                 dtype='float64',
+                 posteriorCutoff=None):
         """Initializes the handler and creates an internal Psi Object for
         grid approximation.
 
@@ -1214,6 +1232,21 @@ class PsiHandler(StairHandler):
                 Optional name for the PsiHandler used in PsychoPy's built-in
                 logging system.
 
+            dtype   (str)
+                Precision of the likelihood tables the next intensity is
+                chosen with. 'float32' halves their memory use and makes
+                choosing the next intensity faster on fine grids. The
+                posterior is always kept in double precision.
+                Defaults to 'float64'.
+
+            posteriorCutoff (float or None)
+                If given, grid points with a posterior probability below
+                `posteriorCutoff` times that of the most probable point
+                (e.g. 1e-6) are left out when choosing the next intensity.
+                This makes choosing it faster as the posterior narrows down
+                over a run. All points are still updated with each response.
+                Defaults to None (use all points).
+
         :Raises:
 
             NotImplementedError
@@ -1246,7 +1279,8 @@ class PsiHandler(StairHandler):
         self._psi = PsiObject_(
             intensRange, alphaRange, betaRange, intensPrecision,
             alphaPrecision, betaPrecision, delta=delta,
-            stepType=stepType, TwoAFC=twoAFC, prior=prior)
+            stepType=stepType, TwoAFC=twoAFC, prior=prior, dtype=dtype,
+            posteriorCutoff=posteriorCutoff)
 
         self._psi.update(None)
 
@@ -1274,6 +1308,8 @@ class PsiHandler(StairHandler):
         """
         self._checkFinished()
         if self.finished == False:
+            # the previous trial is complete
+            self._updateStream()
             # update pointer for next trial
             self.thisTrialN += 1
             self.intensities.append(self._psi.nextIntensity)
@@ -1621,6 +1657,8 @@ class QuestPlusHandler(StairHandler):
     def __next__(self):
         self._checkFinished()
         if not self.finished:
+            # the previous trial is complete
+            self._updateStream()
             # update pointer for next trial
             self.thisTrialN += 1
             if self.thisTrialN == 0 and self.startIntensity is not None:
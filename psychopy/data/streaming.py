@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Stream trial data to a wide text file as each trial completes.
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+import os
+import codecs
+import json
+import shutil
+
+import numpy as np
+
+from psychopy import logging
+from psychopy.tools.filetools import (openOutputFile, genDelimiter,
+                                      genFilenameFromDelimiter)
+from .columnstore import ColumnStore, formatCell
+
+try:
+    import openpyxl
+    haveOpenpyxl = True
+except ImportError:
+    haveOpenpyxl = False
+
+# version of the sidecar schema files
+schemaVersion = 1
+
+
+def getSchemaFileName(fileName):
+    """Get the name of the sidecar file describing the columns of a streamed
+    data file.
+    """
+    return fileName + '.schema.json'
+
+
+def _formatHeader(names, delim):
+    return u''.join(u'%s%s' % (name, delim) for name in names) + u'\n'
+
+
+def _formatRow(row, names, delim):
+    """Format a row given as a dict like the rows of a
+    :class:`~psychopy.data.columnstore.ColumnStore`.
+    """
+    cells = []
+    for name in names:
+        if name not in row:
+            cells.append(delim)
+            continue
+        value = row[name]
+        if isinstance(value, np.generic):
+            value = value.item()
+        cells.append(formatCell(value) + delim)
+    return u''.join(cells) + u'\n'
+
+
+def _replaceFile(fileName, headerOffset, writeData):
+    """Rewrite `fileName` from `headerOffset` bytes on, keeping anything
+    before it (e.g. earlier sessions of an appended file). `writeData` is
+    called with the source file (positioned at `headerOffset`) and the binary
+    file to write to.
+    """
+    tmpName = fileName + '.tmp'
+    with open(fileName, 'rb') as src, open(tmpName, 'wb') as dst:
+        dst.write(src.read(headerOffset))
+        writeData(src, dst)
+    os.replace(tmpName, fileName)
+
+
+def _encodeReplacement(text, encoding, src, headerOffset):
+    """Encode `text` to replace the rest of the file `src` (positioned at
+    `headerOffset`), only keeping a byte order mark if it starts the file and
+    the text being replaced had one too.
+    """
+    data = text.encode(encoding)
+    if data.startswith(codecs.BOM_UTF8):
+        oldStart = src.read(len(codecs.BOM_UTF8))
+        src.seek(headerOffset)
+        if headerOffset > 0 or oldStart != codecs.BOM_UTF8:
+            data = data[len(codecs.BOM_UTF8):]
+    return data
+
+
+def _rewriteHeader(fileName, headerOffset, header, encoding):
+    """Replace the header line of a streamed file, copying the rows as they
+    are.
+    """
+    def writeData(src, dst):
+        dst.write(_encodeReplacement(header, encoding, src, headerOffset))
+        src.readline()  # the old header
+        shutil.copyfileobj(src, dst)
+
+    _replaceFile(fileName, headerOffset, writeData)
+
+
+def finalizeTrialStream(fileName):
+    """Complete the header of a streamed data file that wasn't closed (e.g.
+    after a crash), using its sidecar schema file.
+
+    While streaming, trials are written with the columns known at the time
+    and columns appearing later are added to the end of each row, but the
+    header line is only completed when the stream is closed. Until then the
+    full list of columns is kept in a sidecar file (`<fileName>.schema.json`).
+
+    Parameters
+    ----------
+    fileName : str
+        Path of the streamed data file (not the schema file).
+
+    Returns
+    -------
+    list of str or None
+        The columns of the file, or None if there was no schema file (i.e.
+        the file was already complete).
+    """
+    schemaFileName = getSchemaFileName(fileName)
+    if not os.path.isfile(schemaFileName):
+        return None
+    with open(schemaFileName, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    if schema['columns'] != schema['header']:
+        _rewriteHeader(fileName, schema['headerOffset'],
+                       _formatHeader(schema['columns'], schema['delimiter']),
+                       schema['encoding'])
+    os.remove(schemaFileName)
+    return schema['columns']
+
+
+class TrialDataStream:
+    """Appends rows of trial data to a wide text (.csv / .tsv) file as they
+    complete, so saving during a session only costs the new rows.
+
+    Rows are kept in a :class:`~psychopy.data.columnstore.ColumnStore` and
+    written with the columns in the order they first appeared. When a new
+    column appears the file isn't rewritten: later rows just have more cells
+    and the columns are recorded in a sidecar schema file. The header line is
+    completed (and the columns put in their final order, if that differs)
+    once, when the stream is closed. Files left open by a crash can be
+    completed with :func:`finalizeTrialStream`.
+
+    Parameters
+    ----------
+    fileName : str
+        Path of the data file, '.csv' or '.tsv' is added according to `delim`
+        if it has no extension.
+    delim : str or None
+        Delimiter, by default ',' for .csv files and tab otherwise.
+    encoding : str
+        Encoding of the file.
+    append : bool
+        Add to the end of an existing file rather than making a new one.
+    fileCollisionMethod : str
+        Collision method passed to
+        :func:`~psychopy.tools.fileerrortools.handleFileCollision` (when not
+        appending).
+    store : :class:`~psychopy.data.columnstore.ColumnStore` or None
+        Store holding the rows, if they're already kept by the caller. Rows
+        added to the store are written by :meth:`writeRows`.
+    excelFileName : str or None
+        If given, the rows are also saved to this Excel (.xlsx) file when the
+        stream is closed.
+
+    Examples
+    --------
+    Streaming rows and closing the file::
+
+        stream = TrialDataStream('data.csv')
+        stream.writeRow({'rt': 0.5, 'key': 'left'})
+        stream.writeRow({'rt': 0.7, 'key': 'right', 'corr': 1})
+        stream.close()
+
+    """
+
+    def __init__(self, fileName, delim=None, encoding='utf-8-sig',
+                 append=False, fileCollisionMethod='rename', store=None,
+                 excelFileName=None):
+        if delim is None:
+            delim = genDelimiter(fileName)
+        fileName = genFilenameFromDelimiter(fileName, delim)
+        self.requestedFileName = fileName
+        self.delim = delim
+        self.encoding = encoding
+        self._store = None
+        self.store = ColumnStore() if store is None else store
+        self.excelFileName = excelFileName
+        self.columns = []  # columns of the rows written, in order
+        self.nRows = 0  # rows written so far
+        self._header = None  # columns in the header line of the file
+        self._changed = False  # whether rows already written were modified
+
+        if append and os.path.isfile(fileName):
+            self._headerOffset = os.path.getsize(fileName)
+        else:
+            self._headerOffset = 0
+        self._file = openOutputFile(
+            fileName, append=append,
+            fileCollisionMethod=fileCollisionMethod, encoding=encoding)
+        self.fileName = self._file.name
+        self.schemaFileName = getSchemaFileName(self.fileName)
+
+    def __repr__(self):
+        return "<TrialDataStream: %r, %i rows>" % (self.fileName, self.nRows)
+
+    @property
+    def store(self):
+        """The :class:`~psychopy.data.columnstore.ColumnStore` holding the
+        rows."""
+        return self._store
+
+    @store.setter
+    def store(self, store):
+        if self._store is not None:
+            self._store.removeObserver(self.rowChanged)
+        self._store = store
+        # rows changed in the store after being written need a rewrite
+        store.addObserver(self.rowChanged)
+
+    @property
+    def closed(self):
+        """True once the stream has been closed."""
+        return self._file is None
+
+    def _saveSchema(self):
+        """Record the columns of the rows on disk in the sidecar file.
+        """
+        schema = {'version': schemaVersion,
+                  'delimiter': self.delim,
+                  'encoding': self.encoding,
+                  'headerOffset': self._headerOffset,
+                  'header': self._header,
+                  'columns': self.columns}
+        tmpName = self.schemaFileName + '.tmp'
+        with open(tmpName, 'w', encoding='utf-8') as f:
+            json.dump(schema, f)
+        os.replace(tmpName, self.schemaFileName)
+
+    def writeRow(self, row):
+        """Add a row (a dict of values keyed by column name) and write it to
+        the file.
+        """
+        self.store.appendRow(row)
+        self.writeRows()
+
+    def writeRows(self, names=None, header=False):
+        """Write rows that have been added to the store since the last write.
+
+        Parameters
+        ----------
+        names : list of str or None
+            Columns to write, by default those of the store. Columns that
+            haven't been written before are added after the existing ones.
+        header : bool
+            Write the header line even if there are no rows yet (it's
+            otherwise written with the first row).
+        """
+        if self._file is None:
+            raise ValueError("Can't write to a closed TrialDataStream")
+        stop = len(self.store)
+        if self._header is None and stop == 0 and not header:
+            # wait for the first row, so the header has its columns
+            return
+        if names is None:
+            names = self.store.names
+        newNames = [name for name in names if name not in self.columns]
+        if self._header is None:
+            self.columns.extend(newNames)
+            self._header = list(self.columns)
+            self._file.write(_formatHeader(self._header, self.delim))
+            self._saveSchema()
+        elif newNames:
+            self.columns.extend(newNames)
+            self._saveSchema()
+        if stop > self.nRows:
+            self._file.writelines(self.store.formatRows(
+                self.columns, start=self.nRows, stop=stop, delim=self.delim))
+            self.nRows = stop
+        self._file.flush()
+
+    def rowChanged(self, row):
+        """Tell the stream a value in the store has been changed, so the file
+        is rewritten on closing if that row was already written. This is
+        called by the store whenever one of its values is set.
+        """
+        if row < self.nRows:
+            self._changed = True
+
+    def truncate(self, nRows):
+        """Discard the rows after the first `nRows` (e.g. when trials are
+        rewound). They stay in the file until it is rewritten on closing.
+        """
+        if nRows < len(self.store):
+            self.store.truncate(nRows)
+        if nRows < self.nRows:
+            self.nRows = nRows
+            self._changed = True
+
+    def flush(self):
+        """Write any rows not yet written and flush the file.
+        """
+        self.writeRows()
+
+    def close(self, columns=None, lastRow=None):
+        """Write the remaining rows, complete the header and close the file.
+
+        Parameters
+        ----------
+        columns : list of str or None
+            The columns of the finished file, in order. By default these are
+            the columns in the order they were first written, which only
+            needs the header line rewriting.
+        lastRow : dict or None
+            A row that isn't in the store (e.g. an unfinished trial), written
+            after the others.
+        """
+        if self._file is None:
+            return
+        self.writeRows(columns, header=True)
+        if lastRow:
+            newNames = [name for name in lastRow if name not in self.columns]
+            self.columns.extend(newNames)
+            self._file.write(_formatRow(lastRow, self.columns, self.delim))
+        self._file.close()
+        self._file = None
+        self.store.removeObserver(self.rowChanged)
+        if columns is None:
+            columns = self.columns
+        columns = list(columns)
+
+        if self._changed or columns != self.columns:
+            # rows on disk are out of date or in the wrong order
+            store, delim = self.store, self.delim
+            text = _formatHeader(columns, delim) + u''.join(
+                store.formatRows(columns, delim=delim))
+            if lastRow:
+                text += _formatRow(lastRow, columns, delim)
+
+            def writeData(src, dst):
+                dst.write(_encodeReplacement(text, self.encoding, src,
+                                             self._headerOffset))
+
+            _replaceFile(self.fileName, self._headerOffset, writeData)
+        elif columns != self._header:
+            _rewriteHeader(self.fileName, self._headerOffset,
+                           _formatHeader(columns, self.delim), self.encoding)
+        if os.path.isfile(self.schemaFileName):
+            os.remove(self.schemaFileName)
+        logging.info('saved data to %r' % self.fileName)
+
+        if self.excelFileName:
+            self.saveAsExcel(self.excelFileName, columns)
+
+    def saveAsExcel(self, fileName, columns=None, sheetName='data'):
+        """Save the rows to an Excel (.xlsx) file, with one row per trial.
+        """
+        if not haveOpenpyxl:
+            raise ImportError('openpyxl is required for saving files in '
+                              'Excel (xlsx) format, but was not found.')
+        if not fileName.endswith('.xlsx'):
+            fileName += '.xlsx'
+        if columns is None:
+            columns = self.columns or self.store.names
+        self.store.toDataFrame(columns).to_excel(
+            fileName, sheet_name=sheetName, index=False, engine='openpyxl')
+        logging.info('saved data to %r' % fileName)
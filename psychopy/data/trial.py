@@ -1040,6 +1040,7 @@ class TrialHandler2(_BaseTrialHandler):
         # mark previous trial as elapsed
         if self.thisTrial is not None:
             self.elapsedTrials.append(self.thisTrial)
+            self._updateStream()
         # if upcoming is None, recaculate
         if self.upcomingTrials is None:
             self.calculateUpcoming()
@@ -1563,6 +1564,10 @@ class TrialHandler2(_BaseTrialHandler):
         various other analysis programs, means that some information must
         be repeated on every row.
 
+        If trials are being streamed to this file (see
+        :meth:`startStream`) only the trials completed since the last save
+        are written.
+
         In particular, if the trialHandler's 'extraInfo' exists, then each
         entry in there occurs in every row. In builder, this will include
         any entries in the 'Experiment info' field of the
@@ -1612,6 +1617,13 @@ class TrialHandler2(_BaseTrialHandler):
         # create the file or send to stdout
         fileName = genFilenameFromDelimiter(fileName, delim)
 
+        # trials are already being written to this file, just catch up
+        stream = getattr(self, '_stream', None)
+        if (stream is not None and not matrixOnly and
+                fileName in (stream.requestedFileName, stream.fileName)):
+            self._updateStream()
+            return
+
         with openOutputFile(fileName=fileName, append=appendFile,
                             fileCollisionMethod=fileCollisionMethod,
                             encoding=encoding) as f:
@@ -1625,6 +1637,16 @@ class TrialHandler2(_BaseTrialHandler):
         if (fileName is not None) and (fileName != 'stdout'):
             logging.info('saved wide-format data to %s' % f.name)
 
+    def _nCompletedTrials(self):
+        return len(self.elapsedTrials)
+
+    def _getTrialRow(self, trialN):
+        return self.elapsedTrials[trialN]
+
+    def _getStreamColumns(self):
+        # same columns, in the same order, as saveAsWideText
+        return self.columns
+
     def saveAsJson(self,
                    fileName=None,
                    encoding='utf-8',
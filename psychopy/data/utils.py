@@ -9,6 +9,7 @@ import os
 import re
 import ast
 import pickle
+import hashlib
 import time, datetime
 import numpy as np
 import pandas as pd
@@ -36,6 +37,15 @@ haveXlrd = False
 
 _nonalphanumeric_re = re.compile(r'\W')  # will match all bad var name chars
 
+# version of the on-disk conditions cache, bump this whenever the way
+# conditions files are parsed changes so that cached trial lists are ignored
+conditionsCacheVersion = 1
+# number of parsed conditions files kept in memory
+conditionsCacheSize = 32
+_conditionsCache = OrderedDict()  # cache key: (trialList, fieldNames)
+# decimal mark used in delimited conditions files with each separator
+_delimitedDecimals = {',': '.', ';': ',', '\t': '.'}
+
 
 def checkValidFilePath(filepath, makeValid=True):
     """Checks whether file path location (e.g. is a valid folder)
@@ -213,7 +223,164 @@ def listFromString(val, excludeEmpties=False):
     return asList
 
 
-def importConditions(fileName, returnFieldNames=False, selection=""):
+def getConditionsCacheDir():
+    """Get the folder where parsed conditions files are saved.
+    """
+    from psychopy import prefs
+    return os.path.join(prefs.paths['userCacheDir'], 'conditions')
+
+
+def clearConditionsCache(disk=False):
+    """Forget the conditions files parsed by `importConditions`.
+
+    Parameters
+    ----------
+    disk : bool
+        Also delete the parsed conditions files saved on disk.
+    """
+    _conditionsCache.clear()
+    cacheDir = getConditionsCacheDir()
+    if disk and os.path.isdir(cacheDir):
+        for cacheFile in os.listdir(cacheDir):
+            try:
+                os.remove(os.path.join(cacheDir, cacheFile))
+            except OSError:
+                pass
+
+
+def _getConditionsCacheKey(fileName):
+    """Get the key of a conditions file in the conditions cache. This changes
+    whenever the file is modified.
+    """
+    fileName = os.path.abspath(fileName)
+    stat = os.stat(fileName)
+    pathHash = hashlib.sha1(fileName.encode('utf-8')).hexdigest()[:16]
+    stateHash = hashlib.sha1("{}|{}|{}".format(
+        stat.st_mtime_ns, stat.st_size, conditionsCacheVersion
+    ).encode('utf-8')).hexdigest()[:16]
+    return "{}_{}".format(pathHash, stateHash)
+
+
+def _getCachedConditions(cacheKey):
+    """Get the trial list and field names of a parsed conditions file from
+    memory or, failing that, from disk. Returns `None` if the file hasn't
+    been parsed since it was last modified.
+    """
+    if cacheKey in _conditionsCache:
+        _conditionsCache.move_to_end(cacheKey)
+        return _conditionsCache[cacheKey]
+
+    cacheFile = os.path.join(getConditionsCacheDir(), cacheKey + '.pkl')
+    try:
+        with open(cacheFile, 'rb') as f:
+            version, trialList, fieldNames = pickle.load(f)
+    except Exception:  # missing, or not readable by this version
+        return None
+    if version != conditionsCacheVersion:
+        return None
+
+    _cacheConditions(cacheKey, trialList, fieldNames, save=False)
+    return trialList, fieldNames
+
+
+def _cacheConditions(cacheKey, trialList, fieldNames, save=True):
+    """Keep a parsed conditions file in memory and (optionally) save it to
+    disk, replacing any earlier version of the same file.
+    """
+    _conditionsCache[cacheKey] = (trialList, fieldNames)
+    while len(_conditionsCache) > conditionsCacheSize:
+        _conditionsCache.popitem(last=False)
+    if not save:
+        return
+
+    cacheDir = getConditionsCacheDir()
+    pathHash = cacheKey.split('_')[0]
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        # write to a temporary file first, so another session reading the
+        # cache never sees a partially written file
+        tmpFile = os.path.join(cacheDir, cacheKey + '.tmp')
+        with open(tmpFile, 'wb') as f:
+            pickle.dump((conditionsCacheVersion, trialList, fieldNames), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpFile, os.path.join(cacheDir, cacheKey + '.pkl'))
+    except Exception as err:
+        logging.debug("Could not save conditions to the cache: {}".format(err))
+        return
+    # remove versions of the file this one replaces
+    for cacheFile in os.listdir(cacheDir):
+        if cacheFile.startswith(pathHash) and cacheFile != cacheKey + '.pkl':
+            try:
+                os.remove(os.path.join(cacheDir, cacheFile))
+            except OSError:
+                pass
+
+
+def _sniffDelimiter(fileName):
+    """Get the separator and decimal mark of a delimited conditions file.
+
+    The header row holds parameter names, which can't contain punctuation or
+    spaces, so the separator is the character it contains most of.
+    """
+    try:
+        with open(fileName, encoding='utf-8-sig') as f:
+            header = f.readline()
+    except (OSError, UnicodeDecodeError):
+        return ',', '.'
+    sep = max(_delimitedDecimals, key=header.count)  # ',' if there's none
+
+    return sep, _delimitedDecimals[sep]
+
+
+def _floatFromEuString(val):
+    """Convert a string using a decimal comma to a float, if it is a number.
+    """
+    if isinstance(val, str):
+        try:
+            return float(val.replace(",", "."))
+        except ValueError:
+            pass
+    return val
+
+
+def _selectConditions(trialList, selection):
+    """Get the conditions picked by `selection` (see `importConditions`).
+
+    The conditions are copied, so changing them doesn't change the trial list
+    kept in the conditions cache.
+    """
+    # if we have a selection then try to parse it
+    if isinstance(selection, str) and len(selection) > 0:
+        selection = indicesFromString(selection)
+        if not isinstance(selection, slice):
+            for n in selection:
+                try:
+                    assert n == int(n)
+                except AssertionError:
+                    raise exceptions.ConditionsImportError(
+                        "importConditions() was given some `indices` but could not parse them",
+                        translated=_translate("importConditions() was given some `indices` but could not parse them")
+                    )
+
+    # the selection might now be a slice or a series of indices
+    if isinstance(selection, slice):
+        trialList = trialList[selection]
+    elif len(selection) > 0:
+        trialList = [trialList[int(ii)] for ii in selection]
+
+    selected = []
+    for trial in trialList:
+        trial = trial.copy()
+        for fieldName, val in trial.items():
+            if isinstance(val, list):
+                trial[fieldName] = list(val)
+        selected.append(trial)
+
+    return selected
+
+
+def importConditions(fileName, returnFieldNames=False, selection="",
+                     useCache=True):
     """Imports a list of conditions from an .xlsx, .csv, or .pkl file
 
     The output is suitable as an input to :class:`TrialHandler`
@@ -248,6 +415,11 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
     - slice(-10, 2, None)  # the same as above
     - random(5) * 8  # five random vals 0-7
 
+    Parsed files are cached, in memory and on disk (see
+    `getConditionsCacheDir`), until they are modified. Importing the same
+    file again, e.g. for another loop or with another `selection`, doesn't
+    parse it again. Set `useCache` to `False` to always parse the file.
+
     """
 
     def _attemptImport(fileName):
@@ -262,8 +434,10 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
             errs = []
             # list of possible delimiters
             delims = (",", ".", ";", "\t")
-            # try a variety of separator / decimal pairs
-            for sep, dec in [
+            # try the separator / decimal pair sniffed from the header first,
+            # then a variety of others
+            sniffed = _sniffDelimiter(fileName)
+            for sep, dec in [sniffed] + [pair for pair in [
                 # most common in US, EU
                 (',', '.'), 
                 (';', ','),
@@ -271,7 +445,7 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
                 ('\t', '.'), 
                 ('\t', ','), 
                 (';', '.')
-            ]:
+            ] if pair != sniffed]:
                 # try to load
                 try:
                     thisAttempt = pd.read_csv(
@@ -308,13 +482,8 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
                 )
             # if we made it herre, we successfully loaded the file
             for col in trialsArr.columns:
-                for row, cell in enumerate(trialsArr[col]):
-                    if isinstance(cell, str):
-                        tryVal = cell.replace(",", ".")
-                        try:
-                            trialsArr[col][row] = float(tryVal)
-                        except ValueError:
-                            pass
+                if trialsArr[col].dtype == object:
+                    trialsArr[col] = trialsArr[col].map(_floatFromEuString)
             logging.debug(u"Read csv file with pandas: {}".format(fileName))
         elif fileName.endswith(('.xlsx', '.xlsm')):
             trialsArr = pd.read_excel(fileName, engine='openpyxl')
@@ -401,7 +570,16 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
             trialList.append(thisTrial)
         return trialList, fieldNames
 
-    if (fileName.endswith(('.csv', '.tsv'))
+    cached = None
+    if useCache:
+        cacheKey = _getConditionsCacheKey(fileName)
+        cached = _getCachedConditions(cacheKey)
+
+    if cached is not None:
+        trialList, fieldNames = cached
+        logging.debug(u"Read conditions from the cache: {}".format(fileName))
+
+    elif (fileName.endswith(('.csv', '.tsv'))
             or (fileName.endswith(('.xlsx', '.xls', '.xlsm')) and haveXlrd)):
         trialList, fieldNames = _attemptImport(fileName=fileName)
 
@@ -506,34 +684,17 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
             translated=_translate('Your conditions file should be an xlsx, csv, dlm, tsv or pkl file')
         )
 
-    # if we have a selection then try to parse it
-    if isinstance(selection, str) and len(selection) > 0:
-        selection = indicesFromString(selection)
-        if not isinstance(selection, slice):
-            for n in selection:
-                try:
-                    assert n == int(n)
-                except AssertionError:
-                    raise exceptions.ConditionsImportError(
-                        "importConditions() was given some `indices` but could not parse them",
-                        translated=_translate("importConditions() was given some `indices` but could not parse them")
-                    )
+    if useCache and cached is None:
+        # no need to save pickled files, they load just as fast
+        _cacheConditions(cacheKey, trialList, fieldNames,
+                         save=not fileName.endswith('.pkl'))
 
-    # the selection might now be a slice or a series of indices
-    if isinstance(selection, slice):
-        trialList = trialList[selection]
-    elif len(selection) > 0:
-        allConds = trialList
-        trialList = []
-        print(selection)
-        print(len(allConds))
-        for ii in selection:
-            trialList.append(allConds[int(ii)])
+    trialList = _selectConditions(trialList, selection)
 
     logging.exp('Imported %s as conditions, %d conditions, %d params' %
                 (fileName, len(trialList), len(fieldNames)))
     if returnFieldNames:
-        return (trialList, fieldNames)
+        return (trialList, list(fieldNames))
     else:
         return trialList
 
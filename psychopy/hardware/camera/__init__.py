@@ -57,7 +57,6 @@ import sys
 import math
 import uuid
 import threading
-import queue
 import time
 import numpy as np
 
@@ -107,6 +106,10 @@ CAMERA_LIB_NULL = u'Null'
 CAMERA_FRAMERATE_NOMINAL_NTSC = '30.000030'
 CAMERA_FRAMERATE_NTSC = 30.000030
 
+# number of frame buffers allocated for a camera stream, more are allocated if
+# frames can't be dropped
+CAMERA_FRAME_BUFFER_SIZE = 8
+
 # FourCC and pixel format mappings, mostly used with AVFoundation to determine
 # the FFMPEG decoder which is most suitable for it. Please expand this if you
 # know any more!
@@ -563,17 +566,25 @@ class CameraInterfaceFFmpeg(CameraInterface):
     mic : MicrophoneInterface or None
         Microphone interface to use for audio recording. If `None`, no audio
         recording is performed.
+    frameBufferSize : int
+        Number of preallocated frame buffers used to pass frames from the
+        stream thread to the main thread.
+    dropFrames : bool
+        If `True`, the oldest frame waiting is dropped when all frame buffers
+        are in use. If `False`, more frame buffers are allocated instead.
 
     """
     _cameraLib = u'ffpyplayer'
 
-    def __init__(self, device, mic=None):
+    def __init__(self, device, mic=None,
+                 frameBufferSize=CAMERA_FRAME_BUFFER_SIZE, dropFrames=False):
         super().__init__(device=device)
 
         self._bufferSecs = 0.5  # number of seconds to buffer
         self._cameraInfo = device
         self._mic = mic  # microphone interface
-        self._frameQueue = queue.Queue()
+        self._frameBuffer = movietools.MovieFrameBuffer(
+            frameBufferSize, dropFrames=dropFrames)
         self._enableEvent = threading.Event()
         self._enableEvent.clear()
         self._exitEvent = threading.Event()
@@ -633,7 +644,14 @@ class CameraInterfaceFFmpeg(CameraInterface):
         `_enqueueFrame()`.
 
         """
-        return self._frameQueue.qsize()
+        return self._frameBuffer.framesWaiting
+
+    @property
+    def framesDropped(self):
+        """Number of frames dropped since all frame buffers were in use
+        (`int`).
+        """
+        return self._frameBuffer.framesDropped
 
     def isOpen(self):
         """Check if the camera stream is open (`bool`).
@@ -655,7 +673,7 @@ class CameraInterfaceFFmpeg(CameraInterface):
         
         self._exitEvent.clear()  # signal the thread to stop
         
-        def _frameGetterAsync(videoCapture, frameQueue, exitEvent, recordEvent, 
+        def _frameGetterAsync(videoCapture, frameBuffer, exitEvent, recordEvent,
                               warmUpBarrier, recordingBarrier, audioCapture):
             """Get frames from the camera stream asynchronously.
 
@@ -664,10 +682,9 @@ class CameraInterfaceFFmpeg(CameraInterface):
             videoCapture : ffpyplayer.player.MediaPlayer
                 FFmpeg media player object. This object will be under direct 
                 control of this function.
-            frameQueue : queue.Queue
-                Queue to put frames into. The queue has an unlimited size, so 
-                be careful with memory use. This queue should be flushed when
-                camera thread is paused.
+            frameBuffer : psychopy.tools.movietools.MovieFrameBuffer
+                Frame buffers to copy frames into. Frames are passed to the
+                main thread with the frame size and stream metadata.
             exitEvent : threading.Event
                 Event used to signal the thread to stop.
             recordEvent : threading.Event
@@ -704,7 +721,7 @@ class CameraInterfaceFFmpeg(CameraInterface):
             pollInterval = (1.0 / float(numer / divisor)) * 0.5
 
             # holds main-thread execution until its ready for frames
-            # frameQueue.put((frame, val, metadata))  # put the first frame
+            # frameBuffer.write(...)  # put the first frame
 
             warmUpBarrier.wait()  # wait for main thread to be ready
 
@@ -728,7 +745,11 @@ class CameraInterfaceFFmpeg(CameraInterface):
                     if isRecording:
                         thisFrameAbsTime = videoCapture.get_pts()
                         if lastAbsTime < thisFrameAbsTime:
-                            frameQueue.put((frame, val, metadata))
+                            # copy the pixel data into a free frame buffer
+                            frameImage, pts = frame
+                            frameBuffer.write(
+                                frameImage.to_memoryview()[0], pts,
+                                (frameImage.get_size(), metadata))
                             lastAbsTime = thisFrameAbsTime
 
                 if recordEvent.is_set() and not isRecording:
@@ -833,8 +854,8 @@ class CameraInterfaceFFmpeg(CameraInterface):
         # open a stream thread and pause wait until ready
         self._playerThread = threading.Thread(
             target=_frameGetterAsync,
-            args=(cap, 
-                  self._frameQueue, 
+            args=(cap,
+                  self._frameBuffer,
                   self._exitEvent,
                   self._enableEvent,
                   self._warmupBarrier,
@@ -848,6 +869,23 @@ class CameraInterfaceFFmpeg(CameraInterface):
         # pass off the player to the thread which will process the stream
         self._enqueueFrame()  # pull metadata from first frame
 
+    def _makeMovieFrame(self, colorData, absTime, frameInfo):
+        """Create a `MovieFrame` for frame data read from the frame buffer.
+        """
+        size, metadata = frameInfo
+
+        return MovieFrame(
+            frameIndex=self._frameIndex,
+            absTime=absTime,
+            # displayTime=self._recentMetadata['frame_size'],
+            size=size,
+            colorData=colorData,
+            audioChannels=0,
+            audioSamples=None,
+            metadata=metadata,
+            movieLib=self._cameraLib,
+            userData=None)
+
     def _enqueueFrame(self):
         """Grab the latest frame from the stream.
 
@@ -860,38 +898,12 @@ class CameraInterfaceFFmpeg(CameraInterface):
         """
         self._assertMediaPlayer()
 
-        try:
-            frameData = self._frameQueue.get_nowait()
-        except queue.Empty:
-            return False
-
-        frame, val, metadata = frameData  # update the frame
-
-        if val == CAMERA_STATUS_EOF:  # handle end of stream
+        frame = self._frameBuffer.readLatest()
+        if frame is None:
             return False
-        elif val == CAMERA_STATUS_PAUSED:  # handle when paused
-            return False
-        elif frame is None:  # handle when no frame is available
-            return False
-        
-        frameImage, pts = frame  # otherwise, unpack the frame
-
-        # if we have a new frame, update the frame information
-        videoBuffer = frameImage.to_bytearray()[0]
-        videoFrameArray = np.frombuffer(videoBuffer, dtype=np.uint8)
 
         # provide the last frame
-        self._lastFrame = MovieFrame(
-            frameIndex=self._frameIndex,
-            absTime=pts,
-            # displayTime=self._recentMetadata['frame_size'],
-            size=frameImage.get_size(),
-            colorData=videoFrameArray,
-            audioChannels=0,
-            audioSamples=None,
-            metadata=metadata,
-            movieLib=self._cameraLib,
-            userData=None)
+        self._lastFrame = self._makeMovieFrame(*frame)
 
         return True
 
@@ -948,6 +960,10 @@ class CameraInterfaceFFmpeg(CameraInterface):
         """Get all frames from the camera stream which are waiting to be 
         processed. 
 
+        The color data of the frames references the frame buffers, and is
+        only valid until the next call of `getFrames()`, `getRecentFrame()`
+        or `_enqueueFrame()` that returns frames. Copy it to keep it.
+
         Returns
         -------
         list
@@ -957,9 +973,10 @@ class CameraInterfaceFFmpeg(CameraInterface):
         """
         self._assertMediaPlayer()
 
-        frames = []
-        while self._enqueueFrame():
-            frames.append(self._lastFrame)
+        frames = [self._makeMovieFrame(*frame)
+                  for frame in self._frameBuffer.read()]
+        if frames:
+            self._lastFrame = frames[-1]
 
         return frames
 
@@ -973,8 +990,7 @@ class CameraInterfaceFFmpeg(CameraInterface):
             The most recent frame from the stream.
 
         """
-        while self._enqueueFrame():
-            pass
+        self._enqueueFrame()
 
         return self._lastFrame
 
@@ -993,7 +1009,8 @@ class CameraInterfaceOpenCV(CameraInterface):
     """
     _cameraLib = u'opencv'
 
-    def __init__(self, device, mic=None):
+    def __init__(self, device, mic=None,
+                 frameBufferSize=CAMERA_FRAME_BUFFER_SIZE, dropFrames=False):
         super().__init__(device)
         try:
             import cv2   # just import to check if it's available
@@ -1004,7 +1021,8 @@ class CameraInterfaceOpenCV(CameraInterface):
         
         self._cameraInfo = device
         self._mic = mic  # microphone interface
-        self._frameQueue = queue.Queue()
+        self._frameBuffer = movietools.MovieFrameBuffer(
+            frameBufferSize, dropFrames=dropFrames)
         self._enableEvent = threading.Event()
         self._exitEvent = threading.Event()
         self._warmUpBarrier = None
@@ -1098,7 +1116,14 @@ class CameraInterfaceOpenCV(CameraInterface):
         `_enqueueFrame()`.
 
         """
-        return self._frameQueue.qsize()
+        return self._frameBuffer.framesWaiting
+
+    @property
+    def framesDropped(self):
+        """Number of frames dropped because all frame buffers were in use 
+        (`int`).
+        """
+        return self._frameBuffer.framesDropped
     
     @property
     def frameRate(self):
@@ -1131,7 +1156,7 @@ class CameraInterfaceOpenCV(CameraInterface):
         """
         import cv2
         
-        def _frameGetterAsync(videoCapture, frameQueue, exitEvent, recordEvent, 
+        def _frameGetterAsync(videoCapture, frameBuffer, exitEvent, recordEvent,
                               warmUpBarrier, recordingBarrier, audioCapture):
             """Get frames asynchronously from the camera stream.
 
@@ -1140,8 +1165,8 @@ class CameraInterfaceOpenCV(CameraInterface):
             videoCapture : cv2.VideoCapture
                 Handle for the video capture object. This is opened outside the
                 thread and passed in.
-            frameQueue : queue.Queue
-                Queue to store frames in.
+            frameBuffer : psychopy.tools.movietools.MovieFrameBuffer
+                Frame buffers to store color converted frames in.
             exitEvent : threading.Event
                 Event to signal when the thread should stop.
             recordEvent : threading.Event
@@ -1173,9 +1198,10 @@ class CameraInterfaceOpenCV(CameraInterface):
 
             # start capturing frames
             isRecording = False
+            frame = None  # reused for each frame read from the camera
             while not exitEvent.is_set():
                 # Capture frame-by-frame
-                ret, frame = videoCapture.read()
+                ret, frame = videoCapture.read(frame)
 
                 # if frame is read correctly ret is True
                 if not ret:  # eol or something else
@@ -1184,10 +1210,15 @@ class CameraInterfaceOpenCV(CameraInterface):
                 else:
                     # don't queue frames unless they are newer than the last
                     if isRecording:
-                        # color conversion is done in the thread here
-                        colorData = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        # colorData = frame
-                        frameQueue.put((colorData, 0.0, None))
+                        # color conversion is done in the thread here, right 
+                        # into the frame buffer
+                        acquired = frameBuffer.acquire(frame.nbytes)
+                        if acquired is not None:
+                            index, colorData = acquired
+                            cv2.cvtColor(
+                                frame, cv2.COLOR_BGR2RGB,
+                                dst=colorData.reshape(frame.shape))
+                            frameBuffer.commit(index, 0.0)
 
                 # check if we should start or stop recording
                 if recordEvent.is_set() and not isRecording:
@@ -1276,7 +1307,7 @@ class CameraInterfaceOpenCV(CameraInterface):
         self._playerThread = threading.Thread(
             target=_frameGetterAsync,
             args=(cap, 
-                  self._frameQueue, 
+                  self._frameBuffer, 
                   self._exitEvent,
                   self._enableEvent,
                   self._warmUpBarrier,
@@ -1290,6 +1321,22 @@ class CameraInterfaceOpenCV(CameraInterface):
         # pass off the player to the thread which will process the stream
         self._enqueueFrame()  # pull metadata from first frame
 
+    def _makeMovieFrame(self, colorData, absTime, metadata):
+        """Create a `MovieFrame` for frame data read from the frame buffer.
+        """
+        return MovieFrame(
+            frameIndex=self._frameIndex,
+            absTime=absTime,
+            # displayTime=self._recentMetadata['frame_size'],
+            size=self._cameraInfo.frameSize,
+            colorFormat='rgb24',  # converted in thread
+            colorData=colorData,
+            audioChannels=0,
+            audioSamples=None,
+            metadata=metadata,
+            movieLib=self._cameraLib,
+            userData=None)
+
     def _enqueueFrame(self):
         """Grab the latest frame from the stream.
 
@@ -1302,40 +1349,12 @@ class CameraInterfaceOpenCV(CameraInterface):
         """
         self._assertMediaPlayer()
 
-        try:
-            frameData = self._frameQueue.get_nowait()
-        except queue.Empty:
-            return False
-
-        frame, val, _ = frameData  # update the frame
-
-        if val == 'eof':  # handle end of stream
-            return False
-        elif val == 'paused':  # handle when paused, not used for OpenCV yet
+        frame = self._frameBuffer.readLatest()
+        if frame is None:
             return False
-        elif frame is None:  # handle when no frame is available
-            return False
-        
-        frameImage = frame  # otherwise, unpack the frame
-
-        # if we have a new frame, update the frame information
-        # videoBuffer = frameImage.to_bytearray()[0]
-        videoFrameArray = np.ascontiguousarray(
-            frameImage.flatten(), dtype=np.uint8)
 
         # provide the last frame
-        self._lastFrame = MovieFrame(
-            frameIndex=self._frameIndex,
-            absTime=0.0,
-            # displayTime=self._recentMetadata['frame_size'],
-            size=self._cameraInfo.frameSize,
-            colorFormat='rgb24',  # converted in thread
-            colorData=videoFrameArray,
-            audioChannels=0,
-            audioSamples=None,
-            metadata=None,
-            movieLib=self._cameraLib,
-            userData=None)
+        self._lastFrame = self._makeMovieFrame(*frame)
 
         return True
 
@@ -1387,6 +1406,10 @@ class CameraInterfaceOpenCV(CameraInterface):
         """Get all frames from the camera stream which are waiting to be 
         processed. 
 
+        The color data of the frames references the frame buffers, and is
+        only valid until the next call of `getFrames()`, `getRecentFrame()`
+        or `_enqueueFrame()` that returns frames. Copy it to keep it.
+
         Returns
         -------
         list
@@ -1396,9 +1419,10 @@ class CameraInterfaceOpenCV(CameraInterface):
         """
         self._assertMediaPlayer()
 
-        frames = []
-        while self._enqueueFrame():
-            frames.append(self._lastFrame)
+        frames = [self._makeMovieFrame(*frame)
+                  for frame in self._frameBuffer.read()]
+        if frames:
+            self._lastFrame = frames[-1]
 
         return frames
 
@@ -1412,8 +1436,7 @@ class CameraInterfaceOpenCV(CameraInterface):
             The most recent frame from the stream.
 
         """
-        while self._enqueueFrame():
-            pass
+        self._enqueueFrame()
 
         return self._lastFrame
 
@@ -1480,6 +1503,15 @@ class Camera:
         safely ignored.
     name : str
         Label for the camera for logging purposes.
+    keepFrames : bool
+        Keep a copy of every frame captured while recording, so it can be
+        written to disk with `save()`. If `False`, only the most recent frame
+        is kept and frames are passed from the capture thread through a fixed
+        set of reused buffers without copying. Frames the main thread does not
+        get to in time are dropped and counted by `framesDropped`. Use this if
+        the camera stream is only presented or processed as it arrives.
+    frameBufferSize : int
+        Number of frame buffers used to pass frames from the capture thread.
 
     Examples
     --------
@@ -1516,7 +1548,8 @@ class Camera:
     """
     def __init__(self, device=0, mic=None, cameraLib=u'ffpyplayer',
                  frameRate=None, frameSize=None, bufferSecs=4, win=None,
-                 name='cam'):
+                 name='cam', keepFrames=True,
+                 frameBufferSize=CAMERA_FRAME_BUFFER_SIZE):
         # add attributes for setters
         self.__dict__.update(
             {'_device': None,
@@ -1746,6 +1779,9 @@ class Camera:
         self._captureThread = None
         # self._audioThread = None
         self._captureFrames = []  # array for storing frames
+        self._keepFrames = bool(keepFrames)  # copy frames to `_captureFrames`
+        self._frameBufferSize = int(frameBufferSize)
+        self._frameCount = 0  # frames captured if not keeping them
         # thread for polling the microphone
         self._audioTrack = None  # audio track from the recent recording
         # used to sync threads spawned by this class, created on `open()`
@@ -2009,11 +2045,31 @@ class Camera:
         if not self._isRecording:
             return 0
 
+        if self._keepFrames:
+            framesCaptured = len(self._captureFrames)
+        else:
+            framesCaptured = self._frameCount
+
         totalFramesBuffered = (
-            len(self._captureFrames) + self._captureThread.framesWaiting)
+            framesCaptured + self._captureThread.framesWaiting)
         
         return totalFramesBuffered
 
+    @property
+    def framesDropped(self):
+        """Number of frames dropped by the capture thread since the camera 
+        was opened, since the main thread did not retrieve them before their 
+        buffer was needed for a new frame (`int`).
+
+        Frames are only dropped if `keepFrames` is `False`. Call `update()` 
+        more often or increase `frameBufferSize` to prevent dropped frames.
+
+        """
+        if self._captureThread is None:
+            return 0
+
+        return self._captureThread.framesDropped
+
     @property
     def streamTime(self):
         """Current stream time in seconds (`float`). This time increases
@@ -2088,11 +2144,17 @@ class Camera:
         if not newFrames:
             return False
         
-        # add frames the the buffer
-        self._captureFrames.extend(newFrames)
+        # add frames the the buffer, color data references the frame buffers 
+        # of the capture thread until the next call, so keep copies
+        if self._keepFrames:
+            for frame in newFrames:
+                frame.colorData = frame.colorData.copy()
+            self._captureFrames.extend(newFrames)
+        else:
+            self._frameCount += len(newFrames)
         
         # set the last frame in the buffer as the most recent
-        self._lastFrame = self._captureFrames[-1]
+        self._lastFrame = newFrames[-1]
 
         return True
 
@@ -2117,13 +2179,17 @@ class Camera:
                 "Opening camera stream using FFmpeg. (device={})".format(desc))
             self._captureThread = CameraInterfaceFFmpeg(
                 device=self._cameraInfo, 
-                mic=self._mic)
+                mic=self._mic,
+                frameBufferSize=self._frameBufferSize,
+                dropFrames=not self._keepFrames)
         elif self._cameraLib == u'opencv':
             logging.debug(
                 "Opening camera stream using OpenCV. (device={})".format(desc))
             self._captureThread = CameraInterfaceOpenCV(
                 device=self._cameraInfo, 
-                mic=self._mic)
+                mic=self._mic,
+                frameBufferSize=self._frameBufferSize,
+                dropFrames=not self._keepFrames)
         else:
             raise ValueError(
                 "Invalid value for parameter `cameraLib`, expected one of "
@@ -2165,6 +2231,7 @@ class Camera:
         
         self._audioTrack = None
         self._lastFrame = None
+        self._frameCount = 0
 
         # start recording audio if available
         if self._mic is not None:
@@ -2260,6 +2327,11 @@ class Camera:
             raise RuntimeError(
                 "Attempting to call `save()` before calling `stop()`.")
 
+        if not self._keepFrames:
+            raise RuntimeError(
+                "Cannot call `save()`, frames are not kept if the camera was "
+                "created with `keepFrames=False`.")
+
         # check if a file exists at the given path, if so, delete it
         if os.path.exists(filename):
             msg = (
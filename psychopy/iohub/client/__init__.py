@@ -12,6 +12,7 @@ import json
 import signal
 from weakref import proxy
 
+import numpy as np
 import psutil
 
 try:
@@ -103,6 +104,8 @@ class DeviceRPC():
             conversionMethod = ioHubConnection.eventListToNamedTuple
 
         if self.device_class != 'Experiment':
+            if asType in ('numpy', 'pandas'):
+                return ioHubConnection._eventListsToArrays(r, asType)
             return [conversionMethod(el) for el in r]
 
         EVT_TYPE_IX = DeviceEvent.EVENT_TYPE_ID_INDEX
@@ -115,6 +118,8 @@ class DeviceRPC():
                 ltext = l[self._log_text_index]
                 llevel = l[self._log_level_index]
                 psycho_logging.log(ltext, llevel, ltime)
+        if asType in ('numpy', 'pandas'):
+            return ioHubConnection._eventListsToArrays(r, asType)
         return [conversionMethod(el) for el in r]
 
 
@@ -274,6 +279,10 @@ class ioHubConnection():
         # udp port setup
         self.udp_client = None
 
+        # shared memory buffer the ioHub Server writes new events to, if
+        # enabled by the shared_memory_events config setting.
+        self._shared_event_buffer = None
+
         # the dynamically generated object that contains an attribute for
         # each device registered for monitoring with the ioHub server so
         # that devices can be accessed experiment process side by device name.
@@ -291,6 +300,8 @@ class ioHubConnection():
         self._iohub_server_config = None
         self._shutdown_attempted = False
         self._cv_order = None
+        self._cv_block_size = 1
+        self._cv_cache = []
         self._message_cache = []
         self.iohub_status = self._startServer(ioHubConfig, ioHubConfigAbsPath)
         if self.iohub_status != 'OK':
@@ -354,6 +365,20 @@ class ioHubConnection():
             * 'dict': Each event converted to a dict object.
             * 'object': Each event is converted to a DeviceEvent subclass
                         based on the event's type.
+            * 'numpy': A dict is returned with a numpy structured array
+                       for each type of event received, keyed by event
+                       type id (e.g. EventConstants.KEYBOARD_PRESS). Each
+                       array uses the event class NUMPY_DTYPE, so string
+                       fields are bytes and fields such as keyboard
+                       modifiers keep the value used by the ioHub Server.
+            * 'pandas': As for 'numpy', but with a pandas.DataFrame per
+                        event type, string fields decoded to str.
+
+        The 'numpy' and 'pandas' types avoid creating a Python object per
+        event, so suit getting large numbers of events (e.g. eye tracker
+        samples) each time. They are quickest when shared_memory_events is
+        enabled in the ioHub configuration, as events are then converted to
+        arrays without first being unpacked into lists.
 
         Args:
             device_label (str): Name of device to retrieve events for.
@@ -365,9 +390,15 @@ class ioHubConnection():
         Returns:
             tuple: List of event objects; object type controlled by 'as_type'.
         """
+        if as_type in ('numpy', 'pandas'):
+            return self._getEventArrays(device_label, as_type)
+
         r = None
         if device_label is None:
-            events = self._sendToHubServer(('GET_EVENTS',))[1]
+            if self._shared_event_buffer:
+                events = self._getSharedEvents()
+            else:
+                events = self._sendToHubServer(('GET_EVENTS',))[1]
             if events is None:
                 r = self.allEvents
             else:
@@ -423,6 +454,8 @@ class ioHubConnection():
             if device_label == 'all':
                 self.allEvents = []
                 self._sendToHubServer(('RPC', 'clearEventBuffer', [True, ]))
+                if self._shared_event_buffer:
+                    self._shared_event_buffer.discard()
                 try:
                     self.getDevice('keyboard')._clearLocalEvents()
                 except:
@@ -434,6 +467,8 @@ class ioHubConnection():
         elif device_label in [None, '', False]:
             self.allEvents = []
             self._sendToHubServer(('RPC', 'clearEventBuffer', [False, ]))
+            if self._shared_event_buffer:
+                self._shared_event_buffer.discard()
             try:
                 self.getDevice('keyboard')._clearLocalEvents()
             except:
@@ -598,7 +633,8 @@ class ioHubConnection():
 
         return Computer.getTime() - stime
 
-    def createTrialHandlerRecordTable(self, trials, cv_order=None):
+    def createTrialHandlerRecordTable(self, trials, cv_order=None,
+                                      block_size=1):
         """
         Create a condition variable table in the ioHub data file based on
         the a psychopy TrialHandler. By doing so, the iohub data file
@@ -638,8 +674,17 @@ class ioHubConnection():
             #
             io.addTrialHandlerRecord(trial)
 
+        Each call to addTrialHandlerRecord waits for the ioHub Server to
+        store the record. If block_size is greater than 1, records are
+        cached and sent to the ioHub Server block_size at a time instead.
+        Any cached records are sent by sendTrialHandlerRecords(), which can
+        be called at the end of a routine or block of trials, and when the
+        iohub data store is flushed or the ioHub Server is shut down.
+
         """
         trial = trials.trialList[0]
+        self._cv_block_size = max(1, int(block_size))
+        self._cv_cache = []
         self._cv_order = cv_order
         if cv_order is None:
             self._cv_order = trial.keys()
@@ -667,7 +712,23 @@ class ioHubConnection():
 
     def addTrialHandlerRecord(self, cv_row):
         """Adds the values from a TriaHandler row / record to the iohub data
-        file for future data analysis use.
+        file for future data analysis use. If the record table was created
+        with a block_size greater than 1, the record is cached and the
+        cached records are sent once block_size of them have been added.
+
+        :param cv_row:
+        :return: The ioHub Server result if records were sent, else None.
+
+        """
+        self.cacheTrialHandlerRecord(cv_row)
+        if len(self._cv_cache) >= self._cv_block_size:
+            return self.sendTrialHandlerRecords()
+        return None
+
+    def cacheTrialHandlerRecord(self, cv_row):
+        """Stores the values from a TrialHandler row / record in a local
+        cache. Cached records must be sent using sendTrialHandlerRecords()
+        before they are saved to the iohub data file.
 
         :param cv_row:
         :return: None
@@ -685,9 +746,21 @@ class ioHubConnection():
         for i, d in enumerate(data):
             if isinstance(d, str):
                 data[i] = d.encode('utf-8')
+        self._cv_cache.append(data)
 
-        cvt_rpc = ('RPC', 'extendConditionVariableTable',
-                   (self.experimentID, self.experimentSessionID, data))
+    def sendTrialHandlerRecords(self):
+        """Sends any cached TrialHandler records to the ioHub Server, which
+        appends them to the condition variable table as one block.
+
+        :return: The ioHub Server result, or None if no records were cached.
+
+        """
+        if not self._cv_cache:
+            return None
+        cvt_rpc = ('RPC', 'extendConditionVariableTableRows',
+                   (self.experimentID, self.experimentSessionID,
+                    self._cv_cache))
+        self._cv_cache = []
         r = self._sendToHubServer(cvt_rpc)
         return r[2]
 
@@ -800,6 +873,38 @@ class ioHubConnection():
             ('RPC', 'setProcessAffinity', processor_list))
         return r[2]
 
+    def getDeviceMonitorStats(self, reset=False):
+        """
+        Returns the polling statistics of each device the ioHub Server polls
+        for new events (devices with a device_timer setting), as a dict
+        keyed by device name. The statistics of each device are a dict with
+        the following keys; all times are in sec.msec:
+
+            * mode: 'fixed', 'adaptive' or 'wakeup' (polled when the
+              device's file descriptor has new data).
+            * duration: time the statistics have been collected for.
+            * interval, min_interval, max_interval: current, minimum and
+              maximum time between polls.
+            * event_rate: moving average of the device event rate in Hz
+              (adaptive polling only).
+            * poll_count, active_poll_count, event_count: number of polls,
+              polls that found new events, and events found.
+            * cpu_time, cpu_load: ioHub Process CPU time used polling the
+              device, and as a fraction of duration.
+            * poll_duration_mean, poll_duration_max: time taken by a poll.
+            * wake_latency_mean, wake_latency_max: delay between the time
+              a poll was scheduled and the time it started.
+
+        Args:
+            reset (bool): If True, the statistics of each device are reset
+                          after being returned.
+
+        Returns:
+            dict: polling statistics by device name.
+        """
+        r = self._sendToHubServer(('RPC', 'getDeviceMonitorStats', [reset]))
+        return r[2]
+
     def addDeviceToMonitor(self, device_class, device_config=None):
         """
         Normally this method should not be used, as all devices
@@ -836,8 +941,8 @@ class ioHubConnection():
 
     def flushDataStoreFile(self):
         """Manually tell the iohub datastore to flush any events it has buffered in
-        memory to disk. Any cached message events are sent to the iohub server
-        before flushing the iohub datastore.
+        memory to disk. Any cached message events and trial handler records
+        are sent to the iohub server before flushing the iohub datastore.
 
         Args:
             None
@@ -846,6 +951,7 @@ class ioHubConnection():
             None
         """
         self.sendMessageEvents()
+        self.sendTrialHandlerRecords()
         r = self._sendToHubServer(('RPC', 'flushIODataStoreFile'))
         return r
 
@@ -1046,6 +1152,9 @@ class ioHubConnection():
         # >>>> Creating client side iohub device wrappers...
         self._createDeviceList(ioHubConfig['monitor_devices'])
 
+        if ioHubConfig.get('shared_memory_events', {}).get('enable', False):
+            self._attachSharedEventBuffer()
+
         return 'OK'
 
     def _waitForServerInit(self):
@@ -1063,6 +1172,40 @@ class ioHubConnection():
 
         # # <<<< Finished wait for iohub server ready signal ....
 
+    def _attachSharedEventBuffer(self):
+        """Attach to the shared memory event buffer created by the ioHub
+        Server. If this fails, getEvents() keeps using UDP.
+        """
+        name = self._sendToHubServer(
+            ('RPC', 'getSharedEventBufferName'))[2]
+        if name is None:
+            return False
+        try:
+            from ..sharedmem import SharedEventBuffer
+            self._shared_event_buffer = SharedEventBuffer.attach(name)
+        except Exception:  # pylint: disable=broad-except
+            print2err('Could not attach to shared memory event buffer, '
+                      'events will be received over UDP:')
+            printExceptionDetailsToStdErr()
+            self._shared_event_buffer = None
+            return False
+        return True
+
+    def _getSharedEvents(self):
+        """Read new events from the shared memory event buffer, plus any
+        events the server could not write to it (requested over UDP).
+        """
+        events = self._shared_event_buffer.readEvents()
+        if self._shared_event_buffer.pending:
+            udp_events = self._sendToHubServer(('GET_EVENTS',))[1]
+            if udp_events:
+                # the server reads device events before replying, so there
+                # may be newer events in the buffer now too.
+                events.extend(udp_events)
+                events.extend(self._shared_event_buffer.readEvents())
+                events.sort(key=lambda e: e[DeviceEvent.EVENT_HUB_TIME_INDEX])
+        return events
+
     def _createDeviceList(self, monitor_devices_config):
         """Create client side iohub device views.
         """
@@ -1270,6 +1413,97 @@ class ioHubConnection():
         self._sessionMetaData = sess_info
         return sess_info['session_id']
 
+    def _getEventArrays(self, device_label, as_type):
+        """getEvents() for as_type 'numpy' and 'pandas'."""
+        if device_label is not None:
+            return self.devices.getDevice(device_label).getEvents(
+                asType=as_type)
+
+        events = self.allEvents
+        self.allEvents = []
+        arrays = []
+        sbuf = self._shared_event_buffer
+        if sbuf:
+            arrays.append(sbuf.toArrays(sbuf.read()))
+        if not sbuf or sbuf.pending:
+            udp_events = self._sendToHubServer(('GET_EVENTS',))[1]
+            if udp_events:
+                events.extend(udp_events)
+                if sbuf:
+                    arrays.append(sbuf.toArrays(sbuf.read()))
+        if events:
+            arrays.append(self.eventListsToArrays(events))
+
+        merged = {}
+        for etype_arrays in arrays:
+            for etype, a in etype_arrays.items():
+                merged.setdefault(etype, []).append(a)
+        for etype, parts in merged.items():
+            if len(parts) == 1:
+                merged[etype] = parts[0]
+            else:
+                a = np.concatenate(parts)
+                merged[etype] = a[np.argsort(a['time'], kind='stable')]
+
+        if as_type == 'pandas':
+            return self.eventArraysToDataFrames(merged)
+        return merged
+
+    @staticmethod
+    def _eventListsToArrays(events, as_type):
+        arrays = ioHubConnection.eventListsToArrays(events)
+        if as_type == 'pandas':
+            return ioHubConnection.eventArraysToDataFrames(arrays)
+        return arrays
+
+    @staticmethod
+    def eventListsToArrays(events):
+        """Convert ioHub events in list value format into a numpy
+        structured array per event type, using the NUMPY_DTYPE of each event
+        class.
+
+        Args:
+            events (list): Events in list value format.
+
+        Returns:
+            dict: event type id -> structured array, events kept in the
+                  order given.
+        """
+        grouped = {}
+        for e in events:
+            grouped.setdefault(
+                e[DeviceEvent.EVENT_TYPE_ID_INDEX], []).append(e)
+        arrays = {}
+        for etype, group in grouped.items():
+            dtype = EventConstants.getClass(etype).NUMPY_DTYPE
+            try:
+                arrays[etype] = np.array([tuple(e) for e in group],
+                                         dtype=dtype)
+            except UnicodeEncodeError:
+                # numpy only encodes ascii str values to bytes
+                arrays[etype] = np.array(
+                    [tuple(v.encode('utf-8') if isinstance(v, str) else v
+                           for v in e) for e in group], dtype=dtype)
+        return arrays
+
+    @staticmethod
+    def eventArraysToDataFrames(arrays):
+        """Convert the result of eventListsToArrays() into a
+        pandas.DataFrame per event type, decoding string fields to str."""
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("as_type 'pandas' requires pandas to be "
+                              "installed; use 'numpy' instead.")
+        frames = {}
+        for etype, a in arrays.items():
+            df = pandas.DataFrame.from_records(a)
+            for name in a.dtype.names:
+                if a.dtype[name].kind == 'S':
+                    df[name] = df[name].str.decode('utf-8')
+            frames[etype] = df
+        return frames
+
     @staticmethod
     def eventListToObject(evt_data):
         """Convert an ioHub event currently in list value format into the
@@ -1303,8 +1537,9 @@ class ioHubConnection():
 
     def _shutDownServer(self):
         if self._shutdown_attempted is False:
-            # send any cached experiment messages
+            # send any cached experiment messages and trial records
             self.sendMessageEvents()
+            self.sendTrialHandlerRecords()
 
             try:
                 from psychopy.visual import window
@@ -1313,6 +1548,9 @@ class ioHubConnection():
                 pass
 
             self._shutdown_attempted = True
+            if self._shared_event_buffer:
+                self._shared_event_buffer.close()
+                self._shared_event_buffer = None
             TimeoutError = psutil.TimeoutExpired
             try:
                 if self.udp_client:  # if it isn't already garbage-collected
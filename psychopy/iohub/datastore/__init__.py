@@ -6,11 +6,15 @@
 
 import os
 import atexit
+import threading
+from functools import wraps
 import numpy as np
 from packaging.version import Version
 from ..server import DeviceEvent
+from ..devices import Computer
 from ..constants import EventConstants
 from ..errors import ioHubError, printExceptionDetailsToStdErr, print2err
+from .util import indexTableColumns
 
 import tables
 from tables import parameters, StringCol, UInt32Col, UInt16Col, NoSuchNodeError
@@ -21,12 +25,14 @@ if Version(tables.__version__) < Version('3'):
     create_table = "createTable"
     create_group = "createGroup"
     f_get_child = "_f_getChild"
+    walk_nodes = "walkNodes"
 else:
     from tables import open_file
 
     create_table = "create_table"
     create_group = "create_group"
     _f_get_child = "_f_get_child"
+    walk_nodes = "walk_nodes"
 
 parameters.MAX_NUMEXPR_THREADS = None
 """The maximum number of threads that PyTables should use internally in
@@ -44,6 +50,51 @@ SCHEMA_AUTHORS = 'Sol Simpson'
 SCHEMA_MODIFIED_DATE = 'October 27, 2021'
 
 
+def _withFileLock(method):
+    """Hold the DataStoreFile file lock while the method runs, as the HDF5
+    file is also written to by the event writer thread."""
+    @wraps(method)
+    def lockedMethod(self, *args, **kwargs):
+        with self._fileLock:
+            return method(self, *args, **kwargs)
+    return lockedMethod
+
+
+class EventTableWriter(threading.Thread):
+    """Thread that appends the events staged by a DataStoreFile to their
+    tables, so the ioHub Server event loop does not wait for HDF5 writes.
+
+    Events staged for a table are written once write_chunk_size of them
+    are waiting, or once the oldest has waited write_max_latency sec.msec.
+    """
+    def __init__(self, dsfile, max_latency):
+        threading.Thread.__init__(self, name='ioHubDataStoreWriter')
+        self.daemon = True
+        self.dsfile = dsfile
+        # check often enough that no event waits much past max_latency
+        self.interval = max(max_latency / 4.0, 0.001)
+        self._wake = threading.Event()
+        self._running = True
+
+    def wake(self):
+        self._wake.set()
+
+    def run(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.dsfile._writeStagedEvents()
+            except Exception:
+                printExceptionDetailsToStdErr()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self.is_alive() and self is not threading.current_thread():
+            self.join()
+
+
 class DataStoreFile():
     def __init__(self, fileName, folderPath, fmode='a', iohub_settings=None):
         self.fileName = fileName
@@ -61,6 +112,30 @@ class DataStoreFile():
         self.flushCounter = self.settings.get('flush_interval', 32)
         self._eventCounter = 0
 
+        # Events are staged per table, and appended in chunks by
+        # self._writer (or as they are staged if threaded_writes is False).
+        self.writeChunkSize = max(1, self.settings.get('write_chunk_size',
+                                                       256))
+        self.writeMaxLatency = self.settings.get('write_max_latency', 0.5)
+        self._stagedEvents = dict()  # table label: [event, ...]
+        self._stagedTimes = dict()  # table label: time first event staged
+        self._stagedDtypes = dict()  # table label: event NUMPY_DTYPE
+        self._stageLock = threading.Lock()
+        self._fileLock = threading.RLock()
+        self._writer = None
+
+        complevel = self.settings.get('complevel', 0)
+        try:
+            self._eventTableFilters = tables.Filters(
+                complevel=complevel,
+                complib=self.settings.get('complib', 'zlib'),
+                shuffle=complevel > 0, fletcher32=False)
+        except ValueError as e:
+            print2err('Invalid data_store compression setting ({}), '
+                      'event tables will not be compressed.'.format(e))
+            self._eventTableFilters = tables.Filters(
+                complevel=0, complib='zlib', shuffle=False, fletcher32=False)
+
         self.TABLES = dict()
         self._eventGroupMappings = dict()
         self.emrtFile = open_file(self.filePath, mode=fmode)
@@ -73,6 +148,10 @@ class DataStoreFile():
         else:
             self.loadTableMappings()
 
+        if self.settings.get('threaded_writes', True):
+            self._writer = EventTableWriter(self, self.writeMaxLatency)
+            self._writer.start()
+
     def loadTableMappings(self):
         # create meta-data tables
         self.TABLES['EXPERIMENT_METADETA'] = self.emrtFile.root.data_collection.experiment_meta_data
@@ -137,8 +216,9 @@ class DataStoreFile():
             self.emrtFile.createGroup(datevts_node, evt_group_label, title=egtitle)
             return datevts_node._f_get_child(evt_group_label)
 
+    @_withFileLock
     def updateDataStoreStructure(self, device_instance, event_class_dict):
-        dfilter = tables.Filters(complevel=0, complib='zlib', shuffle=False, fletcher32=False)
+        dfilter = self._eventTableFilters
 
         for event_cls_name, event_cls in event_class_dict.items():
             if event_cls.IOHUB_DATA_TABLE:
@@ -156,6 +236,8 @@ class DataStoreFile():
                         self.flush()
                     except tables.NodeError:
                         self.TABLES[table_label] = self.groupNodeForEvent(event_cls)._f_get_child(tc_name)
+                        # indexes are updated when the file is closed, not on every flush
+                        self.TABLES[table_label].autoindex = False
                     except Exception as e:
                         print2err('---------------ERROR------------------')
                         print2err('Exception %s in iohub.datastore.updateDataStoreStructure:' % (e.__class__.__name__))
@@ -178,6 +260,7 @@ class DataStoreFile():
                     print2err('\teventTableLabel2ClassName: {0}'.format(self.eventTableLabel2ClassName(table_label)))
                     print2err('----------------------------------------------')
 
+    @_withFileLock
     def addClassMapping(self, ioClass, ctable):
         cmtable = self.TABLES['CLASS_TABLE_MAPPINGS']
         names = [x['class_id'] for x in cmtable.where('(class_id == %d)' % ioClass.EVENT_TYPE_ID)]
@@ -190,6 +273,7 @@ class DataStoreFile():
             trow.append()
             self.flush()
 
+    @_withFileLock
     def createOrUpdateExperimentEntry(self, experimentInfoList):
         experiment_metadata = self.TABLES['EXPERIMENT_METADETA']
         result = [row for row in experiment_metadata.iterrows() if row['code'] == experimentInfoList[1]]
@@ -207,6 +291,7 @@ class DataStoreFile():
         self.flush()
         return self.active_experiment_id
 
+    @_withFileLock
     def createExperimentSessionEntry(self, sessionInfoDict):
         session_metadata = self.TABLES['SESSION_METADETA']
         max_id = 0
@@ -222,6 +307,7 @@ class DataStoreFile():
         self.flush()
         return self.active_session_id
 
+    @_withFileLock
     def initConditionVariableTable(
             self, experiment_id, session_id, np_dtype):
         expcv_table = None
@@ -269,20 +355,30 @@ class DataStoreFile():
         return True
 
     def extendConditionVariableTable(self, experiment_id, session_id, data):
+        return self.extendConditionVariableTableRows(experiment_id, session_id,
+                                                     [data, ])
+
+    @_withFileLock
+    def extendConditionVariableTableRows(self, experiment_id, session_id,
+                                         rows):
+        """Appends a block of condition variable rows to the table in one
+        write."""
         if self._EXP_COND_DTYPE is None:
             return False
         if self.emrtFile and 'EXP_CV' in self.TABLES:
-            temp = [experiment_id, session_id]
-            temp.extend(data)
-            data = temp
             try:
                 etable = self.TABLES['EXP_CV']
-                for i, d in enumerate(data):
-                    if isinstance(d, (list, tuple)):
-                        data[i] = tuple(d)
-                np_array = np.array([tuple(data), ], dtype=self._EXP_COND_DTYPE)
+                records = []
+                for row in rows:
+                    record = [experiment_id, session_id]
+                    for d in row:
+                        if isinstance(d, list):
+                            d = tuple(d)
+                        record.append(d)
+                    records.append(tuple(record))
+                np_array = np.array(records, dtype=self._EXP_COND_DTYPE)
                 etable.append(np_array)
-                self.bufferedFlush()
+                self.bufferedFlush(len(records))
                 return True
             except Exception:
                 printExceptionDetailsToStdErr()
@@ -299,6 +395,7 @@ class DataStoreFile():
             return False
         return True
 
+    @_withFileLock
     def checkIfSessionCodeExists(self, sessionCode):
         if self.emrtFile:
             wclause = 'experiment_id == %d' % (self.active_experiment_id,)
@@ -314,13 +411,9 @@ class DataStoreFile():
                 return False
             etype = event[DeviceEvent.EVENT_TYPE_ID_INDEX]
             eventClass = EventConstants.getClass(etype)
-            etable = self.TABLES[eventClass.IOHUB_DATA_TABLE]
             event[DeviceEvent.EVENT_EXPERIMENT_ID_INDEX] = self.active_experiment_id
             event[DeviceEvent.EVENT_SESSION_ID_INDEX] = self.active_session_id
-
-            np_array = np.array([tuple(event), ], dtype=eventClass.NUMPY_DTYPE)
-            etable.append(np_array)
-            self.bufferedFlush()
+            self._stageEvents(eventClass, [event, ])
         except Exception:
             print2err("Error saving event: ", event)
             printExceptionDetailsToStdErr()
@@ -334,22 +427,80 @@ class DataStoreFile():
 
             etype = event[DeviceEvent.EVENT_TYPE_ID_INDEX]
             eventClass = EventConstants.getClass(etype)
-            etable = self.TABLES[eventClass.IOHUB_DATA_TABLE]
 
-            np_events = []
             for event in events:
                 event[DeviceEvent.EVENT_EXPERIMENT_ID_INDEX] = self.active_experiment_id
                 event[DeviceEvent.EVENT_SESSION_ID_INDEX] = self.active_session_id
-                np_events.append(tuple(event))
 
-            np_array = np.array(np_events, dtype=eventClass.NUMPY_DTYPE)
-            etable.append(np_array)
-            self.bufferedFlush(len(np_events))
+            self._stageEvents(eventClass, events)
         except ioHubError as e:
             print2err(e)
         except Exception:
             printExceptionDetailsToStdErr()
 
+    def _stageEvents(self, eventClass, events):
+        """Add events of one class to the staging buffer of their table.
+        """
+        table_label = eventClass.IOHUB_DATA_TABLE
+        if table_label not in self.TABLES:
+            raise ioHubError('No DataStore table for event class:',
+                             eventClass.__name__)
+        with self._stageLock:
+            staged = self._stagedEvents.get(table_label)
+            if staged is None:
+                staged = self._stagedEvents[table_label] = []
+                self._stagedTimes[table_label] = Computer.getTime()
+                self._stagedDtypes[table_label] = eventClass.NUMPY_DTYPE
+            staged.extend(events)
+            chunk_full = len(staged) >= self.writeChunkSize
+        if self._writer is None:
+            self._writeStagedEvents()
+        elif chunk_full:
+            self._writer.wake()
+
+    def _writeStagedEvents(self, force=False):
+        """Append staged events to their tables, for each table that has a
+        full chunk of events or events older than writeMaxLatency; or for
+        all tables if force is True.
+
+        Returns:
+            int: number of events written.
+        """
+        ready = []
+        now = Computer.getTime()
+        with self._stageLock:
+            for table_label, staged in list(self._stagedEvents.items()):
+                if (force or len(staged) >= self.writeChunkSize or
+                        now - self._stagedTimes[table_label] >= self.writeMaxLatency):
+                    ready.append((table_label, staged,
+                                  self._stagedDtypes[table_label]))
+                    del self._stagedEvents[table_label]
+                    del self._stagedTimes[table_label]
+        if not ready:
+            return 0
+
+        event_count = 0
+        with self._fileLock:
+            if not self.emrtFile.isopen:
+                return 0
+            for table_label, staged, dtype in ready:
+                etable = self.TABLES[table_label]
+                try:
+                    etable.append(np.array([tuple(e) for e in staged],
+                                           dtype=dtype))
+                except Exception:
+                    # find the event(s) that could not be saved
+                    for event in staged:
+                        try:
+                            etable.append(np.array([tuple(event), ],
+                                                   dtype=dtype))
+                        except Exception:
+                            print2err("Error saving event: ", event)
+                            printExceptionDetailsToStdErr()
+                event_count += len(staged)
+            self.bufferedFlush(event_count)
+        return event_count
+
     def bufferedFlush(self, eventCount=1):
         """
         If flushCounter threshold is >=0 then do some checks. If it is < 0,
@@ -358,16 +509,25 @@ class DataStoreFile():
         """
         if self.flushCounter >= 0:
             if self.flushCounter == 0:
-                self.flush()
+                self._flushFile()
                 return True
             if self.flushCounter <= self._eventCounter:
-                self.flush()
+                self._flushFile()
                 self._eventCounter = 0
                 return True
             self._eventCounter += eventCount
             return False
 
     def flush(self):
+        """Write all staged events and flush the file."""
+        try:
+            self._writeStagedEvents(force=True)
+        except Exception:
+            printExceptionDetailsToStdErr()
+        self._flushFile()
+
+    @_withFileLock
+    def _flushFile(self):
         try:
             if self.emrtFile:
                 self.emrtFile.flush()
@@ -376,10 +536,32 @@ class DataStoreFile():
         except Exception:
             printExceptionDetailsToStdErr()
 
+    @_withFileLock
+    def indexEventTables(self):
+        """Index the columns of each event table given by the index_columns
+        setting, so data can be queried by time window (or session) without
+        reading the whole table. Done once the file is no longer written to,
+        as keeping indexes up to date on every flush is slow."""
+        columns = self.settings.get('index_columns', ['time', 'session_id'])
+        if not columns or not self.emrtFile.isopen:
+            return
+        events_group = self.emrtFile.root.data_collection.events
+        for table in getattr(self.emrtFile, walk_nodes)(events_group, classname='Table'):
+            try:
+                indexTableColumns(table, columns)
+            except Exception:
+                print2err('Error indexing DataStore table: ', table._v_pathname)
+                printExceptionDetailsToStdErr()
+
     def close(self):
+        if self._writer:
+            self._writer.stop()
+            self._writer = None
         self.flush()
+        self.indexEventTables()
         self._activeRunTimeConditionVariableTable = None
-        self.emrtFile.close()
+        with self._fileLock:
+            self.emrtFile.close()
 
     def __del__(self):
         try:
@@ -19,6 +19,7 @@ if Version(tables.__version__) < Version('3'):
     from tables import openFile as open_file
 
     walk_groups = "walkGroups"
+    walk_nodes = "walkNodes"
     list_nodes = "listNodes"
     get_node = "getNode"
     read_where = "readWhere"
@@ -26,6 +27,7 @@ else:
     from tables import open_file
 
     walk_groups = "walk_groups"
+    walk_nodes = "walk_nodes"
     list_nodes = "list_nodes"
     get_node = "get_node"
     read_where = "read_where"
@@ -43,6 +45,30 @@ def openHubFile(filepath, filename, mode):
     return hubFile
 
 
+def indexTableColumns(table, columns):
+    """
+    Create a PyTables index for each of the given columns of a table that
+    exists and is not already indexed, and bring any out of date indexes up to
+    date. Queries with a condition on an indexed column (for example a time
+    window) only read the matching rows instead of the whole table.
+
+    :param table: (tables.Table)
+    :param columns: (list) column names
+    :return: (list) names of the columns that are indexed
+    """
+    indexed = []
+    for cname in columns:
+        if cname not in table.colnames:
+            continue
+        col = table.colinstances[cname]
+        if not col.is_indexed:
+            col.create_index()
+        indexed.append(cname)
+    if table.indexed:
+        table.reindex_dirty()
+    return indexed
+
+
 def displayDataFileSelectionDialog(starting_dir=None, prompt="Select a ioHub HDF5 File", allowed="HDF5 Files (*.hdf5)"):
     """
     Shows a FileDialog and lets you select a .hdf5 file to open for processing.
@@ -313,18 +339,19 @@ def saveEventReport(hdf5FilePath=None, eventType=None, eventFields=[], useCondit
         event_groupings = []
         if trial_times:
             # Split events into trials
-            for tindex, tstart, tstop in trial_times:
-                if eventType == 'MessageEvent':
+            if eventType == 'MessageEvent':
+                for tindex, tstart, tstop in trial_times:
                     event_groupings.append(event_table[(event_table['time'] >= tstart) & (event_table['time']
                                                                                           <= tstop)])
-                else:
-                    event_groupings.append(event_table.where("(time >= %f) & (time <= %f)" % (tstart, tstop)))
+            else:
+                event_groupings = datafile.getEventsInTimeWindows(event_table,
+                                                                  [(tstart, tstop) for _, tstart, tstop in trial_times])
         else:
             # Report events without splitting them into trials
             if eventType == 'MessageEvent':
                 event_groupings.append(event_table)
             else:
-                event_groupings.append(event_table.iterrows())
+                event_groupings.append(row for chunk in datafile.iterEvents(event_table) for row in chunk)
 
         # Save a row for each event within the trial period
         for tid, trial_events in enumerate(event_groupings):
@@ -419,6 +446,8 @@ class ExperimentDataAccessUtility:
         self._experimentCode = experimentCode
         self._sessionCodes = sessionCodes
         self._lastWhereClause = None
+        # table path -> time column if the table is in time order, else None
+        self._sortedTimes = dict()
 
         try:
             self.hdfFile = openHubFile(hdfFilePath, hdfFileName, mode)
@@ -831,6 +860,123 @@ class ExperimentDataAccessUtility:
 
             return None
 
+    def _getTable(self, event_type):
+        if isinstance(event_type, tables.Table):
+            return event_type
+        table = self.getEventTable(event_type)
+        if table is None:
+            raise ExperimentDataAccessException('No DataStore table found for event type: {}'.format(event_type))
+        return table
+
+    def _getSortedTimes(self, table):
+        """
+        Return the time column of a table if its rows are in time order (so rows in a time window can be found
+        with a binary search), otherwise None.
+        """
+        path = table._v_pathname
+        if path not in self._sortedTimes:
+            times = table.col('time')
+            if len(times) > 1 and numpy.any(times[1:] < times[:-1]):
+                times = None
+            self._sortedTimes[path] = times
+        return self._sortedTimes[path]
+
+    def getEventsInTimeWindow(self, event_type, start, stop, fields=None, session_id=None):
+        """
+        Return the events of a type with a time >= start and <= stop.
+
+        Args:
+            event_type (str, int or tables.Table): Event class name, event type id, or the event table.
+            start (float): Start of the time window, in sec.msec.
+            stop (float): End of the time window, in sec.msec.
+            fields (list or None): Names of the event fields to return, or None for all fields.
+            session_id (int or None): Only return events for this session id.
+
+        Returns:
+            (numpy.ndarray): Structured array of the events.
+        """
+        return self.getEventsInTimeWindows(event_type, [(start, stop)], fields, session_id)[0]
+
+    def getEventsInTimeWindows(self, event_type, windows, fields=None, session_id=None):
+        """
+        Return the events of a type within each of several time windows, for example the start and end time
+        of each trial.
+
+        Only the rows in each window are read. If the event table is in time order, the rows are found with a
+        binary search of the time column; otherwise a query is made for each window, which uses the index on
+        the time column if there is one (see createEventTableIndexes).
+
+        Args:
+            event_type (str, int or tables.Table): Event class name, event type id, or the event table.
+            windows (list): (start, stop) times, in sec.msec.
+            fields (list or None): Names of the event fields to return, or None for all fields.
+            session_id (int or None): Only return events for this session id.
+
+        Returns:
+            (list): A structured array of the events for each window.
+        """
+        table = self._getTable(event_type)
+        times = self._getSortedTimes(table)
+        results = []
+        for start, stop in windows:
+            if times is not None:
+                i0 = numpy.searchsorted(times, start, side='left')
+                i1 = numpy.searchsorted(times, stop, side='right')
+                events = table.read(i0, max(i0, i1))
+                if session_id is not None:
+                    events = events[events['session_id'] == session_id]
+            else:
+                condition = '(time >= %r) & (time <= %r)' % (float(start), float(stop))
+                if session_id is not None:
+                    condition += ' & (session_id == %d)' % session_id
+                events = getattr(table, read_where)(condition)
+                events.sort(order='time', kind='stable')
+            if fields:
+                events = events[list(fields)]
+            results.append(events)
+        return results
+
+    def iterEvents(self, event_type, chunk_size=65536, condition=None, fields=None):
+        """
+        Iterate over the events of a type in chunks, so large tables can be processed without being read into
+        memory at once.
+
+        Args:
+            event_type (str, int or tables.Table): Event class name, event type id, or the event table.
+            chunk_size (int): Number of table rows read at a time.
+            condition (str or None): PyTables condition the events must match, e.g. '(session_id == 1)'.
+            fields (list or None): Names of the event fields to return, or None for all fields.
+
+        Returns:
+            (iterator): Structured arrays of up to chunk_size events.
+        """
+        table = self._getTable(event_type)
+        for start in range(0, table.nrows, chunk_size):
+            stop = start + chunk_size
+            if condition:
+                events = getattr(table, read_where)(condition, start=start, stop=stop)
+            else:
+                events = table.read(start, stop)
+            if len(events) == 0:
+                continue
+            if fields:
+                events = events[list(fields)]
+            yield events
+
+    def createEventTableIndexes(self, columns=('time', 'session_id')):
+        """
+        Index the given columns of every event table, speeding up queries on them. DataStore files are indexed
+        when ioHub closes them (see the data_store index_columns setting), so this is only needed for files
+        written by older versions. The file must have been opened with mode 'a'.
+
+        Args:
+            columns (list): Names of the columns to index.
+        """
+        events_group = self.hdfFile.root.data_collection.events
+        for table in getattr(self.hdfFile, walk_nodes)(events_group, classname='Table'):
+            indexTableColumns(table, columns)
+        self.hdfFile.flush()
+
     def getEventIterator(self, event_type):
         """
         **Docstr TBC.**
@@ -200,6 +200,7 @@ class Device(ioObject):
     __slots__ = [e[0] for e in _newDataTypes] + ['_hw_interface_status',
                                                  '_hw_error_str',
                                                  '_native_event_buffer',
+                                                 '_native_event_count',
                                                  '_event_listeners',
                                                  '_iohub_event_buffer',
                                                  '_last_poll_time',
@@ -246,6 +247,7 @@ class Device(ioObject):
         self._last_poll_time = 0
         self._last_callback_time = 0
         self._native_event_buffer = deque(maxlen=self.event_buffer_length)
+        self._native_event_count = 0
         self._filters = dict()
         self._hw_interface_status = self.HW_STAT_UNDEFINED
         self._hw_error_str = u''
@@ -293,7 +295,8 @@ class Device(ioObject):
             being returned. False results in events being left in the device event buffer.
 
             asType (str): Optional kwarg giving the object type to return events as. Valid values
-            are 'namedtuple' (the default), 'dict', 'list', or 'object'.
+            are 'namedtuple' (the default), 'dict', 'list', 'object', or 'numpy' /
+            'pandas' for a structured array / DataFrame per event type.
 
         Returns:
             (list): New events that the ioHub has received since the last getEvents() or clearEvents()
@@ -534,6 +537,7 @@ class Device(ioObject):
     def _addNativeEventToBuffer(self, e):
         if self.isReportingEvents():
             self._native_event_buffer.append(e)
+            self._native_event_count += 1
 
     def _addEventListener(self, event, eventTypeIDs):
         for ei in eventTypeIDs:
@@ -635,6 +639,23 @@ class Device(ioObject):
         not find any new events to process, causing extra processing overhead that
         is not needed in many cases.
 
+        Setting device_timer.adaptive to True lets the ioHub Server adjust the
+        polling rate to the device's event rate instead:
+
+            device_timer:
+                interval: 0.001
+                adaptive: True
+                max_interval: 0.02
+
+        The device is polled every interval sec.msec while polls keep finding
+        new events. After polls that find no events the time between polls is
+        doubled, up to max_interval, which is therefore the longest a new event
+        can wait before the device is polled. Devices that can provide a file
+        descriptor which becomes readable when new data arrives (see
+        _getWakeupFileDescriptor) are polled as soon as data is available,
+        or every max_interval if none is. Only events added using
+        _addNativeEventToBuffer are counted as found by a poll.
+
         Args:
             None
 
@@ -644,6 +665,24 @@ class Device(ioObject):
         """
         pass
 
+    def _getWakeupFileDescriptor(self):
+        """Devices that use polling and read their data from a file
+        descriptor (a serial port or an input device file for example) can
+        return that file descriptor here. If device_timer.adaptive is True,
+        the ioHub Server waits for the file descriptor to become readable,
+        instead of polling the device at a fixed rate.
+
+        File descriptors are only used on macOS and Linux.
+
+        Args:
+            None
+
+        Returns:
+            int: the file descriptor, or None if the device does not have one.
+
+        """
+        return None
+
     def _handleNativeEvent(self, *args, **kwargs):
         """The _handleEvent method can be used by the native device interface
         (implemented by the ioHub Device class) to register new native device
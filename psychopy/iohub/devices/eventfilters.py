@@ -3,6 +3,7 @@
 # Copyright (C) 2012-2020 iSolver Software Solutions (C) 2021 Open Science Tools Ltd.
 # Distributed under the terms of the GNU General Public License (GPL).
 
+import bisect
 import numpy as np
 from collections import deque
 
@@ -129,6 +130,10 @@ class MovingWindowFilter():
     value, given by 'event_field_name'. knot_pos defines where in the window
     the next filtered value should always be returned from.
 
+    event_field_name can also be a list of field names, in which case one
+    window (and one ring buffer) is shared by all the fields, and filtered
+    values are returned as an array with a value for each field.
+
     knot_pos can be an index between 0 - length-1, or a string constant:
         'center': use the middle value in the window. Window length must be odd.
         'latest': the value just added to the window is filtered and returned
@@ -139,8 +144,10 @@ class MovingWindowFilter():
     None is returned until the MovingWindow is full.
 
     The base class implements a moving window averaging filter, no weights.
-    To change the filter used, extend this class and replace the filteredValue
-    method.
+    The window sum is updated as each value is added, so the cost of
+    filtering a value does not depend on the window length. To change the
+    filter used, extend this class and replace the filteredValue method, and
+    the _updateWindow method if the filter keeps its own window state.
 
     """
 
@@ -171,12 +178,23 @@ class MovingWindowFilter():
 
         self._event_field_index = None
         self._events = None
+        element_shape = ()
         if event_type and event_field_name:
-            self._event_field_index = EventConstants.getClass(
-                event_type).CLASS_ATTRIBUTE_NAMES.index(event_field_name)
+            field_names = EventConstants.getClass(
+                event_type).CLASS_ATTRIBUTE_NAMES
+            if isinstance(event_field_name, str):
+                self._event_field_index = field_names.index(event_field_name)
+            else:
+                self._event_field_index = [field_names.index(f)
+                                           for f in event_field_name]
+                element_shape = (len(event_field_name),)
             self._events = deque(maxlen=length)
 
-        self._filtering_buffer = NumPyRingBuffer(length)
+        self._filtering_buffer = NumPyRingBuffer(length,
+                                                 element_shape=element_shape)
+        self._element_shape = element_shape
+        self._add_count = 0
+        self._window_sum = np.zeros(element_shape)[()]
 
     def filteredValue(self):
         """Returns a filtered value based on the data in the window.
@@ -187,7 +205,23 @@ class MovingWindowFilter():
         types can be created.
 
         """
-        return self._filtering_buffer.mean()
+        return self._window_sum / self._filtering_buffer.max_size
+
+    def _updateWindow(self, value, removed):
+        """Called each time a value is added to the window, with the value
+        added and the value that it replaced (None until the window is full).
+
+        The base implementation keeps the sum of the window values, which is
+        recalculated from the window once per window length values added so
+        that rounding errors do not build up.
+        """
+        self._window_sum = self._window_sum + value
+        if removed is not None:
+            self._window_sum = self._window_sum - removed
+        self._add_count += 1
+        if self._add_count % self._filtering_buffer.max_size == 0:
+            self._window_sum = self._filtering_buffer.getElements().sum(
+                axis=0, dtype=np.float64)[()]
 
     def add(self, event):
         """Add the given iohub event ( in list form ) to the moving window. The
@@ -199,19 +233,30 @@ class MovingWindowFilter():
         filtered.
 
         """
-        if isinstance(event, (list, tuple)):
-            self._filtering_buffer.append(event[self._event_field_index])
-            self._events.append(event)
-            if self.isFull():
-                if self._inplace:
-                    self._events[
-                        self._active_index][
-                        self._event_field_index] = self.filteredValue()
-                return self._events[self._active_index], self.filteredValue()
+        is_event = isinstance(event, (list, tuple))
+        field_index = self._event_field_index
+        if not is_event:
+            value = event
+        elif self._element_shape:
+            value = [event[i] for i in field_index]
         else:
-            self._filtering_buffer.append(event)
-            if self.isFull():
-                return None, self.filteredValue()
+            value = event[field_index]
+        if is_event:
+            self._events.append(event)
+        removed = self._filtering_buffer.append(value)
+        self._updateWindow(self._filtering_buffer[-1], removed)
+        if self.isFull():
+            filtered_value = self.filteredValue()
+            if not is_event:
+                return None, filtered_value
+            active_event = self._events[self._active_index]
+            if self._inplace:
+                if self._element_shape:
+                    for i, v in zip(field_index, filtered_value):
+                        active_event[i] = v
+                else:
+                    active_event[field_index] = filtered_value
+            return active_event, filtered_value
 
     def isFull(self):
         return self._filtering_buffer.isFull()
@@ -220,13 +265,13 @@ class MovingWindowFilter():
         self._filtering_buffer.clear()
         if self._events:
             self._events.clear()
+        self._add_count = 0
+        self._window_sum = np.zeros(self._element_shape)[()]
 # ------
 
 
 class PassThroughFilter(MovingWindowFilter):
-    """Returns the median value of the moving window.
-
-    Length must be odd.
+    """Returns the value just added to the window, unfiltered.
 
     """
 
@@ -235,8 +280,11 @@ class PassThroughFilter(MovingWindowFilter):
         kwargs['knot_pos'] = 0
         MovingWindowFilter.__init__(self, **kwargs)
 
+    def _updateWindow(self, value, removed):
+        pass
+
     def filteredValue(self):
-        return self._filtering_buffer[0]
+        return self._filtering_buffer[0].copy()
 
 # ------
 
@@ -246,13 +294,57 @@ class MedianFilter(MovingWindowFilter):
 
     Length must be odd.
 
+    The window values of each field are also kept in sorted order, updated
+    using a binary search as each value is added and removed, so the median
+    does not need to be found from the whole window for each value.
+
     """
 
     def __init__(self, **kwargs):
         MovingWindowFilter.__init__(self, **kwargs)
+        field_count = self._element_shape[0] if self._element_shape else 1
+        self._sorted_values = [[] for _ in range(field_count)]
+        self._nan_counts = [0] * len(self._sorted_values)
+
+    def _updateWindow(self, value, removed):
+        values = np.atleast_1d(value).tolist()
+        if removed is None:
+            removed = [None] * len(values)
+        else:
+            removed = np.atleast_1d(removed).tolist()
+        for f, (v, r) in enumerate(zip(values, removed)):
+            sorted_values = self._sorted_values[f]
+            if r is not None:
+                if r != r:
+                    self._nan_counts[f] -= 1
+                else:
+                    del sorted_values[bisect.bisect_left(sorted_values, r)]
+            if v != v:
+                self._nan_counts[f] += 1
+            else:
+                bisect.insort(sorted_values, v)
 
     def filteredValue(self):
-        return np.median(self._filtering_buffer.getElements())
+        medians = []
+        for sorted_values, nan_count in zip(self._sorted_values,
+                                            self._nan_counts):
+            n = len(sorted_values)
+            if nan_count:
+                medians.append(np.nan)
+            elif n % 2:
+                medians.append(sorted_values[n // 2])
+            else:
+                medians.append(
+                    (sorted_values[n // 2 - 1] + sorted_values[n // 2]) / 2.0)
+        if self._element_shape:
+            return np.asarray(medians)
+        return medians[0]
+
+    def clear(self):
+        MovingWindowFilter.clear(self)
+        for sorted_values in self._sorted_values:
+            del sorted_values[:]
+        self._nan_counts = [0] * len(self._sorted_values)
 
 # ------
 
@@ -274,12 +366,15 @@ class WeightedAverageFilter(MovingWindowFilter):
         MovingWindowFilter.__init__(self, **kwargs)
         weights = np.asanyarray(weights)
         self._weights = weights / np.sum(weights)
+        # same as np.convolve(window, weights, 'valid')
+        self._window_weights = self._weights[::-1].copy()
+
+    def _updateWindow(self, value, removed):
+        pass
 
     def filteredValue(self):
-        return np.convolve(
-            self._filtering_buffer.getElements(),
-            self._weights,
-            'valid')
+        return np.dot(self._window_weights,
+                      self._filtering_buffer.getElements())
 
 
 # ------
@@ -311,14 +406,16 @@ class StampFilter(MovingWindowFilter):
             kwargs['level'] = level
             self.sub_filter = StampFilter(**kwargs)
 
+    def _updateWindow(self, value, removed):
+        pass
+
     def filteredValue(self):
         if self.sub_filter:
             return self.sub_filter.filteredValue()
 
         e1, e2, e3 = self._filtering_buffer[0:3]
-        if not(e1 < e2 and e2 < e3) or not (e3 < e2 and e2 < e1):
-            return (e1 + e3) / 2.0
-        return e2
+        monotonic = ((e1 < e2) & (e2 < e3)) | ((e3 < e2) & (e2 < e1))
+        return np.where(monotonic, e2, (e1 + e3) / 2.0)[()]
 
     def add(self, event):
         if self.sub_filter:
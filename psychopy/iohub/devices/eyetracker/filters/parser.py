@@ -24,6 +24,11 @@ for a sample, the positions are averaged together. If only one of the two eyes
 has valid data, then that eye data is used for the sample. So the only case
 where a sample will be tagged as missing data is when both eyes do not have
 valid eye position / pupil size data.
+* EyeTrackerEventParser.parseSamples() runs the parser over a whole sample
+array, for example the eye sample table of an ioHub DataStore file. When
+PassThroughFilter is used for both POSITION_FILTER and VELOCITY_FILTER the
+array is parsed using vectorized numpy operations, giving the same events as
+the online parser would.
 
 POSITION_FILTER and VELOCITY_FILTER can be set to one of the following event
 field filter types. Example values for any input arguments are given. The filter
@@ -152,6 +157,96 @@ RIGHT_EYE = 2
 BOTH_EYE = 3
 
 
+def _windowStatsBelow(block, windows, pt):
+    """Returns the mean and standard deviation of the values below pt[i] in
+    window windows[i] of a block of values. Used by
+    _adaptiveVelocityThresholds."""
+    k = np.searchsorted(block['sorted'], pt)
+    # less the values below pt that are at the block edges, but outside the
+    # window
+    outside = block['outside'][windows] & (block['edge'] < pt[:, None])
+    outside = outside.astype(np.float64).dot(block['edge_powers'])
+    n = k - outside[:, 0]
+    mean = (block['sum1'][k] - outside[:, 1]) / n
+    var = (block['sum2'][k] - outside[:, 2]) / n - mean ** 2
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def _adaptiveVelocityThresholds(velocity, history_length, block_size=128):
+    """Vectorized version of
+    EyeTrackerEventParser.addVelocityToAdaptiveThreshold(), for the
+    velocities of one axis of all valid samples.
+
+    Each velocity > 0 is added to a buffer of the last history_length such
+    velocities. Once the buffer has been filled and a further velocity is
+    added, the threshold is found by iterating PT = mean + 3 * std of the
+    buffer values below the previous PT, starting from buffer min + 3 * std,
+    until PT changes by less than 1.0.
+
+    The buffer windows are handled block_size at a time: all windows in a
+    block are part of one array of history_length + block_size - 1 values,
+    so the values below PT in each window are found from that array sorted
+    once, less the few values at its start and end that are outside the
+    window.
+
+    Returns:
+        ndarray: threshold for each velocity, NaN where the online parser
+                 does not calculate one.
+    """
+    velocity = np.asarray(velocity, dtype=np.float64)
+    thresholds = np.full(len(velocity), np.nan)
+    positive = np.flatnonzero(velocity > 0.0)
+    values = velocity[positive]
+    blen = int(history_length)
+    if blen < 1 or len(values) <= blen:
+        return thresholds
+    block_size = max(1, min(block_size, blen))
+    window_thresholds = np.empty(len(values) - blen)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for start in range(blen, len(values), block_size):
+            count = min(block_size, len(values) - start)
+            values_block = values[start - blen + 1:start + count]
+            head = values_block[:count - 1]
+            tail = values_block[blen:]
+            sorted_block = np.sort(values_block)
+            edge = np.concatenate((head, tail))
+            edge_ix = np.arange(count - 1)
+            windows = np.arange(count)
+            block = dict(
+                sorted=sorted_block,
+                sum1=np.concatenate(([0.0], np.cumsum(sorted_block))),
+                sum2=np.concatenate(([0.0], np.cumsum(sorted_block ** 2))),
+                edge=edge,
+                edge_powers=np.column_stack((np.ones(len(edge)), edge,
+                                             edge ** 2)),
+                outside=np.concatenate(
+                    (edge_ix[None, :] < windows[:, None],
+                     edge_ix[None, :] >= windows[:, None]), axis=1))
+
+            # window b includes head[b:], values_block[count - 1:blen]
+            # and tail[:b]
+            window_min = np.minimum(
+                np.concatenate((np.minimum.accumulate(head[::-1])[::-1],
+                                [np.inf])),
+                np.concatenate(([np.inf], np.minimum.accumulate(tail))))
+            window_min = np.minimum(window_min,
+                                    values_block[count - 1:blen].min())
+            _mean, std = _windowStatsBelow(block, windows,
+                                           np.full(count, np.inf))
+            pt = window_min + std * 3.0
+
+            active = windows
+            while len(active):
+                mean, std = _windowStatsBelow(block, active, pt[active])
+                new_pt = mean + 3.0 * std
+                changed = np.abs(new_pt - pt[active]) >= 1.0
+                pt[active] = new_pt
+                active = active[changed]
+            window_thresholds[start - blen:start - blen + count] = pt
+    thresholds[positive[blen:]] = window_thresholds
+    return thresholds
+
+
 class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
 
     def __init__(self, **kwargs):
@@ -166,6 +261,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         self.open_parser_events = OrderedDict()
         self.convertEvent = None
         self.isValidSample = None
+        self._offline = False
         self.vel_thresh_history_dur = kwargs.get(
             'adaptive_vel_thresh_history', 3.0)
         position_filter = kwargs.get('position_filter')
@@ -183,7 +279,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
             pos_filter_class, pos_filter_kwargs = eventfilters.PassThroughFilter, {}
 
         if velocity_filter:
-            vel_filter_class_name = position_filter.get(
+            vel_filter_class_name = velocity_filter.get(
                 'name', 'PassThroughFilter')
             vel_filter_class = getattr(eventfilters, vel_filter_class_name)
             del velocity_filter['name']
@@ -192,27 +288,24 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
             vel_filter_class, vel_filter_kwargs = eventfilters.PassThroughFilter, {}
 
         self.adaptive_x_vthresh_buffer = np.zeros(
-            self.vel_thresh_history_dur * sampling_rate)
+            int(self.vel_thresh_history_dur * sampling_rate))
         self.x_vthresh_buffer_index = 0
         self.adaptive_y_vthresh_buffer = np.zeros(
-            self.vel_thresh_history_dur * sampling_rate)
+            int(self.vel_thresh_history_dur * sampling_rate))
         self.y_vthresh_buffer_index = 0
 
+        # one filter (and filter window) for both angle fields, and one for
+        # the three velocity fields.
         pos_filter_kwargs['event_type'] = MONOCULAR_EYE_SAMPLE
         pos_filter_kwargs['inplace'] = True
-        pos_filter_kwargs['event_field_name'] = 'angle_x'
-        self.x_position_filter = pos_filter_class(**pos_filter_kwargs)
-        pos_filter_kwargs['event_field_name'] = 'angle_y'
-        self.y_position_filter = pos_filter_class(**pos_filter_kwargs)
+        pos_filter_kwargs['event_field_name'] = ['angle_x', 'angle_y']
+        self.position_field_filter = pos_filter_class(**pos_filter_kwargs)
 
         vel_filter_kwargs['event_type'] = MONOCULAR_EYE_SAMPLE
         vel_filter_kwargs['inplace'] = True
-        vel_filter_kwargs['event_field_name'] = 'velocity_x'
-        self.x_velocity_filter = vel_filter_class(**vel_filter_kwargs)
-        vel_filter_kwargs['event_field_name'] = 'velocity_y'
-        self.y_velocity_filter = vel_filter_class(**vel_filter_kwargs)
-        vel_filter_kwargs['event_field_name'] = 'velocity_xy'
-        self.xy_velocity_filter = vel_filter_class(**vel_filter_kwargs)
+        vel_filter_kwargs['event_field_name'] = ['velocity_x', 'velocity_y',
+                                                 'velocity_xy']
+        self.velocity_field_filter = vel_filter_class(**vel_filter_kwargs)
 
         ###
         mm_size = display_device.get('mm_size')
@@ -289,10 +382,235 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
 
         self.clearInputEvents()
 
+    def parseSamples(self, samples, vectorized=True):
+        """Parse a whole array of eye samples offline, for example the
+        BinocularEyeSampleEvent table of an ioHub DataStore file, giving the
+        same samples and fixation, saccade and blink events as passing each
+        sample to the online parser.
+
+        When PassThroughFilter is used for the position and velocity filters
+        the samples are parsed using vectorized numpy operations. Otherwise
+        (or if vectorized is False) each sample is passed through the online
+        parser in turn.
+
+        The parser is reset before and after the samples are parsed. Samples
+        and events keep the event_id of the sample they were created from,
+        rather than being given new event ids.
+
+        Args:
+            samples (ndarray): Binocular or monocular eye sample structured
+                               array, using the sample class NUMPY_DTYPE
+                               field names, in time order.
+            vectorized (bool): False to always use the online parser.
+
+        Returns:
+            dict: event type id -> structured array of the
+                  MonocularEyeSampleEvent, FixationStartEvent, ...
+                  BlinkEndEvent events created, using each event class
+                  NUMPY_DTYPE.
+        """
+        self.reset()
+        self.sample_type = None
+        if len(samples) == 0:
+            return {}
+        self.initializeForSampleType(samples[0].tolist())
+        self._offline = True
+        try:
+            if vectorized and self._usesPassThroughFilters():
+                parsed_samples, events = self._parseSampleArray(samples)
+            else:
+                parsed_samples, events = None, []
+                for sample in samples.tolist():
+                    self._addInputEvent(list(sample))
+                    events.extend(self._removeOutputEvents())
+        finally:
+            self._offline = False
+            self.reset()
+
+        events_by_type = OrderedDict()
+        if parsed_samples is not None:
+            events_by_type[MONOCULAR_EYE_SAMPLE] = parsed_samples
+        for e in events:
+            events_by_type.setdefault(
+                e[DeviceEvent.EVENT_TYPE_ID_INDEX], []).append(tuple(e))
+        for etype, etype_events in events_by_type.items():
+            if isinstance(etype_events, list):
+                events_by_type[etype] = np.array(
+                    etype_events,
+                    dtype=EventConstants.getClass(etype).NUMPY_DTYPE)
+        return dict(events_by_type)
+
+    def addOutputEvent(self, e):
+        if self._offline:
+            # parseSamples() keeps the event ids of the parsed samples
+            e[self.event_filter_id_index] = self.filter_id
+            self._output_events.append(e)
+        else:
+            eventfilters.DeviceEventFilter.addOutputEvent(self, e)
+
+    def _usesPassThroughFilters(self):
+        return all(type(f) is eventfilters.PassThroughFilter for f in (
+            self.position_field_filter, self.velocity_field_filter))
+
+    def _parseSampleArray(self, samples):
+        """Vectorized version of process() for a whole sample array, when
+        PassThroughFilter is used for all fields (which rounds the filtered
+        fields to float32 values). Returns the monocular samples as a
+        structured array and the fixation, saccade and blink events as lists.
+        """
+        ix = self.io_event_ix
+        fields = self.io_event_fields
+        sample_count = len(samples)
+        # samples as monocular events, one row per sample, in the
+        # io_event_fields order; stored by column.
+        mono = np.empty((len(fields), sample_count)).T
+        status = samples['status']
+        if self.convertEvent == self._convertToMonoAveraged:
+            binoc_field_names = samples.dtype.names
+            for i, field in enumerate(fields):
+                if field in binoc_field_names:
+                    mono[:, i] = samples[field]
+                elif field == 'eye':
+                    mono[:, i] = LEFT_EYE
+                elif field.endswith('_type'):
+                    mono[:, i] = samples['left_%s' % field]
+                else:
+                    left = samples['left_%s' % field].astype(np.float64)
+                    right = samples['right_%s' % field].astype(np.float64)
+                    mono[:, i] = np.where(
+                        status == 0, (left + right) / 2.0,
+                        np.where(status == 20, right, left))
+            mono[:, ix('type')] = MONOCULAR_EYE_SAMPLE
+            valid = status != 22
+        else:
+            for i, field in enumerate(fields):
+                mono[:, i] = samples[field]
+            valid = status == 0
+
+        valid_ix = np.flatnonzero(valid)
+        if len(valid_ix) == 0:
+            # nothing is parsed until a valid sample is received.
+            return self._monoSampleArray(mono), []
+
+        ax, ay = ix('angle_x'), ix('angle_y')
+        vx, vy, vxy = ix('velocity_x'), ix('velocity_y'), ix('velocity_xy')
+        ps = ix('pupil_measure1')
+        rounded_fields = [ax, ay, vx, vy, vxy]
+
+        # Samples from the first to the last valid sample are parsed; missing
+        # samples between two valid samples are interpolated. Missing samples
+        # before the first or after the last valid sample are output as is.
+        first, last = valid_ix[0], valid_ix[-1]
+        parsed = np.arange(first, last + 1)
+        valid_parsed = valid[first:last + 1]
+        missing = parsed[~valid_parsed]
+
+        mono[valid_ix, ax], mono[valid_ix, ay] = self.pix2deg(
+            mono[valid_ix, ix('gaze_x')], mono[valid_ix, ix('gaze_y')])
+        # angles are rounded by the position filters, but the unrounded
+        # angle of a valid sample is used when calculating its velocity,
+        # and as the end point of an interpolated run of missing samples.
+        unrounded_angles = mono[:, [ax, ay]].copy()
+        mono[valid_ix, ax] = mono[valid_ix, ax].astype(np.float32)
+        mono[valid_ix, ay] = mono[valid_ix, ay].astype(np.float32)
+
+        if len(missing):
+            index = np.arange(sample_count)
+            prev_valid = np.maximum.accumulate(np.where(valid, index, -1))
+            next_valid = np.minimum.accumulate(
+                np.where(valid, index, sample_count)[::-1])[::-1]
+            prev_valid = prev_valid[missing]
+            next_valid = next_valid[missing]
+            position = (missing - prev_valid).astype(np.float64)
+            div = (next_valid - prev_valid).astype(np.float64)
+            # the same calculation as np.linspace(start, end, run_length + 2)
+            for field, ends in ((ax, unrounded_angles[:, 0]),
+                                (ay, unrounded_angles[:, 1]),
+                                (ps, mono[:, ps])):
+                start = mono[prev_valid, field]
+                delta = ends[next_valid] - start
+                step = delta / div
+                mono[missing, field] = np.where(
+                    step == 0, position / div * delta,
+                    position * step) + start
+            unrounded_angles[missing, 0] = mono[missing, ax]
+            unrounded_angles[missing, 1] = mono[missing, ay]
+            mono[missing, ax] = mono[missing, ax].astype(np.float32)
+            mono[missing, ay] = mono[missing, ay].astype(np.float32)
+
+        # velocity relative to the previous sample
+        velocity_ix = parsed[parsed > 0]
+        t = ix('time')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dt = mono[velocity_ix, t] - mono[velocity_ix - 1, t]
+            dx = np.abs(unrounded_angles[velocity_ix, 0] -
+                        mono[velocity_ix - 1, ax])
+            dy = np.abs(unrounded_angles[velocity_ix, 1] -
+                        mono[velocity_ix - 1, ay])
+            mono[velocity_ix, vx] = dx / dt
+            mono[velocity_ix, vy] = dy / dt
+            mono[velocity_ix, vxy] = np.hypot(dx / dt, dy / dt)
+        for field in rounded_fields[2:]:
+            mono[parsed, field] = mono[parsed, field].astype(np.float32)
+
+        blen = len(self.adaptive_x_vthresh_buffer)
+        mono[valid_ix, ix('raw_x')] = _adaptiveVelocityThresholds(
+            mono[valid_ix, vx], blen)
+        mono[valid_ix, ix('raw_y')] = _adaptiveVelocityThresholds(
+            mono[valid_ix, vy], blen)
+
+        # 0 = FIX, 1 = SAC, 2 = MIS. Valid samples without an x velocity
+        # threshold (e.g. before the adaptive threshold buffer has filled)
+        # can't be categorised, so are left out as by the online parser.
+        parsed_samples = mono[first:last + 1]
+        categorised = ~valid_parsed | ~np.isnan(parsed_samples[:, ix('raw_x')])
+        parsed_samples = parsed_samples[categorised]
+        valid_parsed = valid_parsed[categorised]
+        categories = np.where(
+            (parsed_samples[:, vx] >= parsed_samples[:, ix('raw_x')]) |
+            (parsed_samples[:, vy] >= parsed_samples[:, ix('raw_y')]), 1, 0)
+        categories[~valid_parsed] = 2
+
+        # Each change of category starts an event and ends the event of the
+        # previous category, other than the first category (which has no
+        # start event).
+        run_starts = np.flatnonzero(categories[1:] != categories[:-1]) + 1
+        run_ends = np.append(run_starts[1:], len(categories))
+        start_methods = (self.createFixationStartEventArray,
+                         self.createSaccadeStartEventArray,
+                         self.createBlinkStartEventArray)
+        end_methods = (self.createFixationEndEventArray,
+                       self.createSaccadeEndEventArray,
+                       self.createBlinkEndEventArray)
+        events = []
+        for i, (run_start, run_end) in enumerate(
+                zip(run_starts.tolist(), run_ends.tolist())):
+            category = categories[run_start]
+            start_sample = parsed_samples[run_start]
+            events.append(start_methods[category](start_sample))
+            if i < len(run_starts) - 1:
+                events.append(end_methods[category](
+                    parsed_samples[run_end - 1], start_sample,
+                    parsed_samples[run_start:run_end]))
+        for e in events:
+            e[self.event_filter_id_index] = self.filter_id
+        return self._monoSampleArray(mono), events
+
+    def _monoSampleArray(self, mono):
+        mono[:, self.io_event_ix('filter_id')] = self.filter_id
+        sample_array = np.empty(len(mono),
+                                dtype=self.io_sample_class.NUMPY_DTYPE)
+        for i, field in enumerate(self.io_event_fields):
+            sample_array[field] = mono[:, i]
+        return sample_array
+
     def parseEvent(self, sample):
+        current_sec = self.getSampleEventCategory(sample)
+        if current_sec is None:
+            # no velocity threshold yet, so the sample can't be categorised
+            return
         if self._last_parser_sample:
             last_sec = self.getSampleEventCategory(self._last_parser_sample)
-            current_sec = self.getSampleEventCategory(sample)
             if last_sec and last_sec != current_sec:
                 start_event, end_event = self.createEyeEvents(
                     last_sec, current_sec, self._last_parser_sample, sample)
@@ -309,7 +627,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         if self.isValidSample(sample):
             x_velocity_threshold = sample[self.io_event_ix('raw_x')]
             y_velocity_threshold = sample[self.io_event_ix('raw_y')]
-            if x_velocity_threshold == np.NaN:
+            if np.isnan(x_velocity_threshold):
                 return None
             sample_vx = sample[self.io_event_ix('velocity_x')]
             sample_vy = sample[self.io_event_ix('velocity_y')]
@@ -440,7 +758,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
                         pt_list.append(PT)
                     vthresh_values.append(PT)
             if len(vthresh_values) != v + 1:
-                vthresh_values.append(np.NaN)
+                vthresh_values.append(np.nan)
         return vthresh_values
 
     def reset(self):
@@ -450,11 +768,8 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         self.last_sample = None
         self.invalid_samples_run = []
         self.open_parser_events.clear()
-        self.x_position_filter.clear()
-        self.y_position_filter.clear()
-        self.x_velocity_filter.clear()
-        self.y_velocity_filter.clear()
-        self.xy_velocity_filter.clear()
+        self.position_field_filter.clear()
+        self.velocity_field_filter.clear()
         self.x_vthresh_buffer_index = 0
         self.y_vthresh_buffer_index = 0
 
@@ -515,11 +830,8 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         return samples_for_processing
 
     def addToFieldFilters(self, sample):
-        self.x_position_filter.add(sample)
-        self.y_position_filter.add(sample)
-        self.x_velocity_filter.add(sample)
-        self.y_velocity_filter.add(sample)
-        return self.xy_velocity_filter.add(sample)
+        self.position_field_filter.add(sample)
+        return self.velocity_field_filter.add(sample)
 
     def _convertPosToAngles(self, mono_event):
         gx_ix = self.io_event_ix('gaze_x')
@@ -550,9 +862,10 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
 
     def _convertMonoFields(self, prev_event, current_event):
         if self.isValidSample(current_event):
-            self._convertPosToAngles(self, current_event)
+            self._convertPosToAngles(current_event)
             if prev_event:
                 self._addVelocity(prev_event, current_event)
+        return current_event
 
     def _convertToMonoAveraged(self, prev_event, current_event):
         mono_evt = []
@@ -825,7 +1138,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
                     'time')] - existing_start_event[self.io_event_ix('time')],
                 xDiff,
                 yDiff,
-                np.rad2deg(np.arctan(yDiff, xDiff)),
+                np.rad2deg(np.arctan2(yDiff, xDiff)),
                 existing_start_event[gx],
                 existing_start_event[gy],
                 0.0,
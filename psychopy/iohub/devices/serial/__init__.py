@@ -225,6 +225,15 @@ class Serial(Device):
     def isConnected(self):
         return self._serial is not None
 
+    def _getWakeupFileDescriptor(self):
+        # pyserial only provides a file descriptor for posix serial ports.
+        if self._serial is None or not hasattr(self._serial, 'fileno'):
+            return None
+        try:
+            return self._serial.fileno()
+        except Exception:
+            return None
+
     def getDeviceTime(self):
         return getTime()
 
@@ -5,6 +5,8 @@
 import struct
 from weakref import proxy
 
+import numpy
+
 from gevent import sleep, Greenlet
 import msgpack
 try:
@@ -240,23 +242,11 @@ class ioHubTimeGreenSyncManager(Greenlet):
     def _sync(self, calc_drift_and_offset=True):
         try:
             if self._sync_socket:
-                r = self._sync_socket.sync()
-                min_delay, min_local_time, min_remote_time = r
-                sync_state_target = self.sync_state_target
-                sync_state_target.RTTs.append(min_delay)
-                sync_state_target.L_times.append(min_local_time)
-                sync_state_target.R_times.append(min_remote_time)
-
-                if calc_drift_and_offset is True:
-                    l1 = sync_state_target.L_times[-2]
-                    l2 = sync_state_target.L_times[-1]
-                    r1 = sync_state_target.R_times[-2]
-                    r2 = sync_state_target.R_times[-1]
-                    self.sync_state_target.drifts.append((r2 - r1) / (l2 - l1))
-
-                    l = sync_state_target.L_times[-1]
-                    r = sync_state_target.R_times[-1]
-                    self.sync_state_target.offsets = (r - l)
+                min_delay, min_local_time, min_remote_time = \
+                    self._sync_socket.sync()
+                self.sync_state_target.addSyncSample(
+                    min_delay, min_local_time, min_remote_time,
+                    calc_drift_and_offset)
         except Exception: # pylint: disable=broad-except
             return False
         return True
@@ -281,23 +271,11 @@ class ioHubTimeSyncManager():
 
     def sync(self, calc_drift_and_offset=True):
         if self._sync_socket:
-            r = self._sync_socket.sync()
-            min_delay, min_local_time, min_remote_time = r
-            sync_state_target = self.sync_state_target
-            sync_state_target.RTTs.append(min_delay)
-            sync_state_target.L_times.append(min_local_time)
-            sync_state_target.R_times.append(min_remote_time)
-
-            if calc_drift_and_offset is True:
-                l1 = sync_state_target.L_times[-2]
-                l2 = sync_state_target.L_times[-1]
-                r1 = sync_state_target.R_times[-2]
-                r2 = sync_state_target.R_times[-1]
-                self.sync_state_target.drifts.append((r2 - r1) / (l2 - l1))
-
-                l = sync_state_target.L_times[-1]
-                r = sync_state_target.R_times[-1]
-                self.sync_state_target.offsets = (r - l)
+            min_delay, min_local_time, min_remote_time = \
+                self._sync_socket.sync()
+            self.sync_state_target.addSyncSample(
+                min_delay, min_local_time, min_remote_time,
+                calc_drift_and_offset)
 
     def close(self):
         if self._sync_socket:
@@ -311,39 +289,151 @@ class ioHubTimeSyncManager():
 class TimeSyncState():
     """Container class used by an ioHubSyncManager to hold the data necessary
     to calculate the current time base offset and drift between an ioHub Server
-    and a ioHubRemoteEventSubscriber client."""
-    RTTs = RingBuffer(10)
-    L_times = RingBuffer(10)
-    R_times = RingBuffer(10)
-    drifts = RingBuffer(20)
-    offsets = RingBuffer(20)
+    and a ioHubRemoteEventSubscriber client.
+
+    The remote time base is modelled as a linear function of the local one,
+    remote_time = drift * local_time + offset, fitted by least squares to the
+    last window sync samples. A sync request or reply that is delayed in
+    transit shifts the remote time of the sample by up to half of the extra
+    round trip time (RTT), so samples with an RTT more than rtt_mad_limit
+    median absolute deviations above the median RTT of the window are not
+    used in the fit.
+
+    Times can be converted one at a time, or as numpy arrays of times.
+    """
+    #: Smallest RTT spread (sec.msec) used when rejecting slow sync samples,
+    #: so that RTTs within timer resolution of the median are always used.
+    MIN_RTT_DEVIATION = 0.00001
+
+    def __init__(self, window=256, rtt_mad_limit=3.0):
+        self.RTTs = RingBuffer(window, dtype=numpy.float64)
+        self.L_times = RingBuffer(window, dtype=numpy.float64)
+        self.R_times = RingBuffer(window, dtype=numpy.float64)
+        self.drifts = RingBuffer(20, dtype=numpy.float64)
+        self.offsets = RingBuffer(20, dtype=numpy.float64)
+        self.rtt_mad_limit = rtt_mad_limit
+        # remote_time = _remote_ref + _drift * (local_time - _local_ref),
+        # which keeps the model precise for large time values.
+        self._drift = 1.0
+        self._local_ref = 0.0
+        self._remote_ref = 0.0
+        self._used = numpy.zeros(0, dtype=bool)
+
+    def addSyncSample(self, rtt, local_time, remote_time, update_model=True):
+        """Adds the result of a time sync request and, if update_model is True,
+        fits the drift and offset to the sync samples in the window."""
+        self.RTTs.append(rtt)
+        self.L_times.append(local_time)
+        self.R_times.append(remote_time)
+        if update_model:
+            self.updateModel()
+
+    def updateModel(self):
+        """Fits the drift and offset between the two time bases to the sync
+        samples in the window. Returns False if there are not enough samples
+        to do so."""
+        if len(self.RTTs) < 2:
+            return False
+        rtts = self.RTTs.getElements()
+        local_times = self.L_times.getElements()
+        remote_times = self.R_times.getElements()
+
+        median_rtt = numpy.median(rtts)
+        rtt_deviation = max(numpy.median(numpy.abs(rtts - median_rtt)),
+                            self.MIN_RTT_DEVIATION)
+        used = rtts <= median_rtt + self.rtt_mad_limit * rtt_deviation
+        if numpy.count_nonzero(used) < 2:
+            used[:] = True
+
+        l_used = local_times[used]
+        r_used = remote_times[used]
+        local_ref = l_used.mean()
+        remote_ref = r_used.mean()
+        l_dev = l_used - local_ref
+        l_var = numpy.dot(l_dev, l_dev)
+        if l_var <= 0.0:
+            return False
+
+        self._drift = float(numpy.dot(l_dev, r_used - remote_ref) / l_var)
+        self._local_ref = float(local_ref)
+        self._remote_ref = float(remote_ref)
+        self._used = used
+        self.drifts.append(self._drift)
+        self.offsets.append(self.getOffset())
+        return True
 
     def getDrift(self):
         """Current drift between two time bases."""
-        return self.drifts.mean()
+        return self._drift
 
     def getOffset(self):
         """Current offset between two time bases."""
-        return self.offsets.mean()
+        return self._remote_ref - self._drift * self._local_ref
 
     def getAccuracy(self):
-        """Current accuracy of the time synchronization, as calculated as the.
-
-        average of the last 10 round trip time sync request - response delays
-        divided by two.
-
+        """Current accuracy of the time synchronization, calculated as the
+        average round trip time of the sync samples used by the drift and
+        offset model divided by two."""
+        rtts = self.RTTs.getElements()
+        if len(self._used) == len(rtts) and self._used.any():
+            rtts = rtts[self._used]
+        return rtts.mean() / 2.0
+
+    def getSyncQuality(self):
+        """Returns a dict describing the current time synchronization:
+
+            * sample_count, used_count: number of sync samples in the window,
+              and the number used by the drift and offset model.
+            * window_duration: local time spanned by the sync samples.
+            * rtt_min, rtt_median, rtt_max: sync round trip times.
+            * accuracy: see getAccuracy().
+            * residual_std, residual_max: standard deviation and maximum
+              absolute difference between the remote times of the samples
+              used and the remote times given by the model.
+            * drift, drift_ppm, offset: the model; drift_ppm is the
+              difference in clock rates in parts per million.
+            * drift_ppm_std: standard deviation of the last 20 drift
+              estimates, in parts per million.
+
+        All times are in sec.msec.
         """
-        return self.RTTs.mean() / 2.0
+        rtts = self.RTTs.getElements()
+        local_times = self.L_times.getElements()
+        remote_times = self.R_times.getElements()
+        report = dict(sample_count=len(rtts), used_count=0,
+                      window_duration=0.0, drift=self._drift,
+                      drift_ppm=(self._drift - 1.0) * 1e6,
+                      drift_ppm_std=0.0, offset=self.getOffset())
+        if len(rtts) == 0:
+            return report
+
+        report.update(window_duration=local_times[-1] - local_times[0],
+                      rtt_min=rtts.min(), rtt_median=numpy.median(rtts),
+                      rtt_max=rtts.max(), accuracy=self.getAccuracy())
+        if len(self.drifts):
+            report['drift_ppm_std'] = self.drifts.getElements().std() * 1e6
+        if len(self._used) == len(rtts):
+            residuals = (remote_times[self._used] -
+                         self.local2RemoteTime(local_times[self._used]))
+            report.update(used_count=len(residuals),
+                          residual_std=residuals.std(),
+                          residual_max=numpy.abs(residuals).max())
+        return report
 
     def local2RemoteTime(self, local_time=None):
-        """Converts a local time (sec.msec format) to the corresponding remote
-        computer time, using the current offset and drift measures."""
+        """Converts a local time (sec.msec format), or a numpy array of local
+        times, to the corresponding remote computer time(s), using the
+        current offset and drift measures."""
         if local_time is None:
             local_time = Computer.getTime()
-        return self.getDrift() * local_time + self.getOffset()
+        elif isinstance(local_time, (list, tuple)):
+            local_time = numpy.asarray(local_time, dtype=numpy.float64)
+        return self._remote_ref + self._drift * (local_time - self._local_ref)
 
     def remote2LocalTime(self, remote_time):
-        """Converts a remote computer time (sec.msec format) to the
-        corresponding local time, using the current offset and drift
-        measures."""
-        return (remote_time - self.getOffset()) / self.getDrift()
+        """Converts a remote computer time (sec.msec format), or a numpy array
+        of remote times, to the corresponding local time(s), using the
+        current offset and drift measures."""
+        if isinstance(remote_time, (list, tuple)):
+            remote_time = numpy.asarray(remote_time, dtype=numpy.float64)
+        return self._local_ref + (remote_time - self._remote_ref) / self._drift
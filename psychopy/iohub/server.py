@@ -6,11 +6,13 @@ import importlib
 import os
 import sys
 import inspect
+from time import thread_time
 from operator import itemgetter
 from collections import deque, OrderedDict
 
 import msgpack
 import gevent
+import gevent.select
 from gevent.server import DatagramServer
 from gevent import Greenlet
 
@@ -28,6 +30,7 @@ from .net import MAX_PACKET_SIZE
 from .util import convertCamelToSnake, win32MessagePump
 from .util import yload, yLoader
 from .constants import DeviceConstants, EventConstants
+from .sharedmem import SharedEventBuffer
 from .devices import DeviceEvent, import_device, importDeviceModule
 from .devices import Computer
 from .devices.deviceConfigValidation import validateDeviceConfiguration
@@ -220,6 +223,8 @@ class udpServer(DatagramServer):
             self.iohub.processDeviceEvents()
             currentEvents = list(self.iohub.eventBuffer)
             self.iohub.eventBuffer.clear()
+            if self.iohub.sharedEventBuffer:
+                self.iohub.sharedEventBuffer.pending = 0
 
             if len(currentEvents) > 0:
                 currentEvents = sorted(
@@ -488,6 +493,30 @@ class udpServer(DatagramServer):
             return dsfile.extendConditionVariableTable(exp_id, sess_id, data)
         return False
 
+    def extendConditionVariableTableRows(self, exp_id, sess_id, rows):
+        dsfile = self.iohub.dsfile
+        if dsfile:
+            return dsfile.extendConditionVariableTableRows(exp_id, sess_id,
+                                                           rows)
+        return False
+
+    def getSharedEventBufferName(self):
+        """Returns the name of the shared memory event buffer, or None if
+        events are only sent over UDP."""
+        if self.iohub.sharedEventBuffer:
+            return self.iohub.sharedEventBuffer.name
+        return None
+
+    def getDeviceMonitorStats(self, reset=False):
+        """Returns a dict of polling statistics, keyed by device name, for
+        each device the ioHub Server polls. See DeviceMonitor.getStats."""
+        stats = dict()
+        for monitor in self.iohub.deviceMonitors:
+            stats[monitor.device.name] = monitor.getStats()
+            if reset:
+                monitor.resetStats()
+        return stats
+
     def clearEventBuffer(self, clear_device_level_buffers=False):
         """
 
@@ -544,7 +573,7 @@ class udpServer(DatagramServer):
     def flushIODataStoreFile(self):
         dsfile = self.iohub.dsfile
         if dsfile:
-            dsfile.emrtFile.flush()
+            dsfile.flush()
             return True
         return False
 
@@ -561,20 +590,176 @@ class udpServer(DatagramServer):
 
 
 class DeviceMonitor(Greenlet):
-    def __init__(self, device, sleep_interval):
+    """Polls a Device by calling its _poll method from a Greenlet.
+
+    By default the device is polled every sleep_interval sec.msec. When
+    adaptive is True, the time between polls is doubled after each poll that
+    finds no new native device events, up to max_interval, and goes back to
+    sleep_interval as soon as a poll finds events. The wait after a poll
+    that found no events is cut short to the time the next event is
+    expected, based on a moving average of the device event rate. Devices
+    that have a wakeup file descriptor (see
+    Device._getWakeupFileDescriptor) are instead polled as soon as the
+    file descriptor becomes readable, or after max_interval.
+
+    getStats() returns the polling statistics of the device.
+    """
+    #: Weight given to the latest measurement of the device event rate.
+    RATE_WEIGHT = 0.1
+
+    def __init__(self, device, sleep_interval, adaptive=False,
+                 max_interval=None):
         Greenlet.__init__(self)
         self.device = device
         self.sleep_interval = sleep_interval
+        self.adaptive = adaptive
+        if max_interval is None:
+            max_interval = sleep_interval
+        self.max_interval = max(sleep_interval, max_interval)
+        self.interval = sleep_interval
+        self.event_rate = 0.0
         self.running = False
+        self._last_event_poll_time = None
+        self._use_wakeup_fd = adaptive and Computer.platform != 'win32'
+        self._waited_on_fd = False
+        self.resetStats()
+
+    def resetStats(self):
+        self._stats_start_time = Computer.getTime()
+        self._poll_count = 0
+        self._active_poll_count = 0
+        self._event_count = 0
+        self._poll_cpu_time = 0.0
+        self._poll_duration = 0.0
+        self._poll_duration_max = 0.0
+        self._wake_latency = 0.0
+        self._wake_latency_max = 0.0
+
+    def getStats(self):
+        """Returns a dict of the polling statistics collected since the
+        monitor was started or resetStats() was last called. All times are
+        in sec.msec.
+        """
+        duration = Computer.getTime() - self._stats_start_time
+        polls = max(self._poll_count, 1)
+        mode = 'fixed'
+        if self.adaptive:
+            mode = 'wakeup' if self._waited_on_fd else 'adaptive'
+        return dict(mode=mode,
+                    duration=duration,
+                    interval=self.interval,
+                    min_interval=self.sleep_interval,
+                    max_interval=self.max_interval,
+                    event_rate=self.event_rate,
+                    poll_count=self._poll_count,
+                    active_poll_count=self._active_poll_count,
+                    event_count=self._event_count,
+                    cpu_time=self._poll_cpu_time,
+                    cpu_load=self._poll_cpu_time / max(duration, 1e-9),
+                    poll_duration_mean=self._poll_duration / polls,
+                    poll_duration_max=self._poll_duration_max,
+                    wake_latency_mean=self._wake_latency / polls,
+                    wake_latency_max=self._wake_latency_max)
+
+    def _pollDevice(self, wake_latency):
+        """Polls the device, updating the polling statistics. Returns the
+        number of native events added by the device during the poll.
+        """
+        device = self.device
+        event_count = device._native_event_count
+        cpu_start = thread_time()
+        stime = Computer.getTime()
+        device._poll()
+        duration = Computer.getTime() - stime
+        self._poll_cpu_time += thread_time() - cpu_start
+        new_events = device._native_event_count - event_count
+
+        self._poll_count += 1
+        if new_events > 0:
+            self._active_poll_count += 1
+            self._event_count += new_events
+        self._poll_duration += duration
+        self._poll_duration_max = max(self._poll_duration_max, duration)
+        wake_latency = max(0.0, wake_latency)
+        self._wake_latency += wake_latency
+        self._wake_latency_max = max(self._wake_latency_max, wake_latency)
+        return new_events
+
+    def _nextPollTime(self, poll_time, new_events):
+        """Returns the time the device should next be polled, given the time
+        of the last poll and the number of events it found.
+        """
+        if not self.adaptive:
+            return poll_time + self.sleep_interval
+
+        if new_events > 0:
+            if self._last_event_poll_time is not None:
+                rate = new_events / max(
+                    poll_time - self._last_event_poll_time, 1e-6)
+                if self.event_rate:
+                    self.event_rate += self.RATE_WEIGHT * (
+                        rate - self.event_rate)
+                else:
+                    self.event_rate = rate
+            self._last_event_poll_time = poll_time
+            self.interval = self.sleep_interval
+            return poll_time + self.interval
+
+        self.interval = min(self.interval * 2, self.max_interval)
+        next_time = poll_time + self.interval
+        if self.event_rate > 0.0:
+            expected_time = (self._last_event_poll_time +
+                             1.0 / self.event_rate)
+            if poll_time < expected_time < next_time:
+                next_time = max(expected_time,
+                                poll_time + self.sleep_interval)
+        return next_time
+
+    def _getWakeupFileDescriptor(self):
+        if self._use_wakeup_fd:
+            try:
+                return self.device._getWakeupFileDescriptor()
+            except Exception:
+                printExceptionDetailsToStdErr()
+                self._use_wakeup_fd = False
+        return None
+
+    def _waitForData(self, fd, poll_time, next_time):
+        """Waits until fd is readable or next_time is reached, but no less
+        than sleep_interval after the last poll. Returns True if fd is
+        readable.
+        """
+        ctime = Computer.getTime
+        gevent.sleep(max(0.0, poll_time + self.sleep_interval - ctime()))
+        try:
+            readable = gevent.select.select([fd], [], [],
+                                            max(0.0, next_time - ctime()))[0]
+        except (OSError, ValueError):
+            # the file descriptor has been closed, fall back to sleeping
+            gevent.sleep(max(0.0, next_time - ctime()))
+            return False
+        self._waited_on_fd = True
+        return len(readable) > 0
 
     def _run(self):
         self.running = True
         ctime = Computer.getTime
+        wake_time = ctime()
         while self.running is True:
             stime = ctime()
-            self.device._poll()
-            i = self.sleep_interval - (ctime() - stime)
-            gevent.sleep(max(0,i))
+            new_events = self._pollDevice(stime - wake_time)
+            wake_time = self._nextPollTime(stime, new_events)
+            fd = None
+            if new_events == 0:
+                fd = self._getWakeupFileDescriptor()
+            if fd is None:
+                gevent.sleep(max(0.0, wake_time - ctime()))
+                continue
+            # the file descriptor wakes the monitor when there is new data
+            self.interval = self.max_interval
+            wake_time = stime + self.max_interval
+            if self._waitForData(fd, stime, wake_time):
+                wake_time = ctime()
 
     def __del__(self):
         self.device = None
@@ -582,6 +767,7 @@ class DeviceMonitor(Greenlet):
 
 class ioServer():
     eventBuffer = None
+    sharedEventBuffer = None
     deviceDict = {}
     _logMessageBuffer = deque(maxlen=128)
     _psychopy_windows = {}
@@ -618,6 +804,22 @@ class ioServer():
 
         self._addPubSubListeners()
 
+        self._initSharedEventBuffer(config)
+
+    def _initSharedEventBuffer(self, config):
+        shm_config = config.get('shared_memory_events', {})
+        if not shm_config.get('enable', False):
+            return
+        try:
+            # slots are sized for the event types of the devices added above
+            self.sharedEventBuffer = SharedEventBuffer.create(
+                shm_config.get('buffer_length', 16384))
+        except Exception:
+            print2err('Error creating shared memory event buffer, '
+                      'events will be sent over UDP:')
+            printExceptionDetailsToStdErr()
+            self.sharedEventBuffer = None
+
     def _initDataStore(self, config, script_dir):
         try:
             # initial dataStore setup
@@ -917,10 +1119,16 @@ class ioServer():
             self.log('Device Instance Created: %s' % (dev_cls_name,))
 
             if 'device_timer' in dev_conf:
-                interval = dev_conf['device_timer'].get('interval', 0.001)
-                dPoller = DeviceMonitor(dev_instance, interval)
+                dev_timer = dev_conf['device_timer']
+                interval = dev_timer.get('interval', 0.001)
+                adaptive = dev_timer.get('adaptive', False)
+                max_interval = dev_timer.get('max_interval', interval)
+                dPoller = DeviceMonitor(dev_instance, interval, adaptive,
+                                        max_interval)
                 self.deviceMonitors.append(dPoller)
                 ltxt = '%s timer period: %.3f' % (dev_cls_name, interval)
+                if adaptive:
+                    ltxt += ' (adaptive, max %.3f)' % (max_interval,)
                 self.log(ltxt)
 
             monitor_evt_ids = []
@@ -978,6 +1186,8 @@ class ioServer():
         while self._running:
             stime = Computer.getTime()
             self.processDeviceEvents()
+            if self.sharedEventBuffer:
+                self._pushSharedEvents()
             dur = sleep_interval - (Computer.getTime() - stime)
             gevent.sleep(max(0, dur))
 
@@ -1011,6 +1221,19 @@ class ioServer():
                 printExceptionDetailsToStdErr()
                 print2err('--------------------------------------')
 
+    def _pushSharedEvents(self):
+        """Move events from the global event buffer into the shared memory
+        event buffer. Any that do not fit stay in the global event buffer
+        until the next GET_EVENTS request."""
+        if not self.eventBuffer:
+            return
+        events = sorted(self.eventBuffer,
+                        key=itemgetter(DeviceEvent.EVENT_HUB_TIME_INDEX))
+        self.eventBuffer.clear()
+        unwritten = self.sharedEventBuffer.write(events)
+        self.eventBuffer.extend(unwritten)
+        self.sharedEventBuffer.pending = len(unwritten)
+
     def _handleEvent(self, event):
         self.eventBuffer.append(event)
 
@@ -1019,6 +1242,8 @@ class ioServer():
             self.processDeviceEvents()
         l = len(self.eventBuffer)
         self.eventBuffer.clear()
+        if self.sharedEventBuffer:
+            self.sharedEventBuffer.pending = 0
         return l
 
     def checkForPsychopyProcess(self, sleep_interval):
@@ -1060,6 +1285,10 @@ class ioServer():
             if self.eventBuffer:
                 self.clearEventBuffer()
 
+            if self.sharedEventBuffer:
+                self.sharedEventBuffer.close()
+                self.sharedEventBuffer = None
+
             self.closeDataStoreFile()
 
             while self.devices:
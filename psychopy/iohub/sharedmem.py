@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# Part of the PsychoPy library
+# Copyright (C) 2012-2020 iSolver Software Solutions (C) 2021 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+"""Shared memory ring buffer used to pass events from the ioHub Server to the
+experiment process without a UDP request / reply for every getEvents() call.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .constants import EventConstants
+from .devices import DeviceEvent
+
+# Layout of the buffer header, an array of uint64 values.
+HEADER_SIZE = 64
+_WRITE_COUNT = 0  # number of events ever written, only changed by the server
+_READ_COUNT = 1  # number of events ever read, only changed by the client
+_CAPACITY = 2  # number of event slots in the buffer
+_SLOT_SIZE = 3  # bytes per slot
+_PENDING = 4  # events the server has left for GET_EVENTS over UDP
+
+# Offset of the event type id within every event record; it is one of the
+# DeviceEvent base fields, so the same for all event classes.
+_TYPE_OFFSET = DeviceEvent.NUMPY_DTYPE.fields['type'][1]
+
+
+def getMaxEventRecordSize():
+    """Returns the size in bytes of the largest event record (as given by
+    the event class NUMPY_DTYPE) of the event classes currently registered
+    with EventConstants."""
+    classes = EventConstants._classes or {}  # pylint: disable=protected-access
+    sizes = [c.NUMPY_DTYPE.itemsize for k, c in classes.items()
+             if isinstance(k, int)]
+    return max(sizes + [DeviceEvent.NUMPY_DTYPE.itemsize])
+
+
+class SharedEventBuffer():
+    """A single producer, single consumer ring buffer of fixed size event
+    records held in shared memory.
+
+    The ioHub Server writes each event as a numpy record (using the event
+    class NUMPY_DTYPE) into the next free slot and then advances the write
+    count; the experiment process reads all slots between its read count and
+    the write count and then advances the read count. As each count is only
+    changed by one process no locking is needed.
+
+    Events that can not be written (the buffer is full, the event class
+    record is larger than a slot, or a value does not fit the event dtype)
+    are returned by write() so the server can keep them for the next UDP
+    GET_EVENTS request, and the number of such events is made available to
+    the client as the `pending` property.
+
+    The server creates the buffer with SharedEventBuffer.create(), and the
+    client attaches to it by name with SharedEventBuffer.attach().
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self._owner = owner
+        self._header = np.ndarray((HEADER_SIZE // 8,), dtype=np.uint64,
+                                  buffer=shm.buf)
+        self.capacity = int(self._header[_CAPACITY])
+        self.slot_size = int(self._header[_SLOT_SIZE])
+        self._slots = np.ndarray((self.capacity, self.slot_size),
+                                 dtype=np.uint8, buffer=shm.buf,
+                                 offset=HEADER_SIZE)
+        # event type id -> buffer slots viewed as records of that event type
+        self._record_views = {}
+        self._record_dtypes = {}
+
+    @classmethod
+    def create(cls, capacity=16384, slot_size=None, name=None):
+        """Create a new shared event buffer (done by the ioHub Server).
+
+        Args:
+            capacity (int): Number of events the buffer can hold.
+            slot_size (int): Bytes per event. Default is the size of the
+                             largest registered event class record.
+            name (str): Name of the shared memory block, or None to have one
+                        generated.
+
+        Returns:
+            SharedEventBuffer
+        """
+        if slot_size is None:
+            slot_size = getMaxEventRecordSize()
+        # keep records 8 byte aligned
+        slot_size = int(np.ceil(slot_size / 8.0)) * 8
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=HEADER_SIZE + capacity * slot_size)
+        header = np.ndarray((HEADER_SIZE // 8,), dtype=np.uint64,
+                            buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_SLOT_SIZE] = slot_size
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a shared event buffer created by the ioHub Server.
+
+        Args:
+            name (str): Name of the shared memory block.
+
+        Returns:
+            SharedEventBuffer
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always registers the block with the resource
+            # tracker, which would unlink it when this process exits even
+            # though it is owned by the ioHub Server.
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')  # pylint: disable=protected-access
+            except Exception:  # pylint: disable=broad-except
+                pass
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __len__(self):
+        """Number of events written but not yet read."""
+        return int(self._header[_WRITE_COUNT] - self._header[_READ_COUNT])
+
+    @property
+    def pending(self):
+        """Number of events the server could not write to the buffer, which
+        must be requested over UDP."""
+        return int(self._header[_PENDING])
+
+    @pending.setter
+    def pending(self, count):
+        self._header[_PENDING] = count
+
+    def getRecordDtype(self, event_type):
+        """Returns the dtype of records of the given event type id as stored
+        in a buffer slot (the event class NUMPY_DTYPE padded to the slot
+        size), or None if the event type can not be stored in the buffer."""
+        if event_type in self._record_dtypes:
+            return self._record_dtypes[event_type]
+        event_class = EventConstants.getClass(event_type)
+        dtype = None
+        if event_class is not None:
+            edtype = event_class.NUMPY_DTYPE
+            if edtype.itemsize <= self.slot_size:
+                dtype = np.dtype(dict(
+                    names=edtype.names,
+                    formats=[edtype.fields[n][0] for n in edtype.names],
+                    offsets=[edtype.fields[n][1] for n in edtype.names],
+                    itemsize=self.slot_size))
+        self._record_dtypes[event_type] = dtype
+        return dtype
+
+    def _getRecordView(self, event_type):
+        if event_type not in self._record_views:
+            dtype = self.getRecordDtype(event_type)
+            if dtype is None:
+                self._record_views[event_type] = None
+            else:
+                self._record_views[event_type] = np.ndarray(
+                    (self.capacity,), dtype=dtype, buffer=self._shm.buf,
+                    offset=HEADER_SIZE)
+        return self._record_views[event_type]
+
+    def write(self, events):
+        """Write events (in list format) to the buffer. Only called by the
+        ioHub Server.
+
+        Args:
+            events (list): Events to write, in the order they should be read.
+
+        Returns:
+            list: Events that could not be written.
+        """
+        write_count = int(self._header[_WRITE_COUNT])
+        free = self.capacity - (write_count -
+                                int(self._header[_READ_COUNT]))
+        unwritten = []
+        for event in events:
+            if free <= 0:
+                unwritten.append(event)
+                continue
+            records = self._getRecordView(
+                event[DeviceEvent.EVENT_TYPE_ID_INDEX])
+            if records is None:
+                unwritten.append(event)
+                continue
+            try:
+                records[write_count % self.capacity] = tuple(event)
+            except (ValueError, TypeError, OverflowError,
+                    UnicodeEncodeError):
+                unwritten.append(event)
+                continue
+            write_count += 1
+            free -= 1
+        # only make the new events visible once they are fully written
+        self._header[_WRITE_COUNT] = write_count
+        return unwritten
+
+    def read(self):
+        """Read all unread events, returning them as raw slots. Only called
+        by the experiment process.
+
+        Returns:
+            ndarray: uint8 array of shape (n_events, slot_size), a copy
+                     of the slots, so the server can reuse them straight away.
+        """
+        write_count = int(self._header[_WRITE_COUNT])
+        read_count = int(self._header[_READ_COUNT])
+        if write_count == read_count:
+            return self._slots[:0].copy()
+        start = read_count % self.capacity
+        stop = write_count % self.capacity
+        if start < stop:
+            slots = self._slots[start:stop].copy()
+        else:
+            slots = np.concatenate((self._slots[start:],
+                                    self._slots[:stop]))
+        self._header[_READ_COUNT] = write_count
+        return slots
+
+    def discard(self):
+        """Drop all unread events. Only called by the experiment process.
+        """
+        self._header[_READ_COUNT] = self._header[_WRITE_COUNT]
+
+    def toArrays(self, slots):
+        """Convert slots returned by read() into a numpy structured array
+        per event type, using each event class NUMPY_DTYPE.
+
+        Returns:
+            dict: event type id -> structured array of events, in read order.
+        """
+        types = slots[:, _TYPE_OFFSET]
+        arrays = dict()
+        for event_type in np.unique(types).tolist():
+            dtype = self.getRecordDtype(event_type)
+            if dtype is None:
+                continue
+            records = slots[types == event_type].view(dtype).ravel()
+            edtype = EventConstants.getClass(event_type).NUMPY_DTYPE
+            arrays[event_type] = records.astype(edtype)
+        return arrays
+
+    def toLists(self, slots):
+        """Convert slots returned by read() into events in list format, the
+        same as those sent by the ioHub Server in reply to GET_EVENTS.
+
+        Returns:
+            list: Events in read order.
+        """
+        types = slots[:, _TYPE_OFFSET]
+        events = [None] * len(slots)
+        for event_type in np.unique(types).tolist():
+            dtype = self.getRecordDtype(event_type)
+            if dtype is None:
+                continue
+            indices = np.flatnonzero(types == event_type)
+            records = slots[indices].view(dtype).ravel().tolist()
+            for i, record in zip(indices.tolist(), records):
+                events[i] = [str(v, 'utf-8') if isinstance(v, bytes) else v
+                             for v in record]
+        return [e for e in events if e is not None]
+
+    def readEvents(self):
+        """Read all unread events in list format."""
+        return self.toLists(self.read())
+
+    def close(self):
+        """Release the shared memory, and remove it if this is the process
+        that created it."""
+        self._record_views = {}
+        self._header = None
+        self._slots = None
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
@@ -64,7 +64,12 @@ def run(rootScriptPathDir, configFilePath):
             m.start()
             glets.append(m)
 
-        tlet = gevent.spawn(s.processEventsTasklet, 0.01)
+        proc_events_interval = 0.01
+        if s.sharedEventBuffer:
+            # events reach the experiment process as soon as they are pushed
+            proc_events_interval = s.config.get(
+                'shared_memory_events', {}).get('push_interval', 0.001)
+        tlet = gevent.spawn(s.processEventsTasklet, proc_events_interval)
         glets.append(tlet)
 
         if Computer.psychopy_process:
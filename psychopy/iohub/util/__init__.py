@@ -643,28 +643,36 @@ class NumPyRingBuffer():
 
     """
 
-    def __init__(self, max_size, dtype=numpy.float32):
+    def __init__(self, max_size, dtype=numpy.float32, element_shape=()):
         self._dtype = dtype
-        self._npa = numpy.empty(max_size * 2, dtype=dtype)
+        self._npa = numpy.empty((max_size * 2,) + tuple(element_shape),
+                                dtype=dtype)
         self.max_size = max_size
         self._index = 0
 
     def append(self, element):
         """Add element e to the end of the RingBuffer. The element must match
         the numpy data type specified when the NumPyRingBuffer was created. By
-        default, the RingBuffer uses float32 values.
+        default, the RingBuffer uses float32 values. If an element_shape was
+        given when the NumPyRingBuffer was created, each element is an array
+        of that shape (for example one value for each of several event fields).
 
         If the Ring Buffer is full, adding the element to the end of the array
         removes the currently oldest element from the start of the array.
 
         :param numpy.dtype element: An element to add to the RingBuffer.
-        :returns None:
+        :returns: The element removed from the RingBuffer, or None if the
+                  RingBuffer was not full.
 
         """
-        i = self._index
-        self._npa[i % self.max_size] = element
-        self._npa[(i % self.max_size) + self.max_size] = element
+        i = self._index % self.max_size
+        removed = None
+        if self._index >= self.max_size:
+            removed = self._npa[i].copy()
+        self._npa[i] = element
+        self._npa[i + self.max_size] = element
         self._index += 1
+        return removed
 
     def getElements(self):
         """Return the numpy array being used by the RingBuffer, the length of
@@ -676,6 +684,8 @@ class NumPyRingBuffer():
         :returns numpy.array: The array of data elements that make up the Ring Buffer.
 
         """
+        if self._index < self.max_size:
+            return self._npa[:self._index]
         return self._npa[
             self._index %
             self.max_size:(
@@ -31,13 +31,17 @@ messages, (which PsychoPy doesn't use) using the commands::
 # Much of the code below is based conceptually, if not syntactically, on the
 # python logging module but it's simpler (no threading) and maintaining a
 # stack of log entries for later writing (don't want files written while
-# drawing)
+# drawing). Optionally, a logger can hand flushed entries to a background
+# writer thread so that formatting and file access happen off the frame loop.
 
 from os import path
 import atexit
 import sys
 import codecs
 import locale
+import queue
+import threading
+from collections import deque
 from pathlib import Path
 
 from psychopy import clock
@@ -231,6 +235,37 @@ class LogFile():
             pass
 
 
+class _LogWriter(threading.Thread):
+    """Background thread which formats log entries and writes them to the
+    targets of a logger, so that file access doesn't happen on the thread
+    running the experiment.
+
+    Batches of entries are passed to the thread through `queue` by
+    :meth:`_Logger.flush`. Putting `None` on the queue stops the thread once
+    all preceding batches have been written.
+    """
+
+    def __init__(self, logger):
+        threading.Thread.__init__(self, name='PsychoPyLogWriter', daemon=True)
+        self.logger = logger
+        self.queue = queue.Queue()
+
+    def run(self):
+        while True:
+            entries = self.queue.get()
+            try:
+                if entries is None:
+                    break
+                self.logger._writeEntries(entries)
+            except Exception as e:
+                # never let a failed write kill the thread, and don't mix
+                # the error into stdout (which may be a log target itself)
+                if sys.stderr is not None:
+                    sys.stderr.write('Failed to write log entries: %s\n' % e)
+            finally:
+                self.queue.task_done()
+
+
 class _Logger():
     """Maintains a set of log targets (text streams such as files of stdout)
 
@@ -238,17 +273,67 @@ class _Logger():
 
     """
 
-    def __init__(self, format="{t:.4f} \t{levelname} \t{message}"):
+    def __init__(self, format="{t:.4f} \t{levelname} \t{message}",
+                 maxFlushed=None, threaded=False):
         """The string-formatted elements {xxxx} can be used, where
         each xxxx is an attribute of the LogEntry.
         e.g. t, t_ms, level, levelname, message
+
+        `maxFlushed` sets how many already-written entries are kept in
+        `self.flushed` (`None` keeps them all). If `threaded` is True, entries
+        are formatted and written by a background thread (see
+        :meth:`startWriterThread`).
         """
         super(_Logger, self).__init__()
         self.targets = []
-        self.flushed = []
+        self.flushed = deque(maxlen=maxFlushed)
         self.toFlush = []
         self.format = format
         self.lowestTarget = 50
+        self._writer = None
+        if threaded:
+            self.startWriterThread()
+
+    @property
+    def maxFlushed(self):
+        """Maximum number of written entries kept in `self.flushed`, the
+        oldest entries are discarded first. `None` means no limit, which will
+        make memory use grow for the whole session.
+        """
+        return self.flushed.maxlen
+
+    @maxFlushed.setter
+    def maxFlushed(self, value):
+        self.flushed = deque(self.flushed, maxlen=value)
+
+    @property
+    def threaded(self):
+        """`True` if entries are being written by a background thread.
+        """
+        return self._writer is not None
+
+    def startWriterThread(self):
+        """Start writing flushed entries from a background thread.
+
+        After this, :meth:`flush` only hands the pending entries to the thread
+        and returns straight away, so it is cheap to call during a trial.
+        Entries written directly with :meth:`LogFile.write` are not queued
+        and may appear before pending entries.
+        """
+        if self._writer is None:
+            self._writer = _LogWriter(self)
+            self._writer.start()
+
+    def stopWriterThread(self, timeout=None):
+        """Write all pending entries and stop the background writer thread.
+        Later calls to :meth:`flush` write synchronously again.
+        """
+        if self._writer is None:
+            return
+        self.flush()
+        writer, self._writer = self._writer, None
+        writer.queue.put(None)
+        writer.join(timeout)
 
     def __del__(self):
         self.flush()
@@ -292,14 +377,31 @@ class _Logger():
         self.toFlush.append(
             _LogEntry(t=t, level=level, message=message, obj=obj))
 
-    def flush(self):
+    def flush(self, wait=False):
         """Process all current messages to each target
+
+        If the background writer thread is running, the messages are queued
+        for writing and this returns immediately unless `wait` is True.
         """
-        # loop through targets then entries in toFlush
+        # swap in a new empty list so entries logged meanwhile aren't lost
+        entries, self.toFlush = self.toFlush, []
+        if self._writer is not None:
+            self._writer.queue.put(entries)
+            if wait:
+                self._writer.queue.join()
+        else:
+            self._writeEntries(entries)
+        # finished processing entries - move them to self.flushed
+        self.flushed.extend(entries)
+
+    def _writeEntries(self, entries):
+        """Format `entries` and write them to each target.
+        """
+        # loop through targets then entries
         # so that stream.flush can be called just once
         formatted = {}  # keep a dict - so only do the formatting once
-        for target in self.targets:
-            for thisEntry in self.toFlush:
+        for target in list(self.targets):
+            for thisEntry in entries:
                 if thisEntry.level >= target.level:
                     if not thisEntry in formatted:
                         # convert the entry into a formatted string
@@ -307,9 +409,6 @@ class _Logger():
                     target.write(formatted[thisEntry] + '\n')
             if hasattr(target.stream, 'flush'):
                 target.stream.flush()
-        # finished processing entries - move them to self.flushed
-        self.flushed.extend(self.toFlush)
-        self.toFlush = []  # a new empty list
 
 root = _Logger()
 console = LogFile(level=WARNING)
@@ -320,8 +419,16 @@ def flush(logger=root):
     """
     logger.flush()
 
+
+def _flushAtExit():
+    """Write everything that is still pending, including any entries queued
+    for a background writer thread.
+    """
+    root.flush()
+    root.stopWriterThread()
+
 # make sure this function gets called as python closes
-atexit.register(flush)
+atexit.register(_flushAtExit)
 
 
 def critical(msg, t=None, obj=None):
@@ -16,6 +16,7 @@ from psychopy.constants import (STARTED, PAUSED, FINISHED, STOPPING,
                                 NOT_STARTED)
 from psychopy.tools import systemtools
 from psychopy.tools import filetools as ft
+from psychopy.tools import prefetchtools
 from .exceptions import SoundFormatError, DependencyError
 from ._base import _SoundBase, HammingWindow
 from ..hardware import DeviceManager
@@ -429,6 +430,12 @@ class SoundPTB(_SoundBase):
         # alias default names (so it always points to default.png)
         if filename in ft.defaultStim:
             filename = Path(prefs.paths['assets']) / ft.defaultStim[filename]
+        if self.preBuffer == -1:
+            # use samples decoded in the background if available
+            prefetched = prefetchtools.popPrefetchedSound(filename)
+            if prefetched is not None:
+                self._setSndFromSamples(*prefetched)
+                return
         self.sndFile = f = sf.SoundFile(filename)
         self.sourceType = 'file'
         self.sampleRate = f.samplerate
@@ -463,6 +470,34 @@ class SoundPTB(_SoundBase):
         self._channelCheck(
             self.sndArr)  # Check for fewer channels in stream vs data array
 
+    def _setSndFromSamples(self, samples, sampleRate):
+        """As `_setSndFromFile` with full pre-buffering, but with the samples
+        of the file already read.
+        """
+        self.sndFile = None
+        self.sourceType = 'file'
+        self.sampleRate = sampleRate
+        if self.channels == -1:  # if channels was auto then set to file val
+            self.channels = samples.shape[1]
+        fileDuration = float(len(samples)) / sampleRate
+        # process start time
+        if self.startTime and self.startTime > 0:
+            startFrame = int(self.startTime * self.sampleRate)
+            self.t = self.startTime
+        else:
+            startFrame = 0
+            self.t = 0
+        # process stop time
+        if self.stopTime and self.stopTime > 0:
+            requestedDur = self.stopTime - self.t
+            self.duration = min(requestedDur, fileDuration)
+        else:
+            self.duration = fileDuration - self.t
+        self.durationFrames = int(round(self.duration * self.sampleRate))
+        self._setSndFromArray(
+            samples[startFrame:startFrame + int(self.sampleRate * self.duration)])
+        self._channelCheck(self.sndArr)
+
     def _setSndFromArray(self, thisArray):
 
         self.sndArr = np.asarray(thisArray).astype('float32')
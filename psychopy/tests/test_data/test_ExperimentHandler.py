@@ -4,6 +4,9 @@ from psychopy import data, logging
 import numpy as np
 import os, glob, shutil
 import io
+import csv
+import copy
+import pytest
 from tempfile import mkdtemp
 
 from psychopy.tools.filetools import openOutputFile
@@ -165,6 +168,110 @@ class TestExperimentHandler():
                 # If failed, remove and store character which failed
                 raise UnicodeEncodeError(*err.args[:4], "character failing to save to csv")
 
+    def test_streamWideText(self):
+        """Streaming entries gives the same data as saving at the end"""
+        files = {}
+        for stream in (False, True):
+            fileName = os.path.join(self.tmpDir, 'stream%s' % stream)
+            exp = data.ExperimentHandler(
+                extraInfo={'participant': 'jwp'}, savePickle=False,
+                saveWideText=True, streamWideText=stream,
+                dataFileName=fileName)
+            for n in range(20):
+                exp.addData('n', n)
+                exp.addData('resp', 'left, up' if n % 3 else 'right')
+                if n == 10:
+                    # new column part way through, so file is rewritten
+                    exp.addData('late', 0.5)
+                exp.nextEntry()
+                if stream and n == 5:
+                    # entries are on disk as soon as they're complete
+                    with io.open(fileName + '.csv', encoding='utf-8-sig') as f:
+                        assert len(f.readlines()) == 7
+            exp.addData('orphan', True)
+            if stream:
+                with io.open(fileName + '.csv', encoding='utf-8-sig') as f:
+                    streamed = f.read().splitlines()
+            exp.close()
+            with io.open(fileName + '.csv', encoding='utf-8-sig') as f:
+                # rows streamed before a column appeared end before its cell
+                files[stream] = [
+                    {name: value or '' for name, value in row.items() if name}
+                    for row in csv.DictReader(f)]
+                f.seek(0)
+                lines = f.read().splitlines()
+        # the late column stays where it was streamed, rows on disk are kept
+        # as they are and only the header and unfinished entry are written
+        assert lines[0].endswith('participant,late,orphan,')
+        assert lines[1:len(streamed)] == streamed[1:]
+        assert files[True] == files[False]
+
+    def test_entriesStore(self):
+        exp = data.ExperimentHandler()
+        exp.addData('rt', 0.5)
+        exp.addData('key', 'left')
+        exp.nextEntry()
+        exp.addData('rt', 1)
+        exp.addData('corr', [1, 2])
+        exp.nextEntry()
+        exp.addData('key', 'right', row=0)
+        assert exp.getAllEntries() == [
+            {'rt': 0.5, 'key': 'right'}, {'rt': 1, 'corr': [1, 2]}]
+        # int and float mixed in one column keep their own types
+        assert type(exp.entries[1]['rt']) is int
+        # pickles made with entries as a list of dicts still load
+        state = exp.__getstate__()
+        state['entries'] = exp.getAllEntries()
+        old = data.ExperimentHandler.__new__(data.ExperimentHandler)
+        old.__setstate__(state)
+        assert old.getAllEntries() == exp.getAllEntries()
+
+    def test_editEntries(self):
+        """Entries can be edited in place, as in a list of dicts"""
+        fileName = os.path.join(self.tmpDir, 'edited')
+        exp = data.ExperimentHandler(
+            savePickle=False, saveWideText=True, streamWideText=True,
+            dataFileName=fileName)
+        for n in range(3):
+            exp.addData('n', n)
+            exp.addData('key', 'left')
+            exp.nextEntry()
+        exp.entries[-1]['key'] = 'right'
+        exp.entries[0].update(corr=1)
+        assert exp.entries[0].setdefault('n', 10) == 0
+        del exp.entries[1]['key']
+        assert exp.getAllEntries() == [
+            {'n': 0, 'key': 'left', 'corr': 1}, {'n': 1},
+            {'n': 2, 'key': 'right'}]
+        # copies are independent of the entries
+        entry = copy.copy(exp.entries[2])
+        entry['key'] = 'up'
+        assert type(entry) is dict
+        assert exp.entries[2]['key'] == 'right'
+        # rows already streamed are rewritten
+        exp.close()
+        with io.open(fileName + '.csv', encoding='utf-8-sig') as f:
+            lines = f.read().splitlines()
+        header = lines[0].split(',')
+        assert [line.split(',')[header.index('key')] for line in lines[1:]] \
+            == ['left', '', 'right']
+
+    def test_saveAsBinary(self):
+        from psychopy.data.columnstore import havePyArrow
+        if not havePyArrow:
+            pytest.skip("requires pyarrow")
+        import pandas as pd
+        exp = data.ExperimentHandler()
+        for n in range(5):
+            exp.addData('n', n)
+            exp.addData('key', 'left')
+            exp.nextEntry()
+        fileName = os.path.join(self.tmpDir, 'binary')
+        exp.saveAsBinary(fileName, 'parquet')
+        df = pd.read_parquet(fileName + '.parquet')
+        assert list(df['n']) == list(range(5))
+        assert list(df['key']) == ['left'] * 5
+
 
 if __name__ == '__main__':
     import pytest
@@ -1,5 +1,6 @@
 """Test StairHandler"""
 
+import os
 import numpy as np
 import shutil
 import json_tricks
@@ -151,6 +152,36 @@ class TestStairHandler(_BaseTestStairHandler):
         self.simulate()
         self.checkSimulationResults()
 
+    def test_startStream(self):
+        import pandas as pd
+        self.stairs = data.StairHandler(
+            startVal=0.8, nUp=1, nDown=3, minVal=0, maxVal=1,
+            stepSizes=[0.1, 0.01, 0.001], nTrials=20, stepType='lin')
+        self.responses = makeBasicResponseCycles(
+            cycles=3, nCorrect=4, nIncorrect=4, length=20)
+        fileName = self.stairs.startStream(
+            os.path.join(self.tmp_dir, 'stairs.csv'),
+            excelFileName=os.path.join(self.tmp_dir, 'stairs.xlsx'))
+        for trialN, _ in enumerate(self.stairs):
+            self.stairs.addResponse(self.responses[trialN])
+            if trialN >= 5:
+                self.stairs.addOtherData('RT', trialN / 10.0)
+            if trialN == 10:
+                # previous trials are on disk already
+                with open(fileName, encoding='utf-8-sig') as f:
+                    assert len(f.readlines()) == 11
+        assert not os.path.isfile(fileName + '.schema.json')
+
+        for df in (pd.read_csv(fileName, encoding='utf-8-sig'),
+                   pd.read_excel(os.path.join(self.tmp_dir, 'stairs.xlsx'))):
+            assert list(df.columns[:4]) == [
+                'trialN', 'intensity', 'response', 'RT']
+            assert list(df['trialN']) == list(range(20))
+            assert np.allclose(df['intensity'], self.stairs.intensities)
+            assert list(df['response']) == self.stairs.data
+            assert list(df['RT'].fillna(-1)) == \
+                [-1] * 5 + [n / 10.0 for n in range(5, 20)]
+
     def test_StairHandlerLog(self):
         nTrials = 20
         startVal, minVal, maxVal = 0.8, 0, 1
@@ -483,6 +514,18 @@ class TestQuestHandler(_BaseTestStairHandler):
         assert self.stairs._quest.x[0] == -range/2
         assert self.stairs._quest.x[-1] == range/2
 
+    def test_recompute(self):
+        from psychopy.contrib.quest import QuestObject
+        q = QuestObject(0.0, 1.0, 0.82, 3.5, 0.01, 0.5, grain=0.01, range=5)
+        q.normalizePdf = True
+        rng = np.random.default_rng(0)
+        # enough trials for the pdf to underflow if it isn't renormalized
+        for trialN in range(2000):
+            q.update(q.quantile(), int(rng.random() < 0.8))
+        pdf = q.pdf / q.pdf.sum()
+        q.recompute()
+        assert np.allclose(q.pdf / q.pdf.sum(), pdf)
+
     def test_attributes(self):
         beta = 3.5
         gamma = 0.01
@@ -746,6 +789,49 @@ class TestPsiHandler(_BaseTestStairHandler):
         p_loaded = fromFile(path)
         assert p == p_loaded
 
+    def test_expected_entropy(self):
+        from scipy import stats
+        p = data.PsiHandler(nTrials=10, intensRange=[0.1, 10],
+                            alphaRange=[0.1, 10], betaRange=[0.1, 3],
+                            intensPrecision=0.5, alphaPrecision=0.5,
+                            betaPrecision=0.2, delta=0.02)
+        for response in [1, 1, 0, 1]:
+            p.__next__()
+            p.addResponse(response)
+
+        # entropy of the posterior after each response to each intensity,
+        # computed over the whole grid
+        psi = p._psi
+        probLambda = psi._probLambda
+        probCorrect = (.5 + .5 * stats.norm.cdf(psi._x, psi._alpha, psi._beta)
+                       ) * (1 - psi.delta) + psi.delta / 2
+        probResponse = np.concatenate((1 - probCorrect, probCorrect))
+        probR = np.sum(probResponse * probLambda, axis=(1, 2), keepdims=True)
+        posterior = probLambda * probResponse / probR
+        entropy = -np.sum(posterior * np.log10(posterior), axis=(1, 2),
+                          keepdims=True)
+        expectedEntropy = np.sum(entropy * probR, axis=0).ravel()
+
+        assert np.allclose(psi._expectedEntropyX, expectedEntropy)
+        assert psi.nextIntensityIndex == np.argmin(expectedEntropy)
+
+    def test_fast_options(self):
+        # float32 tables and leaving out improbable grid points choose the
+        # same intensities
+        nextIntensities = []
+        for options in [{}, {'dtype': 'float32'},
+                        {'posteriorCutoff': 1e-9}]:
+            p = data.PsiHandler(nTrials=30, intensRange=[0.1, 10],
+                                alphaRange=[0.1, 10], betaRange=[0.1, 3],
+                                intensPrecision=0.1, alphaPrecision=0.1,
+                                betaPrecision=0.1, delta=0.01, **options)
+            for intensity in p:
+                p.addResponse(int(intensity > 4))
+            nextIntensities.append(p.intensities)
+            assert abs(p.estimateLambda()[0] - 4.0) < 0.5
+        assert nextIntensities[1] == nextIntensities[0]
+        assert nextIntensities[2] == nextIntensities[0]
+
 
 class TestMultiStairHandler(_BaseTestMultiStairHandler):
     """
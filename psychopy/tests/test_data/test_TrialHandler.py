@@ -177,6 +177,89 @@ class TestTrialHandler():
         t2.__next__()
         assert t1 != t2
 
+    def test_dataHandler_types(self):
+        trials = data.TrialHandler([dict(foo=1), dict(foo=2)], 2,
+                                   method='sequential', autoLog=False)
+        for thisTrial in trials:
+            trials.addData('rt', np.float64(0.5))
+            trials.addData('nKeys', np.int64(trials.thisN))
+            trials.addData('key', 'left' if trials.thisN % 2 else 'right')
+            if trials.thisN:
+                trials.addData('extra', [trials.thisN])
+        dat = trials.data
+        # numpy numbers stay in numeric (masked) arrays
+        assert dat.isNumeric['rt'] and dat.isNumeric['nKeys']
+        assert dat['nKeys'].sum() == 6
+        assert not dat.isNumeric['key']
+        assert dat['key'][0, 0] is dat['key'][0, 1]  # interned
+        # validity is known for object arrays too
+        assert dat.getValid('key').all()
+        assert dat.getValid('extra').tolist() == [[False, True],
+                                                   [True, True]]
+        assert dat['extra'][0, 0] == '--'
+
+    def test_dataHandler_grow(self):
+        handler = data.DataHandler(['resp'], dataShape=[2, 1])
+        for repN in range(5):
+            handler.add('resp', repN, position=[0, repN])
+        handler.add('label', 'a', position=[1, 6])
+        assert handler['resp'].shape[1] >= 5
+        assert handler['resp'][0, :5].tolist() == [0, 1, 2, 3, 4]
+        assert handler['resp'].mask[1].all()
+        assert handler.getValid('label').sum() == 1
+        assert handler['label'][1, 6] == 'a'
+
+    def test_dataHandler_precision(self):
+        handler = data.DataHandler(['t', 'count', 'huge'], dataShape=[2, 1])
+        handler.add('t', 0.5, position=[0, 0])
+        handler.add('t', np.float64(1234567.891), position=[1, 0])
+        handler.add('count', np.int64(2 ** 40 + 1), position=[0, 0])
+        handler.add('huge', np.int64(2 ** 60 + 1), position=[0, 0])
+        # numbers that don't fit float32 get a float64 array
+        assert handler.isNumeric['t'] and handler.isNumeric['count']
+        assert handler['t'][1, 0] == 1234567.891
+        assert handler['t'][0, 0] == 0.5
+        assert handler['count'][0, 0] == 2 ** 40 + 1
+        # or an object array if they don't fit a float64 either
+        assert not handler.isNumeric['huge']
+        assert handler['huge'][0, 0] == 2 ** 60 + 1
+
+    def test_dataHandler_mixed(self):
+        handler = data.DataHandler(['rt'], dataShape=[3, 1])
+        handler.add('rt', 0.5, position=[0, 0])
+        handler.add('rt', 'timeout', position=[1, 0])
+        handler.add('rt', np.float64(0.25), position=[2, 0])
+        assert not handler.isNumeric['rt']
+        # numbers stay numbers rather than their text
+        assert handler['rt'][:, 0].tolist() == [0.5, 'timeout', 0.25]
+        numeric = handler.getNumeric('rt')
+        assert numeric.mask[:, 0].tolist() == [False, True, False]
+        assert numeric.mean() == 0.375
+
+    def test_dataHandler_mixed_saved(self):
+        # float32 values added before the column became mixed are saved
+        # with the text they were given, not float32 rounding artefacts
+        tmpDir = mkdtemp(prefix='psychopy-tests-mixed')
+        try:
+            trials = data.TrialHandler([{'a': 1}, {'a': 2}], nReps=2,
+                                       method='sequential', autoLog=False)
+            for n, trial in enumerate(trials):
+                trials.addData('resp', 'left' if n == 2 else 0.1)
+            fileName = pjoin(tmpDir, 'mixed')
+            trials.saveAsText(fileName, delim='\t', dataOut=['resp_raw'])
+            with io.open(fileName + '.tsv', encoding='utf-8-sig') as f:
+                raw = f.read()
+            trials.saveAsWideText(fileName + '.csv', delim=',')
+            with io.open(fileName + '.csv', encoding='utf-8-sig') as f:
+                wide = f.read().splitlines()
+        finally:
+            shutil.rmtree(tmpDir)
+        assert '0.1000' not in raw
+        assert "0.1\t 'left'" in raw
+        header = wide[0].split(',')
+        assert [line.split(',')[header.index('resp')] for line in wide[1:]] \
+            == ['0.1', '0.1', 'left', '0.1']
+
 
 class TestTrialHandlerOutput():
     def setup_class(self):
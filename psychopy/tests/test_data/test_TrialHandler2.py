@@ -6,6 +6,7 @@ import shutil
 from tempfile import mkdtemp, mkstemp
 import numpy as np
 import io
+import codecs
 import json_tricks
 import pytest
 
@@ -390,6 +391,96 @@ class TestTrialHandler2:
         t.skipTrials(n=100)
         assert t.finished
 
+    def test_startStream(self):
+        from psychopy.data.streaming import finalizeTrialStream
+        import pandas as pd
+        t = data.TrialHandler2(self.conditions, nReps=2,
+                               method='sequential', autoLog=False)
+        fileName = t.startStream(pjoin(self.temp_dir, 'stream.csv'))
+        assert fileName.endswith('.csv')
+        schemaFileName = fileName + '.schema.json'
+        for trial in t:
+            t.addData('resp', 'left, right')
+            if trial.thisN >= 3:
+                # a column appearing part way through doesn't rewrite the file
+                t.addData('late', trial.thisN)
+            if trial.thisN == 4:
+                with io.open(fileName, encoding='utf-8-sig') as f:
+                    lines = f.readlines()
+                # completed trials are already on disk
+                assert len(lines) == 5
+                assert lines[0].startswith('foo,bar,')
+                assert 'late' not in lines[0]
+                # saving only needs to catch up with the stream
+                t.saveAsWideText(fileName)
+                assert os.path.isfile(schemaFileName)
+                # a copy of the file with the sidecar is readable mid-session
+                shutil.copy(fileName, fileName + '.crash.csv')
+                shutil.copy(schemaFileName,
+                            fileName + '.crash.csv.schema.json')
+
+        # the stream is closed when the loop finishes
+        assert not os.path.isfile(schemaFileName)
+        df = pd.read_csv(fileName, encoding='utf-8-sig')
+        assert list(df.columns[:-1]) == t.columns
+        assert list(df['thisN']) == list(range(6))
+        assert list(df['resp']) == ['left, right'] * 6
+        assert list(df['late'].fillna(-1)) == [-1, -1, -1, 3, 4, 5]
+
+        crashed = fileName + '.crash.csv'
+        assert finalizeTrialStream(crashed)[-1] == 'late'
+        assert finalizeTrialStream(crashed) is None
+        df = pd.read_csv(crashed, encoding='utf-8-sig')
+        assert list(df['late'].fillna(-1)) == [-1, -1, -1, 3]
+
+    def test_startStream_rewind(self):
+        t = data.TrialHandler2(self.conditions, nReps=2,
+                               method='sequential', autoLog=False)
+        next(t)
+        t.startStream(pjoin(self.temp_dir, 'rewound.tsv'))
+        for n in range(4):
+            t.addData('n', n)
+            next(t)
+        assert t._stream.nRows == 4
+        t.rewindTrials(2)
+        for trial in t:
+            t.addData('n', 10 + trial.thisN)
+        t.closeStream()
+        assert not hasattr(t, '_stream')
+        with io.open(pjoin(self.temp_dir, 'rewound.tsv'),
+                     encoding='utf-8-sig') as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 7
+        header = lines[0].split('\t')
+        nCol = header.index('n')
+        # the rewound trials only appear once, with their new data
+        assert [line.split('\t')[nCol] for line in lines[1:]] == \
+            ['0', '1', '2', '13', '14', '15']
+
+        # handlers that are streaming can still be compared and pickled
+        t.startStream(pjoin(self.temp_dir, 'again.tsv'))
+        assert t == t
+        t.closeStream()
+
+    def test_stream_append_rewrite(self):
+        from psychopy.data.streaming import TrialDataStream
+        fileName = pjoin(self.temp_dir, 'appended.csv')
+        for session in range(2):
+            stream = TrialDataStream(fileName, append=True)
+            stream.writeRow({'a': session + 1})
+            stream.writeRow({'b': session})
+            # changing a written row means the file is rewritten on closing
+            stream.store.setValue(0, 'a', session + 1)
+            stream.rowChanged(0)
+            stream.close()
+        with open(fileName, 'rb') as f:
+            raw = f.read()
+        # only the start of the file has a byte order mark
+        assert raw.startswith(codecs.BOM_UTF8)
+        assert raw.count(codecs.BOM_UTF8) == 1
+        assert raw[len(codecs.BOM_UTF8):].decode('utf-8').splitlines() == \
+            ['a,b,', '1,,', ',0,', 'a,b,', '2,,', ',1,']
+
 
 class TestTrialHandler2Output():
     def setup_class(self):
@@ -0,0 +1,101 @@
+"""Test simulated staircase runs"""
+
+import numpy as np
+import pytest
+
+from psychopy import data
+
+
+def estimateLastIntensity(handler):
+    return handler.intensities[-1]
+
+
+class TestSimulateStaircases:
+    def setup_method(self):
+        self.observer = data.SimulatedObserver(
+            threshold=-1.0, slope=3.5, function='logWeibull')
+        self.configurations = {
+            'simple': (data.StairHandler,
+                       dict(startVal=-0.4, stepType='lin', stepSizes=0.1,
+                            nReversals=6, nTrials=20)),
+            'quest': (data.QuestHandler,
+                      dict(startVal=-0.4, startValSd=0.5, nTrials=20)),
+            'multi': (data.MultiStairHandler,
+                      dict(stairType='quest', nTrials=10,
+                           conditions=[
+                               {'label': 'low', 'startVal': -1.5,
+                                'startValSd': 0.5},
+                               {'label': 'high', 'startVal': -0.5,
+                                'startValSd': 0.5}])),
+            'last': (data.StairHandler,
+                     dict(startVal=-0.4, stepType='lin', stepSizes=0.1,
+                          nTrials=20),
+                     estimateLastIntensity)}
+
+    def test_observer(self):
+        observer = self.observer
+        assert observer.probability(-1.0) == pytest.approx(
+            0.5 + 0.49 * (1 - np.exp(-1)))
+        assert observer.probability(-3) == pytest.approx(0.5)
+        assert observer.probability(1) == pytest.approx(0.99)
+        weibull = data.SimulatedObserver(0.2, function='weibull')
+        assert weibull.probability([0, 0.2])[1] == \
+            pytest.approx(observer.probability(-1))
+        normal = data.SimulatedObserver(0.0, slope=1.0, guessRate=0,
+                                        lapseRate=0, function='cumNormal')
+        assert normal.probability(0) == pytest.approx(0.5)
+        with pytest.raises(ValueError):
+            data.SimulatedObserver(0, function='gumbel')
+
+        rng = np.random.default_rng(1)
+        responses = [observer.respond(-1.0, rng) for _ in range(2000)]
+        assert np.mean(responses) == pytest.approx(
+            observer.probability(-1.0), abs=0.05)
+
+    def test_simulate(self):
+        results = data.simulateStaircases(
+            self.configurations, self.observer, nRuns=8, nWorkers=1, seed=3)
+        assert list(results) == list(self.configurations)
+        for name, stats in results.items():
+            assert stats['nRuns'] == 8
+            assert stats['trueValue'] == -1.0
+            assert len(stats['estimates']) == len(stats['nTrials']) == 8
+            assert stats['bias'] == pytest.approx(stats['mean'] + 1.0)
+            assert stats['rmse'] ** 2 == pytest.approx(
+                stats['bias'] ** 2 +
+                stats['variance'] * 7 / 8)
+        assert all(results['quest']['nTrials'] == 20)
+        assert all(results['multi']['nTrials'] == 20)
+        assert abs(results['quest']['bias']) < 0.3
+
+        # runs are seeded independently of how they are shared out
+        pooled = data.simulateStaircases(
+            self.configurations, self.observer, nRuns=8, nWorkers=2,
+            chunkSize=5, seed=3)
+        for name in results:
+            assert np.allclose(pooled[name]['estimates'],
+                               results[name]['estimates'])
+            assert np.all(pooled[name]['nTrials'] == results[name]['nTrials'])
+
+        single = data.simulateStaircase(
+            *self.configurations['quest'], observer=self.observer, nRuns=8,
+            nWorkers=1, seed=4, trueValue=-0.9)
+        assert single['trueValue'] == -0.9
+        assert single['nRuns'] == 8
+
+    def test_psi(self):
+        observer = data.SimulatedObserver(0.0, slope=1.0, guessRate=0,
+                                          lapseRate=0, function='cumNormal')
+        stats = data.simulateStaircase(
+            data.PsiHandler,
+            dict(nTrials=30, intensRange=[-3, 3], alphaRange=[-2, 2],
+                 betaRange=[0.2, 2], intensPrecision=0.2,
+                 alphaPrecision=0.1, betaPrecision=0.1, delta=0.02,
+                 stepType='lin', expectedMin=0),
+            observer, nRuns=4, nWorkers=1, seed=0)
+        assert all(stats['nTrials'] == 30)
+        assert abs(stats['bias']) < 0.5
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -153,6 +153,54 @@ class Test_utilsClass:
         assert len(conds) == 6
         assert len(list(conds[0].keys())) == 6
 
+    def test_conditionsCache(self, tmpdir, monkeypatch):
+        cacheDir = str(tmpdir.mkdir('cache'))
+        monkeypatch.setattr(utils, 'getConditionsCacheDir', lambda: cacheDir)
+        utils.clearConditionsCache()
+        fileName = str(tmpdir.join('conds.csv'))
+        with open(fileName, 'w') as f:
+            f.write('word;rt;pos\n')
+            f.writelines('w%i;%i,5;[%i, 0]\n' % (i, i, i) for i in range(20))
+
+        parsed = []
+        attemptImport = utils.pd.read_csv
+
+        def readCsv(*args, **kwargs):
+            parsed.append(kwargs['sep'])
+            return attemptImport(*args, **kwargs)
+        monkeypatch.setattr(utils.pd, 'read_csv', readCsv)
+
+        conds, fieldNames = utils.importConditions(
+            fileName, returnFieldNames=True)
+        # the separator and decimal mark are sniffed, the file is parsed once
+        assert parsed == [';']
+        assert fieldNames == ['word', 'rt', 'pos']
+        assert conds[3] == {'word': 'w3', 'rt': 3.5, 'pos': [3, 0]}
+
+        # selections are taken from the parsed file
+        conds[0]['pos'].append(1)
+        assert utils.importConditions(fileName, selection='2:4') == conds[2:4]
+        assert utils.importConditions(fileName, selection=[0])[0]['pos'] == \
+            [0, 0]
+        assert parsed == [';']
+        # and it's saved to disk for other sessions
+        utils.clearConditionsCache()
+        assert utils.importConditions(fileName)[1:] == conds[1:]
+        assert parsed == [';']
+        assert len(os.listdir(cacheDir)) == 1
+
+        # modified files are parsed again
+        with open(fileName, 'a') as f:
+            f.write('w20;20,5;[20, 0]\n')
+        assert len(utils.importConditions(fileName)) == 21
+        assert parsed == [';', ';']
+        assert len(os.listdir(cacheDir)) == 1
+        utils.importConditions(fileName, useCache=False)
+        assert parsed == [';', ';', ';']
+
+        utils.clearConditionsCache(disk=True)
+        assert os.listdir(cacheDir) == []
+
 def test_listFromString():
     assert ['yes', 'no'] == utils.listFromString("yes, no")
     assert ['yes', 'no'] == utils.listFromString("[yes, no]")
@@ -0,0 +1,152 @@
+""" Test writing events to the ioHub DataStore file.
+"""
+import time
+import pytest
+
+tables = pytest.importorskip('tables')
+
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices import DeviceEvent
+from psychopy.iohub.devices.experiment import MessageEvent
+from psychopy.iohub.datastore import DataStoreFile
+from psychopy.iohub.datastore.util import ExperimentDataAccessUtility
+
+
+class Experiment():
+    pass
+
+
+def makeMessages(count, start=0, interval=1.0):
+    events = []
+    for i in range(start, start + count):
+        event = list(MessageEvent._createAsList('msg %d' % i,
+                                                sec_time=i * interval))
+        event[DeviceEvent.EVENT_HUB_TIME_INDEX] = i * interval
+        events.append(event)
+    return events
+
+
+class TestDataStoreFile():
+
+    @classmethod
+    def setup_class(cls):
+        EventConstants.addClassMappings([MessageEvent.EVENT_TYPE_ID],
+                                        {'MessageEvent': MessageEvent})
+
+    def openFile(self, tmpdir, **settings):
+        dsfile = DataStoreFile('events.hdf5', str(tmpdir), 'w', settings)
+        dsfile.updateDataStoreStructure(Experiment(),
+                                        {'MessageEvent': MessageEvent})
+        dsfile.createOrUpdateExperimentEntry([0, 'test', '', '', ''])
+        dsfile.createExperimentSessionEntry(
+            dict(code='s1', name='', comments='', user_variables='{}'))
+        self.dsfile = dsfile
+        return dsfile
+
+    def teardown_method(self):
+        self.dsfile.close()
+        if getattr(self, 'datafile', None):
+            self.datafile.close()
+            self.datafile = None
+
+    def getMessageTexts(self):
+        return self.dsfile.TABLES['MESSAGE'].col('text').tolist()
+
+    def test_chunked_writes(self, tmpdir):
+        dsfile = self.openFile(tmpdir, write_chunk_size=10,
+                               write_max_latency=60.0)
+        dsfile._handleEvents(makeMessages(5))
+        time.sleep(0.1)
+        # fewer than write_chunk_size events are staged
+        assert len(dsfile.TABLES['MESSAGE']) == 0
+        for event in makeMessages(5, 5):
+            dsfile._handleEvent(event)
+        deadline = time.time() + 5.0
+        while len(dsfile.TABLES['MESSAGE']) < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        assert self.getMessageTexts() == [b'msg %d' % i for i in range(10)]
+
+    def test_max_latency(self, tmpdir):
+        dsfile = self.openFile(tmpdir, write_chunk_size=1000,
+                               write_max_latency=0.05)
+        dsfile._handleEvents(makeMessages(3))
+        deadline = time.time() + 5.0
+        while len(dsfile.TABLES['MESSAGE']) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(dsfile.TABLES['MESSAGE']) == 3
+        row = dsfile.TABLES['MESSAGE'][0]
+        assert row['experiment_id'] == dsfile.active_experiment_id
+        assert row['session_id'] == dsfile.active_session_id
+
+    def test_flush(self, tmpdir):
+        dsfile = self.openFile(tmpdir, write_chunk_size=1000,
+                               write_max_latency=60.0, threaded_writes=False)
+        dsfile._handleEvents(makeMessages(3))
+        assert len(dsfile.TABLES['MESSAGE']) == 0
+        dsfile.flush()
+        assert self.getMessageTexts() == [b'msg 0', b'msg 1', b'msg 2']
+
+    def test_compression(self, tmpdir):
+        dsfile = self.openFile(tmpdir, complib='zlib', complevel=5)
+        filters = dsfile.TABLES['MESSAGE'].filters
+        assert filters.complib == 'zlib' and filters.complevel == 5
+
+    def test_condition_variable_rows(self, tmpdir):
+        dsfile = self.openFile(tmpdir)
+        exp_id = dsfile.active_experiment_id
+        sess_id = dsfile.active_session_id
+        assert dsfile.initConditionVariableTable(
+            exp_id, sess_id, [('trial', 'i8'), ('word', 'S', 256),
+                              ('rt', 'f8')])
+        assert dsfile.extendConditionVariableTable(exp_id, sess_id,
+                                                   [0, b'red', 0.5])
+        rows = [[i, b'blue', i / 10.0] for i in range(1, 50)]
+        assert dsfile.extendConditionVariableTableRows(exp_id, sess_id, rows)
+        table = dsfile.TABLES['EXP_CV']
+        assert table.col('trial').tolist() == list(range(50))
+        assert table[0]['word'] == b'red' and table[49]['rt'] == 4.9
+        assert set(table.col('SESSION_ID')) == {sess_id}
+
+    def test_time_window_queries(self, tmpdir):
+        dsfile = self.openFile(tmpdir)
+        events = makeMessages(1000, interval=0.01)
+        dsfile._handleEvents(events[500:])
+        dsfile._handleEvents(events[:500])  # so the table is not in time order
+        dsfile.close()
+        self.datafile = datafile = ExperimentDataAccessUtility(
+            str(tmpdir), 'events.hdf5')
+        table = datafile.getEventTable('MessageEvent')
+        assert table.cols.time.is_indexed
+        assert table.cols.session_id.is_indexed
+
+        window = datafile.getEventsInTimeWindow('MessageEvent', 1.0, 2.0,
+                                                fields=['time', 'text'])
+        assert window.dtype.names == ('time', 'text')
+        assert window['text'].tolist() == [b'msg %d' % i
+                                           for i in range(100, 201)]
+
+        windows = datafile.getEventsInTimeWindows(
+            table, [(0, 0.095), (5.0, 5.0), (20.0, 30.0)], session_id=1)
+        assert [len(w) for w in windows] == [10, 1, 0]
+
+        chunks = list(datafile.iterEvents(table, chunk_size=300))
+        assert [len(c) for c in chunks] == [300, 300, 300, 100]
+        chunks = list(datafile.iterEvents(table, chunk_size=300,
+                                          condition='(time < 1.0)'))
+        assert sum(len(c) for c in chunks) == 100
+
+    def test_sorted_time_window_queries(self, tmpdir):
+        dsfile = self.openFile(tmpdir, index_columns=[])
+        dsfile._handleEvents(makeMessages(1000, interval=0.01))
+        dsfile.close()
+        self.datafile = datafile = ExperimentDataAccessUtility(
+            str(tmpdir), 'events.hdf5')
+        table = datafile.getEventTable('MessageEvent')
+        assert not table.cols.time.is_indexed
+        windows = datafile.getEventsInTimeWindows(
+            table, [(0, 0.095), (5.0, 5.0), (9.995, 30.0), (1.0, 0.5)])
+        assert [len(w) for w in windows] == [10, 1, 0, 0]
+
+
+if __name__ == "__main__":
+    pytest.main()
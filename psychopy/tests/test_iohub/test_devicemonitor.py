@@ -0,0 +1,118 @@
+""" Test the scheduling of device polls by the ioHub Server DeviceMonitor.
+"""
+import os
+import sys
+import pytest
+
+gevent = pytest.importorskip('gevent')
+
+from psychopy.iohub.server import DeviceMonitor
+
+
+class PolledDevice():
+    """Stands in for a polled ioHub Device; each poll adds the native events
+    that are due, or the bytes that can be read from a pipe."""
+    name = 'polled'
+
+    def __init__(self, fd=None):
+        self._native_event_count = 0
+        self.pending = 0
+        self.fd = fd
+
+    def _poll(self):
+        if self.fd is not None:
+            try:
+                self.pending += len(os.read(self.fd, 1024))
+            except BlockingIOError:
+                pass
+        self._native_event_count += self.pending
+        self.pending = 0
+
+    def _getWakeupFileDescriptor(self):
+        return self.fd
+
+
+def runMonitor(monitor, events, write_fd=None, event_interval=0.02):
+    """Runs monitor while events are produced every event_interval."""
+    monitor.start()
+    for _ in range(events):
+        gevent.sleep(event_interval)
+        if write_fd is None:
+            monitor.device.pending += 1
+        else:
+            os.write(write_fd, b'x')
+    gevent.sleep(event_interval)
+    monitor.running = False
+    monitor.join()
+    return monitor.getStats()
+
+
+class TestDeviceMonitor():
+
+    def test_fixed_interval(self):
+        monitor = DeviceMonitor(PolledDevice(), 0.002)
+        assert monitor._nextPollTime(1.0, 0) == 1.002
+        assert monitor._nextPollTime(1.0, 3) == 1.002
+        assert monitor.getStats()['mode'] == 'fixed'
+
+    def test_adaptive_interval(self):
+        monitor = DeviceMonitor(PolledDevice(), 0.001, adaptive=True,
+                                max_interval=0.008)
+        assert monitor._nextPollTime(0.0, 1) == 0.001
+        intervals = []
+        for i in range(5):
+            monitor._nextPollTime(0.0, 0)
+            intervals.append(monitor.interval)
+        assert intervals == [0.002, 0.004, 0.008, 0.008, 0.008]
+        assert monitor._nextPollTime(1.0, 1) == 1.001
+        assert monitor.event_rate == pytest.approx(1.0)
+
+    def test_expected_event_time(self):
+        monitor = DeviceMonitor(PolledDevice(), 0.001, adaptive=True,
+                                max_interval=0.1)
+        monitor._nextPollTime(0.0, 1)
+        monitor._nextPollTime(0.010, 1)
+        assert monitor.event_rate == pytest.approx(100.0)
+        # polls back off, but not past the time the next event is expected
+        assert monitor._nextPollTime(0.011, 0) == pytest.approx(0.013)
+        assert monitor._nextPollTime(0.013, 0) == pytest.approx(0.017)
+        assert monitor._nextPollTime(0.017, 0) == pytest.approx(0.020)
+        # the expected event is late, keep backing off
+        assert monitor._nextPollTime(0.020, 0) == pytest.approx(0.036)
+
+    def test_adaptive_polling(self):
+        fixed = runMonitor(DeviceMonitor(PolledDevice(), 0.001), 10)
+        adaptive = runMonitor(DeviceMonitor(PolledDevice(), 0.001,
+                                            adaptive=True,
+                                            max_interval=0.01), 10)
+        # how many polls are saved depends on how busy the machine is, the
+        # backing off itself is checked by test_adaptive_interval
+        assert fixed['event_count'] == adaptive['event_count'] == 10
+        assert fixed['mode'] == 'fixed'
+        assert adaptive['mode'] == 'adaptive'
+        assert 0 < adaptive['active_poll_count'] <= 10
+        assert adaptive['poll_count'] >= adaptive['active_poll_count']
+        assert adaptive['wake_latency_mean'] >= 0
+
+    @pytest.mark.skipif(sys.platform == 'win32',
+                        reason='select() only supports sockets on Windows')
+    def test_wakeup_fd(self):
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        try:
+            monitor = DeviceMonitor(PolledDevice(read_fd), 0.001,
+                                    adaptive=True, max_interval=0.5)
+            stats = runMonitor(monitor, 10, write_fd)
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+        assert stats['mode'] == 'wakeup'
+        assert stats['event_count'] == 10
+        # one poll when data arrives (writes close together can be read by
+        # the same poll), and one more to see it has all been read
+        assert 0 < stats['active_poll_count'] <= 10
+        assert stats['poll_count'] <= 2 * stats['active_poll_count'] + 2
+
+
+if __name__ == "__main__":
+    pytest.main()
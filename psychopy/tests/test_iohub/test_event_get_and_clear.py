@@ -4,6 +4,7 @@
 import pytest
 from psychopy.tests import skip_under_vm
 from psychopy.tests.test_iohub.testutil import startHubProcess, stopHubProcess, getTime
+from psychopy.iohub.constants import EventConstants
 
 @skip_under_vm
 def testGetEvents():
@@ -92,3 +93,26 @@ def testAllBuffersClear():
     assert len(exp_events) == 0
 
     stopHubProcess()
+
+@skip_under_vm
+def testGetEventsAsArrays():
+    """
+    """
+    io = startHubProcess()
+
+    exp = io.devices.experiment
+    assert exp != None
+
+    io.sendMessageEvent("Array Message 1")
+    io.sendMessageEvent("Array Message 2", category="TEST")
+    arrays = io.getEvents(as_type='numpy')
+    assert list(arrays.keys()) == [EventConstants.MESSAGE]
+    msgs = arrays[EventConstants.MESSAGE]
+    assert msgs['text'].tolist() == [b"Array Message 1", b"Array Message 2"]
+    assert msgs['category'].tolist() == [b"", b"TEST"]
+    assert len(io.getEvents(as_type='numpy')) == 0
+
+    exp_arrays = exp.getEvents(asType='numpy')
+    assert len(exp_arrays[EventConstants.MESSAGE]) == 2
+
+    stopHubProcess()
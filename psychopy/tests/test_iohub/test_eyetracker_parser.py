@@ -0,0 +1,161 @@
+""" Test the offline (vectorized) pass of the eye tracker sample event parser
+against the online parser.
+"""
+import numpy as np
+import pytest
+
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices.eyetracker import eye_events
+from psychopy.iohub.devices.eyetracker.filters.parser import (
+    EyeTrackerEventParser, _adaptiveVelocityThresholds)
+
+EVENT_CLASSES = {c.__name__: c for c in (
+    eye_events.MonocularEyeSampleEvent, eye_events.BinocularEyeSampleEvent,
+    eye_events.FixationStartEvent, eye_events.FixationEndEvent,
+    eye_events.SaccadeStartEvent, eye_events.SaccadeEndEvent,
+    eye_events.BlinkStartEvent, eye_events.BlinkEndEvent)}
+
+SAMPLING_RATE = 500
+
+
+def makeSamples(count=6000, seed=0):
+    """Binocular samples of fixations joined by saccades, with blinks and
+    samples where only one eye is tracked."""
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(count,
+                       dtype=eye_events.BinocularEyeSampleEvent.NUMPY_DTYPE)
+    samples['type'] = EventConstants.BINOCULAR_EYE_SAMPLE
+    samples['event_id'] = np.arange(1, count + 1)
+    samples['time'] = np.arange(count) / float(SAMPLING_RATE)
+    samples['device_time'] = samples['time']
+    samples['logged_time'] = samples['time']
+
+    gaze = np.empty((count, 2))
+    i = 0
+    position = np.zeros(2)
+    while i < count:
+        fixation = rng.integers(100, 300)
+        gaze[i:i + fixation] = position
+        i += fixation
+        target = rng.uniform(-400, 400, 2)
+        saccade = rng.integers(10, 25)
+        gaze[i:i + saccade] = np.linspace(position, target, saccade + 2)[
+            1:-1][:len(gaze[i:i + saccade])]
+        i += saccade
+        position = target
+    for eye in ('left', 'right'):
+        noisy = gaze + rng.normal(0, 2.0, gaze.shape)
+        samples['%s_gaze_x' % eye] = noisy[:, 0]
+        samples['%s_gaze_y' % eye] = noisy[:, 1]
+        samples['%s_pupil_measure1' % eye] = rng.uniform(3.0, 4.0, count)
+        samples['%s_pupil_measure1_type' % eye] = 71
+
+    status = samples['status']
+    status[rng.random(count) < 0.05] = 2
+    status[rng.random(count) < 0.05] = 20
+    for start in rng.integers(1, count - 60, 8):
+        status[start:start + rng.integers(1, 50)] = 22
+    status[:3] = 22
+    status[-2:] = 22
+    return samples
+
+
+def makeParser(**kwargs):
+    return EyeTrackerEventParser(
+        display_device=dict(mm_size=dict(width=500, height=280),
+                            pixel_res=(1920, 1080), eye_distance=600),
+        sampling_rate=SAMPLING_RATE, adaptive_vel_thresh_history=0.5,
+        **kwargs)
+
+
+class TestEyeTrackerEventParser():
+
+    @classmethod
+    def setup_class(cls):
+        EventConstants.addClassMappings(
+            [c.EVENT_TYPE_ID for c in EVENT_CLASSES.values()], EVENT_CLASSES)
+
+    def assertSameEvents(self, expected, actual):
+        assert sorted(expected) == sorted(actual)
+        for etype, events in expected.items():
+            assert len(events) == len(actual[etype])
+            for field in events.dtype.names:
+                if events.dtype[field].kind == 'f':
+                    np.testing.assert_allclose(actual[etype][field],
+                                               events[field], rtol=1e-6)
+                else:
+                    np.testing.assert_array_equal(actual[etype][field],
+                                                  events[field])
+
+    def test_adaptive_thresholds(self):
+        parser = makeParser()
+        rng = np.random.default_rng(1)
+        velocity = np.abs(rng.normal(20.0, 10.0, 1000))
+        velocity[::17] *= 20.0
+        velocity[::23] = 0.0
+        parser.initializeForSampleType(
+            [0, 0, 0, 0, EventConstants.BINOCULAR_EYE_SAMPLE])
+        sample = [0.0] * len(parser.io_event_fields)
+        expected = []
+        for v in velocity:
+            sample[parser.io_event_ix('velocity_x')] = v
+            sample[parser.io_event_ix('velocity_y')] = v
+            expected.append(parser.addVelocityToAdaptiveThreshold(sample)[0])
+        blen = len(parser.adaptive_x_vthresh_buffer)
+        np.testing.assert_allclose(
+            _adaptiveVelocityThresholds(velocity, blen), expected, rtol=1e-9)
+
+    def test_vectorized_matches_online(self):
+        samples = makeSamples(8000)
+        parser = makeParser()
+        online = parser.parseSamples(samples, vectorized=False)
+        offline = parser.parseSamples(samples)
+        for etype in (EventConstants.FIXATION_END, EventConstants.SACCADE_END,
+                      EventConstants.BLINK_END):
+            assert len(offline[etype]) > 5
+        assert len(offline[EventConstants.MONOCULAR_EYE_SAMPLE]) == len(
+            samples)
+        self.assertSameEvents(online, offline)
+
+    def test_samples_before_thresholds(self):
+        # samples without a velocity threshold yet (until the adaptive
+        # threshold buffer has filled) aren't categorised by either parser
+        parser = makeParser()
+        blen = len(parser.adaptive_x_vthresh_buffer)
+        samples = makeSamples(blen, seed=2)
+        online = parser.parseSamples(samples, vectorized=False)
+        self.assertSameEvents(online, parser.parseSamples(samples))
+        assert sorted(online) == [EventConstants.MONOCULAR_EYE_SAMPLE]
+        # and events start once it has filled
+        samples = makeSamples(blen * 3, seed=2)
+        online = parser.parseSamples(samples, vectorized=False)
+        self.assertSameEvents(online, parser.parseSamples(samples))
+        assert len(online[EventConstants.SACCADE_END]) > 0
+
+    def test_monocular_samples(self):
+        binocular = makeSamples(2000, seed=1)
+        samples = np.zeros(
+            len(binocular),
+            dtype=eye_events.MonocularEyeSampleEvent.NUMPY_DTYPE)
+        for field in samples.dtype.names:
+            if field in binocular.dtype.names:
+                samples[field] = binocular[field]
+            elif 'left_' + field in binocular.dtype.names:
+                samples[field] = binocular['left_' + field]
+        samples['type'] = EventConstants.MONOCULAR_EYE_SAMPLE
+        samples['status'] = np.where(binocular['status'] == 22, 2, 0)
+        parser = makeParser()
+        self.assertSameEvents(parser.parseSamples(samples, vectorized=False),
+                              parser.parseSamples(samples))
+
+    def test_other_filters_use_online_parser(self):
+        samples = makeSamples(1000)
+        parser = makeParser(position_filter=dict(name='MedianFilter',
+                                                 length=3, knot_pos=1))
+        assert not parser._usesPassThroughFilters()
+        self.assertSameEvents(parser.parseSamples(samples, vectorized=False),
+                              parser.parseSamples(samples))
+
+
+if __name__ == "__main__":
+    pytest.main()
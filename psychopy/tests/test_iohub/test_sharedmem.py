@@ -0,0 +1,82 @@
+""" Test the shared memory event buffer used between the iohub server and
+    the experiment process.
+"""
+import pytest
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices import DeviceEvent
+from psychopy.iohub.devices.experiment import MessageEvent
+from psychopy.iohub.sharedmem import SharedEventBuffer
+
+
+def makeMessages(count, start=0):
+    return [list(MessageEvent._createAsList('msg %d' % i, category='TEST',
+                                            sec_time=float(i)))
+            for i in range(start, start + count)]
+
+
+class TestSharedEventBuffer():
+
+    @classmethod
+    def setup_class(cls):
+        EventConstants.addClassMappings([MessageEvent.EVENT_TYPE_ID],
+                                        {'MessageEvent': MessageEvent})
+
+    def setup_method(self):
+        self.server = SharedEventBuffer.create(8)
+        self.client = SharedEventBuffer.attach(self.server.name)
+
+    def teardown_method(self):
+        self.client.close()
+        self.server.close()
+
+    def test_read_write(self):
+        assert self.client.capacity == 8
+        assert self.client.slot_size >= MessageEvent.NUMPY_DTYPE.itemsize
+        events = makeMessages(3)
+        assert self.server.write(events) == []
+        assert len(self.client) == 3
+        assert self.client.readEvents() == events
+        assert len(self.client) == 0
+        assert self.client.readEvents() == []
+
+    def test_wraparound(self):
+        for start in range(0, 40, 5):
+            events = makeMessages(5, start)
+            assert self.server.write(events) == []
+            assert self.client.readEvents() == events
+
+    def test_full(self):
+        events = makeMessages(10)
+        unwritten = self.server.write(events)
+        assert unwritten == events[8:]
+        assert self.client.readEvents() == events[:8]
+        assert self.server.write(unwritten) == []
+        assert self.client.readEvents() == events[8:]
+
+    def test_unwritable(self):
+        events = makeMessages(2)
+        events[0][-1] = 'caf\u00e9'  # not ascii, so not a valid |S value
+        unwritten = self.server.write(events)
+        assert unwritten == events[:1]
+        assert self.client.readEvents() == events[1:]
+
+    def test_discard_and_pending(self):
+        self.server.write(makeMessages(4))
+        self.client.discard()
+        assert len(self.client) == 0
+        self.server.pending = 3
+        assert self.client.pending == 3
+
+    def test_arrays(self):
+        events = makeMessages(3)
+        self.server.write(events)
+        arrays = self.client.toArrays(self.client.read())
+        msgs = arrays[MessageEvent.EVENT_TYPE_ID]
+        assert msgs.dtype == MessageEvent.NUMPY_DTYPE
+        assert msgs['text'].tolist() == [b'msg 0', b'msg 1', b'msg 2']
+        assert msgs['time'].tolist() == [
+            e[DeviceEvent.EVENT_HUB_TIME_INDEX] for e in events]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,71 @@
+""" Test the drift and offset model used to convert times between a local
+and a remote ioHub Server.
+"""
+import numpy as np
+import pytest
+
+from psychopy.iohub.net import TimeSyncState
+
+DRIFT = 1.0 + 35e-6
+OFFSET = 1234.5678
+
+
+def addSyncSamples(state, count, start=0.0, interval=0.2, seed=0,
+                   outliers=0.0):
+    """Adds sync samples of a remote clock that runs DRIFT times faster than
+    the local one. The remote time of each sample is off by up to half of
+    the part of its RTT above 0.2 msec; a fraction of the samples are
+    delayed by up to 20 msec."""
+    rng = np.random.default_rng(seed)
+    local_times = start + np.arange(count) * interval
+    rtts = 0.0002 + rng.exponential(0.00005, count)
+    slow = rng.random(count) < outliers
+    rtts[slow] += rng.uniform(0.002, 0.02, np.count_nonzero(slow))
+    errors = rng.uniform(-0.5, 0.5, count) * (rtts - 0.0002)
+    remote_times = DRIFT * local_times + OFFSET + errors
+    for sample in zip(rtts, local_times, remote_times):
+        state.addSyncSample(*sample)
+    return local_times
+
+
+class TestTimeSyncState():
+
+    def test_model(self):
+        state = TimeSyncState()
+        addSyncSamples(state, 1)
+        assert state.getDrift() == 1.0
+        addSyncSamples(state, 300, start=10.0)
+        assert state.getDrift() == pytest.approx(DRIFT, abs=1e-6)
+        assert state.getOffset() == pytest.approx(OFFSET, abs=1e-4)
+        assert state.getAccuracy() < 0.0002
+
+    def test_slow_syncs_rejected(self):
+        state = TimeSyncState()
+        # two hours of syncs, with a quarter of them delayed in transit
+        local_times = addSyncSamples(state, 7200, interval=1.0,
+                                     outliers=0.25)
+        quality = state.getSyncQuality()
+        assert quality['sample_count'] == 256
+        assert quality['used_count'] < 256 * 0.85
+        assert quality['rtt_max'] > 0.002
+        assert quality['residual_max'] < 0.0001
+        assert quality['drift_ppm'] == pytest.approx(35.0, abs=1.0)
+        expected = DRIFT * local_times[-1] + OFFSET
+        assert abs(state.local2RemoteTime(local_times[-1]) -
+                   expected) < 0.0001
+
+    def test_array_conversion(self):
+        state = TimeSyncState()
+        addSyncSamples(state, 100)
+        local_times = np.linspace(0.0, 20.0, 1001)
+        remote_times = state.local2RemoteTime(local_times)
+        assert remote_times.shape == local_times.shape
+        assert remote_times[500] == state.local2RemoteTime(local_times[500])
+        np.testing.assert_allclose(state.remote2LocalTime(remote_times),
+                                   local_times, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(
+            state.local2RemoteTime(local_times.tolist()), remote_times)
+
+
+if __name__ == "__main__":
+    pytest.main()
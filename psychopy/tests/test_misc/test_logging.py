@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import time
+
+import pytest
+
+from psychopy import logging
+
+
+def _makeLogger(**kwargs):
+    logger = logging._Logger(**kwargs)
+    stream = io.StringIO()
+    logging.LogFile(stream, level=logging.DEBUG, logger=logger)
+    return logger, stream
+
+
+def test_flushedRing():
+    """Only the most recent entries are kept once `maxFlushed` is set
+    """
+    logger, stream = _makeLogger(maxFlushed=10)
+    for i in range(25):
+        logger.log("message %i" % i, level=logging.INFO, t=i)
+    logger.flush()
+    assert len(logger.flushed) == 10
+    assert logger.flushed[-1].message == "message 24"
+    assert logger.flushed[0].message == "message 15"
+    # everything was still written
+    assert stream.getvalue().count("\n") == 25
+    # changing the limit keeps the newest entries
+    logger.maxFlushed = 3
+    assert [e.message for e in logger.flushed] == [
+        "message 22", "message 23", "message 24"]
+
+
+def test_threadedWriter():
+    """Entries flushed to a writer thread are written in order
+    """
+    logger, stream = _makeLogger(threaded=True)
+    assert logger.threaded
+    for i in range(1000):
+        logger.log("message %i" % i, level=logging.INFO, t=i)
+        if i % 100 == 0:
+            logger.flush()
+    logger.flush(wait=True)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1000
+    assert lines[0].endswith("message 0")
+    assert lines[-1].endswith("message 999")
+    # stopping writes anything still pending and reverts to synchronous
+    logger.log("last", level=logging.INFO, t=0)
+    logger.stopWriterThread()
+    assert not logger.threaded
+    assert stream.getvalue().splitlines()[-1].endswith("last")
+
+
+def test_flushPerFrame():
+    """All of 10k entries logged across frames (10 entries per frame) are
+    written, with or without the writer thread, and only the most recent
+    are kept
+    """
+    nEntries, perFrame = 10000, 10
+    for threaded in (False, True):
+        logger, stream = _makeLogger(maxFlushed=1000, threaded=threaded)
+        for i in range(nEntries):
+            logger.log("frame %i: entry %i" % (i // perFrame, i),
+                       level=logging.EXP, t=i / 1000.0)
+            if i % perFrame == perFrame - 1:
+                logger.flush()
+        logger.stopWriterThread()
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == nEntries
+        assert lines[-1].endswith("entry %i" % (nEntries - 1))
+        assert len(logger.flushed) == 1000
+
+
+@pytest.mark.benchmark
+def test_flushPerFrame_cost():
+    """Benchmark flushing 10k entries logged across frames (10 entries per
+    frame), which must take a small part of a 16.7 msec frame with or without
+    the writer thread. Run with `-m benchmark`.
+    """
+    nEntries, perFrame = 10000, 10
+    for threaded in (False, True):
+        logger, stream = _makeLogger(maxFlushed=1000, threaded=threaded)
+        flushTimes = []
+        for i in range(nEntries):
+            logger.log("frame %i: entry %i" % (i // perFrame, i),
+                       level=logging.EXP, t=i / 1000.0)
+            if i % perFrame == perFrame - 1:
+                t0 = time.perf_counter()
+                logger.flush()
+                flushTimes.append(time.perf_counter() - t0)
+        logger.stopWriterThread()
+        meanMs = 1000 * sum(flushTimes) / len(flushTimes)
+        assert meanMs < 1.0, 'threaded=%s: %.4f ms per frame flush' % (
+            threaded, meanMs)
+        assert stream.getvalue().count("\n") == nEntries
+
+
+def test_writerThreadError(capsys):
+    """A failed write is reported on stderr and the writer thread carries on
+    """
+    logger, stream = _makeLogger(threaded=True)
+    broken = io.StringIO()
+    brokenLog = logging.LogFile(broken, level=logging.DEBUG, logger=logger)
+    broken.close()
+    logger.log("lost", level=logging.INFO, t=0)
+    logger.flush(wait=True)
+    logger.removeTarget(brokenLog)
+    logger.log("written", level=logging.INFO, t=1)
+    logger.flush(wait=True)
+    assert logger._writer.is_alive()
+    assert stream.getvalue().splitlines()[-1].endswith("written")
+    captured = capsys.readouterr()
+    assert "Failed to write log entries" in captured.err
+    assert "Failed to write log entries" not in captured.out
+    logger.stopWriterThread()
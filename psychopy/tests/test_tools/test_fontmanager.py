@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import numpy as np
+
+from psychopy import prefs
+from psychopy.tools import fontmanager
+from psychopy.tools.fontmanager import GLFont
+
+fontFile = Path(prefs.paths['resources']) / 'fonts' / 'DejaVuSerif.ttf'
+
+
+def test_glyphCache(tmpdir, monkeypatch):
+    monkeypatch.setattr(fontmanager, 'getGlyphCacheDir',
+                        lambda: Path(str(tmpdir)))
+    font = GLFont(fontFile, 24, textureSize=512)
+    assert not font.glyphs
+    font.prewarm('Hello αβγ')
+    assert 'α' in font.glyphs
+    assert len(list(Path(str(tmpdir)).glob('*.npy'))) == 1
+
+    # a new font of the same file and size starts with those glyphs
+    cached = GLFont(fontFile, 24, textureSize=512)
+    assert set(cached.glyphs) == set(font.glyphs)
+    assert cached.glyphs['α'].texcoords == font.glyphs['α'].texcoords
+    assert np.array_equal(cached.atlas.data, font.atlas.data)
+    # and can still add glyphs, which go where a fresh font would put them
+    cached.fetch('xyz')
+    font.fetch('xyz')
+    assert cached.glyphs['z'].texcoords == font.glyphs['z'].texcoords
+    cached.saveToCache()
+    assert len(list(Path(str(tmpdir)).glob('*.npy'))) == 1
+
+    # other sizes, atlas sizes or disabling the cache start empty
+    assert not GLFont(fontFile, 32, textureSize=512).glyphs
+    assert not GLFont(fontFile, 24, textureSize=1024).glyphs
+    assert not GLFont(fontFile, 24, textureSize=512, useCache=False).glyphs
@@ -0,0 +1,120 @@
+import threading
+
+import numpy as np
+import pytest
+
+from psychopy.tools.movietools import MovieFrameBuffer
+
+
+def makeFrame(value, frameBytes=12):
+    return np.full((frameBytes,), value, dtype=np.uint8)
+
+
+class TestMovieFrameBuffer:
+    def test_read(self):
+        frameBuffer = MovieFrameBuffer(4)
+        assert frameBuffer.read() == []
+        assert frameBuffer.readLatest() is None
+
+        for i in range(3):
+            assert frameBuffer.write(makeFrame(i), i / 10., {'n': i})
+        assert frameBuffer.frameBytes == 12
+        assert frameBuffer.framesWaiting == 3
+
+        frames = frameBuffer.read()
+        assert [frame[0][0] for frame in frames] == [0, 1, 2]
+        assert [frame[1] for frame in frames] == [0.0, 0.1, 0.2]
+        assert frames[2][2] == {'n': 2}
+        assert frameBuffer.framesWaiting == 0
+        assert frameBuffer.framesWritten == 3
+
+        # nothing new, frames returned last are still valid
+        assert frameBuffer.read() == []
+        assert frames[0][0][0] == 0
+
+    def test_read_latest(self):
+        frameBuffer = MovieFrameBuffer(4)
+        for i in range(3):
+            frameBuffer.write(makeFrame(i), i)
+        colorData, absTime, _ = frameBuffer.readLatest()
+        assert colorData[0] == 2 and absTime == 2
+        assert frameBuffer.framesSkipped == 2
+        assert frameBuffer.framesDropped == 0
+
+        # skipped buffers are free again
+        for i in range(3):
+            frameBuffer.write(makeFrame(10 + i), 10 + i)
+        assert colorData[0] == 2
+        assert [frame[1] for frame in frameBuffer.read()] == [10, 11, 12]
+
+    def test_drop_frames(self):
+        frameBuffer = MovieFrameBuffer(3)
+        for i in range(5):
+            assert frameBuffer.write(makeFrame(i), i)
+        # oldest frames are dropped to make room for new ones
+        assert frameBuffer.framesDropped == 2
+        frames = frameBuffer.read()
+        assert [frame[1] for frame in frames] == [2, 3, 4]
+        assert [frame[0][0] for frame in frames] == [2, 3, 4]
+
+        # buffers held by the main thread are not written
+        assert not frameBuffer.write(makeFrame(5), 5)
+        assert frameBuffer.framesDropped == 3
+        assert [frame[0][0] for frame in frames] == [2, 3, 4]
+
+    def test_grow(self):
+        frameBuffer = MovieFrameBuffer(2, frameBytes=12, dropFrames=False)
+        for i in range(5):
+            assert frameBuffer.write(makeFrame(i), i)
+        assert frameBuffer.bufferSize == 5
+        assert frameBuffer.framesDropped == 0
+        frames = frameBuffer.read()
+        assert [frame[0][0] for frame in frames] == list(range(5))
+
+    def test_reuse_buffers(self):
+        frameBuffer = MovieFrameBuffer(2)
+        index, buffer = frameBuffer.acquire(12)
+        buffer[:] = 7
+        frameBuffer.commit(index)
+        first = frameBuffer.readLatest()[0]
+        assert first is buffer
+        frameBuffer.write(makeFrame(1))
+        frameBuffer.readLatest()
+        frameBuffer.write(makeFrame(2))
+        # no new arrays are allocated for frames of the same size
+        assert frameBuffer.readLatest()[0] is first
+        # new frame size
+        frameBuffer.write(makeFrame(3, frameBytes=24))
+        colorData = frameBuffer.readLatest()[0]
+        assert colorData.size == 24 and colorData[0] == 3
+
+        with pytest.raises(ValueError):
+            MovieFrameBuffer(1)
+        with pytest.raises(ValueError):
+            MovieFrameBuffer(2).acquire()
+
+    def test_threaded(self):
+        frameBuffer = MovieFrameBuffer(4)
+        nFrames = 2000
+
+        def produce():
+            for i in range(nFrames):
+                frameBuffer.write(makeFrame(i % 256, frameBytes=64), i)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        received = []
+        while producer.is_alive() or frameBuffer.framesWaiting:
+            for colorData, absTime, _ in frameBuffer.read():
+                # frame data is not overwritten while it is held
+                assert np.all(colorData == absTime % 256)
+                received.append(absTime)
+        producer.join()
+
+        assert received == sorted(received)
+        assert len(received) + frameBuffer.framesDropped == nFrames
+        assert frameBuffer.framesWritten == nFrames
+
+
+if __name__ == '__main__':
+    pytest.main()
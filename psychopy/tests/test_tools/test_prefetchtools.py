@@ -0,0 +1,83 @@
+import os
+import shutil
+from tempfile import mkdtemp
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from psychopy.tools import prefetchtools
+from psychopy.tools.prefetchtools import ResourcePrefetcher
+
+
+class TestResourcePrefetcher:
+    def setup_class(self):
+        self.tmpDir = mkdtemp(prefix='psychopy-tests-prefetch')
+        self.images = []
+        for n in range(3):
+            fileName = os.path.join(self.tmpDir, 'img%i.png' % n)
+            Image.new('RGB', (64, 32), (n, 0, 0)).save(fileName)
+            self.images.append(fileName)
+
+    def teardown_class(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_prefetchTrials(self):
+        prefetcher = ResourcePrefetcher(maxWorkers=2)
+        trials = [{'image': fileName, 'ori': 45} for fileName in self.images]
+        assert prefetcher.prefetchTrials(trials) == 3
+        # resources are taken once, already flipped for use as a texture
+        im = prefetcher.getImage(self.images[1])
+        assert im.size == (64, 32)
+        assert im.getpixel((0, 0)) == (1, 0, 0)
+        assert prefetcher.getImage(self.images[1]) is None
+        stats = prefetcher.getStats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['nPending'] == 2
+        prefetcher.shutdown()
+        assert prefetcher.getStats()['nBytes'] == 0
+
+    def test_memoryBudget(self):
+        prefetcher = ResourcePrefetcher(maxWorkers=1, maxBytes=1)
+        assert prefetcher.prefetch(self.images[0])
+        prefetcher.getImage(self.images[0])  # wait for it, frees memory
+        prefetcher.prefetch(self.images[1])
+        prefetcher._pending[prefetcher._getKey(self.images[1])][1].result()
+        # over budget until something is used
+        assert not prefetcher.prefetch(self.images[2])
+        assert prefetcher.getStats()['skipped'] == 1
+        prefetcher.shutdown()
+
+    def test_inFlightBudget(self):
+        # files being decoded count against the budget straight away
+        prefetcher = ResourcePrefetcher(maxWorkers=1, maxBytes=1)
+        assert prefetcher.prefetch(self.images[0])
+        assert prefetcher.getStats()['nBytes'] > 0
+        assert not prefetcher.prefetch(self.images[1])
+        # resources that aren't needed can be discarded to free memory
+        assert prefetcher.discard(self.images[0])
+        assert not prefetcher.discard(self.images[0])
+        assert prefetcher.getStats()['nBytes'] == 0
+        assert prefetcher.prefetch(self.images[1])
+        prefetcher.shutdown()
+
+    def test_activePrefetcher(self):
+        prefetcher = ResourcePrefetcher()
+        assert prefetchtools.popPrefetchedImage(self.images[0]) is None
+        prefetcher.activate()
+        assert prefetchtools.getActivePrefetcher() is prefetcher
+        prefetcher.prefetch(self.images[0])
+        assert prefetchtools.popPrefetchedImage(self.images[0]) is not None
+        prefetcher.shutdown()
+        assert prefetchtools.getActivePrefetcher() is None
+
+    def test_sound(self):
+        sf = pytest.importorskip('soundfile')
+        fileName = os.path.join(self.tmpDir, 'tone.wav')
+        sf.write(fileName, np.zeros((4410, 2), dtype=np.float32), 44100)
+        prefetcher = ResourcePrefetcher()
+        assert prefetcher.prefetch(fileName)
+        samples, sampleRate = prefetcher.getSound(fileName)
+        assert sampleRate == 44100
+        assert samples.shape == (4410, 2)
+        prefetcher.shutdown()
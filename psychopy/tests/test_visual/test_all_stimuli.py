@@ -6,6 +6,7 @@ from psychopy.visual import filters
 from psychopy.tools.coordinatetools import pol2cart
 from psychopy.tests import utils
 import numpy
+import pyglet
 import pytest
 import shutil
 from tempfile import mkdtemp
@@ -423,6 +424,56 @@ class _baseVisualTest():
         utils.compareScreenshot('elarray1_%s.png' %(self.contextName), win)
         win.flip()
 
+    def test_element_array_instanced(self):
+        win = self.win
+        if not win._haveShaders:
+            pytest.skip("ElementArray requires shaders, which aren't available")
+        if not pyglet.gl.gl_info.have_version(3, 3):
+            pytest.skip("Instanced drawing requires OpenGL 3.3")
+        # should look identical to the non-instanced array
+        thetas = numpy.arange(0,360,10)
+        N=len(thetas)
+
+        radii = numpy.linspace(0,1.0,N)*self.scaleFactor
+        x, y = pol2cart(theta=thetas, radius=radii)
+        xys = numpy.array([x,y]).transpose()
+        spiral = visual.ElementArrayStim(
+                win, opacities = 0, nElements=N, sizes=0.5*self.scaleFactor,
+                sfs=1.0, xys=xys, oris=-thetas, useInstancing=True)
+        spiral.draw()
+        #check that only changed values are uploaded after first draw() call
+        spiral.opacities = 1.0
+        spiral.sfs = 3.0
+        spiral.draw()
+        win.flip()
+        spiral.draw()
+        utils.compareScreenshot('elarray1_%s.png' %(self.contextName), win)
+        win.flip()
+
+    @pytest.mark.parametrize('nElements', [1, 2, 3])
+    def test_element_array_instanced_few(self, nElements):
+        win = self.win
+        if not win._haveShaders:
+            pytest.skip("ElementArray requires shaders, which aren't available")
+        if not pyglet.gl.gl_info.have_version(3, 3):
+            pytest.skip("Instanced drawing requires OpenGL 3.3")
+        # fewer elements than the corners of a quad should still be drawn
+        # whole, as they are without instancing
+        xys = numpy.array([[-0.5, 0], [0, 0], [0.5, 0]])[:nElements]
+        frames = []
+        for useInstancing in (False, True):
+            stim = visual.ElementArrayStim(
+                win, nElements=nElements, sizes=0.4*self.scaleFactor,
+                xys=xys*self.scaleFactor, sfs=3.0,
+                useInstancing=useInstancing)
+            win.flip()
+            stim.draw()
+            frames.append(numpy.asarray(win._getFrame(buffer='back'),
+                                        dtype=float))
+        win.flip()
+        assert frames[1].std() > 0  # something was drawn
+        assert numpy.abs(frames[0] - frames[1]).mean() < 1.0
+
     def test_aperture(self):
         win = self.win
         if not win.allowStencil:
@@ -0,0 +1,41 @@
+from psychopy.visual.drawprofiler import DrawProfiler
+
+
+class _FakeStim:
+    """Stands in for a stimulus, needing a vertex update every other draw"""
+    def __init__(self, name, cost=0):
+        self.name = name
+        self.cost = cost
+        self._needVertexUpdate = True
+        self._needColorUpdate = False
+
+    def draw(self):
+        sum(range(self.cost))
+        self._needVertexUpdate = not self._needVertexUpdate
+
+
+def test_drawProfiler():
+    profiler = DrawProfiler(win=None, gpuTiming=False)
+    cheap = _FakeStim('cheap', cost=10)
+    costly = _FakeStim('costly', cost=100000)
+    profiler.routine = 'trial'
+    for frame in range(10):
+        profiler.drawStim(cheap)
+        profiler.drawStim(costly)
+        profiler._endFrame()
+    profiler.routine = 'feedback'
+    profiler.drawStim(cheap)
+    profiler._endFrame()
+
+    assert profiler.getRoutines() == ['trial', 'feedback']
+    top = profiler.topOffenders(n=1, routine='trial')
+    assert [s['name'] for s in top] == ['costly']
+    stats = {s['name']: s for s in profiler.getStats('trial')}
+    assert stats['cheap']['nDraws'] == 10
+    assert stats['cheap']['vertexUploads'] == 5
+    assert stats['cheap']['colorUploads'] == 0
+    assert stats['cheap']['gpuTime'] is None
+    assert len(profiler.getStats()) == 3
+    assert 'Routine: feedback' in profiler.report()
+    profiler.reset()
+    assert profiler.getStats() == []
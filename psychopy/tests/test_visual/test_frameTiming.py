@@ -0,0 +1,68 @@
+import os
+from tempfile import mkdtemp
+
+import numpy as np
+import pytest
+
+from psychopy import visual
+from psychopy.visual.frametiming import FrameTimingRecord
+
+
+def test_frameTimingRecord():
+    record = FrameTimingRecord(capacity=4)
+    for n in range(10):
+        record.addFrame(t=n * 0.016, interval=0.05 if n == 3 else 0.016,
+                        userTime=0.002, autoDrawTime=0.001, flipTime=0.013,
+                        callbackTime=0.0, nAutoDraw=2, dropped=n == 3)
+    # storage grows as needed
+    assert len(record) == 10
+    assert record.capacity >= 10
+    assert list(record.data['frame']) == list(range(10))
+    record.setValue(3, 'gpuTime', 0.02)
+    summary = record.summary()
+    assert summary['nFrames'] == 10
+    assert summary['nDropped'] == 1
+    assert summary['interval']['max'] == 0.05
+    assert summary['gpuTime']['mean'] == pytest.approx(0.02)
+    assert summary['droppedMeans']['gpuTime'] == pytest.approx(0.02)
+    # export
+    tmpDir = mkdtemp(prefix='psychopy-tests-frameTiming')
+    record.save(os.path.join(tmpDir, 'timing.npy'))
+    loaded = np.load(os.path.join(tmpDir, 'timing.npy'))
+    assert np.array_equal(loaded['dropped'], record.data['dropped'])
+    record.save(os.path.join(tmpDir, 'timing.csv'))
+    with open(os.path.join(tmpDir, 'timing.csv')) as f:
+        lines = f.read().splitlines()
+    assert lines[0].split(',')[:3] == ['frame', 't', 'interval']
+    assert len(lines) == 11
+    record.clear()
+    assert len(record) == 0
+    assert record.summary()['interval'] is None
+
+
+class TestWindowFrameTiming:
+    def setup_class(self):
+        self.win = visual.Window(size=(128, 128), units='pix',
+                                 autoLog=False)
+
+    def teardown_class(self):
+        self.win.close()
+
+    def test_recordFrameTiming(self):
+        stim = visual.Rect(self.win, size=20, autoLog=False)
+        stim.autoDraw = True
+        self.win.recordFrameTiming = True
+        for n in range(10):
+            self.win.flip()
+        self.win.recordFrameTiming = False
+        stim.autoDraw = False
+        data = self.win.frameTiming.data
+        # the first frame after turning recording on isn't recorded
+        assert len(data) == 9
+        assert np.all(data['nAutoDraw'] == 1)
+        assert np.all(data['interval'] > 0)
+        assert np.all(data['autoDrawTime'] >= 0)
+        # turning recording off again doesn't add frames
+        self.win.flip()
+        assert len(self.win.frameTiming) == 9
+        self.win.frameTiming.clear()
@@ -4,6 +4,7 @@ from psychopy import visual, colors, core
 from .test_basevisual import _TestUnitsMixin
 from psychopy.tests.test_experiment.test_component_compile_python import _TestBoilerplateMixin
 from psychopy.tests import utils
+import numpy
 import pytest
 
 class TestImage(_TestUnitsMixin, _TestBoilerplateMixin):
@@ -216,4 +217,61 @@ class TestImageAnimation:
             # Cleanup
             win.close()
             del img
-            
\ No newline at end of file
+            
+
+class _FakeVideoFrame:
+    """A frame of solid colour, as returned by `Camera.getVideoFrame()`."""
+    def __init__(self, size, rgb):
+        self.size = size
+        self.colorData = numpy.tile(
+            numpy.asarray(rgb, dtype=numpy.uint8), size[0] * size[1])
+
+
+class _FakeVideoSource:
+    """Stands in for a camera, returning whichever frame was set last."""
+    def __init__(self, size):
+        self.frameSize = size
+        self.frame = None
+
+    def getVideoFrame(self):
+        return self.frame
+
+
+class TestImageVideoFrames:
+    """
+    Tests for showing frames from a camera with ImageStim
+    """
+    def setup_method(self):
+        self.win = visual.Window(size=(64, 64), color='black')
+        self.source = _FakeVideoSource((16, 16))
+
+    def teardown_method(self):
+        self.win.close()
+
+    def _drawnColor(self, stim):
+        self.win.flip()
+        stim.draw()
+        frame = numpy.asarray(self.win._getFrame(buffer='back'))
+        return frame[32, 32, :3].tolist()
+
+    @pytest.mark.parametrize('asyncTextureUpload', [False, True])
+    def test_frames_shown(self, asyncTextureUpload):
+        stim = visual.ImageStim(self.win, image=self.source, units='norm',
+                                size=2, interpolate=False,
+                                asyncTextureUpload=asyncTextureUpload)
+        self.source.frame = _FakeVideoFrame(self.source.frameSize,
+                                            (255, 0, 0))
+        firstColor = self._drawnColor(stim)
+        if asyncTextureUpload:
+            # the frame is only copied to the texture on the next draw...
+            assert firstColor != [255, 0, 0]
+        else:
+            assert firstColor == [255, 0, 0]
+        # ...which shows it even though no new frame has arrived
+        assert self._drawnColor(stim) == [255, 0, 0]
+        # the last frame before the source stops is shown too
+        self.source.frame = _FakeVideoFrame(self.source.frameSize,
+                                            (0, 0, 255))
+        self._drawnColor(stim)
+        assert self._drawnColor(stim) == [0, 0, 255]
+        assert self._drawnColor(stim) == [0, 0, 255]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from psychopy import visual
+
+
+class TestShapeBatch:
+
+    @classmethod
+    def setup_class(cls):
+        cls.win = visual.Window([128, 128], pos=[50, 50], units='pix',
+                                allowGUI=False, autoLog=False)
+
+    @classmethod
+    def teardown_class(cls):
+        cls.win.close()
+
+    def _makeShapes(self):
+        shapes = []
+        for i, pos in enumerate([(-40, -40), (40, -40), (-40, 40), (40, 40)]):
+            shapes.append(visual.Rect(self.win, pos=pos, size=30, lineWidth=2,
+                                      fillColor='red', lineColor='white'))
+            shapes.append(visual.Circle(self.win, pos=pos, radius=8,
+                                        fillColor='blue', lineColor=None))
+        shapes.append(visual.ShapeStim(self.win, vertices=[(-50, 0), (50, 0)],
+                                       closeShape=False, lineWidth=3,
+                                       lineColor='green'))
+        return shapes
+
+    def _compare(self, shapes, batch):
+        """Drawing the batch looks the same as drawing its shapes"""
+        self.win.flip()
+        for shape in shapes:
+            shape.draw()
+        separate = np.array(self.win._getFrame(buffer='back'), dtype=float)
+        self.win.flip()
+        batch.draw()
+        batched = np.array(self.win._getFrame(buffer='back'), dtype=float)
+        self.win.flip()
+        # borders may differ by the odd pixel at line joins
+        assert np.mean(np.abs(separate - batched) > 10) < 0.01
+
+    def test_batchDraw(self):
+        shapes = self._makeShapes()
+        batch = visual.ShapeBatch(self.win, shapes)
+        assert len(batch) == len(shapes) and shapes[0] in batch
+        self._compare(shapes, batch)
+        # changing shapes updates the batch
+        shapes[0].pos = (0, 0)
+        shapes[1].fillColor = 'yellow'
+        shapes[2].opacity = 0.5
+        shapes[3].ori = 45
+        self._compare(shapes, batch)
+        # changing the number of vertices too
+        shapes[-1].vertices = [(-50, 0), (0, 20), (50, 0)]
+        batch.remove(shapes[0])
+        self._compare(shapes[1:], batch)
+
+    def test_members(self):
+        shapes = self._makeShapes()
+        shapes[0].autoDraw = True
+        batch = visual.ShapeBatch(self.win, shapes[:2])
+        # shapes drawn by the batch aren't drawn automatically too
+        assert not shapes[0].autoDraw
+        batch.extend(shapes)
+        assert batch.shapes == shapes
+        with pytest.raises(TypeError):
+            batch.append(visual.TextStim(self.win))
+        batch.clear()
+        assert len(batch) == 0
+        with pytest.raises(ValueError):
+            batch.remove(shapes[0])
@@ -364,6 +364,80 @@ class Test_textbox(_TestColorMixin, _TestUnitsMixin, _TestBoilerplateMixin):
         # Set editable back to start value
         self.textbox.editable = wasEditable
 
+    def test_incremental_layout(self):
+        """Check that editing text gives the same layout as laying it out from scratch"""
+        rng = np.random.default_rng(0)
+        words = ["alpha", "be", "gamma-ray", "antidisestablishmentarianism", "\n"]
+        self.textbox.text = " ".join(rng.choice(words, 100))
+        for n in range(100):
+            # Make a random edit
+            text = self.textbox._text
+            i = int(rng.integers(len(text) + 1))
+            if n % 3:
+                text = text[:i] + str(rng.choice(["a", " ", "-", "\n", "gamma"])) + text[i:]
+            else:
+                text = text[:max(i - 1, 0)] + text[i:]
+            self.textbox.text = text
+            edited = (self.textbox.vertices.copy(), self.textbox._texcoords.copy(),
+                      self.textbox._colors.copy(), list(self.textbox._lineNs),
+                      list(self.textbox._lineLenChars))
+            # Lay out from scratch
+            self.textbox._layoutCache.clear()
+            self.textbox._layout()
+            full = (self.textbox.vertices, self.textbox._texcoords,
+                    self.textbox._colors, list(self.textbox._lineNs),
+                    list(self.textbox._lineLenChars))
+            for a, b in zip(edited, full):
+                assert np.array_equal(a, b)
+
+    def test_caret_edit_layout(self):
+        """Check that typing and deleting at the caret gives the same layout as laying out from scratch"""
+        self.textbox.size = (4, 4)
+        nChars = 1000
+        text = ("A PsychoPy zealot knows a smidge of wx, but JavaScript is the question. "
+                * (nChars // 72 + 1))[:nChars]
+        self.textbox.text = text
+        self.textbox.caret.index = nChars // 2
+
+        def checkLayout():
+            edited = (self.textbox.vertices.copy(), list(self.textbox._lineNs))
+            self.textbox._layoutCache.clear()
+            self.textbox._layout()
+            assert np.array_equal(edited[0], self.textbox.vertices)
+            assert edited[1] == list(self.textbox._lineNs)
+
+        self.textbox.addCharAtCaret("a")
+        assert self.textbox._text == text[:nChars // 2] + "a" + text[nChars // 2:]
+        checkLayout()
+        self.textbox.deleteCaretLeft()
+        assert self.textbox._text == text
+        checkLayout()
+
+    @pytest.mark.benchmark
+    def test_layout_speed(self):
+        """Benchmark laying out text after typing a character, vs laying it out from scratch. Run with `-m benchmark`."""
+        import timeit
+        self.textbox.size = (4, 4)
+        for nChars in (1000, 10000):
+            text = ("A PsychoPy zealot knows a smidge of wx, but JavaScript is the question. "
+                    * (nChars // 72 + 1))[:nChars]
+            self.textbox.text = text
+            self.textbox.caret.index = nChars // 2
+
+            def typeChar():
+                self.textbox.addCharAtCaret("a")
+                self.textbox.deleteCaretLeft()
+
+            def fullLayout():
+                self.textbox._layoutCache.clear()
+                self.textbox._layout()
+
+            typing = min(timeit.repeat(typeChar, number=5, repeat=3)) / 10
+            full = min(timeit.repeat(fullLayout, number=5, repeat=3)) / 5
+            assert typing < full, "%i chars: %.2fms per edit, %.2fms per full layout" % (
+                nChars, typing * 1000, full * 1000)
+            assert self.textbox._text == text
+
     def test_basic(self):
         pass
 
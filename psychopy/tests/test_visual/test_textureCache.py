@@ -0,0 +1,85 @@
+import os
+import numpy as np
+from pathlib import Path
+
+from psychopy import visual
+from psychopy.tests import utils
+from psychopy.tools.prefetchtools import ResourcePrefetcher
+from psychopy.visual.texturecache import TextureCache
+
+
+def test_textureCache_lru():
+    """Unused textures are evicted least recently used first"""
+    cache = TextureCache(maxBytes=300)
+    # texID=None so no GL calls are made when textures are deleted
+    entries = [cache.add(key, None, 100, False, (10, 10))
+               for key in ('a', 'b', 'c')]
+    # all in use, so nothing can be evicted even when over budget
+    cache.add('d', None, 100, False, (10, 10))
+    assert len(cache) == 4 and cache.nBytes == 400
+    for entry in entries:
+        cache.release(entry)
+    # 'a' was least recently used so goes first
+    assert 'a' not in cache and 'b' in cache
+    assert cache.get('b') is entries[1]
+    cache.maxBytes = 200
+    assert 'c' not in cache and 'b' in cache
+    assert cache.get('a') is None
+    stats = cache.getStats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['evictions'] == 2
+    cache.clear()
+    assert len(cache) == 0 and cache.nBytes == 0
+
+
+def test_textureCache_makeKey(tmpdir):
+    fileName = os.path.join(str(tmpdir), 'img.png')
+    with open(fileName, 'wb') as f:
+        f.write(b'0')
+    key = TextureCache.makeKey(fileName, interpolate=True)
+    assert key == TextureCache.makeKey(Path(fileName), interpolate=True)
+    assert key != TextureCache.makeKey(fileName, interpolate=False)
+    # edited files get a new key
+    os.utime(fileName, (0, 0))
+    assert key != TextureCache.makeKey(fileName, interpolate=True)
+    assert TextureCache.makeKey(fileName + 'x') is None
+
+
+class TestImageTextureCache:
+    def setup_class(self):
+        self.win = visual.Window(size=(128, 128), units='pix',
+                                 autoLog=False)
+
+    def teardown_class(self):
+        self.win.close()
+
+    def test_imageStim_reuses_texture(self):
+        fileName = Path(utils.TESTS_DATA_PATH) / 'testimage.jpg'
+        cache = self.win.textureCache
+        cache.clear()
+        stim1 = visual.ImageStim(self.win, image=fileName, autoLog=False)
+        nMisses = cache.misses
+        stim2 = visual.ImageStim(self.win, image=fileName, autoLog=False)
+        assert cache.misses == nMisses
+        assert stim1._texID.value == stim2._texID.value
+        # switching to an array gives the stimulus its own texture back
+        stim2.image = np.zeros((4, 4))
+        assert stim1._texID.value != stim2._texID.value
+        stim1.draw()
+        self.win.flip()
+
+    def test_cached_image_frees_prefetched(self):
+        """Images prefetched for trials that use a cached texture are freed
+        rather than held until the memory budget runs out"""
+        fileName = str(Path(utils.TESTS_DATA_PATH) / 'testimage.jpg')
+        self.win.textureCache.clear()
+        prefetcher = ResourcePrefetcher()
+        prefetcher.activate()
+        try:
+            stim = visual.ImageStim(self.win, autoLog=False)
+            for trial in range(3):
+                prefetcher.prefetch(fileName)
+                stim.image = fileName
+                assert prefetcher.getStats()['nBytes'] == 0
+        finally:
+            prefetcher.shutdown()
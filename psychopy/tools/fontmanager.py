@@ -17,6 +17,10 @@
 import re
 import sys, os
 import math
+import json
+import uuid
+import atexit
+import hashlib
 import numpy as np
 import ctypes
 import freetype as ft
@@ -66,6 +70,32 @@ _weightMap = {
 
 supportedExtensions = ['ttf', 'otf', 'ttc', 'dfont', 'truetype']
 
+# version of the on-disk glyph atlases, bump this whenever the way glyphs are
+# rendered or stored changes so that existing atlases are ignored
+glyphCacheVersion = 1
+_fontHashes = {}  # (path, mtime, size): hash of the font file
+
+
+def getGlyphCacheDir():
+    """Get the folder where glyph atlases of fonts are saved.
+    """
+    return Path(prefs.paths['userCacheDir']) / 'glyphAtlases'
+
+
+def _getFontHash(filename):
+    """Get a hash of the contents of a font file (remembered for as long as
+    the file isn't modified).
+    """
+    stat = os.stat(filename)
+    key = (str(filename), stat.st_mtime, stat.st_size)
+    if key not in _fontHashes:
+        sha = hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        _fontHashes[key] = sha.hexdigest()
+    return _fontHashes[key]
+
 
 def unicode(s, fmt='utf-8'):
     """Force to unicode if bytes"""
@@ -345,7 +375,8 @@ class GLFont:
             Position of the tops of the next line's ascenders relative to this line's baseline
     """
 
-    def __init__(self, filename, size, lineSpacing=1, textureSize=2048):
+    def __init__(self, filename, size, lineSpacing=1, textureSize=2048,
+                 useCache=True):
         """
         Initialize font
 
@@ -363,6 +394,10 @@ class GLFont:
 
         lineSpacing : float
             Leading between lines, proportional to font size
+
+        useCache : bool
+            Load glyphs rendered in previous sessions from the on-disk glyph
+            atlas cache (see `saveToCache`), and save new ones there at exit.
         """
         self.scale = 64.0
         self.atlas = _TextureAtlas(textureSize, textureSize, format='alpha')
@@ -380,6 +415,11 @@ class GLFont:
         self.height = metrics.height / self.scale
         # Set spacing
         self.lineSpacing = lineSpacing
+        # glyphs rendered in previous sessions
+        self.useCache = useCache
+        self._nSavedGlyphs = 0
+        if useCache:
+            self.loadFromCache()
 
     def __getitem__(self, charcode):
         """
@@ -570,19 +610,111 @@ class GLFont:
         logging.debug("TextBox2 loaded {} chars with {} blanks and {} valid"
                      .format(len(charcodes), nBlanks, len(charcodes) - nBlanks))
 
-    def saveToCache(self):
-        """Store the current font texture as an image file.
+    def prewarm(self, charcodes, save=True):
+        """Render a set of characters now, rather than when they are first
+        drawn, and (optionally) save them to the on-disk cache so they are
+        ready immediately in future sessions too.
+
+        Parameters
+        ----------
+        charcodes : str or list of str
+            Characters to render, e.g. the alphabet of each language used.
+        save : bool
+            Save the atlas to the cache if new glyphs were rendered.
+        """
+        self.fetch(charcodes)
+        if save and self.useCache and len(self.glyphs) > self._nSavedGlyphs:
+            self.saveToCache()
+
+    @property
+    def cacheKey(self):
+        """Name of this font's atlas in the glyph cache, from a hash of the
+        font file, the size and the format of the atlas.
+        """
+        return "{}_{}_{}x{}_{}_v{}".format(
+            _getFontHash(self.filename), self.size, self.atlas.width,
+            self.atlas.height, self.format, glyphCacheVersion)
+
+    def loadFromCache(self):
+        """Load the glyphs saved by `saveToCache` for this font, size and atlas
+        format. The atlas is memory-mapped, so only the parts that are used
+        are read from disk.
+
+        Returns
+        -------
+        bool
+            True if glyphs were loaded.
+        """
+        metaFile = getGlyphCacheDir() / (self.cacheKey + '.json')
+        try:
+            with open(metaFile, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['version'] != glyphCacheVersion:
+                return False
+            # copy-on-write, so glyphs can still be added to the atlas
+            data = np.load(metaFile.parent / meta['atlasFile'], mmap_mode='c')
+        except (OSError, ValueError, KeyError):
+            return False
+        if data.shape != self.atlas.data.shape:
+            return False
+        self.atlas.data = data
+        self.atlas.nodes = [tuple(node) for node in meta['nodes']]
+        self.atlas.used = meta['used']
+        for charcode, (size, offset, advance, texcoords) in \
+                meta['glyphs'].items():
+            self.glyphs[charcode] = TextureGlyph(
+                charcode, tuple(size), tuple(offset), tuple(advance),
+                tuple(texcoords))
+        self._nSavedGlyphs = len(self.glyphs)
+        self._dirty = True
+        logging.debug("Loaded {} glyphs for {} from the glyph cache"
+                      .format(len(self.glyphs), self.name))
+        return True
 
-        As yet we aren't storing the offset, advance and texcoords as needed to
-        retrieve the necessary chars, but it's a start!
-            (see  TextureGlyph(charcode, size, offset, advance, texcoords) )
+    def saveToCache(self):
+        """Save the glyph atlas of this font (the texture and the size,
+        offset, advance and texcoords of each glyph) to the on-disk glyph
+        cache, to be loaded by fonts of the same file and size in future.
 
+        Atlases are keyed by a hash of the font file (see `cacheKey`) and
+        versioned, so changed fonts or atlases saved by a different version
+        of this code are never used.
         """
-        from PIL import Image
-        im = Image.fromarray(self.atlas.data)
-        fname = "{}/.psychopy3/{}_{}_texture.png".format(
-            os.path.expanduser("~"), self.name, self.size)
-        im.save(fname)
+        cacheDir = getGlyphCacheDir()
+        cacheDir.mkdir(parents=True, exist_ok=True)
+        key = self.cacheKey
+        # the atlas file gets a unique name and is only referred to once
+        # written, so another session reading the cache never sees a
+        # partially written atlas
+        atlasFile = "{}_{}.npy".format(key, uuid.uuid4().hex[:8])
+        np.save(cacheDir / atlasFile, np.ascontiguousarray(self.atlas.data))
+        meta = {
+            'version': glyphCacheVersion,
+            'font': str(self.filename),
+            'size': self.size,
+            'atlasFile': atlasFile,
+            'nodes': [list(node) for node in self.atlas.nodes],
+            'used': self.atlas.used,
+            'glyphs': {
+                charcode: [list(glyph.size), list(glyph.offset),
+                           list(glyph.advance), list(glyph.texcoords)]
+                for charcode, glyph in self.glyphs.items()}
+        }
+        metaFile = cacheDir / (key + '.json')
+        tmpFile = cacheDir / (atlasFile + '.json.tmp')
+        with open(tmpFile, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmpFile, metaFile)
+        # remove atlases this one replaces (may fail if still mapped)
+        for oldFile in cacheDir.glob(key + '_*.npy'):
+            if oldFile.name != atlasFile:
+                try:
+                    oldFile.unlink()
+                except OSError:
+                    pass
+        self._nSavedGlyphs = len(self.glyphs)
+        logging.debug("Saved {} glyphs for {} to the glyph cache"
+                      .format(len(self.glyphs), self.name))
 
     def upload(self):
         """Upload the font data into graphics card memory.
@@ -955,6 +1087,42 @@ class FontManager():
 
         return glFont
 
+    def prewarm(self, name, sizes, charcodes, bold=False, italic=False):
+        """Render a set of characters for a font at several sizes and save
+        them to the on-disk glyph cache, so that text using them needn't wait
+        for glyphs to be rendered when first drawn (in this or any future
+        session).
+
+        Parameters
+        ----------
+        name : str
+            Font family name.
+        sizes : list of int
+            Sizes (in pixels) the font will be used at.
+        charcodes : str or list of str
+            Characters to render.
+        bold, italic : bool
+            Style of the font.
+
+        Examples
+        --------
+        Get Greek and Cyrillic glyphs ready for two sizes::
+
+            fonts = FontManager()
+            fonts.prewarm('Open Sans', [24, 32],
+                          'αβγδεζηθικλμνξοπρστυφχψω' +
+                          'абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
+
+        """
+        glFonts = []
+        for size in sizes:
+            glFont = self.getFont(name, size=size, bold=bold, italic=italic)
+            if not glFont:
+                raise MissingFontError("Font {} not found".format(name))
+            glFont.prewarm(charcodes)
+            glFonts.append(glFont)
+        return glFonts
+
     def updateFontInfo(self, monospaceOnly=False):
         self._fontInfos.clear()
         del self.fontStyles[:]
@@ -1009,6 +1177,21 @@ class FontManager():
             self._fontInfos = None
 
 
+def _saveGlyphCaches():
+    """Save the atlases of fonts that have rendered new glyphs.
+    """
+    for glFont in list((FontManager._glFonts or {}).values()):
+        if glFont.useCache and len(glFont.glyphs) > glFont._nSavedGlyphs:
+            try:
+                glFont.saveToCache()
+            except Exception as err:
+                logging.warning("Failed to save glyphs of {} to the cache: {}"
+                                .format(glFont.name, err))
+
+
+atexit.register(_saveGlyphCaches)
+
+
 class FontInfo():
 
     def __init__(self, fp, face):
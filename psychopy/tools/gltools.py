@@ -33,6 +33,7 @@ __all__ = [
     'QueryObjectInfo',
     'beginQuery',
     'endQuery',
+    'queryTimestamp',
     'getQuery',
     'getAbsTimeGPU',
     'createFBO',
@@ -56,6 +57,7 @@ __all__ = [
     'unbindVBO',
     'mapBuffer',
     'unmapBuffer',
+    'updateVBO',
     'deleteVBO',
     'setVertexAttribPointer',
     'enableVertexAttribArray',
@@ -1062,6 +1064,38 @@ def endQuery(query):
         raise TypeError('Type of `query` must be `QueryObjectInfo`.')
 
 
+def queryTimestamp(query):
+    """Record the GPU time in a query once all previously issued GL commands
+    have completed. Unlike :func:`getAbsTimeGPU` this doesn't wait for the
+    result, get it later with :func:`getQuery`.
+
+    Parameters
+    ----------
+    query : QueryObjectInfo
+        Query object descriptor returned by :func:`createQueryObject`, with
+        target `GL_TIMESTAMP`.
+
+    Examples
+    --------
+    Time stimuli on the GPU without stalling the pipeline, timestamp queries
+    can be interleaved freely (unlike `GL_TIME_ELAPSED` queries which can't be
+    nested)::
+
+        q0 = createQueryObject(GL_TIMESTAMP)
+        q1 = createQueryObject(GL_TIMESTAMP)
+        queryTimestamp(q0)
+        myStim.draw()
+        queryTimestamp(q1)
+        win.flip()
+        timeRendering = (getQuery(q1) - getQuery(q0)) * 1e-9
+
+    """
+    if isinstance(query, (QueryObjectInfo,)):
+        GL.glQueryCounter(query.name, GL.GL_TIMESTAMP)
+    else:
+        raise TypeError('Type of `query` must be `QueryObjectInfo`.')
+
+
 def getQuery(query):
     """Get the value stored in a query object.
 
@@ -2228,7 +2262,8 @@ def createVAO(attribBuffers, indexBuffer=None, attribDivisors=None, legacy=False
         Attribute divisors to set. Keys are vertex attribute pointer indices,
         values are the number of instances that will pass between updates of an
         attribute. Setting attribute divisors is only permitted if `legacy` is
-        `False`.
+        `False`. Attributes with a divisor aren't used to determine the
+        `count` of vertices of the VAO.
     legacy : bool, optional
         Use legacy attribute pointer functions when setting the VAO state. This
         is for compatibility with older GL implementations. Key specified to
@@ -2299,6 +2334,7 @@ def createVAO(attribBuffers, indexBuffer=None, attribDivisors=None, legacy=False
     # add attribute pointers
     activeAttribs = {}
     bufferIndices = []
+    instanceIndices = []
     for i, buffer in attribBuffers.items():
         if isinstance(buffer, (list, tuple,)):
             if len(buffer) == 1:
@@ -2326,7 +2362,14 @@ def createVAO(attribBuffers, indexBuffer=None, attribDivisors=None, legacy=False
         setVertexAttribPointer(i, buffer, size, offset, normalize, legacy)
 
         activeAttribs[i] = buffer
-        bufferIndices.append(buffer.shape[0])
+        if attribDivisors and attribDivisors.get(i, 0):
+            # per-instance attributes don't limit the number of vertices
+            instanceIndices.append(buffer.shape[0])
+        else:
+            bufferIndices.append(buffer.shape[0])
+
+    if not bufferIndices:  # every attribute is per-instance
+        bufferIndices = instanceIndices
 
     # bind the EBO if available
     if indexBuffer is not None:
@@ -2867,6 +2910,57 @@ def unmapBuffer(vbo):
     return GL.glUnmapBuffer(vbo.target) == GL.GL_TRUE
 
 
+def updateVBO(vbo, data, start=0):
+    """Overwrite a sub-range of a vertex buffer object (VBO) with new data.
+
+    Only the rows of the buffer covered by `data` are re-uploaded (using
+    `glBufferSubData`), which is much cheaper than re-creating the whole buffer
+    when only a few attributes have changed. The VBO should have been created
+    with a `GL_DYNAMIC_*` or `GL_STREAM_*` usage type if it is to be updated
+    frequently.
+
+    Parameters
+    ----------
+    vbo : VertexBufferInfo
+        Vertex buffer descriptor to update.
+    data : array_like
+        Rows of data to write. The array is recast to the data type of the
+        buffer if needed, and must have the same number of columns as the array
+        used to create `vbo`.
+    start : int, optional
+        Index of the first row of the buffer to overwrite.
+
+    Examples
+    --------
+    Update the attributes of elements 10 to 19 only::
+
+        updateVBO(vbo, newValues[10:20], start=10)
+
+    """
+    npType, glType = GL_COMPAT_TYPES[vbo.dataType]
+    data = np.ascontiguousarray(data, dtype=npType)
+
+    # byte offset of the first row to overwrite
+    if len(vbo.shape) > 1:
+        rowSize = vbo.shape[1] * ctypes.sizeof(glType)
+    else:
+        rowSize = ctypes.sizeof(glType)
+    offset = start * rowSize
+    nBytes = data.size * ctypes.sizeof(glType)
+
+    if offset + nBytes > vbo.size:
+        raise ValueError(
+            'Data written to the VBO exceeds the size of the buffer.')
+
+    bindVBO(vbo)
+    GL.glBufferSubData(
+        vbo.target,
+        GL.GLintptr(offset),
+        GL.GLsizeiptr(nBytes),
+        data.ctypes.data_as(ctypes.POINTER(glType)))
+    unbindVBO(vbo)
+
+
 def deleteVBO(vbo):
     """Delete a vertex buffer object (VBO).
 
@@ -9,6 +9,7 @@
 
 __all__ = [
     'MovieFileWriter',
+    'MovieFrameBuffer',
     'closeAllMovieWriters',
     'addAudioToMovie',
     'MOVIE_WRITER_FFPYPLAYER',
@@ -933,6 +934,281 @@ class MovieFileWriter:
             pass
 
 
+class MovieFrameBuffer:
+    """Fixed pool of preallocated frame buffers for passing video frames from
+    a capture thread to the main thread without allocating memory per frame.
+
+    The capture thread gets a free buffer with `acquire()`, writes the frame
+    pixel data into it (e.g., as the destination of a color conversion) and
+    passes it on with `commit()`. The main thread gets the frames waiting
+    with `read()` or just the newest one with `readLatest()`. The arrays
+    returned by these reference the buffer memory directly, and stay valid
+    until the next `read()` or `readLatest()` call that returns frames, when
+    their buffers are reused. Copy any frame data that must be kept for
+    longer.
+
+    If the main thread falls behind and no buffer is free, the oldest waiting
+    frame is dropped to make room for the new one, and `framesDropped` is
+    incremented. If `dropFrames` is `False`, another buffer is allocated
+    instead, and kept for reuse. Buffers are otherwise only reallocated if the
+    frame size changes.
+
+    Parameters
+    ----------
+    bufferSize : int
+        Number of frame buffers. Must be at least 2, so that one frame can be
+        held by the main thread while the next is written.
+    frameBytes : int or None
+        Size of each frame buffer in bytes. If `None`, buffers are allocated
+        when the size of the first frame is given to `acquire()`.
+    dropFrames : bool
+        Drop the oldest waiting frame when no buffer is free. If `False`, no
+        frames are dropped and the number of buffers grows as needed.
+
+    Examples
+    --------
+    Writing frames in a capture thread and reading the most recent one::
+
+        frameBuffer = MovieFrameBuffer(4)
+
+        # capture thread
+        index, buffer = frameBuffer.acquire(width * height * 3)
+        buffer[:] = frameBytes
+        frameBuffer.commit(index, absTime=pts)
+
+        # main thread
+        frame = frameBuffer.readLatest()
+        if frame is not None:
+            colorData, absTime, metadata = frame
+
+    """
+    def __init__(self, bufferSize=4, frameBytes=None, dropFrames=True):
+        if bufferSize < 2:
+            raise ValueError("Value for `bufferSize` must be at least 2.")
+
+        self._bufferSize = int(bufferSize)
+        self._dropFrames = bool(dropFrames)
+        self._frameBytes = 0
+        self._buffers = None
+        self._lock = threading.Lock()
+        self._free = []  # buffers which can be written
+        self._waiting = []  # committed frames (index, absTime, metadata)
+        self._held = []  # buffers returned by the last read
+        self._framesWritten = 0
+        self._framesDropped = 0
+        self._framesSkipped = 0
+
+        if frameBytes is not None:
+            self._allocate(frameBytes)
+
+    def _allocate(self, frameBytes):
+        """Allocate buffers of `frameBytes` size. Arrays already returned by
+        `read()` keep referencing the previous buffers.
+        """
+        self._frameBytes = int(frameBytes)
+        self._buffers = [np.zeros((self._frameBytes,), dtype=np.uint8)
+                         for _ in range(self._bufferSize)]
+        self._free = list(range(self._bufferSize))
+        self._waiting = []
+        self._held = []
+
+    @property
+    def bufferSize(self):
+        """Number of frame buffers (`int`). This can only increase after
+        initialization if `dropFrames` is `False`.
+        """
+        return self._bufferSize
+
+    @property
+    def dropFrames(self):
+        """`True` if the oldest waiting frame is dropped when no buffer is
+        free (`bool`).
+        """
+        return self._dropFrames
+
+    @property
+    def frameBytes(self):
+        """Size of each frame buffer in bytes (`int`).
+        """
+        return self._frameBytes
+
+    @property
+    def framesWaiting(self):
+        """Number of frames committed but not yet read (`int`).
+        """
+        with self._lock:
+            return len(self._waiting)
+
+    @property
+    def framesWritten(self):
+        """Total number of frames committed (`int`).
+        """
+        with self._lock:
+            return self._framesWritten
+
+    @property
+    def framesDropped(self):
+        """Number of frames that were dropped, since the main thread did not
+        read them before their buffer was needed for a new frame (`int`).
+        """
+        with self._lock:
+            return self._framesDropped
+
+    @property
+    def framesSkipped(self):
+        """Number of frames discarded by `readLatest()` since a newer frame
+        was waiting (`int`).
+        """
+        with self._lock:
+            return self._framesSkipped
+
+    def acquire(self, frameBytes=None):
+        """Get a buffer to write a new frame into. Called by the capture
+        thread.
+
+        Parameters
+        ----------
+        frameBytes : int or None
+            Size of the frame in bytes. The buffers are reallocated if this
+            differs from `frameBytes`. If `None`, the current size is used.
+
+        Returns
+        -------
+        tuple
+            Buffer index to pass to `commit()` and the buffer as a 1D
+            `uint8` array of `frameBytes` size. Returns `None` if the main
+            thread holds every buffer, and the frame is dropped.
+
+        """
+        with self._lock:
+            if frameBytes is not None and frameBytes != self._frameBytes:
+                self._allocate(frameBytes)
+            elif self._buffers is None:
+                raise ValueError(
+                    "Size of the frame buffers has not been specified.")
+
+            if self._free:
+                index = self._free.pop()
+            elif not self._dropFrames:
+                index = len(self._buffers)
+                self._buffers.append(
+                    np.zeros((self._frameBytes,), dtype=np.uint8))
+                self._bufferSize += 1
+            elif self._waiting:  # drop the oldest frame not read yet
+                index = self._waiting.pop(0)[0]
+                self._framesDropped += 1
+            else:
+                self._framesDropped += 1
+                return None
+
+            return index, self._buffers[index]
+
+    def commit(self, index, absTime=0.0, metadata=None):
+        """Pass a frame written to the buffer at `index` on to the main
+        thread. Called by the capture thread.
+
+        Parameters
+        ----------
+        index : int
+            Buffer index returned by `acquire()`.
+        absTime : float
+            Presentation timestamp of the frame.
+        metadata : Any
+            Metadata returned with the frame.
+
+        """
+        with self._lock:
+            self._waiting.append((index, absTime, metadata))
+            self._framesWritten += 1
+
+    def write(self, data, absTime=0.0, metadata=None):
+        """Copy frame data into a free buffer and commit it.
+
+        Parameters
+        ----------
+        data : ArrayLike
+            Frame pixel data. Any object supporting the buffer protocol.
+        absTime : float
+            Presentation timestamp of the frame.
+        metadata : Any
+            Metadata returned with the frame.
+
+        Returns
+        -------
+        bool
+            `True` if the frame was written, `False` if it was dropped.
+
+        """
+        data = np.frombuffer(data, dtype=np.uint8)
+        acquired = self.acquire(data.size)
+        if acquired is None:
+            return False
+
+        index, buffer = acquired
+        buffer[:] = data
+        self.commit(index, absTime, metadata)
+
+        return True
+
+    def _release(self):
+        # buffers held from the previous read can be written again
+        self._free.extend(self._held)
+        self._held = []
+
+    def read(self):
+        """Get all frames waiting, oldest first. Called by the main thread.
+
+        Returns
+        -------
+        list
+            List of `(colorData, absTime, metadata)` tuples, where `colorData`
+            is a 1D `uint8` array referencing the frame buffer.
+
+        """
+        with self._lock:
+            if not self._waiting:
+                return []
+
+            self._release()
+            waiting, self._waiting = self._waiting, []
+            self._held = [index for index, _, _ in waiting]
+            return [(self._buffers[index], absTime, metadata)
+                    for index, absTime, metadata in waiting]
+
+    def readLatest(self):
+        """Get the most recent frame waiting, discarding any older ones.
+        Called by the main thread.
+
+        Returns
+        -------
+        tuple or None
+            A `(colorData, absTime, metadata)` tuple as returned by `read()`,
+            or `None` if no frame is waiting.
+
+        """
+        with self._lock:
+            if not self._waiting:
+                return None
+
+            self._release()
+            index, absTime, metadata = self._waiting.pop()
+            self._framesSkipped += len(self._waiting)
+            self._free.extend([i for i, _, _ in self._waiting])
+            self._waiting = []
+            self._held = [index]
+            return self._buffers[index], absTime, metadata
+
+    def clear(self):
+        """Discard all waiting frames and reset the frame counters.
+        """
+        with self._lock:
+            self._free.extend([i for i, _, _ in self._waiting])
+            self._release()
+            self._waiting = []
+            self._framesWritten = self._framesDropped = 0
+            self._framesSkipped = 0
+
+
 def closeAllMovieWriters():
     """Signal all movie writers to close.
 
@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Classes and functions for decoding the resources of upcoming trials in the
+background, so setting them on stimuli during the experiment is quick.
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+__all__ = [
+    'ResourcePrefetcher',
+    'getActivePrefetcher',
+    'popPrefetchedImage',
+    'popPrefetchedSound',
+    'discardPrefetched',
+    'IMAGE_EXTENSIONS',
+    'SOUND_EXTENSIONS'
+]
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psychopy.logging as logging
+from psychopy.tools.filetools import pathToString
+
+# file types which are decoded ahead of time
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff',
+                    '.tga', '.webp')
+SOUND_EXTENSIONS = ('.wav', '.flac', '.ogg', '.aiff', '.aif')
+
+# prefetcher that stimuli take decoded resources from, see `activate()`
+_activePrefetcher = None
+
+
+def getActivePrefetcher():
+    """Get the prefetcher stimuli currently take resources from (or `None`).
+    """
+    return _activePrefetcher
+
+
+def popPrefetchedImage(filename):
+    """Take the decoded image for `filename` from the active prefetcher.
+
+    Returns
+    -------
+    PIL.Image.Image or None
+        The image, already flipped top to bottom ready for uploading as a
+        texture, or `None` if it hasn't been prefetched.
+    """
+    if _activePrefetcher is None:
+        return None
+    return _activePrefetcher.getImage(filename)
+
+
+def popPrefetchedSound(filename):
+    """Take the decoded samples for `filename` from the active prefetcher.
+
+    Returns
+    -------
+    tuple or None
+        `(samples, sampleRate)`, where `samples` is a float32 array of shape
+        (nSamples, nChannels), or `None` if it hasn't been prefetched.
+    """
+    if _activePrefetcher is None:
+        return None
+    return _activePrefetcher.getSound(filename)
+
+
+def discardPrefetched(filename):
+    """Discard anything the active prefetcher has decoded for `filename`,
+    e.g. when the stimulus has the resource already so doesn't take it.
+    """
+    if _activePrefetcher is not None:
+        _activePrefetcher.discard(filename)
+
+
+def _decodeImage(filename):
+    from PIL import Image
+    im = Image.open(filename)
+    im.load()  # Image.open() is lazy, make sure the work is done here
+    im = im.transpose(Image.FLIP_TOP_BOTTOM)
+    return im, im.size[0] * im.size[1] * len(im.getbands())
+
+
+def _decodeSound(filename, sampleRate=None):
+    import soundfile as sf
+    samples, fileRate = sf.read(filename, dtype='float32', always_2d=True)
+    if sampleRate is not None and fileRate != sampleRate:
+        from psychopy.sound.audioclip import AudioClip
+        clip = AudioClip(samples, sampleRateHz=fileRate)
+        samples = clip.resample(sampleRate, copy=True).samples
+        samples = np.asarray(samples, dtype=np.float32)
+        fileRate = sampleRate
+    return (samples, fileRate), samples.nbytes
+
+
+class ResourcePrefetcher:
+    """Decode image and sound files for upcoming trials in background
+    threads.
+
+    Decoding a large image takes tens of milliseconds, which is often more
+    than is left of a frame when a trial is being prepared. The prefetcher
+    decodes the files that upcoming trials refer to in a thread pool while
+    the current trial runs. Once activated, `ImageStim` (and other textured
+    stimuli) and `Sound` take the decoded data from it instead of reading the
+    file, leaving only the upload on the main thread.
+
+    Decoded data is held until used, up to `maxBytes`. Files still being
+    decoded count as their size on disk until their decoded size is known.
+    Once over budget, new files aren't decoded until memory is freed by
+    stimuli taking (or discarding) theirs.
+
+    Movie files aren't prefetched; movies are already decoded in a separate
+    thread while playing.
+
+    Parameters
+    ----------
+    maxWorkers : int
+        Number of threads decoding files.
+    maxBytes : int
+        Memory budget for decoded data not yet used, in bytes.
+    sampleRate : int or None
+        If given, sounds are resampled to this rate in the background (e.g.
+        the rate of your audio device), otherwise they are kept at the rate of
+        the file.
+
+    Examples
+    --------
+    Decode the resources of the next 2 trials while the current one runs::
+
+        prefetcher = ResourcePrefetcher()
+        prefetcher.activate()
+        for trial in trials:  # a TrialHandler2
+            prefetcher.prefetchTrials(trials, n=2)
+            image.setImage(trial['imageFile'])  # decoded already
+            ...
+        print(prefetcher.getStats())
+        prefetcher.shutdown()
+
+    """
+
+    def __init__(self, maxWorkers=2, maxBytes=512 * 1024 ** 2,
+                 sampleRate=None):
+        self.maxBytes = maxBytes
+        self.sampleRate = sampleRate
+        self._executor = ThreadPoolExecutor(
+            max_workers=maxWorkers, thread_name_prefix='PsychoPyPrefetch')
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # key: (kind, future)
+        self._sizes = {}  # key: bytes, for resources not yet taken
+        self.nBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # not decoded because over budget
+        self.failed = 0
+
+    def __del__(self):
+        try:
+            self.shutdown(wait=False)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _getKey(filename):
+        return os.path.normcase(os.path.abspath(pathToString(filename)))
+
+    @staticmethod
+    def getKind(filename):
+        """Get the kind of resource a file holds, 'image', 'sound' or `None`
+        if it's neither (or doesn't exist).
+        """
+        if not isinstance(filename, str) or not os.path.isfile(filename):
+            return None
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in IMAGE_EXTENSIONS:
+            return 'image'
+        if ext in SOUND_EXTENSIONS:
+            return 'sound'
+        return None
+
+    def activate(self):
+        """Make stimuli take decoded resources from this prefetcher.
+        """
+        global _activePrefetcher
+        _activePrefetcher = self
+
+    def deactivate(self):
+        """Stop stimuli taking resources from this prefetcher.
+        """
+        global _activePrefetcher
+        if _activePrefetcher is self:
+            _activePrefetcher = None
+
+    def prefetch(self, filename):
+        """Start decoding a file in the background.
+
+        Returns
+        -------
+        bool
+            `True` if the file is being decoded (or was already), `False` if
+            it isn't a supported resource or the memory budget is exhausted.
+        """
+        filename = pathToString(filename)
+        kind = self.getKind(filename)
+        if kind is None:
+            return False
+        key = self._getKey(filename)
+        # a lower bound for the decoded size until it is known
+        size = os.path.getsize(filename)
+        with self._lock:
+            if key in self._pending:
+                return True
+            if self.nBytes >= self.maxBytes:
+                self.skipped += 1
+                return False
+            if kind == 'image':
+                future = self._executor.submit(_decodeImage, filename)
+            else:
+                future = self._executor.submit(
+                    _decodeSound, filename, self.sampleRate)
+            self._pending[key] = (kind, future)
+            self._sizes[key] = size
+            self.nBytes += size
+        future.add_done_callback(
+            lambda f, key=key: self._onDecoded(key, f))
+        return True
+
+    def _isPending(self, key, future):
+        """Whether `future` is still the decode pending for `key` (rather
+        than having been taken, discarded or replaced).
+        """
+        pending = self._pending.get(key)
+        return pending is not None and pending[1] is future
+
+    def _onDecoded(self, key, future):
+        """Account for the memory used by a decoded resource.
+        """
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            with self._lock:
+                self.failed += 1
+                if self._isPending(key, future):
+                    del self._pending[key]
+                    self.nBytes -= self._sizes.pop(key, 0)
+            logging.warning("Failed to prefetch %s: %s"
+                            % (key, future.exception()))
+            return
+        with self._lock:
+            if self._isPending(key, future):
+                size = future.result()[1]
+                self.nBytes += size - self._sizes.get(key, 0)
+                self._sizes[key] = size
+
+    def prefetchTrials(self, trials, n=1, start=0):
+        """Start decoding every resource file referred to by upcoming trials.
+
+        Parameters
+        ----------
+        trials : :class:`~psychopy.data.TrialHandler2` or list of dict
+            Handler to get the upcoming trials from (using
+            :meth:`~psychopy.data.TrialHandler2.getFutureTrials`), or the
+            trials themselves.
+        n : int
+            Number of upcoming trials to prefetch.
+        start : int
+            Number of trials to skip first, as for `getFutureTrials`.
+
+        Returns
+        -------
+        int
+            Number of files being decoded.
+        """
+        if hasattr(trials, 'getFutureTrials'):
+            trials = trials.getFutureTrials(n=n, start=start)
+        nFiles = 0
+        for trial in trials:
+            if not trial:
+                continue
+            for value in trial.values():
+                if isinstance(value, str) and self.prefetch(value):
+                    nFiles += 1
+        return nFiles
+
+    def _take(self, filename, kind):
+        key = self._getKey(filename)
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            if pending is None or pending[0] != kind:
+                if pending is not None:
+                    self._pending[key] = pending  # wrong kind, leave it
+                self.misses += 1
+                return None
+            self.nBytes -= self._sizes.pop(key, 0)
+        try:
+            # if still decoding, waiting is quicker than starting again
+            result = pending[1].result()[0]
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def getImage(self, filename):
+        """Take a decoded image, flipped top to bottom as needed for a
+        texture. Returns `None` if the file wasn't prefetched.
+        """
+        return self._take(filename, 'image')
+
+    def getSound(self, filename):
+        """Take decoded sound samples as `(samples, sampleRate)`. Returns
+        `None` if the file wasn't prefetched.
+        """
+        return self._take(filename, 'sound')
+
+    def discard(self, filename):
+        """Discard the decoded resource for a file (or cancel decoding it)
+        without using it, freeing its memory.
+
+        Returns
+        -------
+        bool
+            `True` if the file had been prefetched.
+        """
+        key = self._getKey(filename)
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                return False
+            self.nBytes -= self._sizes.pop(key, 0)
+        pending[1].cancel()
+        return True
+
+    def clear(self):
+        """Discard all decoded resources and cancel pending decodes.
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._sizes.clear()
+            self.nBytes = 0
+        for kind, future in pending:
+            future.cancel()
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads, discarding anything decoded.
+        """
+        self.deactivate()
+        self.clear()
+        self._executor.shutdown(wait=wait)
+
+    def getStats(self):
+        """Get the number of hits and misses (resources taken that were or
+        weren't prefetched), files skipped for lack of memory or failing to
+        decode, plus the number and size of decoded resources not yet used.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'skipped': self.skipped,
+                    'failed': self.failed,
+                    'nPending': len(self._pending),
+                    'nBytes': self.nBytes,
+                    'maxBytes': self.maxBytes}
@@ -84,6 +84,9 @@ from psychopy.visual.noise import NoiseStim
 # stimuli derived from BaseShapeStim
 from psychopy.visual.shape import ShapeStim
 
+# draws many BaseShapeStims at once
+from psychopy.visual.shapebatch import ShapeBatch
+
 # stimuli derived from ShapeStim
 from psychopy.visual.line import Line
 from psychopy.visual.polygon import Polygon
@@ -43,6 +43,7 @@ from psychopy.tools.monitorunittools import (cm2pix, deg2pix, pix2cm,
 from psychopy.visual.helpers import (pointInPolygon, polygonsOverlap,
                                      setColor, findImageFile)
 from psychopy.tools.typetools import float_uint8
+from psychopy.tools import prefetchtools
 from psychopy.tools.arraytools import makeRadialMatrix, createLumPattern
 from psychopy.event import Mouse
 from psychopy.tools.colorspacetools import dkl2rgb, lms2rgb  # pylint: disable=W0611
@@ -1062,9 +1063,12 @@ class TextureMixin:
                     logging.error(msg % (tex, os.path.abspath(tex)))
                     logging.flush()
                     raise IOError(msg % (tex, os.path.abspath(tex)))
+                # decoded in the background already?
+                im = prefetchtools.popPrefetchedImage(filename)
                 try:
-                    im = Image.open(filename)
-                    im = im.transpose(Image.FLIP_TOP_BOTTOM)
+                    if im is None:
+                        im = Image.open(filename)
+                        im = im.transpose(Image.FLIP_TOP_BOTTOM)
                 except IOError:
                     msg = "Found file '%s', failed to load as an image"
                     logging.error(msg % (filename))
@@ -1276,20 +1280,138 @@ class TextureMixin:
 
         return wasLum
 
+    def _createCachedTexture(self, tex, idAttr, pixFormat, res=128,
+                             maskParams=None, forcePOW2=True, dataType=None,
+                             wrapping=True):
+        """Create a texture as :meth:`_createTexture`, but reuse the texture
+        from the window's :class:`~psychopy.visual.texturecache.TextureCache`
+        if `tex` is an image file that has been loaded already.
+
+        Parameters
+        ----------
+        tex : Any
+            Texture data, as for :meth:`_createTexture`.
+        idAttr : str
+            Name of the attribute holding the texture ID the stimulus draws
+            with (e.g. '_texID'). When a cached texture is used this attribute
+            is pointed at it, the stimulus' own texture is restored otherwise.
+
+        Other parameters are passed on to :meth:`_createTexture`.
+
+        Returns
+        -------
+        bool
+            Whether the texture was created from a luminance image.
+        """
+        if not hasattr(self, '_cachedTextures'):
+            # idAttr: (cache entry, the stimulus' own texture ID)
+            self._cachedTextures = {}
+        cache = getattr(self.win, 'textureCache', None)
+        key = None
+        if (cache is not None and cache.enabled and
+                isinstance(tex, (str, Path)) and
+                tex not in ("none", "None", "color")):
+            filename = findImageFile(tex, checkResources=True)
+            if filename:
+                key = cache.makeKey(
+                    filename, pixFormat=pixFormat, dataType=dataType,
+                    interpolate=self.interpolate, res=res,
+                    maskParams=tuple(sorted((maskParams or {}).items())),
+                    forcePOW2=forcePOW2, wrapping=wrapping)
+
+        oldID = getattr(self, idAttr).value
+        if key is None:
+            # not cacheable, go back to our own texture and (re)create it
+            self._releaseCachedTexture(idAttr)
+            wasLum = self._createTexture(
+                tex, id=getattr(self, idAttr), pixFormat=pixFormat, stim=self,
+                res=res, maskParams=maskParams, forcePOW2=forcePOW2,
+                dataType=dataType, wrapping=wrapping)
+        else:
+            entry = cache.get(key)
+            if entry is None:
+                texID = GL.GLuint()
+                GL.glGenTextures(1, ctypes.byref(texID))
+                wasLum = self._createTexture(
+                    tex, id=texID, pixFormat=pixFormat, stim=self, res=res,
+                    maskParams=maskParams, forcePOW2=forcePOW2,
+                    dataType=dataType, wrapping=wrapping)
+                entry = cache.add(key, texID, self._getTextureBytes(texID),
+                                  wasLum, self._origSize)
+            else:
+                cache.acquire(entry)
+                # not decoding the file, so free its prefetched image
+                prefetchtools.discardPrefetched(filename)
+                wasLum = entry.isLum
+                self._origSize = entry.origSize
+            prev = self._cachedTextures.get(idAttr)
+            if prev is None:
+                ownID = getattr(self, idAttr)
+            else:
+                ownID = prev[1]
+                cache.release(prev[0])
+            self._cachedTextures[idAttr] = (entry, ownID)
+            setattr(self, idAttr, entry.texID)
+
+        if getattr(self, idAttr).value != oldID:
+            # display lists refer to textures by ID so need rebuilding
+            self._needUpdate = True
+        return wasLum
+
+    def _releaseCachedTexture(self, idAttr):
+        """Stop using a cached texture for `idAttr`, restoring the
+        stimulus' own texture ID.
+        """
+        cached = getattr(self, '_cachedTextures', {}).pop(idAttr, None)
+        if cached is None:
+            return
+        entry, ownID = cached
+        setattr(self, idAttr, ownID)
+        self.win.textureCache.release(entry)
+
+    @staticmethod
+    def _getTextureBytes(texID):
+        """Estimate the video memory used by a texture (including mipmaps).
+        """
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texID)
+        nBytes = 0
+        for param, size in ((GL.GL_TEXTURE_RED_SIZE, 1),
+                            (GL.GL_TEXTURE_GREEN_SIZE, 1),
+                            (GL.GL_TEXTURE_BLUE_SIZE, 1),
+                            (GL.GL_TEXTURE_ALPHA_SIZE, 1)):
+            bits = GL.GLint()
+            GL.glGetTexLevelParameteriv(GL.GL_TEXTURE_2D, 0, param, bits)
+            nBytes += bits.value
+        width, height = GL.GLint(), GL.GLint()
+        GL.glGetTexLevelParameteriv(
+            GL.GL_TEXTURE_2D, 0, GL.GL_TEXTURE_WIDTH, width)
+        GL.glGetTexLevelParameteriv(
+            GL.GL_TEXTURE_2D, 0, GL.GL_TEXTURE_HEIGHT, height)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        # bits per texel to bytes, plus a third for mipmaps
+        return int(width.value * height.value * nBytes / 8 * 4 / 3)
+
     def clearTextures(self):
         """Clear all textures associated with the stimulus.
 
         As of v1.61.00 this is called automatically during garbage collection
         of your stimulus, so doesn't need calling explicitly by the user.
         """
+        # textures shared through the window's cache aren't ours to delete
+        for idAttr in list(getattr(self, '_cachedTextures', {})):
+            self._releaseCachedTexture(idAttr)
+
         if hasattr(self, '_texID'):
             GL.glDeleteTextures(1, self._texID)
 
         if hasattr(self, '_maskID'):
             GL.glDeleteTextures(1, self._maskID)
 
-        if hasattr(self, '_pixBuffID'):
-            GL.glDeleteBuffers(1, self._pixBuffID)
+        if hasattr(self, '_pixbuffID'):
+            GL.glDeleteBuffers(1, self._pixbuffID)
+
+        if getattr(self, '_pixbuffBackID', None) is not None:
+            GL.glDeleteBuffers(1, self._pixbuffBackID)
 
     @attributeSetter
     def mask(self, value):
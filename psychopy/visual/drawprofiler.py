@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Profiling of the stimuli drawn automatically by a window, enabled with
+:py:attr:`Window.profileDraws`.
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+__all__ = ['DrawProfiler']
+
+import time
+
+import pyglet.gl as GL
+
+import psychopy.tools.gltools as gltools
+
+# flags which, when set before a call to draw(), cause the stimulus to rebuild
+# and upload some of its data, grouped by what is uploaded
+uploadFlags = {
+    'vertex': ('_needVertexUpdate', '_needTexCoordUpdate'),
+    'color': ('_needColorUpdate',),
+    'texture': ('_needTextureUpdate', '_needSetText'),
+    'update': ('_needUpdate',),
+}
+
+
+class _StimDrawStats:
+    """Accumulated draw statistics of one stimulus within one routine.
+    """
+    __slots__ = ['name', 'stimType', 'routine', 'nDraws', 'cpuTime',
+                 'cpuMax', 'gpuTime', 'gpuMax', 'nGPU', 'uploads']
+
+    def __init__(self, stim, routine):
+        self.name = getattr(stim, 'name', None) or repr(stim)
+        self.stimType = type(stim).__name__
+        self.routine = routine
+        self.nDraws = 0
+        self.cpuTime = 0.0
+        self.cpuMax = 0.0
+        self.gpuTime = 0.0
+        self.gpuMax = 0.0
+        self.nGPU = 0  # draws with a GPU time
+        self.uploads = dict.fromkeys(uploadFlags, 0)
+
+    def asDict(self):
+        stats = {
+            'name': self.name,
+            'stimType': self.stimType,
+            'routine': self.routine,
+            'nDraws': self.nDraws,
+            'cpuTime': self.cpuTime,
+            'cpuMean': self.cpuTime / self.nDraws if self.nDraws else 0.0,
+            'cpuMax': self.cpuMax,
+            'gpuTime': self.gpuTime if self.nGPU else None,
+            'gpuMean': self.gpuTime / self.nGPU if self.nGPU else None,
+            'gpuMax': self.gpuMax if self.nGPU else None,
+        }
+        for kind, count in self.uploads.items():
+            stats[kind + 'Uploads'] = count
+        stats['uploads'] = sum(self.uploads.values())
+        return stats
+
+
+class DrawProfiler:
+    """Times each `autoDraw` stimulus as the window draws it.
+
+    For every stimulus drawn by :py:meth:`Window.flip()` the profiler records
+    the CPU time of its `draw()` call, the GPU time of the commands it issued
+    (using timestamp queries, read back a frame later so they never stall
+    drawing) and how often the draw had to rebuild and re-upload vertices,
+    colors or textures because the stimulus had changed. Statistics are kept
+    per routine (see :py:attr:`routine`), so the slowest stimuli of each part
+    of an experiment can be found with :py:meth:`topOffenders` or
+    :py:meth:`report`.
+
+    Parameters
+    ----------
+    win : :class:`~psychopy.visual.Window`
+        Window whose stimuli are profiled.
+    gpuTiming : bool
+        Measure GPU time too, if timer queries are supported.
+
+    Examples
+    --------
+    Profile a trial and print the stimuli taking the most time::
+
+        win.profileDraws = True
+        win.drawProfiler.routine = 'trial'
+        # ... run the trial ...
+        win.profileDraws = False
+        print(win.drawProfiler.report())
+
+    """
+
+    def __init__(self, win, gpuTiming=True):
+        self.win = win
+        self.gpuTiming = gpuTiming
+        self.routine = None
+        self._stats = {}
+        self._haveQueries = None  # checked on first draw
+        self._freeQueries = []
+        self._thisFrame = []  # (stats, startQuery, endQuery) drawn this frame
+        self._lastFrame = []  # waiting for query results
+
+    @property
+    def routine(self):
+        """Label the following draws are counted under, e.g. the name of the
+        current Builder routine. Stimuli drawn in different routines are
+        reported separately.
+        """
+        return self._routine
+
+    @routine.setter
+    def routine(self, value):
+        self._routine = value
+
+    def reset(self):
+        """Discard all statistics collected so far.
+        """
+        self._stats = {}
+        self._releaseQueries(self._thisFrame)
+        self._releaseQueries(self._lastFrame)
+        self._thisFrame = []
+        self._lastFrame = []
+
+    def _getQuery(self):
+        if self._freeQueries:
+            return self._freeQueries.pop()
+        return gltools.createQueryObject(GL.GL_TIMESTAMP)
+
+    def _releaseQueries(self, frame):
+        for stats, startQuery, endQuery in frame:
+            self._freeQueries.append(startQuery)
+            self._freeQueries.append(endQuery)
+
+    def drawStim(self, stim):
+        """Draw a stimulus, recording how long it took.
+        """
+        key = (self._routine, id(stim))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _StimDrawStats(stim, self._routine)
+
+        # find out which of its data the stimulus will need to re-upload
+        for kind, flags in uploadFlags.items():
+            for flag in flags:
+                if getattr(stim, flag, False) is True:
+                    stats.uploads[kind] += 1
+                    break
+
+        if self._haveQueries is None:
+            self._haveQueries = self.gpuTiming and (
+                GL.gl_info.have_version(3, 3) or
+                GL.gl_info.have_extension('GL_ARB_timer_query'))
+        if self._haveQueries:
+            startQuery = self._getQuery()
+            endQuery = self._getQuery()
+            gltools.queryTimestamp(startQuery)
+
+        t0 = time.perf_counter()
+        stim.draw()
+        cpuTime = time.perf_counter() - t0
+
+        if self._haveQueries:
+            gltools.queryTimestamp(endQuery)
+            self._thisFrame.append((stats, startQuery, endQuery))
+
+        stats.nDraws += 1
+        stats.cpuTime += cpuTime
+        if cpuTime > stats.cpuMax:
+            stats.cpuMax = cpuTime
+
+    def _endFrame(self):
+        """Collect the GPU times of the frame before last (which have certainly
+        finished by now) and start a new frame. Called by `Window.flip()`.
+        """
+        for stats, startQuery, endQuery in self._lastFrame:
+            gpuTime = (gltools.getQuery(endQuery) -
+                       gltools.getQuery(startQuery)) * 1e-9
+            stats.gpuTime += gpuTime
+            stats.nGPU += 1
+            if gpuTime > stats.gpuMax:
+                stats.gpuMax = gpuTime
+        self._releaseQueries(self._lastFrame)
+        self._lastFrame = self._thisFrame
+        self._thisFrame = []
+
+    def getStats(self, routine=None):
+        """Get the statistics of every stimulus drawn.
+
+        Parameters
+        ----------
+        routine : str or None
+            Only include draws made while :py:attr:`routine` had this value.
+            If None, stimuli from all routines are included.
+
+        Returns
+        -------
+        list of dict
+            One dict per stimulus (and routine) with its `name`, `stimType`,
+            `routine`, `nDraws`, total, mean and max `cpu` and `gpu` times
+            (in seconds, GPU times are None if unavailable) and the number of
+            re-uploads of each kind (`vertexUploads`, `colorUploads`,
+            `textureUploads`, `updateUploads` and their total `uploads`).
+        """
+        return [stats.asDict() for stats in self._stats.values()
+                if routine is None or stats.routine == routine]
+
+    def getRoutines(self):
+        """Get the routines draws have been recorded for, in the order they
+        were first seen.
+        """
+        routines = []
+        for stats in self._stats.values():
+            if stats.routine not in routines:
+                routines.append(stats.routine)
+        return routines
+
+    def topOffenders(self, n=5, by='cpuTime', routine=None):
+        """Get the stimuli that took the most time (or caused the most
+        re-uploads).
+
+        Parameters
+        ----------
+        n : int
+            Number of stimuli to return.
+        by : str
+            Key of the stats (see :py:meth:`getStats`) to sort by, e.g.
+            'cpuTime', 'gpuTime', 'cpuMax' or 'uploads'.
+        routine : str or None
+            Only consider draws within this routine.
+
+        Returns
+        -------
+        list of dict
+            Stats of the top `n` stimuli, largest first.
+        """
+        stats = self.getStats(routine)
+        stats.sort(key=lambda s: s[by] if s[by] is not None else -1,
+                   reverse=True)
+        return stats[:n]
+
+    def report(self, n=5, by='cpuTime'):
+        """Get a text table of the top `n` stimuli of each routine.
+        """
+        lines = []
+        for routine in self.getRoutines():
+            lines.append("Routine: %s" % routine)
+            lines.append("  %-24s %-14s %7s %9s %9s %9s %8s" % (
+                "name", "type", "draws", "cpu ms", "max ms", "gpu ms",
+                "uploads"))
+            for stats in self.topOffenders(n, by=by, routine=routine):
+                gpuMean = stats['gpuMean']
+                lines.append("  %-24s %-14s %7i %9.3f %9.3f %9s %8i" % (
+                    stats['name'][:24], stats['stimType'][:14],
+                    stats['nDraws'], stats['cpuMean'] * 1000,
+                    stats['cpuMax'] * 1000,
+                    '-' if gpuMean is None else '%.3f' % (gpuMean * 1000),
+                    stats['uploads']))
+        return '\n'.join(lines)
@@ -30,12 +30,19 @@ from psychopy.visual import Window
 from psychopy.tools.arraytools import val2array
 from psychopy.tools.attributetools import attributeSetter, logAttrib, setAttribute
 from psychopy.tools.monitorunittools import convertToPix
+import psychopy.tools.gltools as gltools
 from psychopy.visual.helpers import setColor
 from psychopy.visual.basevisual import MinimalStim, TextureMixin, ColorMixin
 from . import globalVars
+from . import shaders as _shaders
 
 import numpy
 
+# units for which element corners scale linearly about the element position,
+# which is required to compute vertices on the GPU when using instancing
+_instancingUnits = ('pix', 'pixels', 'norm', 'height', 'cm', 'deg', 'degs',
+                    'degFlatPos')
+
 
 class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
     """This stimulus class defines a field of elements whose behaviour can
@@ -76,7 +83,8 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
                  interpolate=True,
                  name=None,
                  autoLog=None,
-                 maskParams=None):
+                 maskParams=None,
+                 useInstancing=False):
         """
         :Parameters:
 
@@ -90,6 +98,15 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
 
             nElements :
                 number of elements in the array.
+
+            useInstancing : bool
+                If `True`, per-element attributes are kept in single precision
+                vertex buffers on the graphics card and the whole array is
+                drawn with a single instanced draw call. Only the range of
+                elements whose attributes changed is re-uploaded when an
+                attribute is set. Requires OpenGL 3.3 (or the
+                `ARB_instanced_arrays` extension) and units that scale
+                linearly (i.e. not 'degFlat').
         """
         # what local vars are defined (these are the init params) for use by
         # __repr__
@@ -118,6 +135,11 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
         self._needColorUpdate = True
         self._RGBAs = None
         self.interpolate = interpolate
+        # GPU-resident instance buffers used when `useInstancing` is True
+        self._instanceData = {}
+        self._instanceBuffers = {}
+        self._instanceVAO = None
+        self._instanceVertices = None
         self.__dict__['fieldDepth'] = fieldDepth
         self.__dict__['depths'] = depths
         if self.win.winType == 'pygame':
@@ -125,6 +147,11 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
         if not self.win._haveShaders:
             raise Exception("ElementArrayStim requires shaders support"
                             " and floating point textures")
+        if useInstancing and self.units not in _instancingUnits:
+            logging.warning("ElementArrayStim can't use instancing with "
+                            "units='%s', drawing without it." % self.units)
+            useInstancing = False
+        self.__dict__['useInstancing'] = useInstancing
 
         self.colorSpace = colorSpace
         if rgbs != None:
@@ -509,6 +536,10 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
             win = self.win
         self._selectWindow(win)
 
+        if self.useInstancing:
+            self._drawInstanced(win)
+            return
+
         if self._needVertexUpdate:
             self._updateVertices()
         if self._needColorUpdate:
@@ -575,9 +606,173 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
         GL.glPopClientAttrib()
         GL.glPopMatrix()
 
+    def _getInstancedProgram(self, win):
+        """Get the shader program for instanced drawing, compiling it the first
+        time it is needed for `win`.
+        """
+        if win.blendMode == 'add':
+            key = 'signedTexMaskInstanced_adding'
+            fragSource = _shaders.fragSignedColorTexMask_adding
+        else:
+            key = 'signedTexMaskInstanced'
+            fragSource = _shaders.fragSignedColorTexMask
+
+        if key not in win._shaders:
+            win._shaders[key] = _shaders.compileProgram(
+                _shaders.vertElementArrayInstanced, fragSource)
+
+        return win._shaders[key]
+
+    def _setInstanceData(self, name, values):
+        """Store per-element attribute values in the instance buffer `name`.
+
+        Values are compared with those last uploaded and only the range of
+        elements which differ is written to the buffer.
+        """
+        values = numpy.ascontiguousarray(values, dtype=numpy.float32)
+        vbo = self._instanceBuffers.get(name, None)
+
+        if vbo is None or vbo.shape != values.shape:
+            # (re)create the buffer, the VAO must be rebuilt to refer to it
+            if vbo is not None:
+                gltools.deleteVBO(vbo)
+            self._instanceBuffers[name] = gltools.createVBO(
+                values, usage=GL.GL_DYNAMIC_DRAW)
+            self._instanceData[name] = values
+            self._deleteInstanceVAO()
+            return
+
+        changed = numpy.nonzero(
+            numpy.any(values != self._instanceData[name], axis=1))[0]
+        if len(changed):
+            first, last = changed[0], changed[-1] + 1
+            gltools.updateVBO(vbo, values[first:last], start=first)
+            self._instanceData[name] = values
+
+    def _updateInstanceData(self):
+        """Update the instance buffers for any attributes flagged as changed.
+        """
+        if self._needVertexUpdate:
+            positions = self.xys + self.fieldPos
+            elementPos = numpy.zeros((len(positions), 3), numpy.float32)
+            elementPos[:, :2] = convertToPix(
+                vertices=numpy.zeros_like(positions), pos=positions,
+                units=self.units, win=self.win)
+            elementPos[:, 2] = self.depths + self.fieldDepth
+            self._setInstanceData('elementPos', elementPos)
+            self._setInstanceData(
+                'elementSizeOri', numpy.column_stack((self.sizes, self.oris)))
+            self._needVertexUpdate = False
+
+        if self._needTexCoordUpdate:
+            # sf is dependent on size (openGL default), see
+            # `updateTextureCoords`
+            if self.units in ['norm', 'pix', 'height']:
+                sfScale = self.sfs
+            else:
+                sfScale = self.sfs * self.sizes
+            self._setInstanceData(
+                'elementTexParams', numpy.column_stack((sfScale, self.phases)))
+            self._needTexCoordUpdate = False
+
+        if self._needColorUpdate:
+            rgbas = numpy.zeros([self.nElements, 4], 'd')
+            rgbas[:, :] = self._colors.render('rgba1')
+            rgbas[:, -1] = self.opacities.reshape([self.nElements, ])
+            self._setInstanceData('elementColor', rgbas)
+            self._needColorUpdate = False
+
+    def _createInstanceVAO(self, prog):
+        """Build the VAO binding the quad corners and instance buffers to the
+        attributes of the instanced shader program.
+        """
+        if self._instanceVertices is None:
+            # unit quad drawn as a triangle strip
+            self._instanceVertices = gltools.createVBO(
+                [[-0.5, -0.5], [0.5, -0.5], [-0.5, 0.5], [0.5, 0.5]])
+
+        attribBuffers = {
+            GL.glGetAttribLocation(prog, b"corner"): self._instanceVertices}
+        attribDivisors = {}
+        for name, vbo in self._instanceBuffers.items():
+            loc = GL.glGetAttribLocation(prog, name.encode())
+            attribBuffers[loc] = vbo
+            attribDivisors[loc] = 1
+
+        self._instanceVAO = gltools.createVAO(
+            attribBuffers, attribDivisors=attribDivisors)
+        self._instanceVAO.userData['program'] = prog
+
+    def _deleteInstanceVAO(self):
+        if self._instanceVAO is not None:
+            gltools.deleteVAO(self._instanceVAO)
+            self._instanceVAO = None
+
+    def _drawInstanced(self, win):
+        """Draw all elements with a single instanced draw call.
+        """
+        self._updateInstanceData()
+
+        prog = self._getInstancedProgram(win)
+        if (self._instanceVAO is None or
+                self._instanceVAO.userData['program'] != prog):
+            self._deleteInstanceVAO()
+            self._createInstanceVAO(prog)
+
+        GL.glPushMatrix()  # push before drawing, pop after
+        self.win.setScale('pix')
+
+        GL.glUseProgram(prog)
+        GL.glUniform1i(GL.glGetUniformLocation(prog, b"texture"), 0)
+        GL.glUniform1i(GL.glGetUniformLocation(prog, b"mask"), 1)
+        # corners are scaled to pixels on the GPU, positions already are
+        unitScale = convertToPix(vertices=numpy.ones(2), pos=numpy.zeros(2),
+                                 units=self.units, win=self.win)
+        GL.glUniform2f(GL.glGetUniformLocation(prog, b"unitScale"),
+                       *numpy.asarray(unitScale, dtype=float))
+
+        # bind textures
+        GL.glActiveTexture(GL.GL_TEXTURE1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._maskID)
+        GL.glEnable(GL.GL_TEXTURE_2D)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texID)
+        GL.glEnable(GL.GL_TEXTURE_2D)
+
+        gltools.drawVAO(self._instanceVAO, GL.GL_TRIANGLE_STRIP,
+                        instanceCount=self._instanceData['elementPos'].shape[0])
+
+        # unbind the textures
+        GL.glActiveTexture(GL.GL_TEXTURE1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glDisable(GL.GL_TEXTURE_2D)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glDisable(GL.GL_TEXTURE_2D)
+
+        GL.glUseProgram(0)
+        GL.glPopMatrix()
+
+    def _clearInstanceBuffers(self):
+        """Free the instance buffers and VAO on the graphics card.
+        """
+        self._deleteInstanceVAO()
+        for vbo in self._instanceBuffers.values():
+            gltools.deleteVBO(vbo)
+        self._instanceBuffers = {}
+        self._instanceData = {}
+        if self._instanceVertices is not None:
+            gltools.deleteVBO(self._instanceVertices)
+            self._instanceVertices = None
+
     def _updateVertices(self):
         """Sets Stim.verticesPix from fieldPos.
         """
+        if self.useInstancing:
+            # vertices are computed on the GPU from the instance buffers,
+            # these are refreshed on the next draw
+            self._needVertexUpdate = True
+            return
 
         # Handle the orientation, size and location of
         # each element in native units
@@ -724,5 +919,6 @@ class ElementArrayStim(MinimalStim, TextureMixin, ColorMixin):
         # remove textures from graphics card to prevent OpenGl memory leak
         try:
             self.clearTextures()
+            self._clearInstanceBuffers()
         except (ImportError, ModuleNotFoundError, TypeError):
             pass  # has probably been garbage-collected already
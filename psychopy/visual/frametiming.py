@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Per-frame timing records, filled in by :py:meth:`Window.flip()` while
+:py:attr:`Window.recordFrameTiming` is `True`.
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+__all__ = ['FrameTimingRecord']
+
+import numpy as np
+
+# fields stored for each frame, times are in seconds
+frameTimingDtype = np.dtype([
+    ('frame', np.int64),  # index of the frame since recording started
+    ('t', np.float64),  # time the flip completed (same clock as logging)
+    ('interval', np.float64),  # time since the previous flip
+    ('userTime', np.float64),  # in the script between the previous flip and
+                               # this call to flip (incl. manual draw calls)
+    ('autoDrawTime', np.float64),  # drawing autoDraw stimuli within flip
+    ('flipTime', np.float64),  # rest of flip, until the buffers were swapped
+    ('callbackTime', np.float64),  # running functions added with callOnFlip
+    ('gpuTime', np.float64),  # GPU time rendering the frame (NaN if unknown)
+    ('nAutoDraw', np.int32),  # number of stimuli drawn automatically
+    ('dropped', np.bool_),  # interval was over the window's refreshThreshold
+])
+
+# fields summarised by FrameTimingRecord.summary()
+_timeFields = ('interval', 'userTime', 'autoDrawTime', 'flipTime',
+               'callbackTime', 'gpuTime')
+
+
+class FrameTimingRecord:
+    """A preallocated table of per-frame timing information.
+
+    Each flip of the window adds one row, with the fields given by
+    `frameTimingDtype`. Storage is allocated up front (and doubled when full)
+    so recording doesn't allocate Python objects every frame.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of frames to allocate space for initially.
+
+    Examples
+    --------
+    Record timing of the frames in a trial, then look at the slow ones::
+
+        win.recordFrameTiming = True
+        # ... run the trial ...
+        win.recordFrameTiming = False
+
+        timing = win.frameTiming.data
+        print(win.frameTiming.summary())
+        slow = timing[timing['dropped']]
+        print(slow['autoDrawTime'], slow['gpuTime'])
+
+    """
+
+    dtype = frameTimingDtype
+
+    def __init__(self, capacity=3600):
+        self._data = np.zeros(max(int(capacity), 1), dtype=self.dtype)
+        self._nFrames = 0
+
+    def __len__(self):
+        return self._nFrames
+
+    def __repr__(self):
+        return "<FrameTimingRecord: %i frames, %i dropped>" % (
+            self._nFrames, self.nDropped)
+
+    @property
+    def data(self):
+        """Structured array of the recorded frames (a view, so copy it if you
+        want to keep it after clearing the record).
+        """
+        return self._data[:self._nFrames]
+
+    @property
+    def capacity(self):
+        """Number of frames space is currently allocated for."""
+        return len(self._data)
+
+    @property
+    def nDropped(self):
+        """Number of frames flagged as dropped."""
+        return int(np.count_nonzero(self.data['dropped']))
+
+    def clear(self):
+        """Remove all recorded frames (the allocated space is kept).
+        """
+        self._nFrames = 0
+
+    def addFrame(self, t, interval, userTime, autoDrawTime, flipTime,
+                 callbackTime, gpuTime=np.nan, nAutoDraw=0, dropped=False):
+        """Add a row for a frame.
+
+        Returns
+        -------
+        int
+            Index of the new row, so values measured later (e.g. `gpuTime`)
+            can be filled in with :meth:`setValue`.
+        """
+        index = self._nFrames
+        if index >= len(self._data):
+            newData = np.zeros(len(self._data) * 2, dtype=self.dtype)
+            newData[:index] = self._data
+            self._data = newData
+        self._data[index] = (index, t, interval, userTime, autoDrawTime,
+                             flipTime, callbackTime, gpuTime, nAutoDraw,
+                             dropped)
+        self._nFrames += 1
+        return index
+
+    def setValue(self, index, field, value):
+        """Set a field of a frame that was already added.
+        """
+        if not 0 <= index < self._nFrames:
+            return  # record has been cleared since
+        self._data[field][index] = value
+
+    def summary(self):
+        """Summarise the recorded frames.
+
+        Returns
+        -------
+        dict
+            Keys `nFrames`, `nDropped` and `propDropped`, plus, for each of
+            the timing fields, a dict of its `mean`, `median`, `p95` and `max`
+            (in seconds, ignoring frames where it wasn't measured). For
+            the dropped frames, the mean of each field is given in
+            `droppedMeans`, to see which phase of the frame took longer.
+        """
+        data = self.data
+        nFrames = len(data)
+        nDropped = self.nDropped
+        summary = {'nFrames': nFrames,
+                   'nDropped': nDropped,
+                   'propDropped': nDropped / nFrames if nFrames else 0.0}
+        dropped = data[data['dropped']]
+        summary['droppedMeans'] = {}
+        for field in _timeFields:
+            values = data[field][~np.isnan(data[field])]
+            if len(values):
+                summary[field] = {
+                    'mean': float(np.mean(values)),
+                    'median': float(np.median(values)),
+                    'p95': float(np.percentile(values, 95)),
+                    'max': float(np.max(values))}
+            else:
+                summary[field] = None
+            droppedValues = dropped[field][~np.isnan(dropped[field])]
+            summary['droppedMeans'][field] = (
+                float(np.mean(droppedValues)) if len(droppedValues) else None)
+        return summary
+
+    def save(self, fileName, delim=None):
+        """Save the recorded frames.
+
+        Parameters
+        ----------
+        fileName : str
+            File to save to. If it ends with '.npy' the structured array is
+            saved in NumPy's binary format, otherwise as delimited text with a
+            header row.
+        delim : str or None
+            Delimiter for text files, if None this is a tab for '.tsv' files
+            and a comma otherwise.
+        """
+        if fileName.endswith('.npy'):
+            np.save(fileName, self.data)
+            return
+        if delim is None:
+            delim = '\t' if fileName.endswith('.tsv') else ','
+        fmt = []
+        for name in self.dtype.names:
+            kind = self.dtype[name].kind
+            fmt.append('%.6f' if kind == 'f' else '%d')
+        np.savetxt(fileName, self.data, fmt=fmt, delimiter=delim,
+                   header=delim.join(self.dtype.names), comments='')
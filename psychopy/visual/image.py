@@ -57,7 +57,8 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
                  texRes=128,
                  name=None,
                  autoLog=None,
-                 maskParams=None):
+                 maskParams=None,
+                 asyncTextureUpload=False):
         """ """  # Empty docstring. All doc is in attributes
         # what local vars are defined (these are the init params) for use by
         # __repr__
@@ -77,6 +78,12 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         GL.glGenTextures(1, ctypes.byref(self._maskID))
         self._pixbuffID = GL.GLuint()
         GL.glGenBuffers(1, ctypes.byref(self._pixbuffID))
+        # second pixel buffer and the size of the frame waiting in the first
+        # one to be copied to the texture, for double-buffered frame uploads
+        self._pixbuffBackID = None
+        self._pixbuffFrameSize = None
+        self._lastMovieFrame = None  # last movie frame copied to the texture
+        self.asyncTextureUpload = asyncTextureUpload
         self.__dict__['maskParams'] = maskParams
         self.__dict__['mask'] = mask
         # Not pretty (redefined later) but it works!
@@ -218,9 +225,17 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         # If our image is a movie stim object, pull pixel data from the most
         # recent frame and write it to the memory
         if hasattr(self.image, 'getVideoFrame'):
+            if self._pixbuffFrameSize is not None:
+                # show the frame written to a pixel buffer on the last draw,
+                # whether or not a new one has arrived since
+                self._pixelBufferToTexture(
+                    self._pixbuffID, *self._pixbuffFrameSize)
+                self._pixbuffFrameSize = None
             videoFrame = self.image.getVideoFrame()
-            if videoFrame is not None:
+            # only upload frames we haven't seen yet
+            if videoFrame is not None and videoFrame is not self._lastMovieFrame:
                 self._movieFrameToTexture(videoFrame)
+                self._lastMovieFrame = videoFrame
 
         GL.glPushMatrix()  # push before the list, pop after
         win.setScale('pix')
@@ -256,34 +271,38 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         vidWidth, vidHeight = movieSrc.size
         nBufferBytes = vidWidth * vidHeight * 3
 
-        # bind pixel unpack buffer
-        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, self._pixbuffID)
+        if not self._asyncTextureUpload:
+            self._fillPixelBuffer(self._pixbuffID, colorData, nBufferBytes)
+            self._pixelBufferToTexture(self._pixbuffID, vidWidth, vidHeight)
+            return
 
-        # Free last storage buffer before mapping and writing new frame
-        # data. This allows the GPU to process the extant buffer in VRAM
-        # uploaded last cycle without being stalled by the CPU accessing it.
-        GL.glBufferData(
-            GL.GL_PIXEL_UNPACK_BUFFER,
-            nBufferBytes * ctypes.sizeof(GL.GLubyte),
-            None,
-            GL.GL_STREAM_DRAW)
+        if self._pixbuffBackID is None:
+            self._pixbuffBackID = GL.GLuint()
+            GL.glGenBuffers(1, ctypes.byref(self._pixbuffBackID))
+
+        # Write the new frame to the other buffer than the one the texture
+        # was last updated from, and only update the texture from it on the
+        # next draw. The driver then has a whole frame to transfer the
+        # buffer, so the texture update doesn't wait for the copy to finish.
+        # This delays the frame shown by one draw.
+        self._pixbuffID, self._pixbuffBackID = \
+            self._pixbuffBackID, self._pixbuffID
+        self._fillPixelBuffer(self._pixbuffID, colorData, nBufferBytes)
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+        self._pixbuffFrameSize = (vidWidth, vidHeight)
 
-        # Map the buffer to client memory, `GL_WRITE_ONLY` to tell the
-        # driver to optimize for a one-way write operation if it can.
-        bufferPtr = GL.glMapBuffer(
-            GL.GL_PIXEL_UNPACK_BUFFER,
-            GL.GL_WRITE_ONLY)
+    def _pixelBufferToTexture(self, pixbuffID, vidWidth, vidHeight):
+        """Update the texture from a pixel buffer holding a movie frame.
 
-        bufferArray = numpy.ctypeslib.as_array(
-            ctypes.cast(bufferPtr, ctypes.POINTER(GL.GLubyte)),
-            shape=(nBufferBytes,))
-
-        # copy data
-        bufferArray[:] = colorData[:]
+        Parameters
+        ----------
+        pixbuffID : GLuint
+            Pixel buffer object holding the frame.
+        vidWidth, vidHeight : int
+            Size of the frame in pixels.
 
-        # Very important that we unmap the buffer data after copying, but
-        # keep the buffer bound for setting the texture.
-        GL.glUnmapBuffer(GL.GL_PIXEL_UNPACK_BUFFER)
+        """
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, pixbuffID)
 
         # bind the texture in OpenGL
         GL.glEnable(GL.GL_TEXTURE_2D)
@@ -319,6 +338,67 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
         GL.glDisable(GL.GL_TEXTURE_2D)
 
+    @staticmethod
+    def _fillPixelBuffer(pixbuffID, colorData, nBufferBytes):
+        """Copy pixel data into a pixel unpack buffer, leaving it bound.
+
+        Parameters
+        ----------
+        pixbuffID : GLuint
+            Pixel buffer object to write to.
+        colorData : ArrayLike
+            Pixel data to copy, as unsigned bytes.
+        nBufferBytes : int
+            Size of the pixel data in bytes.
+
+        """
+        # bind pixel unpack buffer
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, pixbuffID)
+
+        # Free last storage buffer before mapping and writing new frame
+        # data. This allows the GPU to process the extant buffer in VRAM
+        # uploaded last cycle without being stalled by the CPU accessing it.
+        GL.glBufferData(
+            GL.GL_PIXEL_UNPACK_BUFFER,
+            nBufferBytes * ctypes.sizeof(GL.GLubyte),
+            None,
+            GL.GL_STREAM_DRAW)
+
+        # Map the buffer to client memory, `GL_WRITE_ONLY` to tell the
+        # driver to optimize for a one-way write operation if it can.
+        bufferPtr = GL.glMapBuffer(
+            GL.GL_PIXEL_UNPACK_BUFFER,
+            GL.GL_WRITE_ONLY)
+
+        bufferArray = numpy.ctypeslib.as_array(
+            ctypes.cast(bufferPtr, ctypes.POINTER(GL.GLubyte)),
+            shape=(nBufferBytes,))
+
+        # copy data
+        bufferArray[:] = colorData[:nBufferBytes]
+
+        # Very important that we unmap the buffer data after copying, but
+        # keep the buffer bound for setting the texture.
+        GL.glUnmapBuffer(GL.GL_PIXEL_UNPACK_BUFFER)
+
+    @property
+    def asyncTextureUpload(self):
+        """Upload movie and camera frames to the texture through two
+        alternating pixel buffers (`bool`).
+
+        A new frame is written to one buffer while the texture is updated
+        from the other, and copied to the texture on the next `draw()` (even
+        if no new frame has arrived by then). This keeps the draw loop from
+        stalling on the transfer of large or high frame rate video, but shows
+        each frame one draw later.
+
+        """
+        return self._asyncTextureUpload
+
+    @asyncTextureUpload.setter
+    def asyncTextureUpload(self, value):
+        self._asyncTextureUpload = bool(value)
+
     @attributeSetter
     def image(self, value):
         """The image file to be presented (most formats supported).
@@ -332,6 +412,8 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         ImageStim must be set explicitly.
         """
         self.__dict__['image'] = self._imName = value
+        self._lastMovieFrame = None
+        self._pixbuffFrameSize = None
 
         # If given a color array, get it in rgb1
         if isinstance(value, colors.Color):
@@ -346,9 +428,9 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
         if type(value) != numpy.ndarray and value in (None, "None", "none"):
             self.isLumImage = True
         else:
-            self.isLumImage = self._createTexture(
-                value, id=self._texID,
-                stim=self,
+            # image files already loaded are taken from the window's cache
+            self.isLumImage = self._createCachedTexture(
+                value, idAttr='_texID',
                 pixFormat=GL.GL_RGB,
                 dataType=datatype,
                 maskParams=self.maskParams,
@@ -424,14 +506,13 @@ class ImageStim(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin,
                 + or a numpy array (1xN or NxN) ranging -1:1
         """
         self.__dict__['mask'] = value
-        self._createTexture(value, id=self._maskID,
-                            pixFormat=GL.GL_ALPHA,
-                            dataType=GL.GL_UNSIGNED_BYTE,
-                            stim=self,
-                            res=self.texRes,
-                            maskParams=self.maskParams,
-                            forcePOW2=False,
-                            wrapping=True)
+        self._createCachedTexture(value, idAttr='_maskID',
+                                  pixFormat=GL.GL_ALPHA,
+                                  dataType=GL.GL_UNSIGNED_BYTE,
+                                  res=self.texRes,
+                                  maskParams=self.maskParams,
+                                  forcePOW2=False,
+                                  wrapping=True)
 
     def setMask(self, value, log=None):
         """Usually you can use 'stim.attribute = value' syntax instead,
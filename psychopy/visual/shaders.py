@@ -282,6 +282,34 @@ vertSimple = """
     }
     """
 
+# instanced vertex shader for ElementArrayStim, each element is one instance of
+# a unit quad whose position, size, orientation, texture and color are given by
+# per-instance attributes (corners are in the range -0.5 to +0.5)
+vertElementArrayInstanced = """
+    #version 120
+    attribute vec2 corner;
+    attribute vec3 elementPos;
+    attribute vec3 elementSizeOri;
+    attribute vec4 elementTexParams;
+    attribute vec4 elementColor;
+    uniform vec2 unitScale;
+    void main() {
+            float theta = radians(elementSizeOri.z);
+            vec2 local = corner * elementSizeOri.xy;
+            vec2 rotated = vec2(
+                local.x * cos(theta) + local.y * sin(theta),
+                -local.x * sin(theta) + local.y * cos(theta));
+            vec4 vertex = vec4(
+                elementPos.xy + rotated * unitScale, elementPos.z, 1.0);
+            gl_FrontColor = elementColor;
+            gl_TexCoord[0] = vec4(
+                0.5 - elementTexParams.zw + elementTexParams.xy * corner,
+                0.0, 1.0);
+            gl_TexCoord[1] = vec4(corner + 0.5, 0.0, 1.0);
+            gl_Position = gl_ModelViewProjectionMatrix * vertex;
+    }
+    """
+
 vertPhongLighting = """
 // Vertex shader for the Phong Shading Model
 // 
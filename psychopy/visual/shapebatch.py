@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Draw many shapes with a few OpenGL calls, rather than a few calls per
+shape."""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+__all__ = ['ShapeBatch']
+
+import numpy
+
+import pyglet
+
+from psychopy import logging
+from psychopy.visual.basevisual import MinimalStim
+from psychopy.visual.shape import BaseShapeStim, ShapeStim
+
+GL = pyglet.gl
+
+
+class _BatchMember:
+    """A shape in a :class:`ShapeBatch`, with the geometry and colors it
+    contributes to the batch.
+    """
+    __slots__ = ['stim', 'state', 'fill', 'fillColors', 'line', 'lineColors',
+                 'fillKey', 'lineKey', 'fillSlice', 'lineSlice']
+
+    def __init__(self, stim):
+        self.stim = stim
+        self.state = None
+        self.fillSlice = self.lineSlice = slice(0, 0)
+
+    def getState(self):
+        """Get everything the shape's contribution depends on.
+
+        Values are compared by identity, so this is cheap: when a shape moves
+        its pixel vertices are recalculated into a new array, and changing
+        a color (including its opacity or contrast) replaces its render cache.
+        """
+        stim = self.stim
+        verts = stim.verticesPix
+        if isinstance(stim, ShapeStim):
+            border = stim._borderPix
+        else:
+            border = verts
+        fillColor = stim._fillColor
+        borderColor = stim._borderColor
+        return (verts, border, fillColor, fillColor._renderCache,
+                borderColor, borderColor._renderCache, stim.lineWidth,
+                stim.closeShape, stim.interpolate, stim.opacity)
+
+    def isDirty(self):
+        """Check whether the shape has changed since it was last added to the
+        batch's buffers (and store its new state if so).
+        """
+        state = self.getState()
+        if self.state is not None:
+            for old, new in zip(self.state, state):
+                if old is not new:
+                    break
+            else:
+                return False
+        self.state = state
+        return True
+
+    def update(self):
+        """Calculate the triangles and line segments to draw the shape with,
+        in the same way as the shape's own `draw()` method would.
+        """
+        stim = self.stim
+        (verts, border, fillColor, _, borderColor, _, lineWidth, closeShape,
+         interpolate, opacity) = self.state
+        isShapeStim = isinstance(stim, ShapeStim)
+        nVerts = verts.shape[0]
+
+        # fill, ShapeStim vertices are already tesselated into triangles
+        # whereas BaseShapeStim draws a convex polygon (as a triangle fan)
+        if isShapeStim:
+            hasFill = closeShape and nVerts > 2 and fillColor != None
+        else:
+            hasFill = nVerts > 2 and fillColor != None
+        if hasFill:
+            if isShapeStim:
+                self.fill = verts
+            else:
+                fan = numpy.empty((nVerts - 2, 3), dtype=int)
+                fan[:, 0] = 0
+                fan[:, 1] = numpy.arange(1, nVerts - 1)
+                fan[:, 2] = numpy.arange(2, nVerts)
+                self.fill = verts[fan.ravel()]
+            self.fillColors = numpy.tile(fillColor.render('rgba1'),
+                                         (self.fill.shape[0], 1))
+        else:
+            self.fill = numpy.zeros((0, 2))
+            self.fillColors = numpy.zeros((0, 4))
+        self.fillKey = interpolate
+
+        # border, drawn as separate segments rather than a line strip or loop
+        if borderColor != None and lineWidth and border.shape[0] > 1:
+            ends = numpy.roll(border, -1, axis=0)
+            if not closeShape:
+                border, ends = border[:-1], ends[:-1]
+            self.line = numpy.empty((border.shape[0] * 2, 2))
+            self.line[0::2] = border
+            self.line[1::2] = ends
+            rgba = numpy.array(borderColor.render('rgba1'), dtype=float)
+            if not isShapeStim and opacity is not None:
+                rgba[-1] = opacity  # as in BaseShapeStim.draw()
+            self.lineColors = numpy.tile(rgba, (self.line.shape[0], 1))
+        else:
+            self.line = numpy.zeros((0, 2))
+            self.lineColors = numpy.zeros((0, 4))
+        self.lineKey = (interpolate, lineWidth)
+
+
+class ShapeBatch(MinimalStim):
+    """Draw many shapes (e.g. :class:`~psychopy.visual.Rect`,
+    :class:`~psychopy.visual.Circle` or :class:`~psychopy.visual.ShapeStim`)
+    together, with one OpenGL draw call for all their fills and one for their
+    borders.
+
+    Each shape drawn on its own sets up the OpenGL state and issues its own
+    draw calls, so scenes with hundreds of shapes (e.g. visual search arrays)
+    are limited by the CPU time spent drawing. A batch keeps the triangles
+    and line segments of all its shapes in shared vertex and color arrays,
+    and draws them at once.
+
+    Shapes in a batch keep working as usual: set their `pos`, `ori`, `size`,
+    `fillColor`, `opacity` etc. and the batch picks up the change the next
+    time it's drawn, updating the arrays for just the shapes which changed.
+    Shapes are drawn in the order they were added, except that the fills of
+    all shapes are drawn before any of their borders (so where shapes overlap,
+    their borders show on top of each other's fills). Shapes with different
+    `lineWidth` or `interpolate` values need a separate draw call each.
+
+    Parameters
+    ----------
+    win : :class:`~psychopy.visual.Window`
+        Window the shapes are drawn in.
+    shapes : list
+        Shapes (derived from :class:`~psychopy.visual.shape.BaseShapeStim`)
+        to add to the batch. Shapes being drawn automatically are stopped,
+        as the batch draws them.
+    name : str
+        Name of the batch, for logging.
+    depth : int
+        Depth of the batch, as for stimuli, when drawn automatically.
+    autoLog : bool
+        Log the creation of the batch.
+    autoDraw : bool
+        Draw the batch automatically on every flip.
+
+    Examples
+    --------
+    Draw a search array of 400 circles, changing the color of one::
+
+        circles = [visual.Circle(win, radius=5, units='pix', pos=pos)
+                   for pos in positions]
+        batch = visual.ShapeBatch(win, circles)
+        circles[target].fillColor = 'red'
+        batch.draw()
+        win.flip()
+
+    """
+
+    def __init__(self, win, shapes=(), name=None, depth=0, autoLog=None,
+                 autoDraw=False):
+        super(ShapeBatch, self).__init__(name=name, autoLog=False)
+        self.win = win
+        self.depth = depth
+        self._members = []
+        self._fillGroups = {}  # interpolate: (vertices, colors)
+        self._lineGroups = {}  # (interpolate, lineWidth): (vertices, colors)
+        self._needRebuild = True
+        for shape in shapes:
+            self.append(shape)
+
+        self.autoDraw = autoDraw
+        wantLog = autoLog is None and self.win.autoLog
+        self.__dict__['autoLog'] = autoLog or wantLog
+        if self.autoLog:
+            logging.exp("Created %s with %i shapes" % (self.name, len(self)))
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return (member.stim for member in self._members)
+
+    def __getitem__(self, index):
+        return self._members[index].stim
+
+    def __contains__(self, shape):
+        return any(member.stim is shape for member in self._members)
+
+    @property
+    def shapes(self):
+        """List of the shapes in the batch, in the order they're drawn."""
+        return list(self)
+
+    def append(self, shape):
+        """Add a shape to the batch (drawn after the shapes already in it).
+        """
+        if not isinstance(shape, BaseShapeStim):
+            raise TypeError("ShapeBatch can only hold shapes derived from "
+                            "BaseShapeStim, not %s" % type(shape).__name__)
+        if shape.win is not self.win:
+            raise ValueError("Shapes in a ShapeBatch must be in the same "
+                             "window as the batch")
+        if shape in self:
+            return
+        if shape.autoDraw:
+            logging.warning("%s is now drawn by %s, so won't be drawn "
+                            "automatically" % (shape.name, self.name))
+            shape.autoDraw = False
+        self._members.append(_BatchMember(shape))
+        self._needRebuild = True
+
+    def extend(self, shapes):
+        """Add several shapes to the batch.
+        """
+        for shape in shapes:
+            self.append(shape)
+
+    def remove(self, shape):
+        """Remove a shape from the batch.
+        """
+        for member in self._members:
+            if member.stim is shape:
+                self._members.remove(member)
+                self._needRebuild = True
+                return
+        raise ValueError("%s isn't in %s" % (shape.name, self.name))
+
+    def clear(self):
+        """Remove all shapes from the batch.
+        """
+        self._members = []
+        self._needRebuild = True
+
+    def _updateArrays(self):
+        """Bring the shared arrays up to date with the shapes.
+
+        Shapes which changed without needing more or fewer vertices (e.g. a
+        new position or color) are updated in place, otherwise the arrays are
+        rebuilt from every shape's cached geometry.
+        """
+        for member in self._members:
+            if not member.isDirty():
+                continue
+            oldSizes = (member.fillSlice.stop - member.fillSlice.start,
+                        member.lineSlice.stop - member.lineSlice.start)
+            oldKeys = (getattr(member, 'fillKey', None),
+                       getattr(member, 'lineKey', None))
+            member.update()
+            if self._needRebuild:
+                continue
+            if (oldSizes != (member.fill.shape[0], member.line.shape[0]) or
+                    oldKeys != (member.fillKey, member.lineKey)):
+                self._needRebuild = True
+                continue
+            if oldSizes[0]:
+                verts, colors = self._fillGroups[member.fillKey]
+                verts[member.fillSlice] = member.fill
+                colors[member.fillSlice] = member.fillColors
+            if oldSizes[1]:
+                verts, colors = self._lineGroups[member.lineKey]
+                verts[member.lineSlice] = member.line
+                colors[member.lineSlice] = member.lineColors
+
+        if self._needRebuild:
+            self._fillGroups = self._buildGroups('fill', 'fillColors',
+                                                 'fillKey', 'fillSlice')
+            self._lineGroups = self._buildGroups('line', 'lineColors',
+                                                 'lineKey', 'lineSlice')
+            self._needRebuild = False
+
+    def _buildGroups(self, vertsAttr, colorsAttr, keyAttr, sliceAttr):
+        """Concatenate the vertices and colors of all shapes, grouped by the
+        OpenGL state they need.
+        """
+        groups = {}
+        for member in self._members:
+            verts = getattr(member, vertsAttr)
+            if not verts.shape[0]:
+                setattr(member, sliceAttr, slice(0, 0))
+                continue
+            groups.setdefault(getattr(member, keyAttr), []).append(member)
+        arrays = {}
+        for key, members in groups.items():
+            arrays[key] = (
+                numpy.ascontiguousarray(numpy.vstack(
+                    [getattr(member, vertsAttr) for member in members]),
+                    dtype=float),
+                numpy.ascontiguousarray(numpy.vstack(
+                    [getattr(member, colorsAttr) for member in members]),
+                    dtype=float))
+            start = 0
+            for member in members:
+                stop = start + getattr(member, vertsAttr).shape[0]
+                setattr(member, sliceAttr, slice(start, stop))
+                start = stop
+        return arrays
+
+    @staticmethod
+    def _setInterpolate(interpolate):
+        if interpolate:
+            GL.glEnable(GL.GL_LINE_SMOOTH)
+            GL.glEnable(GL.GL_MULTISAMPLE)
+        else:
+            GL.glDisable(GL.GL_LINE_SMOOTH)
+            GL.glDisable(GL.GL_MULTISAMPLE)
+
+    def draw(self, win=None):
+        """Draw all the shapes in the batch.
+        """
+        if win is None:
+            win = self.win
+        win._setCurrent()
+        self._updateArrays()
+
+        GL.glPushMatrix()
+        win.setScale('pix')
+        if win._haveShaders:
+            GL.glUseProgram(win._progSignedFrag)
+        # load Null textures into multitexteureARB - or they modulate glColor
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glEnable(GL.GL_TEXTURE_2D)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glActiveTexture(GL.GL_TEXTURE1)
+        GL.glEnable(GL.GL_TEXTURE_2D)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+        for interpolate, (verts, colors) in self._fillGroups.items():
+            self._setInterpolate(interpolate)
+            GL.glVertexPointer(2, GL.GL_DOUBLE, 0, verts.ctypes)
+            GL.glColorPointer(4, GL.GL_DOUBLE, 0, colors.ctypes)
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, verts.shape[0])
+        for (interpolate, lineWidth), (verts, colors) in \
+                self._lineGroups.items():
+            self._setInterpolate(interpolate)
+            GL.glLineWidth(lineWidth)
+            GL.glVertexPointer(2, GL.GL_DOUBLE, 0, verts.ctypes)
+            GL.glColorPointer(4, GL.GL_DOUBLE, 0, colors.ctypes)
+            GL.glDrawArrays(GL.GL_LINES, 0, verts.shape[0])
+        GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+        if win._haveShaders:
+            GL.glUseProgram(0)
+        GL.glPopMatrix()
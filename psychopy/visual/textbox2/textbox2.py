@@ -22,6 +22,7 @@ from arabic_reshaper import ArabicReshaper
 from pyglet import gl
 from bidi import algorithm as bidi
 import re
+from bisect import bisect_right
 
 from ..aperture import Aperture
 from ..basevisual import (
@@ -144,6 +145,7 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
         """
 
         BaseVisualStim.__init__(self, win, units=units, name=name)
+        self._layoutCache = _LayoutCache()
         self.depth = depth
         self.win = win
         self.colorSpace = colorSpace
@@ -744,9 +746,14 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
                 _colorCache[matchKey] = Color(matchVal, self.colorSpace)
                 if not _colorCache[matchKey].valid:
                     raise ValueError(f"Could not interpret color value for `{matchKey}` in textbox.")
-            color_values.append(_colorCache[matchKey].render('rgba1'))
+            color_values.append(tuple(_colorCache[matchKey].render('rgba1')))
 
-        visible_text = ''.join([c for c in text if c not in codes.values()])
+        # only look for formatting codes if there are any
+        hasCodes = any(code in text for code in codes.values())
+        if hasCodes:
+            visible_text = ''.join([c for c in text if c not in codes.values()])
+        else:
+            visible_text = text
         self._styles = Style(len(visible_text))
         self._styles.formatted_text = original_text
         self._text = visible_text
@@ -760,7 +767,7 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
         is_bold = False
         is_italic = False
         ci = 0
-        for c in text:
+        for c in (text if hasCodes else ''):
             if c == codes['ITAL_START']:
                 is_italic = True
             elif c == codes['BOLD_START']:
@@ -792,7 +799,6 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
         self._styles.insert(self.caret.index, cstyle)
         self.caret.index += 1
         self.text = txt
-        self._layout()
 
     def deleteCaretLeft(self):
         """Deletes 1 character to the left of the caret"""
@@ -803,7 +809,6 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
             self._styles = self._styles[:ci-1]+self._styles[ci:]
             self.caret.index -= 1
             self.text = txt
-            self._layout()
 
     def deleteCaretRight(self):
         """Deletes 1 character to the right of the caret"""
@@ -813,7 +818,6 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
             txt = txt[:ci] + txt[ci+1:]
             self._styles = self._styles[:ci]+self._styles[ci+1:]
             self.text = txt
-            self._layout()
         
     def _layout(self):
         """Layout the text, calculating the vertex locations
@@ -826,15 +830,12 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
         # then we convert them to the requested units for self._vertices
         # then they are converted back during rendering using standard BaseStim
         visible_text = self._text
-        vertices = np.zeros((len(visible_text) * 4, 2), dtype=np.float32)
-        self._charIndices = np.zeros((len(visible_text)), dtype=int)
-        self._colors = np.zeros((len(visible_text) * 4, 4), dtype=np.double)
-        self._texcoords = np.zeros((len(visible_text) * 4, 2), dtype=np.double)
-        self._glIndices = np.zeros((len(visible_text) * 4), dtype=int)
+        nChars = len(visible_text)
+        self._charIndices = np.zeros(nChars, dtype=int)
+        self._glIndices = np.zeros(nChars * 4, dtype=int)
         self._renderChars = []
 
         # the following are used internally for layout
-        self._lineNs = np.zeros(len(visible_text), dtype=int)
         _lineBottoms = []
         self._lineLenChars = []  #
         _lineWidths = []  # width in stim units of each line
@@ -851,12 +852,33 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
 
         if self._lineBreaking == 'default':
 
+            # only lay out again from the start of the first word that has
+            # changed since the last layout, keeping the characters before it
+            cache = self._layoutCache
+            signature = (id(font), font.size, font.height, font.ascender,
+                         lineMax, self.letterSpacing, showWhiteSpace,
+                         tuple(rgb))
+            start, state = cache.restart(signature, visible_text, self._styles)
+            vertices = cache.vertices
+            texcoords = cache.texcoords
+            colors = cache.colors
+            lineNs = cache.lineNs
+
             wordLen = 0
             charsThisLine = 0
             wordsThisLine = 0
             lineN = 0
-
-            for i, charcode in enumerate(self._text):
+            if state is not None:
+                (current[0], current[1], lineN, charsThisLine, wordsThisLine,
+                 nLineBottoms, nLineLenChars, nLineWidths,
+                 nRenderChars) = state
+                _lineBottoms = cache.lineBottoms[:nLineBottoms]
+                self._lineLenChars = cache.lineLenChars[:nLineLenChars]
+                _lineWidths = cache.lineWidths[:nLineWidths]
+                self._renderChars = cache.renderChars[:nRenderChars]
+
+            for i in range(start, nChars):
+                charcode = visible_text[i]
                 printable = True  # unless we decide otherwise
                 # handle formatting codes
                 fakeItalic = 0.0
@@ -909,18 +931,18 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
 
                 theseVertices = [[xTopL, yTop], [xBotL, yBot],
                                  [xBotR, yBot], [xTopR, yTop]]
-                texcoords = [[u0, v0], [u0, v1],
-                             [u1, v1], [u1, v0]]
+                theseTexcoords = [[u0, v0], [u0, v1],
+                                  [u1, v1], [u1, v0]]
 
                 vertices[i * 4:i * 4 + 4] = theseVertices
-                self._texcoords[i * 4:i * 4 + 4] = texcoords
+                texcoords[i * 4:i * 4 + 4] = theseTexcoords
                 # handle character color
                 rgb_ = self._styles.c[i]
                 if len(rgb_) > 0:
-                    self._colors[i*4 : i*4+4, :4] = rgb_ # set custom color
+                    colors[i*4 : i*4+4, :4] = rgb_ # set custom color
                 else:
-                    self._colors[i*4 : i*4+4, :4] = rgb # set default color
-                self._lineNs[i] = lineN
+                    colors[i*4 : i*4+4, :4] = rgb # set default color
+                lineNs[i] = lineN
                 current[0] = current[0] + (glyph.advance[0] + fakeBold / 2) * self.letterSpacing
                 current[1] = current[1] + glyph.advance[1]
 
@@ -968,7 +990,7 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
                     vertices[(i - wordLen + 1) * 4: (i + 1) * 4, 0] -= lineBreakPt
                     vertices[(i - wordLen + 1) * 4: (i + 1) * 4, 1] -= font.height
                     # update line values
-                    self._lineNs[i - wordLen + 1: i + 1] += 1
+                    lineNs[i - wordLen + 1: i + 1] += 1
                     self._lineLenChars.append(charsThisLine - wordLen)
                     _lineWidths.append(lineBreakPt)
                     lineN += 1
@@ -982,12 +1004,35 @@ class TextBox2(BaseVisualStim, DraggingMixin, ContainerMixin, ColorMixin):
                 if lineN + 1 > len(_lineBottoms):
                     _lineBottoms.append(current[1])
 
+                # between words, so layout can be restarted from here
+                if wordLen == 0:
+                    cache.addCheckpoint(i + 1, (
+                        current[0], current[1], lineN, charsThisLine,
+                        wordsThisLine, len(_lineBottoms),
+                        len(self._lineLenChars), len(_lineWidths),
+                        len(self._renderChars)))
+
+            cache.lineBottoms = _lineBottoms
+            cache.lineLenChars = self._lineLenChars
+            cache.lineWidths = _lineWidths
+            cache.renderChars = self._renderChars
             # add length of this (unfinished) line
             _lineWidths.append(current[0])
             self._lineLenChars.append(charsThisLine)
 
+            # the cached buffers are reused next time, so mustn't be changed
+            vertices = vertices[:nChars * 4].copy()
+            self._texcoords = texcoords[:nChars * 4]
+            self._colors = colors[:nChars * 4]
+            self._lineNs = lineNs[:nChars]
+
         elif self._lineBreaking == 'uax14':
 
+            vertices = np.zeros((nChars * 4, 2), dtype=np.float32)
+            self._colors = np.zeros((nChars * 4, 4), dtype=np.double)
+            self._texcoords = np.zeros((nChars * 4, 2), dtype=np.double)
+            self._lineNs = np.zeros(nChars, dtype=int)
+
             # get a list of line-breakable points according to UAX#14
             breakable_points = list(get_breakable_points(self._text))
             text_seg = list(break_units(self._text, breakable_points))
@@ -1758,6 +1803,119 @@ class Caret(ColorMixin):
             [x, top]
         ])
 
+def _firstDifference(a, b, end=None):
+    """Index of the first item that differs between two strings or lists (or
+    the length of the shorter one if it's the start of the other).
+    """
+    n = min(len(a), len(b))
+    if end is not None:
+        n = min(n, end)
+    if a[:n] == b[:n]:
+        return n
+    if isinstance(a, str):
+        # compare code points as arrays rather than char by char
+        a = np.frombuffer(a[:n].encode('utf-32-le'), dtype=np.uint32)
+        b = np.frombuffer(b[:n].encode('utf-32-le'), dtype=np.uint32)
+        return int(np.argmax(a != b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class _LayoutCache:
+    """Layout of each character from the last call to `TextBox2._layout()`,
+    with the state of the layout at the end of every word.
+
+    When the text is edited only the characters from the start of the first
+    changed word onwards need laying out again: the layout of those before it
+    can't have changed. The vertex, texcoord and color buffers are reused (and
+    grown as needed) rather than reallocated on every layout.
+    """
+
+    def __init__(self):
+        self.signature = None
+        self.text = ''
+        self.italic = []
+        self.bold = []
+        self.charColors = []
+        self.vertices = np.zeros((0, 2), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.double)
+        self.colors = np.zeros((0, 4), dtype=np.double)
+        self.lineNs = np.zeros(0, dtype=int)
+        self.lineBottoms = []
+        self.lineLenChars = []
+        self.lineWidths = []
+        self.renderChars = []
+        self._checkIndices = []  # chars laid out at each checkpoint
+        self._checkStates = []
+
+    def clear(self):
+        """Forget the previous layout, so the next one is done in full.
+        """
+        self.signature = None
+
+    def restart(self, signature, text, styles):
+        """Find where to restart layout for new text.
+
+        Parameters
+        ----------
+        signature : tuple
+            Everything besides the text and its styles that affects layout
+            (font, box width...), if it differs from last time everything is
+            laid out again.
+        text : str
+            Text to lay out.
+        styles : Style
+            Style of each character.
+
+        Returns
+        -------
+        tuple
+            Index of the character to start laying out from and the layout
+            state at that point (`None` if starting from the beginning).
+        """
+        if signature == self.signature:
+            changed = _firstDifference(self.text, text)
+            changed = _firstDifference(self.italic, styles.i, changed)
+            changed = _firstDifference(self.bold, styles.b, changed)
+            changed = _firstDifference(self.charColors, styles.c, changed)
+        else:
+            changed = 0
+        self.signature = signature
+        self.text = text
+        self.italic = list(styles.i)
+        self.bold = list(styles.b)
+        self.charColors = list(styles.c)
+
+        # discard checkpoints after the change
+        nKeep = bisect_right(self._checkIndices, changed)
+        del self._checkIndices[nKeep:]
+        del self._checkStates[nKeep:]
+        if nKeep:
+            start, state = self._checkIndices[-1], self._checkStates[-1]
+        else:
+            start, state = 0, None
+
+        # make room for the new text, keeping what's laid out already
+        if len(self.lineNs) < len(text):
+            size = max(len(text), len(self.lineNs) * 2)
+            for name, rowsPerChar in (('vertices', 4), ('texcoords', 4),
+                                      ('colors', 4), ('lineNs', 1)):
+                old = getattr(self, name)
+                new = np.zeros((size * rowsPerChar,) + old.shape[1:],
+                               dtype=old.dtype)
+                new[:start * rowsPerChar] = old[:start * rowsPerChar]
+                setattr(self, name, new)
+        return start, state
+
+    def addCheckpoint(self, nChars, state):
+        """Store the layout state after laying out `nChars` characters.
+        """
+        self._checkIndices.append(nChars)
+        self._checkStates.append(state)
+
+
 class Style:
     # Define a simple Style class for storing information in text().
     # Additional features exist to maintain extant edit/caret syntax
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""A cache of the textures loaded from image files, shared by the stimuli of
+a window (see :py:attr:`Window.textureCache`).
+"""
+
+# Part of the PsychoPy library
+# Copyright (C) 2002-2018 Jonathan Peirce (C) 2019-2024 Open Science Tools Ltd.
+# Distributed under the terms of the GNU General Public License (GPL).
+
+__all__ = ['TextureCache']
+
+import os
+from collections import OrderedDict
+
+import pyglet.gl as GL
+
+from psychopy import logging
+from psychopy.tools.filetools import pathToString
+
+
+class CachedTexture:
+    """A GL texture held by a :class:`TextureCache`.
+
+    Attributes
+    ----------
+    texID : :class:`~pyglet.gl.GLuint`
+        Name of the texture.
+    nBytes : int
+        Estimated amount of video memory used by the texture.
+    isLum : bool
+        Whether the texture was created from a luminance image (the value
+        returned by `TextureMixin._createTexture`).
+    origSize : tuple
+        Size of the image the texture was made from.
+    nUsers : int
+        Number of stimuli currently using the texture. Textures in use are
+        never evicted.
+    """
+    __slots__ = ['key', 'texID', 'nBytes', 'isLum', 'origSize', 'nUsers',
+                 'evicted']
+
+    def __init__(self, key, texID, nBytes, isLum, origSize):
+        self.key = key
+        self.texID = texID
+        self.nBytes = nBytes
+        self.isLum = isLum
+        self.origSize = origSize
+        self.nUsers = 0
+        self.evicted = False
+
+
+class TextureCache:
+    """Least-recently-used cache of textures created from image files.
+
+    When a stimulus sets its image to a file that has already been loaded
+    (with the same texture parameters) the existing texture is used again,
+    rather than decoding and uploading the file again. Cached textures that
+    aren't used by any stimulus are deleted, least recently used first, once
+    the total exceeds `maxBytes`.
+
+    Textures are keyed by the absolute path and modification time of the
+    file plus all parameters affecting the texture, so editing a file on disk
+    results in it being loaded again.
+
+    Parameters
+    ----------
+    maxBytes : int
+        Budget of (estimated) video memory for the cache, in bytes.
+    enabled : bool
+        Use the cache. If `False` every image is loaded and uploaded anew.
+
+    Examples
+    --------
+    Set a budget of 512MB for the window's textures and check that images
+    are being reused::
+
+        win.textureCache.maxBytes = 512 * 1024 ** 2
+        # ... run trials ...
+        print(win.textureCache.getStats())
+
+    """
+
+    def __init__(self, maxBytes=256 * 1024 ** 2, enabled=True):
+        self._entries = OrderedDict()
+        self._maxBytes = int(maxBytes)
+        self.enabled = enabled
+        self.nBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def maxBytes(self):
+        """Budget of video memory for unused textures, in bytes. Lowering it
+        evicts textures straight away.
+        """
+        return self._maxBytes
+
+    @maxBytes.setter
+    def maxBytes(self, value):
+        self._maxBytes = int(value)
+        self._evict()
+
+    @staticmethod
+    def makeKey(filename, **params):
+        """Make the key for a texture created from an image file, or `None` if
+        the file doesn't exist.
+        """
+        filename = os.path.abspath(pathToString(filename))
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            return None
+        return (filename, mtime) + tuple(sorted(params.items()))
+
+    def get(self, key):
+        """Get a cached texture, marking it as recently used. Returns `None`
+        if not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def add(self, key, texID, nBytes, isLum, origSize):
+        """Add a texture to the cache, which then owns it. The texture is
+        marked as used (see :py:meth:`acquire`) by the caller.
+
+        Returns
+        -------
+        CachedTexture
+            The new entry.
+        """
+        if key in self._entries:
+            self._remove(self._entries[key])
+        entry = CachedTexture(key, texID, nBytes, isLum, origSize)
+        entry.nUsers = 1
+        self._entries[key] = entry
+        self.nBytes += nBytes
+        self._evict()
+        return entry
+
+    def acquire(self, entry):
+        """Mark a texture as being used by a stimulus.
+        """
+        entry.nUsers += 1
+
+    def release(self, entry):
+        """Mark a texture as no longer used by a stimulus, it may then be
+        evicted.
+        """
+        entry.nUsers -= 1
+        if entry.nUsers <= 0:
+            entry.nUsers = 0
+            if entry.evicted:
+                # removed from the cache while in use, delete it now
+                self._deleteTexture(entry)
+            else:
+                self._evict()
+
+    def _evict(self):
+        """Delete unused textures, least recently used first, until within
+        budget.
+        """
+        if self.nBytes <= self._maxBytes:
+            return
+        for entry in list(self._entries.values()):
+            if self.nBytes <= self._maxBytes:
+                break
+            if entry.nUsers == 0:
+                self._remove(entry)
+                self.evictions += 1
+
+    def _remove(self, entry):
+        del self._entries[entry.key]
+        self.nBytes -= entry.nBytes
+        entry.evicted = True
+        if entry.nUsers == 0:
+            self._deleteTexture(entry)
+
+    @staticmethod
+    def _deleteTexture(entry):
+        if entry.texID is not None:
+            try:
+                GL.glDeleteTextures(1, entry.texID)
+            except Exception:  # context may have gone
+                pass
+            entry.texID = None
+
+    def clear(self):
+        """Remove all textures from the cache. Textures still used by a
+        stimulus are deleted when it stops using them.
+        """
+        for entry in list(self._entries.values()):
+            self._remove(entry)
+        logging.debug("Cleared texture cache")
+
+    def getStats(self):
+        """Get the number of hits, misses and evictions, plus the number of
+        textures and bytes currently cached.
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'nTextures': len(self._entries),
+                'nBytes': self.nBytes,
+                'maxBytes': self._maxBytes}
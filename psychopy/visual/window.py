@@ -88,6 +88,9 @@ import psychopy.tools.gltools as gltools
 from .text import TextStim
 from .grating import GratingStim
 from .helpers import setColor
+from .frametiming import FrameTimingRecord
+from .drawprofiler import DrawProfiler
+from .texturecache import TextureCache
 from . import globalVars
 
 try:
@@ -594,6 +597,22 @@ class Window():
         self.frameIntervals = []
         self._frameTimes = deque(maxlen=1000)  # 1000 keeps overhead low
 
+        # detailed per-frame timing, see `recordFrameTiming`
+        self.frameTiming = FrameTimingRecord()
+        self._frameTimingJustTurnedOn = False
+        self._frameTimingEnd = None  # time the last recorded flip returned
+        self._frameTimingQueries = None  # pair of GPU timer queries
+        self._frameTimingQueryIdx = 0
+        self._frameTimingQueryOpen = False
+        self._frameTimingPendingRow = None  # row awaiting its GPU time
+        self.recordFrameTiming = False
+        # per-stimulus timing of autoDraw stimuli, see `profileDraws`
+        self.drawProfiler = DrawProfiler(self)
+        self.profileDraws = False
+
+        # textures loaded from image files, shared between stimuli
+        self.textureCache = TextureCache()
+
         self._toDraw = []
         self._heldDraw = []
         self._toDrawDepths = []
@@ -798,6 +817,120 @@ class Window():
         self.__dict__['recordFrameIntervals'] = value
         self.frameClock.reset()
 
+    @attributeSetter
+    def recordFrameTiming(self, value):
+        """Record detailed timing of each frame.
+
+        While `True`, every call to :py:attr:`~Window.flip()` adds a row to
+        :py:attr:`~Window.frameTiming` (a
+        :class:`~psychopy.visual.frametiming.FrameTimingRecord`) giving the
+        time spent in the script between flips, drawing `autoDraw` stimuli,
+        swapping buffers and running :py:attr:`~Window.callOnFlip()`
+        functions, the GPU time taken to render the frame (if timer queries
+        are supported) and whether the frame was dropped. Use this to see
+        which part of the frame is responsible for dropped frames.
+
+        GPU times are measured with a `GL_TIME_ELAPSED` query spanning the
+        whole frame, so don't use your own `GL_TIME_ELAPSED` queries while
+        recording.
+
+        Examples
+        --------
+        Record frame timing during a trial and save it::
+
+            win.recordFrameTiming = True
+            # ... run the trial ...
+            win.recordFrameTiming = False
+            print(win.frameTiming.summary())
+            win.saveFrameTiming('frameTiming.csv')
+
+        """
+        wasOn = self.__dict__.get('recordFrameTiming', False)
+        self.__dict__['recordFrameTiming'] = value
+        if value and not wasOn:
+            self._frameTimingJustTurnedOn = True
+            if self._frameTimingQueries is None and (
+                    GL.gl_info.have_version(3, 3) or
+                    GL.gl_info.have_extension('GL_ARB_timer_query')):
+                self._frameTimingQueries = [
+                    gltools.createQueryObject(GL.GL_TIME_ELAPSED),
+                    gltools.createQueryObject(GL.GL_TIME_ELAPSED)]
+        elif wasOn and not value:
+            self._endFrameTimingQuery()
+            self._frameTimingPendingRow = None
+
+    @attributeSetter
+    def profileDraws(self, value):
+        """Profile the drawing of each `autoDraw` stimulus.
+
+        While `True`, :py:attr:`~Window.flip()` times the CPU and GPU time of
+        each stimulus it draws and counts how often they re-upload vertices,
+        colors or textures, accumulating the results in
+        :py:attr:`~Window.drawProfiler` (a
+        :class:`~psychopy.visual.drawprofiler.DrawProfiler`). This adds a little
+        overhead to every draw, so only turn it on while investigating.
+
+        Examples
+        --------
+        Find the stimuli taking the most time in each routine::
+
+            win.profileDraws = True
+            win.drawProfiler.routine = 'trial'
+            # ... run the trial ...
+            win.profileDraws = False
+            print(win.drawProfiler.report(n=5))
+
+        """
+        self.__dict__['profileDraws'] = value
+
+    def saveFrameTiming(self, fileName=None, clear=True):
+        """Save the timing recorded with
+        :py:attr:`~Window.recordFrameTiming`.
+
+        Parameters
+        ----------
+        fileName : *None* or str
+            File to save to, as comma-separated values unless it ends with
+            '.tsv' (tab-separated) or '.npy' (NumPy structured array). If None
+            then 'lastFrameTiming.csv' will be used.
+        clear : bool
+            Clear the recorded frames after saving. Default is `True`.
+
+        """
+        if not fileName:
+            fileName = 'lastFrameTiming.csv'
+        if len(self.frameTiming):
+            self.frameTiming.save(fileName)
+        if clear:
+            self.frameTiming.clear()
+            self._frameTimingPendingRow = None
+
+    def _endFrameTimingQuery(self):
+        """End the GPU timer query for the current frame, if one is open.
+        """
+        if self._frameTimingQueryOpen:
+            gltools.endQuery(
+                self._frameTimingQueries[self._frameTimingQueryIdx])
+            self._frameTimingQueryOpen = False
+
+    def _startFrameTiming(self):
+        """Collect the GPU time of the previous frame, then start timing the
+        next one. Called at the end of `flip()`.
+        """
+        queries = self._frameTimingQueries
+        if queries is not None:
+            # the query of the previous frame has had a whole frame to finish,
+            # so reading it shouldn't stall
+            if self._frameTimingPendingRow is not None:
+                row, idx = self._frameTimingPendingRow
+                self.frameTiming.setValue(
+                    row, 'gpuTime', gltools.getQuery(queries[idx]) * 1e-9)
+                self._frameTimingPendingRow = None
+            self._frameTimingQueryIdx = 1 - self._frameTimingQueryIdx
+            gltools.beginQuery(queries[self._frameTimingQueryIdx])
+            self._frameTimingQueryOpen = True
+        self._frameTimingEnd = logging.defaultClock.getTime()
+
     def setRecordFrameIntervals(self, value=True, log=None):
         """Usually you can use 'stim.attribute = value' syntax instead,
         but use this method if you need to suppress the log message.
@@ -1172,14 +1305,22 @@ class Window():
             win.flip(clearBuffer=False)
 
         """
+        recordTiming = self.recordFrameTiming
+        if recordTiming:
+            tFlipStart = logging.defaultClock.getTime()
+
         # draw message/splash if needed
         if self._showSplash:
             self._splashTextbox.draw()
 
         if self._toDraw:
+            profiler = self.drawProfiler if self.profileDraws else None
             for thisStim in self._toDraw:
                 # draw
-                thisStim.draw()
+                if profiler is None:
+                    thisStim.draw()
+                else:
+                    profiler.drawStim(thisStim)
                 # draw validation rect if needed
                 if thisStim in self.validators:
                     self.validators[thisStim].draw()
@@ -1202,6 +1343,9 @@ class Window():
             GL.glMatrixMode(GL.GL_MODELVIEW)
             GL.glLoadIdentity()
 
+        if recordTiming:
+            tDrawn = logging.defaultClock.getTime()
+
         # disable lighting
         self.useLights = False
 
@@ -1259,8 +1403,16 @@ class Window():
         # call this before flip() whether FBO was used or not
         self._afterFBOrender()
 
+        if recordTiming:
+            gpuQueryIdx = (self._frameTimingQueryIdx
+                           if self._frameTimingQueryOpen else None)
+            self._endFrameTimingQuery()
+
         self.backend.swapBuffers(flipThisFrame)
 
+        if self.profileDraws:
+            self.drawProfiler._endFrame()
+
         if self.useFBO and flipThisFrame:
             # set rendering back to the framebuffer object
             GL.glBindFramebufferEXT(
@@ -1325,6 +1477,25 @@ class Window():
             callEntry['function'](*callEntry['args'], **callEntry['kwargs'])
         del self._toCall[:]
 
+        if recordTiming:
+            tCalled = logging.defaultClock.getTime()
+            if self._frameTimingJustTurnedOn:
+                # the start of this frame wasn't seen, so don't record it
+                self._frameTimingJustTurnedOn = False
+            else:
+                interval = now - self._frameTimes[-2]
+                row = self.frameTiming.addFrame(
+                    t=now,
+                    interval=interval,
+                    userTime=tFlipStart - self._frameTimingEnd,
+                    autoDrawTime=tDrawn - tFlipStart,
+                    flipTime=now - tDrawn,
+                    callbackTime=tCalled - now,
+                    nAutoDraw=len(self._toDraw),
+                    dropped=interval > self.refreshThreshold)
+                if gpuQueryIdx is not None:
+                    self._frameTimingPendingRow = (row, gpuQueryIdx)
+
         # do bookkeeping
         if self.recordFrameIntervals:
             self.frames += 1
@@ -1358,6 +1529,10 @@ class Window():
         # keep the system awake (prevent screen-saver or sleep)
         platform_specific.sendStayAwake()
 
+        # the next frame starts here
+        if recordTiming and self.recordFrameTiming:
+            self._startFrameTiming()
+
         # draw background (if present) for next frame
         if hasattr(self.backgroundImage, "draw"):
             self.backgroundImage.draw()
@@ -2650,6 +2825,9 @@ class Window():
         except Exception:
             pass
 
+        # free cached textures while the context still exists
+        self.textureCache.clear()
+
         self.backend.close()  # moved here, dereferencing the window prevents
                               # backend specific actions to take place
 